@@ -6,7 +6,7 @@ from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from typing import (
     Annotated,
-    Any, AsyncGenerator, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union,
+    Any, AsyncGenerator, AsyncIterable, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union,
     get_args, get_origin
 )
 
@@ -670,7 +670,11 @@ class AmphibiousAutoma(GraphAutoma, Generic[CognitiveContextT]):
         """
         return decision_result
 
-    async def action_tool_call(self, tool_list: List[Tuple[ToolCall, ToolSpec]], context: CognitiveContextT) -> ActionResult:
+    async def action_tool_call(
+        self,
+        tool_list: Union[List[Tuple[ToolCall, ToolSpec]], AsyncIterable[Tuple[ToolCall, ToolSpec]]],
+        context: CognitiveContextT,
+    ) -> ActionResult:
         """
         Execute tool calls concurrently and collect results.
 
@@ -679,8 +683,10 @@ class AmphibiousAutoma(GraphAutoma, Generic[CognitiveContextT]):
 
         Parameters
         ----------
-        tool_list : List[Tuple[ToolCall, ToolSpec]]
-            Matched tool call / spec pairs to execute.
+        tool_list : Union[List[Tuple[ToolCall, ToolSpec]], AsyncIterable[Tuple[ToolCall, ToolSpec]]]
+            Matched tool call / spec pairs to execute. When an async iterable is given
+            (e.g. pairs matched from a streamed tool selection), each tool starts as soon
+            as its pair arrives, while the following pairs are still being produced.
         context : CognitiveContextT
             The current cognitive context.
 
@@ -719,9 +725,20 @@ class AmphibiousAutoma(GraphAutoma, Generic[CognitiveContextT]):
                     error=str(e),
                 )
 
-        step_results = await asyncio.gather(
-            *(_run_one(tc, ts) for tc, ts in tool_list)
-        )
+        if isinstance(tool_list, AsyncIterable):
+            tasks = []
+            try:
+                async for tc, ts in tool_list:
+                    tasks.append(asyncio.ensure_future(_run_one(tc, ts)))
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+            step_results = await asyncio.gather(*tasks)
+        else:
+            step_results = await asyncio.gather(
+                *(_run_one(tc, ts) for tc, ts in tool_list)
+            )
         return ActionResult(results=list(step_results))
 
     async def action_custom_output(self, decision_result: Any, context: CognitiveContextT) -> Any:
@@ -27,7 +27,7 @@ from typing import Annotated, Any, Dict, List, Optional, Tuple, Type, Union
 from pydantic import BaseModel, Field, create_model
 from pydantic.functional_validators import BeforeValidator
 
-from bridgic.core.model import BaseLlm
+from bridgic.core.model import BaseLlm, get_token_counter
 from bridgic.core.model.protocols import PydanticModel
 from bridgic.core.model.types import Message
 from bridgic.core.automa import GraphAutoma, worker
@@ -672,8 +672,8 @@ class CognitiveWorker(GraphAutoma):
         return messages
 
     def _count_tokens(self, text: str) -> int:
-        """Estimate token count. Rough approximation: ~4 chars per token (typical for English/UTF-8)."""
-        return (len(text) + 3) // 4
+        """Count tokens with the default tokenizer (see `set_default_tokenizer`), reusing the counts of unchanged texts."""
+        return get_token_counter().count(text)
 
     ############################################################################
     # Template methods (override by user to customize the behavior)
@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional, Generic, TypeVar, Tuple, get_origi
 
 from pydantic import BaseModel, Field, ConfigDict
 from bridgic.core.agentic.tool_specs import ToolSpec
+from bridgic.core.model import request_priority
 from bridgic.core.model.types import Message
 from bridgic.amphibious._type import Step, Skill
 
@@ -952,13 +953,14 @@ class CognitiveHistory(LayeredExposure[Step]):
         user_parts.append("Compressed summary:")
         user_prompt = "\n\n".join(user_parts)
 
-        # Call LLM
-        new_summary = await self._llm.agenerate(
-            messages=[
-                Message.from_text(text=system_prompt, role="system"),
-                Message.from_text(text=user_prompt, role="user")
-            ]
-        )
+        # Call LLM (at background priority)
+        with request_priority("background"):
+            new_summary = await self._llm.agenerate(
+                messages=[
+                    Message.from_text(text=system_prompt, role="system"),
+                    Message.from_text(text=user_prompt, role="user")
+                ]
+            )
 
         # Update compression state
         self.compressed_summary = new_summary
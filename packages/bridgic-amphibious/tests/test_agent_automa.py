@@ -1,4 +1,5 @@
 """Tests for AmphibiousAutoma: _run(), error strategies, tool filtering, etc."""
+import asyncio
 import json
 import os
 import tempfile
@@ -17,6 +18,8 @@ from bridgic.amphibious import (
     TraceStep,
     RecordedToolCall,
 )
+from bridgic.core.agentic.tool_specs import FunctionToolSpec
+from bridgic.core.model.types import ToolCall
 from .tools import get_travel_planning_tools
 
 # Default decision model for mock LLM responses (no policies, no output_schema)
@@ -296,6 +299,31 @@ class TestAmphibiousAutomaMisc:
         assert steps[0].result.results[0].tool_name == "search_flights"
         assert steps[1].result.results[0].tool_name == "search_hotels"
 
+    @pytest.mark.asyncio
+    async def test_action_tool_call_starts_streamed_tools_early(self):
+        """action_tool_call() starts each tool of an async iterable as soon as it arrives."""
+        started = []
+
+        async def slow_lookup(city: str) -> str:
+            started.append(city)
+            await asyncio.sleep(0.05)
+            return f"info of {city}"
+
+        spec = FunctionToolSpec.from_raw(slow_lookup)
+
+        async def stream_tool_calls():
+            yield ToolCall(id="call_1", name="slow_lookup", arguments={"city": "Tokyo"}), spec
+            # The first tool runs while the second call is still generated.
+            await asyncio.sleep(0.01)
+            assert started == ["Tokyo"]
+            yield ToolCall(id="call_2", name="slow_lookup", arguments={"city": "Paris"}), spec
+
+        agent = AmphibiousAutoma(llm=MockLLM([]))
+        result = await agent.action_tool_call(stream_tool_calls(), _make_ctx())
+
+        assert [r.tool_result for r in result.results] == ["info of Tokyo", "info of Paris"]
+        assert all(r.success for r in result.results)
+
 
 # ---------------------------------------------------------------------------
 # Tests — AgentTrace: observation, success/error, finished removal, save/load
@@ -0,0 +1,83 @@
+"""
+Microbenchmark of the per-worker overhead introduced by worker callbacks.
+
+It measures the cost of `_GraphAdaptedWorker.arun()` relative to calling the decorated 
+worker directly, with 0, 1 and 5 callbacks registered on the worker.
+
+Usage:
+    python benchmarks/bench_worker_callback_overhead.py [--iterations N]
+"""
+import argparse
+import asyncio
+import time
+
+from typing import Any, Dict, Optional
+
+from bridgic.core.automa import GraphAutoma, Automa, worker
+from bridgic.core.automa.worker import WorkerCallback, WorkerCallbackBuilder
+
+
+class CountingCallback(WorkerCallback):
+    def __init__(self):
+        self.count = 0
+
+    async def on_worker_start(
+        self,
+        key: str,
+        is_top_level: bool = False,
+        parent: Optional[Automa] = None,
+        arguments: Dict[str, Any] = None,
+    ) -> None:
+        self.count += 1
+
+    async def on_worker_end(
+        self,
+        key: str,
+        is_top_level: bool = False,
+        parent: Optional[Automa] = None,
+        arguments: Dict[str, Any] = None,
+        result: Any = None,
+    ) -> None:
+        self.count += 1
+
+
+def build_automa(num_callbacks: int) -> GraphAutoma:
+    callback_builders = [
+        WorkerCallbackBuilder(CountingCallback, is_shared=False) for _ in range(num_callbacks)
+    ]
+
+    class BenchGraph(GraphAutoma):
+        @worker(is_start=True, is_output=True, callback_builders=callback_builders)
+        async def step(self, x: int) -> int:
+            return x + 1
+
+    return BenchGraph()
+
+
+async def measure(coro_factory, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        await coro_factory(i)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+async def main(iterations: int) -> None:
+    print(f"{'callbacks':>10} {'direct (ns)':>14} {'adapted (ns)':>14} {'overhead (ns)':>14}")
+    for num_callbacks in (0, 1, 5):
+        automa = build_automa(num_callbacks)
+        adapted_worker = automa._workers["step"]
+        decorated_worker = adapted_worker.get_decorated_worker()
+
+        # Warm up caches (method signatures, callback dispatcher, etc.).
+        await measure(lambda i: adapted_worker.arun(x=i), 1000)
+
+        direct = await measure(lambda i: decorated_worker.arun(x=i), iterations)
+        adapted = await measure(lambda i: adapted_worker.arun(x=i), iterations)
+        print(f"{num_callbacks:>10} {direct:>14.1f} {adapted:>14.1f} {adapted - direct:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -76,6 +76,7 @@ class GoalEpisodicNode(BaseEpisodicNode):
     def dump_to_dict(self) -> Dict[str, Any]:
         result = super().dump_to_dict()
         result["content"] = self.goal
+        result["guidance"] = self.guidance
         result["previous_goal_node_timestep"] = self.previous_goal_node_timestep
         return result
 
@@ -83,6 +84,7 @@ class GoalEpisodicNode(BaseEpisodicNode):
     def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
         super().load_from_dict(state_dict)
         self.goal = state_dict["content"]
+        self.guidance = state_dict.get("guidance", "")
         self.previous_goal_node_timestep = state_dict.get("previous_goal_node_timestep", -1)
 
 class LeafEpisodicNode(BaseEpisodicNode):
@@ -1,7 +1,9 @@
 import asyncio
 from typing import List, Dict, Any, Optional, Union, cast
 from threading import RLock
+from concurrent.futures import Future
 
+from bridgic.core.model import TokenCounter, get_token_counter
 from bridgic.core.model.types import Message
 from bridgic.core.types._serialization import Serializable
 from bridgic.core.agentic.recent._episodic_node import (
@@ -28,6 +30,14 @@ class EpisodicNodeTree(Serializable):
     - This data structure only supports appending new nodes; deletion or insertion is not allowed.
     - All write operations are protected by a lock to ensure atomicity and preserve ordered nature of the structure.
     - The data structure does not and should not perform any computationally expensive operations such as summarization.
+    - The numbers of nodes and tokens of the directly accessible nodes are maintained as the nodes are added, so
+      reading them does not walk the history. The messages of a leaf node must be appended through
+      `append_messages` to be counted; modifying them in place is not detected.
+
+    Parameters
+    ----------
+    token_counter : Optional[TokenCounter]
+        The counter of the tokens of the nodes. If None, the counter of the default tokenizer.
     """
 
     _lock: RLock
@@ -41,11 +51,49 @@ class EpisodicNodeTree(Serializable):
     _non_goal_node_timesteps: List[int]
     """The timesteps of the non-goal nodes."""
 
-    def __init__(self):
+    _token_counter: Optional[TokenCounter] = None
+    """The counter of the tokens of the nodes."""
+    _goal_token_count: int
+    """The number of tokens of the current goal node."""
+    _node_token_counts: Dict[int, int]
+    """The number of tokens of each non-goal node, by timestep."""
+    _non_goal_token_count: int
+    """The total number of tokens of the non-goal nodes."""
+
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
         self._node_sequence = []
         self._goal_node_timestep = -1
         self._non_goal_node_timesteps = []
         self._lock = RLock()
+        self._token_counter = token_counter
+        self._goal_token_count = 0
+        self._node_token_counts = {}
+        self._non_goal_token_count = 0
+
+    @property
+    def token_counter(self) -> TokenCounter:
+        """The counter of the tokens of the nodes."""
+        return self._token_counter if self._token_counter is not None else get_token_counter()
+
+    @token_counter.setter
+    def token_counter(self, token_counter: Optional[TokenCounter]) -> None:
+        with self._lock:
+            self._token_counter = token_counter
+            self._recount_tokens()
+
+    @property
+    def node_count(self) -> int:
+        """The number of directly accessible nodes: the non-goal nodes, and the goal node if it exists."""
+        return len(self._non_goal_node_timesteps) + (1 if self._goal_node_timestep != -1 else 0)
+
+    @property
+    def token_count(self) -> int:
+        """
+        The number of tokens of the directly accessible nodes: the goal and guidance of the goal node,
+        the messages of the leaf nodes and the summaries of the compression nodes. A summary still
+        being generated is counted once it is ready.
+        """
+        return self._goal_token_count + self._non_goal_token_count
 
     def get_node(self, timestep: int) -> Optional[BaseEpisodicNode]:
         """
@@ -149,6 +197,7 @@ class EpisodicNodeTree(Serializable):
             # Add the new goal node to the sequence and update the goal timestep.
             self._node_sequence.append(goal_node)
             self._goal_node_timestep = new_timestep
+            self._goal_token_count = self._count_goal_tokens(goal_node)
 
         return new_timestep
 
@@ -184,9 +233,54 @@ class EpisodicNodeTree(Serializable):
             # Add the new leaf node to the sequence and update the non-goal node timesteps.
             self._node_sequence.append(leaf_node)
             self._non_goal_node_timesteps.append(new_timestep)
+            self._set_node_token_count(new_timestep, self.token_counter.count_messages(messages))
 
         return new_timestep
 
+    def append_messages(self, messages: List[Message]) -> Optional[int]:
+        """
+        Append messages to the tail appendable leaf node if it exists.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            The messages to append.
+
+        Returns
+        -------
+        Optional[int]
+            The timestep of the leaf node, or None if there is no appendable leaf node.
+        """
+        with self._lock:
+            leaf_node = self.get_tail_appendable_leaf_node()
+            if leaf_node is None:
+                return None
+            leaf_node.messages.extend(messages)
+            tokens = self._node_token_counts.get(leaf_node.timestep, 0) + self.token_counter.count_messages(messages)
+            self._set_node_token_count(leaf_node.timestep, tokens)
+        return leaf_node.timestep
+
+    def push_messages(self, messages: List[Message]) -> int:
+        """
+        Append messages to the tail appendable leaf node, or add a new leaf node with them if there
+        is no appendable leaf node.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            The messages to push.
+
+        Returns
+        -------
+        int
+            The timestep of the leaf node.
+        """
+        with self._lock:
+            timestep = self.append_messages(messages)
+            if timestep is None:
+                timestep = self.add_leaf_node(messages)
+        return timestep
+
     def add_compression_node(self, compressed_timesteps: List[int], summary: Optional[str] = None) -> int:
         """
         Add a new compression node that summarizes the given non-goal nodes.
@@ -226,13 +320,65 @@ class EpisodicNodeTree(Serializable):
             self._non_goal_node_timesteps.append(new_timestep)
 
             # Remove the timesteps of the compressed nodes from _non_goal_node_timesteps.
+            compressed = set(compressed_timesteps)
             self._non_goal_node_timesteps = [
                 t for t in self._non_goal_node_timesteps 
-                if t not in compressed_timesteps
+                if t not in compressed
             ]
+            for timestep in compressed:
+                self._set_node_token_count(timestep, None)
+
+            # The summary is counted once it is ready.
+            self._set_node_token_count(new_timestep, 0)
+            self._watch_summary(new_timestep, compression_node)
 
         return new_timestep
 
+    def _watch_summary(self, timestep: int, compression_node: CompressionEpisodicNode) -> None:
+        # Registered once per compression node; a recount reads the summaries that are ready.
+        compression_node.summary.add_done_callback(
+            lambda summary: self._on_summary_done(timestep, summary)
+        )
+
+    def _on_summary_done(self, timestep: int, summary: "Future[str]") -> None:
+        try:
+            text = summary.result()
+        except Exception:
+            return
+        tokens = self.token_counter.count(text) if text else 0
+        with self._lock:
+            # The compression node may have been compressed in the meantime.
+            if timestep in self._node_token_counts:
+                self._set_node_token_count(timestep, tokens)
+
+    def _set_node_token_count(self, timestep: int, tokens: Optional[int]) -> None:
+        self._non_goal_token_count -= self._node_token_counts.pop(timestep, 0)
+        if tokens is not None:
+            self._node_token_counts[timestep] = tokens
+            self._non_goal_token_count += tokens
+
+    def _count_goal_tokens(self, goal_node: GoalEpisodicNode) -> int:
+        tokens = 0
+        if goal_node.goal:
+            tokens += self.token_counter.count(goal_node.goal)
+        if goal_node.guidance:
+            tokens += self.token_counter.count(goal_node.guidance)
+        return tokens
+
+    def _recount_tokens(self) -> None:
+        goal_node = self.get_goal_node()
+        self._goal_token_count = self._count_goal_tokens(goal_node) if goal_node is not None else 0
+        self._node_token_counts = {}
+        self._non_goal_token_count = 0
+        for timestep in self._non_goal_node_timesteps:
+            node = self.get_node(timestep)
+            if isinstance(node, LeafEpisodicNode):
+                self._set_node_token_count(timestep, self.token_counter.count_messages(node.messages))
+            elif isinstance(node, CompressionEpisodicNode):
+                self._set_node_token_count(timestep, 0)
+                if node.summary.done():
+                    self._on_summary_done(timestep, node.summary)
+
     def get_tail_appendable_leaf_node(self) -> Optional[LeafEpisodicNode]:
         """
         Get the tail appendable leaf node if it exists.
@@ -277,4 +423,9 @@ class EpisodicNodeTree(Serializable):
 
         self._goal_node_timestep = state_dict.get("goal_node_timestep", -1)
         self._non_goal_node_timesteps = state_dict.get("non_goal_node_timesteps", [])
+        self._lock = RLock()
+        self._recount_tokens()
+        for node in self._node_sequence:
+            if isinstance(node, CompressionEpisodicNode) and not node.summary.done():
+                self._watch_summary(node.timestep, node)
 
@@ -1,15 +1,17 @@
 import uuid
 import asyncio
-from typing import Optional, List, Any, Dict, Tuple, Union, Callable
+from typing import Optional, List, Any, Dict, Sequence, Tuple, Union, Callable
 from typing_extensions import override
 from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field
 
 from bridgic.core.automa import GraphAutoma, Automa, worker, RunningOptions
+from bridgic.core.automa._graph_automa import _GraphAdaptedWorker
 from bridgic.core.automa.args import ArgsMappingRule, System
-from bridgic.core.automa.worker import WorkerCallback, WorkerCallbackBuilder
+from bridgic.core.automa.args._args_binding import safely_map_args
+from bridgic.core.automa.worker import Worker, WorkerCallback, WorkerCallbackBuilder
 from bridgic.core.model import BaseLlm
-from bridgic.core.model.types import Message, Tool, Role, ToolCall
+from bridgic.core.model.types import Message, MessageChunk, Tool, Role, ToolCall
 from bridgic.core.model.protocols import StructuredOutput, PydanticModel, ToolSelection
 from bridgic.core.agentic.tool_specs import (
     ToolSpec,
@@ -127,6 +129,11 @@ class ReCentAutoma(GraphAutoma):
     answer_task_config : Optional[AnswerTaskConfig]
         Configuration for the answer generation task. If None, uses default config with the provided `llm`.
         If provided but system_template or instruction_template is None, will use default templates.
+    early_tool_execution : bool
+        Whether to stream the tool selection and start each selected function tool as soon as
+        its call is generated, while the model is still generating the following calls. It
+        requires an LLM of the tool selection task with `astream_select_tool`; otherwise the
+        tools are selected, then run, as usual. Defaults to False.
     name : Optional[str]
         The name of the automa instance.
     thread_pool : Optional[ThreadPoolExecutor]
@@ -159,6 +166,12 @@ class ReCentAutoma(GraphAutoma):
     _stop_condition: StopCondition
     """Stop condition configuration."""
 
+    _early_tool_execution: bool
+    """Whether to start the tools while the tool selection is still being generated."""
+
+    _early_tool_workers: Dict[str, _GraphAdaptedWorker]
+    """The tools started during the tool selection and not collected yet, by tool call ID."""
+
     def __init__(
         self,
         llm: BaseLlm,
@@ -169,6 +182,7 @@ class ReCentAutoma(GraphAutoma):
         observation_task_config: Optional[ObservationTaskConfig] = None,
         tool_task_config: Optional[ToolTaskConfig] = None,
         answer_task_config: Optional[AnswerTaskConfig] = None,
+        early_tool_execution: bool = False,
         name: Optional[str] = None,
         thread_pool: Optional[ThreadPoolExecutor] = None,
         running_options: Optional[RunningOptions] = None,
@@ -206,6 +220,9 @@ class ReCentAutoma(GraphAutoma):
         # Initialize stop condition with defaults if not provided.
         self._stop_condition = stop_condition or StopCondition()
 
+        self._early_tool_execution = early_tool_execution
+        self._early_tool_workers = {}
+
     def _ensure_tool_spec(self, tool: Union[Callable, Automa, ToolSpec]) -> ToolSpec:
         if isinstance(tool, ToolSpec):
             return tool
@@ -277,6 +294,7 @@ class ReCentAutoma(GraphAutoma):
         messages: List[Message] = []
 
         # Add system message for goal evaluation (if configured).
+        system_message = None
         if self._observation_task_config.system_template is not None:
             system_message = self._observation_task_config.system_template.format_message(
                 role=Role.SYSTEM,
@@ -285,13 +303,15 @@ class ReCentAutoma(GraphAutoma):
             )
             messages.append(system_message)
 
-        # Add memory messages (observation history).
-        if context["memory_messages"]:
-            messages.extend(context["memory_messages"])
-
-        # Add instruction message (if configured).
+        instruction_message = None
         if self._observation_task_config.instruction_template is not None:
             instruction_message = self._observation_task_config.instruction_template.format_message(role=Role.USER)
+
+        # Add memory messages (observation history), within the token budget of the task.
+        messages.extend(self._fit_memory_messages(self._observation_task_config, context, system_message, instruction_message))
+
+        # Add instruction message (if configured).
+        if instruction_message is not None:
             messages.append(instruction_message)
 
         # 3. Call LLM with StructuredOutput to get goal status.
@@ -340,6 +360,7 @@ class ReCentAutoma(GraphAutoma):
             tool_select_messages = []
 
             # Add system message (if configured)
+            tool_system_message = None
             if self._tool_task_config.system_template is not None:
                 tool_system_message = self._tool_task_config.system_template.format_message(
                     role=Role.SYSTEM,
@@ -348,12 +369,17 @@ class ReCentAutoma(GraphAutoma):
                 )
                 tool_select_messages.append(tool_system_message)
 
-            # Add memory messages
-            tool_select_messages.extend(context["memory_messages"])
-
-            # Add instruction message (if configured).
+            tool_instruction_message = None
             if self._tool_task_config.instruction_template is not None:
                 tool_instruction_message = self._tool_task_config.instruction_template.format_message(role=Role.USER)
+
+            # Add memory messages, within the token budget of the task.
+            tool_select_messages.extend(
+                self._fit_memory_messages(self._tool_task_config, context, tool_system_message, tool_instruction_message)
+            )
+
+            # Add instruction message (if configured).
+            if tool_instruction_message is not None:
                 tool_select_messages.append(tool_instruction_message)
 
             tools = [tool_spec.to_tool() for tool_spec in self._tool_specs]
@@ -396,14 +422,29 @@ class ReCentAutoma(GraphAutoma):
             raise TypeError(f"LLM must support ToolSelection protocol, but {type(tool_select_llm)} does not.")
 
         # Call tool selection method.
+        streamed_tool_calls: List[ToolCall] = []
+        early_tasks: Dict[str, asyncio.Future] = {}
         try:
-            tool_calls, tool_response = await tool_select_llm.aselect_tool(
-                messages=messages,
-                tools=tools,
-            )
+            if self._early_tool_execution and hasattr(tool_select_llm, "astream_select_tool"):
+                tool_response = await self._astream_select_tools(
+                    tool_select_llm, messages, tools, streamed_tool_calls, early_tasks
+                )
+                tool_calls = streamed_tool_calls
+            else:
+                tool_calls, tool_response = await tool_select_llm.aselect_tool(
+                    messages=messages,
+                    tools=tools,
+                )
         except Exception as error:
-            tool_calls = []
+            # The tools already started are kept, so that their results are still collected.
+            tool_calls = [tool_call for tool_call in streamed_tool_calls if tool_call.id in early_tasks]
             tool_response = "The tool selection could not be completed because the model did not respond as expected. "
+        except BaseException:
+            # The tools already started would never be collected, e.g. when the run is cancelled.
+            for tool_call_id, task in early_tasks.items():
+                task.cancel()
+                self._early_tool_workers.pop(tool_call_id, None)
+            raise
 
         # Log selected tools in debug mode.
         top_options = self._get_top_running_options()
@@ -439,22 +480,38 @@ class ReCentAutoma(GraphAutoma):
                 matched_tool_calls = []
 
                 for tool_call, tool_spec in matched_list:
-                    # Create the tool worker.
+                    matched_tool_calls.append(tool_call)
+
+                    # A tool started during the tool selection is already running, and its result
+                    # is awaited by the collect_results worker.
+                    if tool_call.id in early_tasks:
+                        continue
+
                     tool_worker_key = f"tool-<{tool_call.name}>-<{tool_call.id}>"
+                    tool_worker_keys.append(tool_worker_key)
+
+                    # Create the tool worker.
                     tool_worker_obj = tool_spec.create_worker()
 
                     # Register the tool worker.
                     self.add_worker(key=tool_worker_key, worker=tool_worker_obj)
-                    tool_worker_keys.append(tool_worker_key)
-                    matched_tool_calls.append(tool_call)
 
                     # Execute the tool worker in the next dynamic step (via ferry_to).
                     self.ferry_to(tool_worker_key, **tool_call.arguments)
 
                 # Create collect_results worker dynamically.
                 # After collecting, the tool calls and their results will be pushed to memory.
-                def collect_wrapper(compression_timestep_and_tool_results: List[Any]) -> None:
-                    tool_results = compression_timestep_and_tool_results[1:]
+                async def collect_wrapper(compression_timestep_and_tool_results: List[Any]) -> None:
+                    graph_tool_results = iter(compression_timestep_and_tool_results[1:])
+                    tool_results = []
+                    for tool_call in matched_tool_calls:
+                        if tool_call.id in early_tasks:
+                            try:
+                                tool_results.append(await early_tasks[tool_call.id])
+                            finally:
+                                self._early_tool_workers.pop(tool_call.id, None)
+                        else:
+                            tool_results.append(next(graph_tool_results))
                     return self._collect_tools_results(tool_response, matched_tool_calls, tool_results)
 
                 # To ensure that compression is performed based on the memory prior to tool selection, 
@@ -488,6 +545,66 @@ class ReCentAutoma(GraphAutoma):
                 # If the limit is exceeded, finalize the answer.
                 self.ferry_to("finalize_answer")
 
+    async def _astream_select_tools(
+        self,
+        tool_select_llm: BaseLlm,
+        messages: List[Message],
+        tools: List[Tool],
+        tool_calls: List[ToolCall],
+        early_tasks: Dict[str, asyncio.Future],
+    ) -> Optional[str]:
+        """
+        Select tools with a streaming tool selection, starting each function tool as soon as its
+        call is complete. The tool calls are appended to `tool_calls` and the tasks of the started
+        tools are recorded in `early_tasks` by tool call ID. Returns the response text, if any.
+        """
+        text_parts: List[str] = []
+        async for item in tool_select_llm.astream_select_tool(messages=messages, tools=tools):
+            if isinstance(item, MessageChunk):
+                if item.delta:
+                    text_parts.append(item.delta)
+                continue
+
+            tool_calls.append(item)
+            matched = self._match_tool_calls_and_tool_specs([item], self._tool_specs or [])
+            if matched:
+                task = self._start_tool(*matched[0])
+                if task is not None:
+                    early_tasks[item.id] = task
+        return "".join(text_parts) or None
+
+    def _start_tool(self, tool_call: ToolCall, tool_spec: ToolSpec) -> Optional[asyncio.Future]:
+        """
+        Start running a function tool outside of the graph. Automa tools are left to the graph,
+        which runs them as nested automas.
+
+        The tool runs as a worker of this automa under its key in the graph, so the worker
+        callbacks, e.g. the tracing ones, see it like the tools run by the graph.
+        """
+        tool_worker_obj = tool_spec.create_worker()
+        if isinstance(tool_worker_obj, Automa):
+            return None
+
+        tool_worker_key = f"tool-<{tool_call.name}>-<{tool_call.id}>"
+        adapted_worker = _GraphAdaptedWorker(
+            key=tool_worker_key,
+            worker=tool_worker_obj,
+            callback_builders=self._get_effective_callback_builders(tool_worker_obj, []),
+        )
+        # The parent provides the thread pool to the synchronous tools.
+        adapted_worker.parent = self
+        self._early_tool_workers[tool_call.id] = adapted_worker
+
+        args, kwargs = safely_map_args((), tool_call.arguments, adapted_worker.get_input_param_names())
+        return asyncio.ensure_future(adapted_worker.arun(*args, **kwargs))
+
+    @override
+    def _get_worker_instance(self, worker_key: str) -> Worker:
+        for early_tool_worker in self._early_tool_workers.values():
+            if early_tool_worker.key == worker_key:
+                return early_tool_worker
+        return super()._get_worker_instance(worker_key)
+
     @worker()
     async def compress_memory(self) -> Optional[int]:
         """
@@ -546,6 +663,7 @@ class ReCentAutoma(GraphAutoma):
         messages: List[Message] = []
 
         # Add system prompt for final answer generation (if configured).
+        system_message = None
         if self._answer_task_config.system_template is not None:
             system_message = self._answer_task_config.system_template.format_message(
                 role=Role.SYSTEM,
@@ -554,13 +672,15 @@ class ReCentAutoma(GraphAutoma):
             )
             messages.append(system_message)
 
-        # Add memory messages (observation history).
-        if context["memory_messages"]:
-            messages.extend(context["memory_messages"])
-
-        # Add instruction to generate final answer (if configured).
+        instruction_message = None
         if self._answer_task_config.instruction_template is not None:
             instruction_message = self._answer_task_config.instruction_template.format_message(role=Role.USER)
+
+        # Add memory messages (observation history), within the token budget of the task.
+        messages.extend(self._fit_memory_messages(self._answer_task_config, context, system_message, instruction_message))
+
+        # Add instruction to generate final answer (if configured).
+        if instruction_message is not None:
             messages.append(instruction_message)
 
         # 3. Call LLM to generate final answer.
@@ -648,6 +768,32 @@ class ReCentAutoma(GraphAutoma):
         # Route to observe.
         self.ferry_to("observe")
 
+    def _fit_memory_messages(
+        self,
+        task_config: LlmTaskConfig,
+        context: ReCentContext,
+        system_message: Optional[Message],
+        instruction_message: Optional[Message],
+    ) -> Sequence[Message]:
+        """
+        Get the memory messages of the prompt of a task: all of them, or the most recent ones
+        packed in what the system and instruction messages leave of its token budget.
+        """
+        memory_messages = context["memory_messages"]
+        if task_config.max_context_tokens is None:
+            return memory_messages
+
+        token_counter = self._memory_manager.memory_config.token_counter
+        prompt_tokens = token_counter.count_messages([m for m in (system_message, instruction_message) if m is not None])
+        max_tool_result_tokens = task_config.max_tool_result_tokens
+        if max_tool_result_tokens is None:
+            max_tool_result_tokens = task_config.max_context_tokens // 4
+        return self._memory_manager.pack_memory_messages(
+            memory_messages,
+            max_tokens=max(0, task_config.max_context_tokens - prompt_tokens),
+            max_tool_result_tokens=max_tool_result_tokens,
+        )
+
     def _match_tool_calls_and_tool_specs(
         self,
         tool_calls: List[ToolCall],
@@ -680,6 +826,7 @@ class ReCentAutoma(GraphAutoma):
         state_dict["tool_task_config"] = self._tool_task_config
         state_dict["answer_task_config"] = self._answer_task_config
         state_dict["stop_condition"] = self._stop_condition
+        state_dict["early_tool_execution"] = self._early_tool_execution
         return state_dict
 
     @override
@@ -700,6 +847,8 @@ class ReCentAutoma(GraphAutoma):
                 self._tool_specs.extend(response.get("tool_specs", []))
 
         self._stop_condition = state_dict["stop_condition"]
+        self._early_tool_execution = state_dict.get("early_tool_execution", False)
+        self._early_tool_workers = {}
         self._memory_manager = state_dict["memory_manager"]
 
         self._observation_task_config = (
@@ -714,3 +863,4 @@ class ReCentAutoma(GraphAutoma):
             state_dict.get("answer_task_config")
             or AnswerTaskConfig(llm=self._llm).to_llm_task_config()
         )
+
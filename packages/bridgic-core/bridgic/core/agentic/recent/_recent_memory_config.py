@@ -1,6 +1,6 @@
 from typing import Dict, Any, Optional, Callable
 from typing_extensions import override
-from bridgic.core.model import BaseLlm
+from bridgic.core.model import BaseLlm, BpeTokenizer, TokenCounter, count_tokens
 from bridgic.core.types._serialization import Serializable
 from bridgic.core.prompt import EjinjaPromptTemplate
 from bridgic.core.utils._inspect_tools import load_qualified_class_or_func
@@ -25,10 +25,11 @@ DEFAULT_INSTRUCTION_PROMPT_TEMPLATE = (
 
 def estimate_token_count(text: str) -> int:
     """
-    Estimate token count from text using a simple approximation rule.
+    Estimate token count from text with the default tokenizer.
     
-    This function uses a character-based approximation: approximately 1 token ≈ 4 characters
-    for English text. This is a common heuristic used when exact tokenization is not available.
+    The default tokenizer is a `HeuristicTokenizer`, which estimates the tokens by kind of
+    characters (words, numbers, symbols, CJK characters); an exact `BpeTokenizer` can be set
+    with `set_default_tokenizer`.
     
     Parameters
     ----------
@@ -40,7 +41,7 @@ def estimate_token_count(text: str) -> int:
     int
         The estimated token count.
     """
-    return len(text) // 4
+    return count_tokens(text)
 
 
 class ReCentMemoryConfig(Serializable):
@@ -65,8 +66,8 @@ class ReCentMemoryConfig(Serializable):
         Jinja2 prompt template for the instruction prompt used in memory compression.
     token_count_callback : Optional[Callable[[str], int]]
         Optional callback function to calculate token count from text.
-        If None, defaults to `estimate_token_count` which uses a simple approximation
-        (character_count / 4). The callback should accept a text string and return the token count.
+        If None, defaults to `estimate_token_count` which uses the default tokenizer. The callback
+        should accept a text string and return the token count, e.g. a `Tokenizer` instance.
     """
 
     llm: BaseLlm
@@ -87,6 +88,8 @@ class ReCentMemoryConfig(Serializable):
     token_count_callback: Callable[[str], int]
     """Callback function to calculate token count from text. Defaults to estimate_token_count."""
 
+    _token_counter: Optional[TokenCounter] = None
+
     def __init__(
         self,
         llm: BaseLlm,
@@ -111,13 +114,31 @@ class ReCentMemoryConfig(Serializable):
             instruction_template = DEFAULT_INSTRUCTION_PROMPT_TEMPLATE
         self.instruction_template = EjinjaPromptTemplate(instruction_template)
 
+    @property
+    def token_counter(self) -> TokenCounter:
+        """The memo of the token counts of `token_count_callback`, shared by the memory managers."""
+        if self._token_counter is None or self._token_counter.tokenizer is not self.token_count_callback:
+            self._token_counter = TokenCounter(self.token_count_callback)
+        return self._token_counter
+
     @override
     def dump_to_dict(self) -> Dict[str, Any]:
         state_dict = {}
         state_dict["llm"] = self.llm
         state_dict["max_node_size"] = self.max_node_size
         state_dict["max_token_size"] = self.max_token_size
-        state_dict["token_count_callback"] = self.token_count_callback.__module__ + "." + self.token_count_callback.__qualname__
+        if hasattr(self.token_count_callback, "__qualname__"):
+            state_dict["token_count_callback"] = self.token_count_callback.__module__ + "." + self.token_count_callback.__qualname__
+        elif isinstance(self.token_count_callback, BpeTokenizer) and self.token_count_callback.path is not None:
+            # The vocabulary is read again from its file rather than stored with every snapshot.
+            state_dict["token_count_callback"] = {
+                "bpe_path": self.token_count_callback.path,
+                "pattern": self.token_count_callback.pattern,
+                "cache_size": self.token_count_callback.cache_size,
+            }
+        else:
+            # A tokenizer instance is serialized as an object.
+            state_dict["token_count_callback"] = self.token_count_callback
         state_dict["system_template"] = self.system_template
         state_dict["instruction_template"] = self.instruction_template
         return state_dict
@@ -127,6 +148,15 @@ class ReCentMemoryConfig(Serializable):
         self.llm = state_dict["llm"]
         self.max_node_size = state_dict["max_node_size"]
         self.max_token_size = state_dict["max_token_size"]
-        self.token_count_callback = load_qualified_class_or_func(state_dict["token_count_callback"])
+        token_count_callback = state_dict["token_count_callback"]
+        if isinstance(token_count_callback, str):
+            token_count_callback = load_qualified_class_or_func(token_count_callback)
+        elif isinstance(token_count_callback, dict):
+            token_count_callback = BpeTokenizer.from_file(
+                token_count_callback["bpe_path"],
+                pattern=token_count_callback["pattern"],
+                cache_size=token_count_callback["cache_size"],
+            )
+        self.token_count_callback = token_count_callback
         self.system_template = state_dict["system_template"]
         self.instruction_template = state_dict["instruction_template"]
\ No newline at end of file
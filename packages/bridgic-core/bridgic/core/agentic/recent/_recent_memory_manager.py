@@ -1,9 +1,10 @@
 import asyncio
-from typing import List, Dict, Any, Optional, TypedDict, Tuple
+from threading import RLock
+from typing import List, Dict, Any, Optional, Sequence, TypedDict, Tuple
 from typing_extensions import override
 
-from bridgic.core.model import BaseLlm
-from bridgic.core.model.types import Message, Role, TextBlock, ToolCallBlock, ToolResultBlock
+from bridgic.core.model import BaseLlm, ConversionMemo, message_fingerprint, request_priority
+from bridgic.core.model.types import Message, Role, ToolResultBlock
 from bridgic.core.types._serialization import Serializable
 from bridgic.core.agentic.recent._episodic_node import (
     BaseEpisodicNode,
@@ -47,9 +48,28 @@ class ReCentMemoryManager(Serializable):
     _memory_config: ReCentMemoryConfig
     """The memory configuration."""
 
+    _context_version: int
+    """The version of the memory messages, incremented whenever they change."""
+    _context_messages: Optional[List[Message]]
+    """The materialized memory messages, appended to as messages are pushed and reset by compressions."""
+
+    _truncation_memos: Dict[int, ConversionMemo[Message]]
+    """The memos of the messages with truncated tool results, by maximum number of tokens of a tool result."""
+
+    _lock: RLock
+    """Reentrant lock keeping the memory messages of the context consistent with the episodic node tree."""
+
     def __init__(self, compression_config: ReCentMemoryConfig):
-        self._episodic_node_tree = EpisodicNodeTree()
+        self._episodic_node_tree = EpisodicNodeTree(token_counter=compression_config.token_counter)
         self._memory_config = compression_config
+        self._lock = RLock()
+        self._reset_context()
+        self._truncation_memos = {}
+
+    @property
+    def context_version(self) -> int:
+        """The version of the memory messages of the context, incremented whenever they change."""
+        return self._context_version
 
     @property
     def memory_config(self) -> ReCentMemoryConfig:
@@ -127,7 +147,7 @@ class ReCentMemoryManager(Serializable):
         ValueError
             If there are no nodes to compress.
         """
-        with self._episodic_node_tree._lock:
+        with self._lock:
             goal_node = self._episodic_node_tree.get_goal_node()
             non_goal_nodes = self._episodic_node_tree.get_non_goal_nodes()
 
@@ -142,6 +162,7 @@ class ReCentMemoryManager(Serializable):
                 compressed_timesteps=compressed_timesteps,
                 summary=None
             )
+            self._reset_context(self._context_version + 1)
 
             # Get reference to the created compression node for later summary update
             compression_node = self._episodic_node_tree.get_node(compression_timestep)
@@ -207,8 +228,10 @@ class ReCentMemoryManager(Serializable):
             instruction_message = self._memory_config.instruction_template.format_message(role=Role.USER)
             compression_messages.append(instruction_message)
 
-            # Step 3: Call the LLM to generate summary (synchronous version).
-            response = self._memory_config.llm.chat(messages=compression_messages)
+            # Step 3: Call the LLM to generate summary (synchronous version). The compression is
+            # background work, which yields to the agent's own requests on a shared scheduler.
+            with request_priority("background"):
+                response = self._memory_config.llm.chat(messages=compression_messages)
             summary = response.message.content
 
             # Set the result of the summary future.
@@ -278,8 +301,9 @@ class ReCentMemoryManager(Serializable):
             instruction_message = self._memory_config.instruction_template.format_message(role=Role.USER)
             compression_messages.append(instruction_message)
 
-            # Step 3: Call the LLM to generate summary (asynchronous version).
-            response = await self._memory_config.llm.achat(messages=compression_messages)
+            # Step 3: Call the LLM to generate summary (asynchronous version), as background work.
+            with request_priority("background"):
+                response = await self._memory_config.llm.achat(messages=compression_messages)
             summary = response.message.content
 
             # Set the result of the summary future.
@@ -304,16 +328,15 @@ class ReCentMemoryManager(Serializable):
         int
             The timestep of the leaf node.
         """
-        # Try to get the tail appendable leaf node
-        tail_leaf_node = self._episodic_node_tree.get_tail_appendable_leaf_node()
-        
-        if tail_leaf_node is not None:
-            # If an appendable leaf node exists, append messages
-            tail_leaf_node.messages.extend(messages)
-            return tail_leaf_node.timestep
-        else:
-            # If not, create a new appendable leaf node
-            return self._episodic_node_tree.add_leaf_node(messages)
+        self._sync_token_counter()
+        with self._lock:
+            timestep = self._episodic_node_tree.push_messages(messages)
+
+            # The pushed messages follow the accessible ones in the materialized context.
+            self._context_version += 1
+            if self._context_messages is not None:
+                self._context_messages.extend(messages)
+            return timestep
 
     def should_trigger_compression(self) -> bool:
         """
@@ -328,54 +351,24 @@ class ReCentMemoryManager(Serializable):
           - GoalEpisodicNode: the text content of goal and guidance
         - Non-goal nodes:
           - LeafEpisodicNode: the text content of all messages
-          - CompressionEpisodicNode: the text content of the summary (if available)
+          - CompressionEpisodicNode: the text content of the summary (once available)
+
+        Both counts are maintained by the episodic node tree as nodes and messages are added, so the
+        check takes constant time whatever the length of the history.
 
         Returns
         -------
         bool
             True if compression should be triggered, False otherwise.
         """
-        goal_node = self._episodic_node_tree.get_goal_node()
-        non_goal_nodes = self._episodic_node_tree.get_non_goal_nodes()
-
-        node_list = []
-        if goal_node is not None:
-            node_list.append(goal_node)
-        if non_goal_nodes:
-            node_list.extend(non_goal_nodes)
+        self._sync_token_counter()
 
         # Check node count threshold.
-        if len(node_list) >= self._memory_config.max_node_size:
+        if self._episodic_node_tree.node_count >= self._memory_config.max_node_size:
             return True
 
-        # Collect text parts.
-        text_parts = []
-        for node in node_list:
-            if isinstance(node, GoalEpisodicNode):
-                if node.goal:
-                    text_parts.append(node.goal)
-                if node.guidance:
-                    text_parts.append(node.guidance)
-            elif isinstance(node, LeafEpisodicNode):
-                for message in node.messages:
-                    for block in message.blocks:
-                        if isinstance(block, TextBlock):
-                            text_parts.append(block.text)
-                        elif isinstance(block, ToolCallBlock):
-                            text_parts.append("{"+ f"\"id\": \"{block.id}\", \"name\": \"{block.name}\", \"arguments\": {block.arguments}" + "}")
-                        elif isinstance(block, ToolResultBlock):
-                            text_parts.append(block.content)
-                        else:
-                            raise ValueError(f"Not supported block type: {type(block)}")
-            elif isinstance(node, CompressionEpisodicNode):
-                text_parts.append(node.summary.result())
-
-        # Calculate token count using callback function.
-        total_text = "\n\n".join(text_parts)
-        estimated_token_count = self._memory_config.token_count_callback(total_text)
-
         # Check token count threshold.
-        if estimated_token_count >= self._memory_config.max_token_size:
+        if self._episodic_node_tree.token_count >= self._memory_config.max_token_size:
             return True
 
         return False
@@ -391,40 +384,28 @@ class ReCentMemoryManager(Serializable):
           - For LeafEpisodicNode, using original messages
         3. Organizing messages in timestep order
 
+        The message list is materialized once and reused by the following calls: the pushed
+        messages are appended to it, and it is only rebuilt after a compression. Each context
+        gets a shallow copy of it.
+
         Returns
         -------
         ContextDict
             Dictionary containing goal content, goal timestep, and memory messages.
         """
-        # 1. Get goal node.
-        goal_node = self._episodic_node_tree.get_goal_node()
-        goal_content = goal_node.goal if goal_node else ""
-        goal_guidance = goal_node.guidance if goal_node else ""
-        goal_timestep = goal_node.timestep if goal_node else -1
-
-        # 2. Get directly accessible non-goal nodes (sorted by timestep).
-        non_goal_nodes = self._episodic_node_tree.get_non_goal_nodes()
-
-        # 3. Build message list.
-        memory_messages = []
-        for node in non_goal_nodes:
-            if isinstance(node, LeafEpisodicNode):
-                # Leaf node: use original messages.
-                memory_messages.extend(node.messages)
-            elif isinstance(node, CompressionEpisodicNode):
-                # Compression node: await its summary future.
-                msg = Message.from_text(
-                    text=f"[Stage Summary] {node.summary.result()}",
-                    role=Role.AI,
-                )
-                memory_messages.append(msg)
-
-        return {
-            "goal_content": goal_content,
-            "goal_guidance": goal_guidance,
-            "goal_timestep": goal_timestep,
-            "memory_messages": memory_messages,
-        }
+        memory_messages = self._get_context_messages()
+        if memory_messages is None:
+            version, non_goal_nodes = self._get_context_nodes()
+            messages = []
+            for node in non_goal_nodes:
+                if isinstance(node, LeafEpisodicNode):
+                    # Leaf node: use original messages.
+                    messages.extend(node.messages)
+                elif isinstance(node, CompressionEpisodicNode):
+                    # Compression node: wait for its summary future.
+                    messages.append(self._summary_message(node.summary.result()))
+            memory_messages = self._store_context(version, messages)
+        return self._make_context(memory_messages)
 
     async def abuild_context(self) -> ReCentContext:
         """
@@ -437,40 +418,175 @@ class ReCentMemoryManager(Serializable):
           - For LeafEpisodicNode, using original messages
         3. Organizing messages in timestep order
 
+        The message list is materialized once and reused by the following calls: the pushed
+        messages are appended to it, and it is only rebuilt after a compression. Each context
+        gets a shallow copy of it.
+
         Returns
         -------
         ContextDict
             Dictionary containing goal content, goal timestep, and memory messages.
         """
-        # 1. Get goal node.
-        goal_node = self._episodic_node_tree.get_goal_node()
-        goal_content = goal_node.goal if goal_node else ""
-        goal_guidance = goal_node.guidance if goal_node else ""
-        goal_timestep = goal_node.timestep if goal_node else -1
-
-        # 2. Get directly accessible non-goal nodes (sorted by timestep).
-        non_goal_nodes = self._episodic_node_tree.get_non_goal_nodes()
-
-        # 3. Build message list.
-        memory_messages = []
-        for node in non_goal_nodes:
-            if isinstance(node, LeafEpisodicNode):
-                # Leaf node: use original messages.
-                memory_messages.extend(node.messages)
-            elif isinstance(node, CompressionEpisodicNode):
-                # Compression node: wait for its summary future (non-blocking).
-                asyncio_future = asyncio.wrap_future(node.summary)
-                summary_text = await asyncio_future
-                msg = Message.from_text(
-                    text=f"[Stage Summary] {summary_text}",
-                    role=Role.AI,
-                )
-                memory_messages.append(msg)
+        memory_messages = self._get_context_messages()
+        if memory_messages is None:
+            version, non_goal_nodes = self._get_context_nodes()
+            messages = []
+            for node in non_goal_nodes:
+                if isinstance(node, LeafEpisodicNode):
+                    # Leaf node: use original messages.
+                    messages.extend(node.messages)
+                elif isinstance(node, CompressionEpisodicNode):
+                    # Compression node: wait for its summary future (non-blocking).
+                    summary_text = await asyncio.wrap_future(node.summary)
+                    messages.append(self._summary_message(summary_text))
+            memory_messages = self._store_context(version, messages)
+        return self._make_context(memory_messages)
+
+    def pack_memory_messages(
+        self,
+        memory_messages: Sequence[Message],
+        max_tokens: int,
+        max_tool_result_tokens: Optional[int] = None,
+    ) -> List[Message]:
+        """
+        Select the most recent memory messages that fit in a token budget, e.g. the part of the
+        prompt of a task left for the memory.
 
+        The messages are taken from the most recent one backwards until the budget is spent, a
+        message with tool results being kept with the message calling the tools. The tool results
+        longer than `max_tool_result_tokens` are truncated, with a reference to the tool call whose
+        full result remains in the memory. When earlier messages are left out, a note of their
+        number replaces them. Only the recent messages that are packed are counted, with the
+        counts of `token_count_callback` remembered across calls.
+
+        Parameters
+        ----------
+        memory_messages : Sequence[Message]
+            The memory messages of a context, as built by `build_context` or `abuild_context`.
+        max_tokens : int
+            The maximum number of tokens of the packed messages.
+        max_tool_result_tokens : Optional[int]
+            The maximum number of tokens of a tool result. If None, the tool results are not
+            truncated.
+
+        Returns
+        -------
+        List[Message]
+            The packed messages, in order.
+        """
+        token_counter = self._memory_config.token_counter
+        memo = None
+        if max_tool_result_tokens is not None:
+            memo = self._truncation_memos.get(max_tool_result_tokens)
+            if memo is None:
+                memo = ConversionMemo(
+                    lambda message: self._truncate_tool_results(message, max_tool_result_tokens),
+                    message_fingerprint,
+                )
+                self._truncation_memos[max_tool_result_tokens] = memo
+
+        # Collect groups of messages backwards, a group ending with a message that has no tool result.
+        groups: List[Tuple[List[Message], int]] = []
+        used_tokens = 0
+        group: List[Message] = []
+        group_tokens = 0
+        for index in range(len(memory_messages) - 1, -1, -1):
+            message = memory_messages[index]
+            if memo is not None:
+                message = memo(message)
+            group.append(message)
+            group_tokens += token_counter.count_message(message)
+            if index > 0 and any(isinstance(block, ToolResultBlock) for block in message.blocks):
+                continue
+            if used_tokens + group_tokens > max_tokens:
+                break
+            groups.append((group, group_tokens))
+            used_tokens += group_tokens
+            group, group_tokens = [], 0
+
+        packed_count = sum(len(messages) for messages, _ in groups)
+        if packed_count < len(memory_messages):
+            # Make room for the note of the elided messages.
+            note_tokens = token_counter.count_message(self._elision_message(len(memory_messages)))
+            while groups and used_tokens + note_tokens > max_tokens:
+                messages, tokens = groups.pop()
+                used_tokens -= tokens
+                packed_count -= len(messages)
+
+        packed = [message for messages, _ in reversed(groups) for message in reversed(messages)]
+        if packed_count < len(memory_messages):
+            packed.insert(0, self._elision_message(len(memory_messages) - packed_count))
+        return packed
+
+    def _truncate_tool_results(self, message: Message, max_tokens: int) -> Message:
+        tokenizer = self._memory_config.token_counter.tokenizer
+        blocks = []
+        truncated = False
+        for block in message.blocks:
+            if isinstance(block, ToolResultBlock):
+                tokens = tokenizer(block.content)
+                if tokens > max_tokens:
+                    # Cut the content proportionally, then shorten it until it fits.
+                    end = len(block.content) * max_tokens // tokens
+                    while end > 0 and tokenizer(block.content[:end]) > max_tokens:
+                        end = end * 9 // 10
+                    omitted_tokens = tokens - tokenizer(block.content[:end])
+                    block = block.model_copy(update={"content": (
+                        f"{block.content[:end]}\n... [{omitted_tokens} more tokens of the result of "
+                        f"the tool call '{block.id}' are elided]"
+                    )})
+                    truncated = True
+            blocks.append(block)
+        if not truncated:
+            return message
+        return Message(role=message.role, blocks=blocks, extras=dict(message.extras))
+
+    def _elision_message(self, elided_count: int) -> Message:
+        return Message.from_text(
+            text=f"[Elided Memory] {elided_count} earlier messages are omitted to fit the context budget.",
+            role=Role.AI,
+        )
+
+    def _reset_context(self, version: int = 0) -> None:
+        self._context_version = version
+        self._context_messages = None
+
+    def _sync_token_counter(self) -> None:
+        # The counter of the configuration is replaced when its `token_count_callback` is changed.
+        token_counter = self._memory_config.token_counter
+        if self._episodic_node_tree.token_counter is not token_counter:
+            self._episodic_node_tree.token_counter = token_counter
+
+    def _get_context_messages(self) -> Optional[List[Message]]:
+        # Each context gets its own list, so the callers may modify it.
+        with self._lock:
+            if self._context_messages is None:
+                return None
+            return list(self._context_messages)
+
+    def _get_context_nodes(self) -> Tuple[int, List[BaseEpisodicNode]]:
+        with self._lock:
+            return self._context_version, self._episodic_node_tree.get_non_goal_nodes()
+
+    def _store_context(self, version: int, messages: List[Message]) -> List[Message]:
+        with self._lock:
+            # Messages pushed or compressed while the summaries were awaited are not in this list.
+            if version == self._context_version:
+                self._context_messages = list(messages)
+        return messages
+
+    def _summary_message(self, summary_text: str) -> Message:
+        return Message.from_text(
+            text=f"[Stage Summary] {summary_text}",
+            role=Role.AI,
+        )
+
+    def _make_context(self, memory_messages: List[Message]) -> ReCentContext:
+        goal_node = self._episodic_node_tree.get_goal_node()
         return {
-            "goal_content": goal_content,
-            "goal_guidance": goal_guidance,
-            "goal_timestep": goal_timestep,
+            "goal_content": goal_node.goal if goal_node else "",
+            "goal_guidance": goal_node.guidance if goal_node else "",
+            "goal_timestep": goal_node.timestep if goal_node else -1,
             "memory_messages": memory_messages,
         }
 
@@ -485,3 +601,7 @@ class ReCentMemoryManager(Serializable):
     def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
         self._episodic_node_tree = state_dict["episodic_node_tree"]
         self._memory_config = state_dict["memory_config"]
+        self._episodic_node_tree.token_counter = self._memory_config.token_counter
+        self._lock = RLock()
+        self._reset_context()
+        self._truncation_memos = {}
@@ -43,6 +43,12 @@ class ObservationTaskConfig:
         System prompt template. If None, uses DEFAULT_OBSERVE_SYSTEM_TEMPLATE.
     instruction_template : Optional[Union[str, EjinjaPromptTemplate]]
         Instruction prompt template. If None, uses DEFAULT_OBSERVE_INSTRUCTION_TEMPLATE.
+    max_context_tokens : Optional[int]
+        Token budget of the observation prompt. The most recent memory messages that fit in it
+        are sent, the earlier ones being elided. If None, the whole memory is sent.
+    max_tool_result_tokens : Optional[int]
+        Maximum number of tokens of a tool result in the prompt, longer results being truncated.
+        If None, a quarter of `max_context_tokens` when it is set.
     """
 
     def __init__(
@@ -50,16 +56,22 @@ class ObservationTaskConfig:
         llm: BaseLlm,
         system_template: Optional[Union[str, EjinjaPromptTemplate]] = DEFAULT_OBSERVATION_SYSTEM_TEMPLATE,
         instruction_template: Optional[Union[str, EjinjaPromptTemplate]] = DEFAULT_OBSERVATION_INSTRUCTION_TEMPLATE,
+        max_context_tokens: Optional[int] = None,
+        max_tool_result_tokens: Optional[int] = None,
     ):
         self.llm = llm
         self.system_template = system_template or DEFAULT_OBSERVATION_SYSTEM_TEMPLATE
         self.instruction_template = instruction_template or DEFAULT_OBSERVATION_INSTRUCTION_TEMPLATE
+        self.max_context_tokens = max_context_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
 
     def to_llm_task_config(self) -> LlmTaskConfig:
         return LlmTaskConfig(
             llm=self.llm,
             system_template=self.system_template,
             instruction_template=self.instruction_template,
+            max_context_tokens=self.max_context_tokens,
+            max_tool_result_tokens=self.max_tool_result_tokens,
         )
 
 
@@ -99,6 +111,13 @@ class ToolTaskConfig:
         System prompt template. If None, uses DEFAULT_TOOL_SELECTION_SYSTEM_TEMPLATE.
     instruction_template : Optional[Union[str, EjinjaPromptTemplate]]
         Instruction prompt template. If None, uses DEFAULT_TOOL_SELECTION_INSTRUCTION_TEMPLATE.
+    max_context_tokens : Optional[int]
+        Token budget of the tool selection prompt, excluding the tool definitions. The most recent
+        memory messages that fit in it are sent, the earlier ones being elided. If None, the whole
+        memory is sent.
+    max_tool_result_tokens : Optional[int]
+        Maximum number of tokens of a tool result in the prompt, longer results being truncated.
+        If None, a quarter of `max_context_tokens` when it is set.
     """
 
     def __init__(
@@ -106,16 +125,22 @@ class ToolTaskConfig:
         llm: BaseLlm,
         system_template: Optional[Union[str, EjinjaPromptTemplate]] = DEFAULT_TOOL_SELECTION_SYSTEM_TEMPLATE,
         instruction_template: Optional[Union[str, EjinjaPromptTemplate]] = DEFAULT_TOOL_SELECTION_INSTRUCTION_TEMPLATE,
+        max_context_tokens: Optional[int] = None,
+        max_tool_result_tokens: Optional[int] = None,
     ):
         self.llm = llm
         self.system_template = system_template or DEFAULT_TOOL_SELECTION_SYSTEM_TEMPLATE
         self.instruction_template = instruction_template or DEFAULT_TOOL_SELECTION_INSTRUCTION_TEMPLATE
+        self.max_context_tokens = max_context_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
 
     def to_llm_task_config(self) -> LlmTaskConfig:
         return LlmTaskConfig(
             llm=self.llm,
             system_template=self.system_template,
             instruction_template=self.instruction_template,
+            max_context_tokens=self.max_context_tokens,
+            max_tool_result_tokens=self.max_tool_result_tokens,
         )
 
 
@@ -151,6 +176,12 @@ class AnswerTaskConfig:
         System prompt template. If None, uses DEFAULT_ANSWER_SYSTEM_TEMPLATE.
     instruction_template : Optional[Union[str, EjinjaPromptTemplate]]
         Instruction prompt template. If None, uses DEFAULT_ANSWER_INSTRUCTION_TEMPLATE.
+    max_context_tokens : Optional[int]
+        Token budget of the answer prompt. The most recent memory messages that fit in it are
+        sent, the earlier ones being elided. If None, the whole memory is sent.
+    max_tool_result_tokens : Optional[int]
+        Maximum number of tokens of a tool result in the prompt, longer results being truncated.
+        If None, a quarter of `max_context_tokens` when it is set.
     """
 
     def __init__(
@@ -158,15 +189,21 @@ class AnswerTaskConfig:
         llm: BaseLlm,
         system_template: Optional[Union[str, EjinjaPromptTemplate]] = DEFAULT_ANSWER_SYSTEM_TEMPLATE,
         instruction_template: Optional[Union[str, EjinjaPromptTemplate]] = DEFAULT_ANSWER_INSTRUCTION_TEMPLATE,
+        max_context_tokens: Optional[int] = None,
+        max_tool_result_tokens: Optional[int] = None,
     ):
         self.llm = llm
         self.system_template = system_template or DEFAULT_ANSWER_SYSTEM_TEMPLATE
         self.instruction_template = instruction_template or DEFAULT_ANSWER_INSTRUCTION_TEMPLATE
+        self.max_context_tokens = max_context_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
 
     def to_llm_task_config(self) -> LlmTaskConfig:
         return LlmTaskConfig(
             llm=self.llm,
             system_template=self.system_template,
             instruction_template=self.instruction_template,
+            max_context_tokens=self.max_context_tokens,
+            max_tool_result_tokens=self.max_tool_result_tokens,
         )
 
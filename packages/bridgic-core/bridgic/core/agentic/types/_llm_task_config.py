@@ -13,6 +13,7 @@ class LlmTaskConfig(Serializable):
     - A dedicated LLM instance for the task
     - Optional system prompt template
     - Optional instruction prompt template
+    - Optional token budget of the prompt
 
     This class serves as a configuration holder and the actual behavior of the system are 
     determined by the concrete implementations utilizing this configuration.
@@ -25,6 +26,10 @@ class LlmTaskConfig(Serializable):
         Optional system prompt template. If None, no system message will be added.
     instruction_template : Optional[EjinjaPromptTemplate]
         Optional instruction prompt template. If None, no instruction message will be added.
+    max_context_tokens : Optional[int]
+        Optional maximum number of tokens of the prompt messages of the task. If None, the prompt is not limited.
+    max_tool_result_tokens : Optional[int]
+        Optional maximum number of tokens of a tool result in the prompt. If None, the tool results are not truncated.
     """
 
     llm: BaseLlm
@@ -36,11 +41,19 @@ class LlmTaskConfig(Serializable):
     instruction_template: Optional[EjinjaPromptTemplate]
     """Optional instruction prompt template for this task."""
 
+    max_context_tokens: Optional[int]
+    """Optional maximum number of tokens of the prompt messages of this task."""
+
+    max_tool_result_tokens: Optional[int]
+    """Optional maximum number of tokens of a tool result in the prompt of this task."""
+
     def __init__(
         self,
         llm: BaseLlm,
         system_template: Optional[Union[str, EjinjaPromptTemplate]] = None,
         instruction_template: Optional[Union[str, EjinjaPromptTemplate]] = None,
+        max_context_tokens: Optional[int] = None,
+        max_tool_result_tokens: Optional[int] = None,
     ):
         """
         Initialize LLM task configuration.
@@ -55,8 +68,14 @@ class LlmTaskConfig(Serializable):
         instruction_template : Optional[Union[str, EjinjaPromptTemplate]]
             Instruction prompt template. Can be a string (will be converted to EjinjaPromptTemplate)
             or an EjinjaPromptTemplate instance. If None, no instruction message will be added.
+        max_context_tokens : Optional[int]
+            Maximum number of tokens of the prompt messages. If None, the prompt is not limited.
+        max_tool_result_tokens : Optional[int]
+            Maximum number of tokens of a tool result in the prompt. If None, the tool results are not truncated.
         """
         self.llm = llm
+        self.max_context_tokens = max_context_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
 
         if system_template is None:
             self.system_template = None
@@ -88,6 +107,8 @@ class LlmTaskConfig(Serializable):
         state_dict["llm"] = self.llm
         state_dict["system_template"] = self.system_template
         state_dict["instruction_template"] = self.instruction_template
+        state_dict["max_context_tokens"] = self.max_context_tokens
+        state_dict["max_tool_result_tokens"] = self.max_tool_result_tokens
         return state_dict
 
     @override
@@ -95,4 +116,6 @@ class LlmTaskConfig(Serializable):
         self.llm = state_dict["llm"]
         self.system_template = state_dict["system_template"]
         self.instruction_template = state_dict["instruction_template"]
+        self.max_context_tokens = state_dict.get("max_context_tokens")
+        self.max_tool_result_tokens = state_dict.get("max_tool_result_tokens")
 
@@ -2,6 +2,7 @@ import asyncio
 import uuid
 import threading
 
+from contextvars import ContextVar
 from typing import List, Any, Optional, Dict
 from typing_extensions import override
 from abc import ABCMeta, abstractmethod
@@ -15,8 +16,12 @@ from bridgic.core.automa.args import RuntimeContext
 from bridgic.core.utils._msgpackx import load_bytes
 from bridgic.core.utils._inspect_tools import get_param_names_by_kind
 from bridgic.core.types._error import AutomaRuntimeError
-from bridgic.core.automa.worker._worker_callback import WorkerCallbackBuilder, WorkerCallback
-from bridgic.core.config import GlobalSetting
+from bridgic.core.automa.worker._worker_callback import WorkerCallbackBuilder, WorkerCallback, _WorkerCallbackDispatcher
+from bridgic.core.config import GlobalSetting, TraceSamplingConfig, TracePayloadConfig
+
+# Whether the current run of the top-level automa is traced, decided by head sampling when the run starts.
+# It is scoped to the run, so that concurrent runs of the same automa do not overwrite each other's decision.
+_run_trace_sampled: ContextVar[Optional[bool]] = ContextVar("bridgic_run_trace_sampled", default=None)
 
 class RunningOptions(BaseModel):
     """
@@ -27,6 +32,8 @@ class RunningOptions(BaseModel):
     1. **Runtime-configurable fields**: Can be set at any time via `set_running_options()`.
        - `debug`: Whether to enable debug mode.
        - `verbose`: Whether to print more verbose runtime debug information. Only takes effect when `debug=True`.
+       - `trace_sampling`: The sampling policy of traces, overriding the one of `GlobalSetting`.
+       - `trace_payload`: The payload policy of traces, overriding the one of `GlobalSetting`.
 
     2. **Initialization-only fields**: Must be set during Automa instantiation via the `running_options` parameter.
        - `callback_builders`: Callback builders at the Automa instance level. These will be merged with 
@@ -38,6 +45,12 @@ class RunningOptions(BaseModel):
     verbose: bool = False
     """Whether to print more verbose runtime debug information. Only takes effect when debug=True. Can be set at runtime via set_running_options()."""
 
+    trace_sampling: Optional[TraceSamplingConfig] = None
+    """The sampling policy of traces. If None, the one of `GlobalSetting` is used. Only takes effect on the top-level Automa."""
+
+    trace_payload: Optional[TracePayloadConfig] = None
+    """The payload policy of traces. If None, the one of `GlobalSetting` is used. Only takes effect on the top-level Automa."""
+
     callback_builders: List[WorkerCallbackBuilder] = []
     """A list of callback builders specific to this Automa instance."""
 
@@ -92,6 +105,8 @@ class Automa(Worker):
 
     # Cached callbacks for top-level automa execution, which are built once and reused across multiple arun() calls.
     _cached_callbacks: Optional[List[WorkerCallback]] = None
+    # Precompiled dispatcher of the cached callbacks, which is rebuilt whenever the cached callbacks are reset.
+    _cached_callback_dispatcher: Optional[_WorkerCallbackDispatcher] = None
 
     def __init__(
         self,
@@ -252,6 +267,24 @@ class Automa(Worker):
             return self._running_options
         return self.parent._get_top_running_options()
 
+    def _get_trace_sampling_config(self) -> TraceSamplingConfig:
+        """
+        Get the trace sampling policy in effect, which is set by the top-level automa or globally.
+        """
+        running_options = self._get_top_running_options()
+        if running_options.trace_sampling is not None:
+            return running_options.trace_sampling
+        return GlobalSetting.read().trace_sampling
+
+    def _get_trace_payload_config(self) -> TracePayloadConfig:
+        """
+        Get the trace payload policy in effect, which is set by the top-level automa or globally.
+        """
+        running_options = self._get_top_running_options()
+        if running_options.trace_payload is not None:
+            return running_options.trace_payload
+        return GlobalSetting.read().trace_payload
+
     def _collect_ancestor_callback_builders(self) -> List[WorkerCallbackBuilder]:
         """
         Collect callback builders from all ancestor automas in the ancestor chain.
@@ -310,6 +343,27 @@ class Automa(Worker):
             self._cached_callbacks = [cb.build() for cb in effective_builders]
         return self._cached_callbacks
 
+    def _set_automa_callbacks(self, callbacks: List[WorkerCallback]) -> None:
+        """
+        Reset the cached callback instances for top-level automa execution, 
+        invalidating the precompiled dispatcher built from the previous ones.
+        """
+        self._cached_callbacks = callbacks
+        self._cached_callback_dispatcher = None
+
+    def _get_automa_callback_dispatcher(self) -> _WorkerCallbackDispatcher:
+        """
+        Get or build the precompiled dispatcher of the callbacks for top-level automa execution.
+
+        Returns
+        -------
+        _WorkerCallbackDispatcher
+            The dispatcher over the callbacks returned by `_get_automa_callbacks()`.
+        """
+        if self._cached_callback_dispatcher is None:
+            self._cached_callback_dispatcher = _WorkerCallbackDispatcher(self._get_automa_callbacks())
+        return self._cached_callback_dispatcher
+
     ###############################################################
     ########## [Bridgic Event Handling Mechanism] starts ##########
     ###############################################################
@@ -20,8 +20,8 @@ from bridgic.core.types._common import AutomaType
 from bridgic.core.automa import Automa, Snapshot
 from bridgic.core.automa.worker import CallableWorker, Worker
 from bridgic.core.automa.interaction import Interaction, InteractionFeedback, InteractionException
-from bridgic.core.automa._automa import _InteractionAndFeedback, _InteractionEventException, RunningOptions
-from bridgic.core.automa.worker._worker_callback import WorkerCallback, WorkerCallbackBuilder, try_handle_error_with_callbacks
+from bridgic.core.automa._automa import _InteractionAndFeedback, _InteractionEventException, RunningOptions, _run_trace_sampled
+from bridgic.core.automa.worker._worker_callback import WorkerCallback, WorkerCallbackBuilder, _WorkerCallbackDispatcher
 from bridgic.core.automa._graph_meta import GraphMeta
 from bridgic.core.automa.args._args_binding import ArgsManager, ArgsMappingRule, ResultDispatchingRule, safely_map_args
 
@@ -40,7 +40,13 @@ class _GraphAdaptedWorker(Worker):
     args_mapping_rule: str
     result_dispatching_rule: str
     _decorated_worker: Worker
-    _worker_callbacks: List[WorkerCallback]
+    __worker_callbacks: List[WorkerCallback]
+
+    # Precompiled dispatcher of the worker callbacks, with no need for serialization.
+    # It is rebuilt lazily after the worker callbacks are changed.
+    __callback_dispatcher: Optional[_WorkerCallbackDispatcher]
+    # Whether the arun of the decorated worker is an async generator function, with no need for serialization.
+    __is_agen_arun: bool
 
     def __init__(
         self,
@@ -63,6 +69,22 @@ class _GraphAdaptedWorker(Worker):
         self.result_dispatching_rule = result_dispatching_rule
         self._decorated_worker = worker
         self._worker_callbacks = [cb.build() for cb in callback_builders]
+        self.__is_agen_arun = inspect.isasyncgenfunction(worker.arun) if worker is not None else False
+
+    @property
+    def _worker_callbacks(self) -> List[WorkerCallback]:
+        return self.__worker_callbacks
+
+    @_worker_callbacks.setter
+    def _worker_callbacks(self, value: List[WorkerCallback]):
+        # Note: `_worker_callbacks += new_callbacks` also goes through this setter.
+        self.__worker_callbacks = value
+        self.__callback_dispatcher = None
+
+    def _get_callback_dispatcher(self) -> _WorkerCallbackDispatcher:
+        if self.__callback_dispatcher is None:
+            self.__callback_dispatcher = _WorkerCallbackDispatcher(self.__worker_callbacks)
+        return self.__callback_dispatcher
 
     @override
     def get_report_info(self) -> Dict[str, Any]:
@@ -99,23 +121,33 @@ class _GraphAdaptedWorker(Worker):
         self.result_dispatching_rule = state_dict["result_dispatching_rule"]
         self._decorated_worker = state_dict["decorated_worker"]
         self._worker_callbacks = state_dict["worker_callbacks"]
+        self.__is_agen_arun = inspect.isasyncgenfunction(self._decorated_worker.arun)
     #
     # Delegate all the properties and methods of _GraphAdaptedWorker to the decorated worker.
     # TODO: Maybe 'Worker' should be a Protocol.
     #
     @override
     async def arun(self, *args, **kwargs) -> Any:
-        for callback in self._worker_callbacks:
-            await callback.on_worker_start(
-                key=self.key,
-                is_top_level=False,
-                parent=self.parent,
-                arguments={"args": args, "kwargs": kwargs},
-            )
+        dispatcher = self._get_callback_dispatcher()
+
+        # Fast path: no callback is interested in the execution of this worker.
+        if not dispatcher:
+            if self.__is_agen_arun:
+                return self._decorated_worker.arun(*args, **kwargs)
+            return await self._decorated_worker.arun(*args, **kwargs)
+
+        arguments = {"args": args, "kwargs": kwargs}
+        parent = self.parent
+        await dispatcher.on_worker_start(
+            key=self.key,
+            is_top_level=False,
+            parent=parent,
+            arguments=arguments,
+        )
 
         try:
             # Check if arun is an async generator function.
-            if inspect.isasyncgenfunction(self._decorated_worker.arun):
+            if self.__is_agen_arun:
                 # For async generator functions, call directly and return the generator.
                 result = self._decorated_worker.arun(*args, **kwargs)
             else:
@@ -123,12 +155,11 @@ class _GraphAdaptedWorker(Worker):
                 result = await self._decorated_worker.arun(*args, **kwargs)
         except Exception as e:
             # Try to handle the exception with callbacks
-            handled = await try_handle_error_with_callbacks(
-                callbacks=self._worker_callbacks,
+            handled = await dispatcher.on_worker_error(
                 key=self.key,
                 is_top_level=False,
-                parent=self.parent,
-                arguments={"args": args, "kwargs": kwargs},
+                parent=parent,
+                arguments=arguments,
                 error=e,
             )
 
@@ -139,14 +170,13 @@ class _GraphAdaptedWorker(Worker):
             # If exception was handled, set result to None
             result = None
 
-        for callback in self._worker_callbacks:
-            await callback.on_worker_end(
-                key=self.key,
-                is_top_level=False,
-                parent=self.parent,
-                arguments={"args": args, "kwargs": kwargs},
-                result=result,
-            )
+        await dispatcher.on_worker_end(
+            key=self.key,
+            is_top_level=False,
+            parent=parent,
+            arguments=arguments,
+            result=result,
+        )
         return result
 
     @override
@@ -190,6 +220,8 @@ class _RunnningTask:
 class _AutomaInputBuffer(BaseModel):
     args: Tuple[Any, ...] = ()
     kwargs: Dict[str, Any] = {}
+    # The head-sampling decision of the run, kept in the snapshot so that a resumed run is not sampled again.
+    trace_sampled: Optional[bool] = None
 
 class _KickoffInfo(BaseModel):
     # The key of the worker that is going to be kicked off.
@@ -435,6 +467,14 @@ class GraphAutoma(Automa, metaclass=GraphMeta):
     # The version of the serialization format.
     SERIALIZATION_VERSION: str = "1.0"
 
+    @override
+    def _invalidate_ancestry(self) -> None:
+        super()._invalidate_ancestry()
+        # The ancestry of the nested automas changes along with the one of this automa.
+        for worker in self._workers.values():
+            if worker.is_automa():
+                worker.get_decorated_worker()._invalidate_ancestry()
+
     @override
     def dump_to_dict(self) -> Dict[str, Any]:
         state_dict = super().dump_to_dict()
@@ -505,16 +545,9 @@ class GraphAutoma(Automa, metaclass=GraphMeta):
                 f"duplicate workers with the same key '{key}' are not allowed to be added!"
             )
 
-        # Merge callback builders: Global -> Ancestor Automa(s) -> Current Automa -> Nested Automa (if worker is automa) -> Worker
-        effective_callback_builders = []
-        effective_callback_builders.extend(GlobalSetting.read().callback_builders)
         # Collect callback builders from all ancestor automas in the ancestor chain (from top-level to current)
-        effective_callback_builders.extend(self._collect_ancestor_callback_builders())
-        # If the worker itself is an automa, include its own RunningOptions callback builders
-        if isinstance(worker, Automa):
-            effective_callback_builders.extend(worker._running_options.callback_builders)
-        # Include the callback builders from the worker itself.
-        effective_callback_builders.extend(callback_builders)
+        ancestor_callback_builders = self._collect_ancestor_callback_builders()
+        effective_callback_builders = self._get_effective_callback_builders(worker, callback_builders, ancestor_callback_builders)
 
         # Note: the dependencies argument must be a new copy of the list, created with list(dependencies).
         # Refer to the Python documentation for more details:
@@ -553,16 +586,39 @@ class GraphAutoma(Automa, metaclass=GraphMeta):
         if new_worker_obj.is_automa():
             nested_automa = new_worker_obj.get_decorated_worker()
             if isinstance(nested_automa, GraphAutoma):
-                # Collect callback builders from all ancestor automas in the ancestor chain (from top-level to current)
-                ancestor_callback_builders = self._collect_ancestor_callback_builders()
                 # Append ancestor callbacks to the _cached_callbacks of the nested automa instance.
-                nested_automa._cached_callbacks = nested_automa._get_automa_callbacks() + [cb.build() for cb in ancestor_callback_builders]
+                nested_automa._set_automa_callbacks(
+                    nested_automa._get_automa_callbacks() + [cb.build() for cb in ancestor_callback_builders]
+                )
                 # Recursively propagate ancestor callbacks to inner workers.
                 self._propagate_callbacks_to_nested_automa(
                     nested_automa=nested_automa,
                     callback_builders=ancestor_callback_builders,
                 )
 
+    def _get_effective_callback_builders(
+        self,
+        worker: Worker,
+        callback_builders: List[WorkerCallbackBuilder],
+        ancestor_callback_builders: Optional[List[WorkerCallbackBuilder]] = None,
+    ) -> List[WorkerCallbackBuilder]:
+        """
+        Get the callback builders of a worker added to this automa.
+        """
+        if ancestor_callback_builders is None:
+            ancestor_callback_builders = self._collect_ancestor_callback_builders()
+
+        # Merge callback builders: Global -> Ancestor Automa(s) -> Current Automa -> Nested Automa (if worker is automa) -> Worker
+        effective_callback_builders = []
+        effective_callback_builders.extend(GlobalSetting.read().callback_builders)
+        effective_callback_builders.extend(ancestor_callback_builders)
+        # If the worker itself is an automa, include its own RunningOptions callback builders
+        if isinstance(worker, Automa):
+            effective_callback_builders.extend(worker._running_options.callback_builders)
+        # Include the callback builders from the worker itself.
+        effective_callback_builders.extend(callback_builders)
+        return effective_callback_builders
+
     def _propagate_callbacks_to_nested_automa(
         self,
         nested_automa: "GraphAutoma",
@@ -1356,10 +1412,15 @@ class GraphAutoma(Automa, metaclass=GraphMeta):
 
         # If this is the top-level automa, execute its callbacks separately.
         if is_top_level:
-            automa_callbacks = self._get_automa_callbacks()
-
-            for callback in automa_callbacks:
-                await callback.on_worker_start(
+            automa_callbacks = self._get_automa_callback_dispatcher()
+            if automa_callbacks:
+                # The head-sampling decision of the run is visible to the callbacks of the run
+                # only, since a top-level run is isolated in its own task and context. A run
+                # resumed after an interaction keeps the decision made when it was started.
+                if self._input_buffer.trace_sampled is None:
+                    self._input_buffer.trace_sampled = self._get_trace_sampling_config().sample_head()
+                _run_trace_sampled.set(self._input_buffer.trace_sampled)
+                await automa_callbacks.on_worker_start(
                     key=self.name,
                     is_top_level=True,
                     parent=self.parent,
@@ -1552,22 +1613,22 @@ class GraphAutoma(Automa, metaclass=GraphMeta):
             # Handle exceptions with callbacks at the top-level automa before re-raising them.
             if is_top_level:
                 # Get cached callbacks for top-level automa
-                automa_callbacks = self._get_automa_callbacks()
+                automa_callbacks = self._get_automa_callback_dispatcher()
 
                 # Process interaction exceptions with callbacks (they cannot be suppressed, but callbacks can observe them)
-                for e in interaction_exceptions + non_interaction_exceptions:
-                    await try_handle_error_with_callbacks(
-                        callbacks=automa_callbacks,
-                        key=self.name,
-                        is_top_level=True,
-                        parent=self.parent,
-                        arguments={
-                            "args": self._input_buffer.args,
-                            "kwargs": self._input_buffer.kwargs,
-                            "feedback_data": feedback_data,
-                        },
-                        error=e,
-                    )
+                if automa_callbacks:
+                    for e in interaction_exceptions + non_interaction_exceptions:
+                        await automa_callbacks.on_worker_error(
+                            key=self.name,
+                            is_top_level=True,
+                            parent=self.parent,
+                            arguments={
+                                "args": self._input_buffer.args,
+                                "kwargs": self._input_buffer.kwargs,
+                                "feedback_data": feedback_data,
+                            },
+                            error=e,
+                        )
 
             # For inner interaction exceptions, collect them and throw an InteractionException as a whole.
             if len(interaction_exceptions) > 0:
@@ -1643,9 +1704,9 @@ class GraphAutoma(Automa, metaclass=GraphMeta):
 
         # If this is the top-level automa, execute its callbacks separately.
         if is_top_level:
-            automa_callbacks = self._get_automa_callbacks()
-            for callback in automa_callbacks:
-                await callback.on_worker_end(
+            automa_callbacks = self._get_automa_callback_dispatcher()
+            if automa_callbacks:
+                await automa_callbacks.on_worker_end(
                     key=self.name,
                     is_top_level=True,
                     parent=self.parent,
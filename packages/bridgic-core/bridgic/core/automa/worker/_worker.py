@@ -56,6 +56,13 @@ class Worker(Serializable):
     __cached_param_names_of_arun: Dict[_ParameterKind, List[Tuple[str, Any]]]
     __cached_param_names_of_run: Dict[_ParameterKind, List[Tuple[str, Any]]]
 
+    # Bumped whenever this worker or one of its ancestors is re-parented. Cached data derived from the
+    # ancestry of an automa (such as tracing metadata) is valid as long as its version is unchanged.
+    _ancestry_version: int = 0
+
+    # Cached tracing metadata, with no need for serialization. See `get_worker_tracing_record()`.
+    _cached_tracing_record: Optional[Tuple["Automa", int, Any]] = None
+
     def __init__(self):
         self.__parent = self
         self.__local_space = {}
@@ -157,7 +164,15 @@ class Worker(Serializable):
 
     @parent.setter
     def parent(self, value: "Automa"):
-        self.__parent = value
+        if value is not self.__parent:
+            self.__parent = value
+            self._invalidate_ancestry()
+
+    def _invalidate_ancestry(self) -> None:
+        """
+        Bump the ancestry version of this worker, and of the automas nested in it, if any.
+        """
+        self._ancestry_version += 1
 
     @property
     def local_space(self) -> Dict[str, Any]:
@@ -422,4 +422,91 @@ async def try_handle_error_with_callbacks(
             if suppress_request and not is_interaction_exception:
                 should_suppress = True
     
-    return should_suppress
\ No newline at end of file
+    return should_suppress
+
+def _is_hook_overridden(callback: WorkerCallback, hook_name: str) -> bool:
+    """
+    Check whether the callback provides its own implementation of the given hook.
+    """
+    hook = getattr(callback, hook_name)
+    return getattr(hook, "__func__", None) is not getattr(WorkerCallback, hook_name)
+
+
+class _WorkerCallbackDispatcher:
+    """
+    A precompiled dispatcher over a fixed list of worker callbacks. For internal use only.
+
+    The callbacks that actually override each hook are resolved once when the dispatcher 
+    is built, so that the hot path of worker execution neither iterates over callbacks 
+    that would do nothing nor builds the `arguments` dict when no hook is interested in it. 
+    A dispatcher is falsy when it contains no callback at all, which allows the caller 
+    to skip the whole dispatching logic.
+
+    A dispatcher must be rebuilt whenever the underlying list of callbacks changes.
+    """
+    __slots__ = ("callbacks", "start_callbacks", "end_callbacks", "error_callbacks")
+
+    callbacks: List[WorkerCallback]
+    start_callbacks: List[WorkerCallback]
+    end_callbacks: List[WorkerCallback]
+    error_callbacks: List[WorkerCallback]
+
+    def __init__(self, callbacks: List[WorkerCallback]):
+        self.callbacks = list(callbacks)
+        self.start_callbacks = [cb for cb in self.callbacks if _is_hook_overridden(cb, "on_worker_start")]
+        self.end_callbacks = [cb for cb in self.callbacks if _is_hook_overridden(cb, "on_worker_end")]
+        self.error_callbacks = [cb for cb in self.callbacks if _is_hook_overridden(cb, "on_worker_error")]
+
+    def __bool__(self) -> bool:
+        return bool(self.start_callbacks or self.end_callbacks or self.error_callbacks)
+
+    async def on_worker_start(
+        self,
+        key: str,
+        is_top_level: bool = False,
+        parent: Optional["Automa"] = None,
+        arguments: Dict[str, Any] = None,
+    ) -> None:
+        for callback in self.start_callbacks:
+            await callback.on_worker_start(
+                key=key,
+                is_top_level=is_top_level,
+                parent=parent,
+                arguments=arguments,
+            )
+
+    async def on_worker_end(
+        self,
+        key: str,
+        is_top_level: bool = False,
+        parent: Optional["Automa"] = None,
+        arguments: Dict[str, Any] = None,
+        result: Any = None,
+    ) -> None:
+        for callback in self.end_callbacks:
+            await callback.on_worker_end(
+                key=key,
+                is_top_level=is_top_level,
+                parent=parent,
+                arguments=arguments,
+                result=result,
+            )
+
+    async def on_worker_error(
+        self,
+        key: str,
+        is_top_level: bool = False,
+        parent: Optional["Automa"] = None,
+        arguments: Dict[str, Any] = None,
+        error: Exception = None,
+    ) -> bool:
+        # Callbacks that do not override `on_worker_error` would only observe the error 
+        # and never suppress it, so it is safe to leave them out of the error handling.
+        return await try_handle_error_with_callbacks(
+            callbacks=self.error_callbacks,
+            key=key,
+            is_top_level=is_top_level,
+            parent=parent,
+            arguments=arguments,
+            error=error,
+        )
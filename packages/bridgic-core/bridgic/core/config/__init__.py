@@ -3,11 +3,15 @@ Configuration management module for Bridgic.
 """
 
 from ._global_setting import GlobalSetting
+from ._trace_setting import TraceSamplingConfig, TracePayloadConfig
 from ._http_client_config import (
     HttpClientConfig,
     HttpClientTimeoutConfig,
     HttpClientAuthConfig,
+    HttpClientLimitsConfig,
     create_http_client_from_config,
+    get_shared_http_client,
+    close_shared_http_clients,
 )
 
 # Import WorkerCallbackBuilder to resolve forward references in GlobalSetting.
@@ -19,9 +23,14 @@ GlobalSetting.model_rebuild()
 
 __all__ = [
     "GlobalSetting",
+    "TraceSamplingConfig",
+    "TracePayloadConfig",
     "HttpClientConfig",
     "HttpClientTimeoutConfig",
     "HttpClientAuthConfig",
+    "HttpClientLimitsConfig",
     "create_http_client_from_config",
+    "get_shared_http_client",
+    "close_shared_http_clients",
 ]
 
@@ -6,6 +6,8 @@ from typing import List, Optional, ClassVar, TYPE_CHECKING
 from pydantic import BaseModel
 from threading import Lock
 
+from bridgic.core.config._trace_setting import TraceSamplingConfig, TracePayloadConfig
+
 if TYPE_CHECKING:
     from bridgic.core.automa.worker._worker_callback import WorkerCallbackBuilder
 
@@ -25,12 +27,22 @@ class GlobalSetting(BaseModel):
     callback_builders : List[WorkerCallbackBuilder]
         Callback builders that will be automatically applied to all workers
         across all Automa instances.
+    trace_sampling : TraceSamplingConfig
+        The sampling policy of the traces of top-level automa runs, honored by all tracing callbacks.
+    trace_payload : TracePayloadConfig
+        The policy of how worker arguments and results are recorded in traces.
     """
     model_config = {"arbitrary_types_allowed": True}
 
     callback_builders: List["WorkerCallbackBuilder"] = []
     """Global callback builders that will be applied to all workers."""
 
+    trace_sampling: TraceSamplingConfig = TraceSamplingConfig()
+    """The sampling policy of traces. Can be overridden per top-level automa by `RunningOptions`."""
+
+    trace_payload: TracePayloadConfig = TracePayloadConfig()
+    """The payload policy of traces. Can be overridden per top-level automa by `RunningOptions`."""
+
     # Singleton instance
     _instance: ClassVar[Optional["GlobalSetting"]] = None
     _lock: ClassVar[Lock] = Lock()
@@ -55,6 +67,8 @@ class GlobalSetting(BaseModel):
     def set(
         cls,
         callback_builders: Optional[List["WorkerCallbackBuilder"]] = None,
+        trace_sampling: Optional[TraceSamplingConfig] = None,
+        trace_payload: Optional[TracePayloadConfig] = None,
     ) -> None:
         """
         Set global setting fields.
@@ -67,11 +81,19 @@ class GlobalSetting(BaseModel):
         callback_builders : Optional[List[WorkerCallbackBuilder]], optional
             Global callback builders that will be applied to all workers.
             If None, the current callback_builders are not changed.
+        trace_sampling : Optional[TraceSamplingConfig], optional
+            The sampling policy of traces. If None, the current trace_sampling is not changed.
+        trace_payload : Optional[TracePayloadConfig], optional
+            The payload policy of traces. If None, the current trace_payload is not changed.
         """
         instance = cls.read()
         with cls._lock:
             if callback_builders is not None:
                 instance.callback_builders = callback_builders
+            if trace_sampling is not None:
+                instance.trace_sampling = trace_sampling
+            if trace_payload is not None:
+                instance.trace_payload = trace_payload
 
     @classmethod
     def add(cls, callback_builder: Optional["WorkerCallbackBuilder"] = None) -> None:
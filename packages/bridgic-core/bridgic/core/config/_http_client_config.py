@@ -5,7 +5,13 @@ This module provides serializable configuration types and utility functions
 for creating HTTP clients (both sync and async).
 """
 
-from typing import Optional, Dict, TypedDict, Literal, Union, Any
+import asyncio
+import copy
+import json
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from threading import Lock
+from typing import Optional, Dict, Tuple, TypedDict, Literal, Union, Any
 import httpx
 
 
@@ -51,6 +57,24 @@ class HttpClientAuthConfig(TypedDict, total=False):
     token: Optional[str]
 
 
+class HttpClientLimitsConfig(TypedDict, total=False):
+    """
+    Configuration for the connection pool of an HTTP client.
+
+    Attributes
+    ----------
+    max_connections : Optional[int]
+        The maximum number of concurrent connections.
+    max_keepalive_connections : Optional[int]
+        The maximum number of idle connections kept alive in the pool.
+    keepalive_expiry : Optional[float]
+        The number of seconds an idle connection is kept alive.
+    """
+    max_connections: Optional[int]
+    max_keepalive_connections: Optional[int]
+    keepalive_expiry: Optional[float]
+
+
 class HttpClientConfig(TypedDict, total=False):
     """
     Serializable configuration for creating an HTTP client.
@@ -66,10 +90,22 @@ class HttpClientConfig(TypedDict, total=False):
         Timeout configuration for the HTTP client.
     auth : Optional[HttpClientAuthConfig]
         Authentication configuration for the HTTP client.
+    limits : Optional[HttpClientLimitsConfig]
+        Connection pool configuration for the HTTP client.
+    http2 : Optional[bool]
+        Whether to enable HTTP/2, which requires the `h2` package (`pip install httpx[http2]`).
+    share : Optional[bool]
+        Whether the clients of the model instances of the same endpoint and configuration are
+        shared process-wide, so that they reuse warm connections; see `get_shared_http_client()`.
+        Off by default, since the shared clients keep no cookies and cannot be closed by their
+        users.
     """
     headers: Optional[Dict[str, str]]
     timeout: Optional[HttpClientTimeoutConfig]
     auth: Optional[HttpClientAuthConfig]
+    limits: Optional[HttpClientLimitsConfig]
+    http2: Optional[bool]
+    share: Optional[bool]
 
 
 def create_http_client_from_config(
@@ -118,6 +154,16 @@ def create_http_client_from_config(
     if config is None:
         return None
 
+    client_kwargs = _build_client_kwargs(config)
+
+    # Create the appropriate client type
+    if is_async:
+        return httpx.AsyncClient(**client_kwargs)
+    else:
+        return httpx.Client(**client_kwargs)
+
+
+def _build_client_kwargs(config: HttpClientConfig) -> Dict[str, Any]:
     # Extract configuration
     headers = config.get("headers")
     timeout_config = config.get("timeout")
@@ -176,9 +222,198 @@ def create_http_client_from_config(
     if auth is not None:
         client_kwargs["auth"] = auth
 
-    # Create the appropriate client type
+    client_kwargs.update(_get_pool_kwargs(config))
+    return client_kwargs
+
+
+# The connection limits of the shared clients when not configured, as large as those of the
+# default clients of the OpenAI SDK.
+_DEFAULT_SHARED_LIMITS: HttpClientLimitsConfig = {
+    "max_connections": 1000,
+    "max_keepalive_connections": 100,
+}
+
+_shared_clients: Dict[Tuple[Optional[str], str, bool], Union[httpx.AsyncClient, httpx.Client]] = {}
+_shared_clients_lock = Lock()
+
+
+def get_shared_http_client(
+    base_url: Optional[str],
+    config: Optional[HttpClientConfig] = None,
+    is_async: bool = True,
+) -> Union[httpx.AsyncClient, httpx.Client]:
+    """
+    Get the HTTP client shared process-wide by all the callers of a base URL with the same
+    configuration, so that they reuse the warm connections of one connection pool instead of
+    each paying new TCP and TLS handshakes.
+
+    The shared clients cannot be closed by their users; see `close_shared_http_clients()`.
+    They keep no cookies, since their users may authenticate differently. A shared asynchronous
+    client can be used from several event loops: it keeps a connection pool per event loop,
+    which is released once its event loop is closed.
+
+    Parameters
+    ----------
+    base_url : Optional[str]
+        The base URL the client is used for.
+    config : Optional[HttpClientConfig]
+        The HTTP client configuration. If None, or if it has no `limits`, the connection pool
+        allows 1000 connections and keeps 100 idle ones alive.
+    is_async : bool
+        If True, gets an `httpx.AsyncClient`. If False, gets an `httpx.Client`.
+        Defaults to True.
+
+    Returns
+    -------
+    Union[httpx.AsyncClient, httpx.Client]
+        The shared HTTP client.
+    """
+    config = copy.deepcopy(config) if config else {}
+    config.pop("share", None)
+    if not config.get("limits"):
+        config["limits"] = dict(_DEFAULT_SHARED_LIMITS)
+    key = (base_url, json.dumps(config, sort_keys=True, default=str), is_async)
+    client = _shared_clients.get(key)
+    if client is None:
+        with _shared_clients_lock:
+            client = _shared_clients.get(key)
+            if client is None:
+                client = _shared_clients[key] = _create_shared_client(config, is_async)
+    return client
+
+
+def close_shared_http_clients() -> None:
+    """
+    Close the shared HTTP clients of the process and their connections, e.g. on shutdown.
+    The clients that are used afterwards are created again.
+
+    The connections of the asynchronous clients are closed on the event loops that opened
+    them: right away for the event loops that are not running, and shortly after for the
+    running ones. The connections of the closed event loops are already unusable.
+    """
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client._close_shared()
+
+
+def _get_pool_kwargs(config: HttpClientConfig) -> Dict[str, Any]:
+    pool_kwargs: Dict[str, Any] = {}
+    limits_config = config.get("limits")
+    if limits_config:
+        default_limits = httpx.Limits()
+        pool_kwargs["limits"] = httpx.Limits(
+            max_connections=limits_config.get("max_connections", default_limits.max_connections),
+            max_keepalive_connections=limits_config.get("max_keepalive_connections", default_limits.max_keepalive_connections),
+            keepalive_expiry=limits_config.get("keepalive_expiry", default_limits.keepalive_expiry),
+        )
+    if config.get("http2"):
+        pool_kwargs["http2"] = True
+    return pool_kwargs
+
+
+def _create_shared_client(config: HttpClientConfig, is_async: bool) -> Union[httpx.AsyncClient, httpx.Client]:
+    client_kwargs = _build_client_kwargs(config)
+    # The cookies set for one user of a shared client must not be sent for the others.
+    client_kwargs["cookies"] = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
     if is_async:
-        return httpx.AsyncClient(**client_kwargs)
-    else:
-        return httpx.Client(**client_kwargs)
+        return _SharedAsyncClient(_get_pool_kwargs(config), **client_kwargs)
+    return _SharedClient(**client_kwargs)
+
+
+class _SharedClient(httpx.Client):
+    """A shared `httpx.Client`, which its users cannot close, even as a context manager."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "_SharedClient":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def _close_shared(self) -> None:
+        super().close()
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    """
+    A shared `httpx.AsyncClient`, which its users cannot close. Its connections are bound to
+    the event loop that opened them, so it sends its requests through a `_PerLoopAsyncTransport`.
+    """
+
+    def __init__(self, pool_kwargs: Dict[str, Any], **client_kwargs: Any):
+        super().__init__(transport=_PerLoopAsyncTransport(pool_kwargs), **client_kwargs)
+
+    async def aclose(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "_SharedAsyncClient":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    def _close_shared(self) -> None:
+        self._transport.close_pools()
+
+
+class _PerLoopAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    A transport sending the requests of each event loop through the connection pool of that
+    event loop. The pools of the event loops that are closed are released on the next request.
+    """
+
+    _pool_kwargs: Dict[str, Any]
+    _transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]"
+    _lock: Lock
+
+    def __init__(self, pool_kwargs: Dict[str, Any]):
+        self._pool_kwargs = pool_kwargs
+        self._transports = weakref.WeakKeyDictionary()
+        self._lock = Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # The connections of the closed event loops are unusable, and keep them alive.
+            closed_loops = [other for other in self._transports if other.is_closed()]
+            stale_transports = [self._transports.pop(closed_loop) for closed_loop in closed_loops]
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(**self._pool_kwargs)
+        for stale_transport in stale_transports:
+            await _aclose_stale_transport(stale_transport)
+        return await transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        # Shared by the users of the client, see `close_pools()`.
+        pass
+
+    def close_pools(self) -> None:
+        """
+        Close the connection pools of all the event loops. The pools of the event loops that are
+        running are closed on their event loop, shortly after.
+        """
+        with self._lock:
+            transports = list(self._transports.items())
+            self._transports.clear()
+        for loop, transport in transports:
+            if loop.is_closed():
+                continue
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+            else:
+                loop.run_until_complete(transport.aclose())
+
 
+async def _aclose_stale_transport(transport: httpx.AsyncHTTPTransport) -> None:
+    # Closing the connections of a closed event loop fails when their transports are scheduled
+    # to be released on that event loop. The pool is emptied first, so they are released anyway
+    # (their sockets are closed when they are collected).
+    try:
+        await transport.aclose()
+    except RuntimeError:
+        pass
@@ -0,0 +1,113 @@
+"""
+Trace sampling and payload policies.
+
+This module provides the policies that decide which top-level runs are traced and how
+much of the worker inputs and outputs are recorded in their spans. They can be set
+globally (via `GlobalSetting`) or per top-level automa (via `RunningOptions`), and
+are honored by all the tracing callbacks of Bridgic.
+"""
+
+import random
+
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class TraceSamplingConfig(BaseModel):
+    """
+    Sampling policy of the traces of top-level automa runs.
+
+    Head sampling decides whether a run is traced when it starts. Tail sampling further
+    buffers the spans of a head-sampled run until it finishes, and only exports them
+    if the run turns out to be failed or slow.
+
+    Attributes
+    ----------
+    head_sample_rate : float
+        The fraction (between 0 and 1) of top-level runs to be traced.
+    tail_sampling : bool
+        Whether to only keep the traces of the runs that are failed or slow.
+    slow_threshold : Optional[float]
+        The duration (in seconds) from which a run is considered slow under tail sampling.
+        If None, no run is kept for being slow.
+    keep_failed : bool
+        Whether to keep the traces of failed runs under tail sampling.
+    """
+    head_sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
+    """The fraction of top-level runs to be traced."""
+
+    tail_sampling: bool = False
+    """Whether to only keep the traces of the runs that are failed or slow."""
+
+    slow_threshold: Optional[float] = None
+    """The duration (in seconds) from which a run is considered slow under tail sampling."""
+
+    keep_failed: bool = True
+    """Whether to keep the traces of failed runs under tail sampling."""
+
+    def sample_head(self) -> bool:
+        """
+        Decide whether a top-level run that is about to start should be traced.
+
+        Returns
+        -------
+        bool
+            True if the run should be traced.
+        """
+        if self.head_sample_rate >= 1.0:
+            return True
+        if self.head_sample_rate <= 0.0:
+            return False
+        return random.random() < self.head_sample_rate
+
+    def should_keep(self, duration: float, failed: bool) -> bool:
+        """
+        Decide whether the trace of a finished top-level run should be exported.
+
+        Parameters
+        ----------
+        duration : float
+            The duration of the run in seconds.
+        failed : bool
+            Whether the run raised an exception.
+
+        Returns
+        -------
+        bool
+            True if the trace should be exported.
+        """
+        if not self.tail_sampling:
+            return True
+        if failed and self.keep_failed:
+            return True
+        return self.slow_threshold is not None and duration >= self.slow_threshold
+
+
+class TracePayloadConfig(BaseModel):
+    """
+    Policy of how the arguments and results of workers are recorded in traces.
+
+    Attributes
+    ----------
+    max_bytes : Optional[int]
+        The maximum size (in bytes of its JSON form) of each recorded argument or result.
+        Larger payloads are replaced with a truncated preview. If None, payloads are not truncated.
+    redact_keys : List[str]
+        The keys (case-insensitive) of the mappings whose values are replaced with `"[REDACTED]"`.
+    max_depth : int
+        The maximum nesting depth to traverse into a payload.
+    max_nodes : Optional[int]
+        The maximum number of values to traverse in each payload. Values beyond the budget are
+        recorded by their `repr`. If None, the traversal is only limited by `max_depth`.
+    """
+    max_bytes: Optional[int] = Field(default=None, gt=0)
+    """The maximum size (in bytes of its JSON form) of each recorded argument or result."""
+
+    redact_keys: List[str] = []
+    """The keys (case-insensitive) of the mappings whose values are redacted."""
+
+    max_depth: int = Field(default=5, ge=1)
+    """The maximum nesting depth to traverse into a payload."""
+
+    max_nodes: Optional[int] = Field(default=None, gt=0)
+    """The maximum number of values to traverse in each payload."""
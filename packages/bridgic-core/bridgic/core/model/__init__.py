@@ -11,9 +11,67 @@ from bridgic.core.model._model_retry import (
     is_recoverable_exception,
     retryable_model_call,
 )
+from bridgic.core.model._circuit_breaker import (
+    CircuitBreakerConfig,
+    CircuitBreaker,
+    CircuitState,
+)
+from bridgic.core.model._rate_limiter import (
+    RateLimitConfig,
+    RateLimiter,
+)
+from bridgic.core.model._request_hedging import (
+    HedgingConfig,
+    RequestHedger,
+)
+from bridgic.core.model._llm_metrics import (
+    LlmMetricsRegistry,
+    LlmCallTracker,
+)
+from bridgic.core.model._llm_cache import (
+    LlmCache,
+    InMemoryLlmCache,
+    SqliteLlmCache,
+    compute_llm_cache_key,
+)
+from bridgic.core.model._conversion_memo import (
+    ConversionMemo,
+    message_fingerprint,
+    tool_fingerprint,
+)
+from bridgic.core.model._tokenizer import (
+    Tokenizer,
+    HeuristicTokenizer,
+    BpeTokenizer,
+    TokenCounter,
+    set_default_tokenizer,
+    get_token_counter,
+    count_tokens,
+)
+from bridgic.core.model._constraint_cache import (
+    ConstraintCache,
+    CompiledConstraint,
+)
+from bridgic.core.model._incremental_json import (
+    IncrementalJsonParser,
+    StructuredOutputStream,
+)
+from bridgic.core.model._cached_llm import CachedLlm
+from bridgic.core.model._coalescing_llm import CoalescingLlm
+from bridgic.core.model._load_balanced_llm import LoadBalancedLlm, LoadBalancePolicy
+from bridgic.core.model._cascade_llm import CascadeLlm, EscalationPredicate
+from bridgic.core.model._priority_scheduler import (
+    RequestPriority,
+    PrioritySchedulerConfig,
+    PriorityScheduler,
+    ScheduledLlm,
+    request_priority,
+    get_request_priority,
+)
 from bridgic.core.model._model_error import (
     ModelRetryLimitError,
     ModelUnrecoverableError,
+    ModelCircuitOpenError,
 )
 
 __all__ = [
@@ -21,6 +79,46 @@ __all__ = [
     "retryable_model_call",
     "is_recoverable_exception",
     "RetryPolicyConfig",
+    "CircuitBreakerConfig",
+    "CircuitBreaker",
+    "CircuitState",
+    "RateLimitConfig",
+    "RateLimiter",
+    "HedgingConfig",
+    "RequestHedger",
     "ModelRetryLimitError",
     "ModelUnrecoverableError",
+    "ModelCircuitOpenError",
+    "LlmMetricsRegistry",
+    "LlmCallTracker",
+    "CachedLlm",
+    "CoalescingLlm",
+    "LoadBalancedLlm",
+    "LoadBalancePolicy",
+    "CascadeLlm",
+    "EscalationPredicate",
+    "RequestPriority",
+    "PrioritySchedulerConfig",
+    "PriorityScheduler",
+    "ScheduledLlm",
+    "request_priority",
+    "get_request_priority",
+    "LlmCache",
+    "InMemoryLlmCache",
+    "SqliteLlmCache",
+    "compute_llm_cache_key",
+    "ConversionMemo",
+    "message_fingerprint",
+    "tool_fingerprint",
+    "Tokenizer",
+    "HeuristicTokenizer",
+    "BpeTokenizer",
+    "TokenCounter",
+    "set_default_tokenizer",
+    "get_token_counter",
+    "count_tokens",
+    "ConstraintCache",
+    "CompiledConstraint",
+    "IncrementalJsonParser",
+    "StructuredOutputStream",
 ]
\ No newline at end of file
@@ -0,0 +1,201 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+from bridgic.core.model._base_llm import BaseLlm
+from bridgic.core.model._llm_cache import LlmCache, InMemoryLlmCache, compute_llm_cache_key
+from bridgic.core.model.protocols import StructuredOutput, ToolSelection, Constraint
+from bridgic.core.model.types import *
+
+
+class CachedLlm(BaseLlm, StructuredOutput, ToolSelection):
+    """
+    A wrapper of a `BaseLlm` that caches the results of its calls by their content.
+
+    The results of `chat`/`achat`, `structured_output`/`astructured_output` and
+    `select_tool`/`aselect_tool` are keyed on a canonical hash of the messages, the tools,
+    the constraint schema, the model configuration, the endpoint (the `api_base` of the
+    wrapped LLM) and the per-call parameters (see
+    `compute_llm_cache_key()`), so that identical requests (such as those issued by
+    development replays, evaluation sweeps or repeated observation prompts) are answered
+    from the cache instead of the model. Streaming calls are always forwarded to the model.
+
+    Parameters
+    ----------
+    llm : BaseLlm
+        The wrapped LLM. It must implement `StructuredOutput` / `ToolSelection` for the
+        corresponding methods to be used.
+    cache : Optional[LlmCache]
+        The store of the cached results. If None, an `InMemoryLlmCache` is used.
+    ttl : Optional[float]
+        The time-to-live of the cached results in seconds. If None, they never expire.
+    only_deterministic : bool, default=False
+        If True, only the calls at temperature 0 are cached. The temperature is taken from
+        the call parameters, falling back to the configuration of the wrapped LLM.
+
+    Examples
+    --------
+    ```python
+    llm = CachedLlm(
+        OpenAILlm(api_key=api_key),
+        cache=SqliteLlmCache(".cache/llm.sqlite"),
+        only_deterministic=True,
+    )
+    response = llm.chat(messages=messages, model="gpt-4o", temperature=0)
+    ```
+    """
+
+    _llm: BaseLlm
+    _cache: LlmCache
+    _ttl: Optional[float]
+    _only_deterministic: bool
+    _hits: int
+    _misses: int
+
+    def __init__(
+        self,
+        llm: BaseLlm,
+        cache: Optional[LlmCache] = None,
+        ttl: Optional[float] = None,
+        only_deterministic: bool = False,
+    ):
+        self._llm = llm
+        self._cache = cache if cache is not None else InMemoryLlmCache()
+        self._ttl = ttl
+        self._only_deterministic = only_deterministic
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def llm(self) -> BaseLlm:
+        """The wrapped LLM."""
+        return self._llm
+
+    @property
+    def cache(self) -> LlmCache:
+        """The store of the cached results."""
+        return self._cache
+
+    @property
+    def hits(self) -> int:
+        """The number of calls answered from the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """The number of cacheable calls forwarded to the model."""
+        return self._misses
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        key = self._get_cache_key("chat", messages, **kwargs)
+        found, result = self._lookup(key)
+        if not found:
+            result = self._llm.chat(messages=messages, **kwargs)
+            self._store(key, result)
+        return result
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        key = self._get_cache_key("chat", messages, **kwargs)
+        found, result = self._lookup(key)
+        if not found:
+            result = await self._llm.achat(messages=messages, **kwargs)
+            self._store(key, result)
+        return result
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        return self._llm.stream(messages=messages, **kwargs)
+
+    def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        return self._llm.astream(messages=messages, **kwargs)
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        key = self._get_cache_key("structured_output", messages, constraint=constraint, **kwargs)
+        found, result = self._lookup(key)
+        if not found:
+            result = self._llm.structured_output(messages=messages, constraint=constraint, **kwargs)
+            self._store(key, result)
+        return result
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        key = self._get_cache_key("structured_output", messages, constraint=constraint, **kwargs)
+        found, result = self._lookup(key)
+        if not found:
+            result = await self._llm.astructured_output(messages=messages, constraint=constraint, **kwargs)
+            self._store(key, result)
+        return result
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        key = self._get_cache_key("select_tool", messages, tools=tools, **kwargs)
+        found, result = self._lookup(key)
+        if not found:
+            result = self._llm.select_tool(messages=messages, tools=tools, **kwargs)
+            self._store(key, result)
+        return result
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        key = self._get_cache_key("select_tool", messages, tools=tools, **kwargs)
+        found, result = self._lookup(key)
+        if not found:
+            result = await self._llm.aselect_tool(messages=messages, tools=tools, **kwargs)
+            self._store(key, result)
+        return result
+
+    def _get_cache_key(
+        self,
+        operation: str,
+        messages: List[Message],
+        tools: Optional[List[Tool]] = None,
+        constraint: Optional[Constraint] = None,
+        **kwargs: Any,
+    ) -> Optional[str]:
+        configuration = self._get_configuration()
+        if self._only_deterministic:
+            temperature = kwargs.get("temperature")
+            if temperature is None and configuration is not None:
+                temperature = configuration.get("temperature")
+            if temperature != 0:
+                return None
+        return compute_llm_cache_key(
+            operation,
+            messages,
+            tools=tools,
+            constraint=constraint,
+            configuration=configuration,
+            endpoint=getattr(self._llm, "api_base", None),
+            **kwargs,
+        )
+
+    def _get_configuration(self) -> Optional[Dict[str, Any]]:
+        configuration = getattr(self._llm, "configuration", None)
+        if isinstance(configuration, BaseModel):
+            return configuration.model_dump(mode="json")
+        return None
+
+    def _lookup(self, key: Optional[str]) -> Tuple[bool, Any]:
+        if key is None:
+            return False, None
+        found, result = self._cache.get(key)
+        if found:
+            self._hits += 1
+        else:
+            self._misses += 1
+        return found, result
+
+    def _store(self, key: Optional[str], result: Any) -> None:
+        if key is not None:
+            self._cache.set(key, result, ttl=self._ttl)
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {
+            "llm": self._llm,
+            "cache": self._cache,
+            "ttl": self._ttl,
+            "only_deterministic": self._only_deterministic,
+        }
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(
+            llm=state_dict["llm"],
+            cache=state_dict["cache"],
+            ttl=state_dict["ttl"],
+            only_deterministic=state_dict["only_deterministic"],
+        )
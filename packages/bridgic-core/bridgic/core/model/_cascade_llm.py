@@ -0,0 +1,333 @@
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from bridgic.core.model._base_llm import BaseLlm
+from bridgic.core.model.protocols import StructuredOutput, ToolSelection, Constraint
+from bridgic.core.model.types import *
+from bridgic.core.utils._inspect_tools import load_qualified_class_or_func
+
+
+EscalationPredicate = Callable[[str, Any], bool]
+"""
+A predicate deciding whether the result of a tier must be escalated to the next tier. It
+receives the name of the operation (e.g. `"astructured_output"`) and the result of the tier
+(a `Response`, a structured output, or a tuple of the tool calls and the response text).
+"""
+
+
+class _Tier:
+    __slots__ = ("index", "llm", "name", "requests", "accepted", "escalations")
+
+    def __init__(self, index: int, llm: BaseLlm):
+        self.index = index
+        self.llm = llm
+        self.name = getattr(llm, "api_base", None) or f"tier-{index}"
+        self.requests = 0
+        self.accepted = 0
+        self.escalations: Dict[str, int] = {"error": 0, "validation": 0, "confidence": 0, "predicate": 0}
+
+
+class CascadeLlm(BaseLlm, StructuredOutput, ToolSelection):
+    """
+    A LLM that chains several models from the cheapest to the strongest (e.g. a small local
+    model served by vLLM, then a hosted frontier model), so that the requests the cheap model
+    answers well are not paid at the price of the strong one.
+
+    Each request is sent to the first tier, and escalated to the next tier when:
+
+    - the call fails, e.g. the structured output does not validate against its constraint;
+    - the tool calls name an unknown tool or miss a required argument;
+    - the `confidence_field` of a structured output is a boolean that is false (a self-check),
+      or a number below `min_confidence`;
+    - the `should_escalate` predicate returns True.
+
+    The result of the last tier is returned as is, and its errors are raised. Streams cannot be
+    checked before being consumed, so they are only escalated when a tier fails before yielding
+    its first chunk.
+
+    Parameters
+    ----------
+    llms : List[BaseLlm]
+        The LLM instances of the tiers, from the cheapest to the strongest. The tiers not
+        implementing `StructuredOutput` / `ToolSelection` are skipped by the corresponding methods.
+    confidence_field : Optional[str]
+        The name of the field of the structured outputs holding the confidence or the self-check
+        of the model. If None, or if an output has no such field, the confidence is not checked.
+    min_confidence : float, default=0.5
+        The minimum numerical confidence of a structured output to be accepted.
+    should_escalate : Optional[EscalationPredicate]
+        An additional condition of escalating the result of a tier. It is serialized by its
+        qualified name, so a cascade with a lambda or a local function cannot be serialized.
+
+    Examples
+    --------
+    ```python
+    llm = CascadeLlm(
+        [VllmServerLlm(api_base=local_api_base, api_key=local_api_key), OpenAILlm(api_key=api_key)],
+        confidence_field="confidence",
+        min_confidence=0.7,
+    )
+    ```
+    """
+
+    _tiers: List[_Tier]
+    _confidence_field: Optional[str]
+    _min_confidence: float
+    _should_escalate: Optional[EscalationPredicate]
+    _lock: Lock
+
+    def __init__(
+        self,
+        llms: List[BaseLlm],
+        confidence_field: Optional[str] = None,
+        min_confidence: float = 0.5,
+        should_escalate: Optional[EscalationPredicate] = None,
+    ):
+        if not llms:
+            raise ValueError("At least one LLM instance is required for a cascade.")
+        self._tiers = [_Tier(index, llm) for index, llm in enumerate(llms)]
+        self._confidence_field = confidence_field
+        self._min_confidence = min_confidence
+        self._should_escalate = should_escalate
+        self._lock = Lock()
+
+    @property
+    def llms(self) -> List[BaseLlm]:
+        """The LLM instances of the tiers."""
+        return [tier.llm for tier in self._tiers]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Export the statistics of the tiers.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            For each tier, its `name`, the number of `requests` it received, the number of them
+            it `accepted`, its `hit_rate` (the ratio of the two), and its `escalations` by reason
+            (`error`, `validation`, `confidence` and `predicate`).
+        """
+        with self._lock:
+            return [
+                {
+                    "name": tier.name,
+                    "requests": tier.requests,
+                    "accepted": tier.accepted,
+                    "hit_rate": tier.accepted / tier.requests if tier.requests else 0.0,
+                    "escalations": dict(tier.escalations),
+                }
+                for tier in self._tiers
+            ]
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        return self._cascade("chat", lambda llm: llm.chat(messages=messages, **kwargs))
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        return await self._acascade("achat", lambda llm: llm.achat(messages=messages, **kwargs))
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        tiers = self._tiers
+        for tier in tiers:
+            self._record_request(tier)
+            chunks = tier.llm.stream(messages=messages, **kwargs)
+            try:
+                first_chunk = next(chunks)
+            except StopIteration:
+                self._record_acceptance(tier)
+                return
+            except Exception:
+                if tier is tiers[-1]:
+                    raise
+                self._record_escalation(tier, "error")
+                continue
+            self._record_acceptance(tier)
+            yield first_chunk
+            yield from chunks
+            return
+
+    async def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        tiers = self._tiers
+        for tier in tiers:
+            self._record_request(tier)
+            chunks = tier.llm.astream(messages=messages, **kwargs).__aiter__()
+            try:
+                first_chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                self._record_acceptance(tier)
+                return
+            except Exception:
+                if tier is tiers[-1]:
+                    raise
+                self._record_escalation(tier, "error")
+                continue
+            self._record_acceptance(tier)
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+            return
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        return self._cascade(
+            "structured_output",
+            lambda llm: llm.structured_output(messages=messages, constraint=constraint, **kwargs),
+            protocol=StructuredOutput,
+        )
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        return await self._acascade(
+            "astructured_output",
+            lambda llm: llm.astructured_output(messages=messages, constraint=constraint, **kwargs),
+            protocol=StructuredOutput,
+        )
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        return self._cascade(
+            "select_tool",
+            lambda llm: llm.select_tool(messages=messages, tools=tools, **kwargs),
+            protocol=ToolSelection,
+            tools=tools,
+        )
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        return await self._acascade(
+            "aselect_tool",
+            lambda llm: llm.aselect_tool(messages=messages, tools=tools, **kwargs),
+            protocol=ToolSelection,
+            tools=tools,
+        )
+
+    def _cascade(
+        self,
+        operation: str,
+        call: Callable[[BaseLlm], Any],
+        protocol: Optional[type] = None,
+        tools: Optional[List[Tool]] = None,
+    ) -> Any:
+        tiers = self._get_tiers(operation, protocol)
+        for tier in tiers:
+            self._record_request(tier)
+            try:
+                result = call(tier.llm)
+            except Exception as e:
+                if tier is tiers[-1]:
+                    raise
+                self._record_escalation(tier, _get_error_reason(e))
+                continue
+            if self._accept(tier, tier is tiers[-1], operation, result, tools):
+                return result
+
+    async def _acascade(
+        self,
+        operation: str,
+        call: Callable[[BaseLlm], Awaitable[Any]],
+        protocol: Optional[type] = None,
+        tools: Optional[List[Tool]] = None,
+    ) -> Any:
+        tiers = self._get_tiers(operation, protocol)
+        for tier in tiers:
+            self._record_request(tier)
+            try:
+                result = await call(tier.llm)
+            except Exception as e:
+                if tier is tiers[-1]:
+                    raise
+                self._record_escalation(tier, _get_error_reason(e))
+                continue
+            if self._accept(tier, tier is tiers[-1], operation, result, tools):
+                return result
+
+    def _get_tiers(self, operation: str, protocol: Optional[type]) -> List[_Tier]:
+        if protocol is None:
+            return self._tiers
+        tiers = [tier for tier in self._tiers if isinstance(tier.llm, protocol)]
+        if not tiers:
+            raise TypeError(f"No LLM of the cascade supports '{operation}'.")
+        return tiers
+
+    def _accept(self, tier: _Tier, is_last: bool, operation: str, result: Any, tools: Optional[List[Tool]]) -> bool:
+        if not is_last:
+            reason = self._get_escalation_reason(operation, result, tools)
+            if reason is not None:
+                self._record_escalation(tier, reason)
+                return False
+        self._record_acceptance(tier)
+        return True
+
+    def _get_escalation_reason(self, operation: str, result: Any, tools: Optional[List[Tool]]) -> Optional[str]:
+        if tools is not None and not _are_valid_tool_calls(result[0], tools):
+            return "validation"
+        if self._confidence_field is not None and not self._is_confident(result):
+            return "confidence"
+        if self._should_escalate is not None and self._should_escalate(operation, result):
+            return "predicate"
+        return None
+
+    def _is_confident(self, result: Any) -> bool:
+        if isinstance(result, BaseModel):
+            confidence = getattr(result, self._confidence_field, None)
+        elif isinstance(result, dict):
+            confidence = result.get(self._confidence_field)
+        else:
+            return True
+        if confidence is None:
+            return True
+        if isinstance(confidence, bool):
+            return confidence
+        if isinstance(confidence, (int, float)):
+            return confidence >= self._min_confidence
+        return True
+
+    def _record_request(self, tier: _Tier) -> None:
+        with self._lock:
+            tier.requests += 1
+
+    def _record_acceptance(self, tier: _Tier) -> None:
+        with self._lock:
+            tier.accepted += 1
+
+    def _record_escalation(self, tier: _Tier, reason: str) -> None:
+        with self._lock:
+            tier.escalations[reason] += 1
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        should_escalate = self._should_escalate
+        if should_escalate is not None:
+            qualified_name = should_escalate.__module__ + "." + should_escalate.__qualname__
+            if "<" in should_escalate.__qualname__ or load_qualified_class_or_func(qualified_name) is not should_escalate:
+                raise ValueError(
+                    f"The escalation predicate '{qualified_name}' cannot be serialized, "
+                    f"only the functions importable by their qualified names can."
+                )
+            should_escalate = qualified_name
+        return {
+            "llms": self.llms,
+            "confidence_field": self._confidence_field,
+            "min_confidence": self._min_confidence,
+            "should_escalate": should_escalate,
+        }
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        state_dict = dict(state_dict)
+        if isinstance(state_dict.get("should_escalate"), str):
+            state_dict["should_escalate"] = load_qualified_class_or_func(state_dict["should_escalate"])
+        self.__init__(**state_dict)
+
+
+def _get_error_reason(error: Exception) -> str:
+    # Outputs that do not parse or validate (including pydantic's `ValidationError`) are
+    # reported apart from the failures of the calls.
+    return "validation" if isinstance(error, ValueError) else "error"
+
+
+def _are_valid_tool_calls(tool_calls: List[ToolCall], tools: List[Tool]) -> bool:
+    tools_by_name = {tool.name: tool for tool in tools}
+    for tool_call in tool_calls:
+        tool = tools_by_name.get(tool_call.name)
+        if tool is None:
+            return False
+        required = tool.parameters.get("required", [])
+        if any(name not in tool_call.arguments for name in required):
+            return False
+    return True
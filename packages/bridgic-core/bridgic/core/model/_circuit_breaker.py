@@ -0,0 +1,163 @@
+import time
+
+from threading import Lock
+from typing import Any, ClassVar, Dict, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+CircuitState = Literal["closed", "open", "half_open"]
+"""The states of a circuit breaker."""
+
+
+class CircuitBreakerConfig(BaseModel):
+    """
+    Configuration of the circuit breaker of the requests to a model endpoint.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        The number of consecutive failed requests (with recoverable errors such as timeouts,
+        connection errors or 5xx responses) after which the circuit opens.
+    recovery_time : float
+        The number of seconds the circuit stays open before a probe request is let through.
+    """
+    failure_threshold: int = Field(default=5, ge=1)
+    recovery_time: float = Field(default=30.0, gt=0.0)
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker of the requests to one endpoint, which fails the requests fast while the
+    endpoint is down instead of letting each of them wait for its own timeouts and retries.
+
+    The circuit opens after `failure_threshold` consecutive failed requests. While it is open,
+    requests are rejected without being sent. After `recovery_time` seconds, the circuit is
+    half-open: a single probe request is let through, and its outcome closes the circuit or
+    opens it again.
+
+    The circuit breakers are shared by all the LLM instances of the same endpoint, see
+    `CircuitBreaker.shared()`. LLM implementations that have a `circuit_breaker` attribute (a
+    `CircuitBreakerConfig`) are guarded automatically by `retryable_model_call`.
+
+    Parameters
+    ----------
+    config : CircuitBreakerConfig
+        The configuration of the circuit breaker.
+    """
+
+    _registry: ClassVar[Dict[Optional[str], "CircuitBreaker"]] = {}
+    _registry_lock: ClassVar[Lock] = Lock()
+
+    _config: CircuitBreakerConfig
+    _state: CircuitState
+    _consecutive_failures: int
+    _opened_at: float
+    _probing: bool
+    _rejections: int
+    _lock: Lock
+
+    def __init__(self, config: CircuitBreakerConfig):
+        self._config = config
+        self._state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejections = 0
+        self._lock = Lock()
+
+    @classmethod
+    def shared(cls, endpoint: Optional[str], config: CircuitBreakerConfig) -> "CircuitBreaker":
+        """
+        Get the circuit breaker shared by all the callers of an endpoint.
+
+        Parameters
+        ----------
+        endpoint : Optional[str]
+            The base URL of the endpoint.
+        config : CircuitBreakerConfig
+            The configuration. If the shared circuit breaker was created with a different
+            configuration, it is replaced with a new one.
+
+        Returns
+        -------
+        CircuitBreaker
+            The shared circuit breaker.
+        """
+        breaker = cls._registry.get(endpoint)
+        if breaker is None or breaker._config != config:
+            with cls._registry_lock:
+                breaker = cls._registry.get(endpoint)
+                if breaker is None or breaker._config != config:
+                    breaker = cls._registry[endpoint] = cls(config)
+        return breaker
+
+    @property
+    def config(self) -> CircuitBreakerConfig:
+        """The configuration of the circuit breaker."""
+        return self._config
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state of the circuit."""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Tell whether a request may be sent now. A request that is allowed must report its
+        outcome with `record_success()` or `record_failure()`, or `record_abandon()` if it has
+        no outcome (e.g. it was cancelled).
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self._rejections += 1
+            return False
+
+    def record_success(self) -> None:
+        """Report that an allowed request succeeded."""
+        with self._lock:
+            self._state = "closed"
+            self._consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Report that an allowed request failed because of the endpoint."""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._probing or self._consecutive_failures >= self._config.failure_threshold:
+                self._state = "open"
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def record_abandon(self) -> None:
+        """Report that an allowed request ended without telling anything about the endpoint."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Export the current state of the circuit breaker.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The `state` of the circuit, the `consecutive_failures` and the number of
+            `rejections` of requests.
+        """
+        with self._lock:
+            return {
+                "state": self._current_state(time.monotonic()),
+                "consecutive_failures": self._consecutive_failures,
+                "rejections": self._rejections,
+            }
+
+    def _current_state(self, now: float) -> CircuitState:
+        # Must be called with the lock held.
+        if self._state == "open" and now - self._opened_at >= self._config.recovery_time:
+            return "half_open"
+        return self._state
@@ -0,0 +1,157 @@
+import asyncio
+import copy
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+from bridgic.core.model._base_llm import BaseLlm
+from bridgic.core.model._llm_cache import compute_llm_cache_key
+from bridgic.core.model.protocols import StructuredOutput, ToolSelection, Constraint
+from bridgic.core.model.types import *
+
+
+class _Flight:
+    """
+    An in-flight request to the wrapped LLM, shared by all the callers awaiting its result.
+    """
+    __slots__ = ("task", "waiters", "consumed", "pristine_result")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+        self.consumed = False
+        self.pristine_result = None
+
+
+class CoalescingLlm(BaseLlm, StructuredOutput, ToolSelection):
+    """
+    A wrapper of a `BaseLlm` that deduplicates concurrent identical requests (single-flight).
+
+    When an `achat`, `astructured_output` or `aselect_tool` request is issued while an identical
+    one (keyed like `CachedLlm`, see `compute_llm_cache_key()`) is still in flight, the new
+    caller does not send another request, but awaits the result of the in-flight one. Nothing
+    is kept once the request finishes, so no cache is involved. It can be combined with
+    `CachedLlm` to also reuse the results of finished requests.
+
+    - If the shared request fails, all its callers receive the same exception.
+    - If a caller is cancelled, the shared request keeps running for the other callers; it is
+      only cancelled when all of its callers are cancelled.
+    - The first caller receives the result itself, while the others receive deep copies, so
+      that callers mutating their results never affect each other.
+
+    Synchronous and streaming calls are forwarded to the wrapped LLM as is.
+
+    Parameters
+    ----------
+    llm : BaseLlm
+        The wrapped LLM. It must implement `StructuredOutput` / `ToolSelection` for the
+        corresponding methods to be used.
+
+    Examples
+    --------
+    ```python
+    llm = CoalescingLlm(OpenAILlm(api_key=api_key))
+    # Only one request is sent to the server.
+    responses = await asyncio.gather(*[llm.achat(messages=messages, model="gpt-4o") for _ in range(8)])
+    ```
+    """
+
+    _llm: BaseLlm
+    _inflight: Dict[Tuple[int, str], _Flight]
+    _coalesced_count: int
+
+    def __init__(self, llm: BaseLlm):
+        self._llm = llm
+        self._inflight = {}
+        self._coalesced_count = 0
+
+    @property
+    def llm(self) -> BaseLlm:
+        """The wrapped LLM."""
+        return self._llm
+
+    @property
+    def coalesced_count(self) -> int:
+        """The number of requests that were served by an identical in-flight request."""
+        return self._coalesced_count
+
+    @property
+    def inflight_count(self) -> int:
+        """The number of distinct requests currently in flight."""
+        return len(self._inflight)
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        return self._llm.chat(messages=messages, **kwargs)
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        key = self._get_key("chat", messages, **kwargs)
+        return await self._coalesce(key, lambda: self._llm.achat(messages=messages, **kwargs))
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        return self._llm.stream(messages=messages, **kwargs)
+
+    def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        return self._llm.astream(messages=messages, **kwargs)
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        return self._llm.structured_output(messages=messages, constraint=constraint, **kwargs)
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        key = self._get_key("structured_output", messages, constraint=constraint, **kwargs)
+        return await self._coalesce(key, lambda: self._llm.astructured_output(messages=messages, constraint=constraint, **kwargs))
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        return self._llm.select_tool(messages=messages, tools=tools, **kwargs)
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        key = self._get_key("select_tool", messages, tools=tools, **kwargs)
+        return await self._coalesce(key, lambda: self._llm.aselect_tool(messages=messages, tools=tools, **kwargs))
+
+    def _get_key(self, operation: str, messages: List[Message], **kwargs: Any) -> Tuple[int, str]:
+        configuration = getattr(self._llm, "configuration", None)
+        configuration = configuration.model_dump(mode="json") if isinstance(configuration, BaseModel) else None
+        key = compute_llm_cache_key(operation, messages, configuration=configuration, **kwargs)
+        # Requests are only shared within the same event loop.
+        return id(asyncio.get_running_loop()), key
+
+    async def _coalesce(self, key: Tuple[int, str], call: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._on_flight_done(key, flight))
+        else:
+            self._coalesced_count += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                flight.waiters -= 1
+                if flight.waiters == 0:
+                    # All the callers are gone, so is the need of the request.
+                    flight.task.cancel()
+                    self._finish_flight(key, flight)
+            raise
+
+        if flight.consumed:
+            return copy.deepcopy(flight.pristine_result)
+        flight.consumed = True
+        return result
+
+    def _on_flight_done(self, key: Tuple[int, str], flight: _Flight) -> None:
+        self._finish_flight(key, flight)
+        if flight.waiters > 1 and not flight.task.cancelled() and flight.task.exception() is None:
+            # Keep an untouched copy for the other callers before any of them gets the result.
+            flight.pristine_result = copy.deepcopy(flight.task.result())
+
+    def _finish_flight(self, key: Tuple[int, str], flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {"llm": self._llm}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(llm=state_dict["llm"])
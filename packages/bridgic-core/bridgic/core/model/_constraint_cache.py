@@ -0,0 +1,145 @@
+import copy
+import json
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar, Union
+from pydantic import TypeAdapter
+
+from bridgic.core.model.protocols import Constraint, JsonSchema, PydanticModel
+
+
+T = TypeVar("T")
+
+
+class CompiledConstraint(Generic[T]):
+    """
+    The request payload of a JSON constraint, and the validation of the outputs generated
+    under it, computed once per constraint by a `ConstraintCache`.
+
+    The payload is shared between the calls and must not be modified.
+    """
+
+    __slots__ = ("payload", "_adapter")
+
+    payload: T
+    """The provider-specific request payload of the constraint."""
+    _adapter: Optional[TypeAdapter]
+
+    def __init__(self, payload: T, adapter: Optional[TypeAdapter] = None):
+        self.payload = payload
+        self._adapter = adapter
+
+    def validate_json(self, text: str) -> Any:
+        """
+        Parse and validate an output generated under the constraint.
+
+        Parameters
+        ----------
+        text : str
+            The JSON text of the output.
+
+        Returns
+        -------
+        Any
+            An instance of the model of a `PydanticModel` constraint, or the parsed JSON
+            value of a `JsonSchema` constraint.
+        """
+        if self._adapter is None:
+            return json.loads(text)
+        return self._adapter.validate_json(text)
+
+
+class ConstraintCache(Generic[T]):
+    """
+    A cache of the compilation of `PydanticModel` and `JsonSchema` constraints to the request
+    payloads of a provider, so that the JSON schema of a constraint used on every call (e.g.
+    the output model of an agent step) is only generated and adjusted once.
+
+    The compilations are keyed by the model class of a `PydanticModel`, and by the content
+    of the schema of a `JsonSchema`. The compilation function receives a copy of the schema
+    of a `JsonSchema`, which it may modify.
+
+    Parameters
+    ----------
+    compile : Callable[[Union[PydanticModel, JsonSchema]], T]
+        The compilation of a constraint to its request payload.
+    max_entries : int, default=256
+        The number of compilations remembered; the least recently used ones are forgotten.
+    """
+
+    _compile: Callable[[Union[PydanticModel, JsonSchema]], T]
+    _max_entries: int
+    _entries: "OrderedDict[Hashable, CompiledConstraint[T]]"
+    _hits: int
+    _misses: int
+    _lock: Lock
+
+    def __init__(self, compile: Callable[[Union[PydanticModel, JsonSchema]], T], max_entries: int = 256):
+        self._compile = compile
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    @property
+    def hits(self) -> int:
+        """The number of compilations reused."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """The number of compilations computed."""
+        return self._misses
+
+    def get(self, constraint: Constraint) -> CompiledConstraint[T]:
+        """
+        Get the compilation of a constraint, compiling it on first use.
+
+        Parameters
+        ----------
+        constraint : Constraint
+            A `PydanticModel` or a `JsonSchema` constraint.
+
+        Returns
+        -------
+        CompiledConstraint[T]
+            The request payload and the output validation of the constraint.
+
+        Raises
+        ------
+        ValueError
+            If the constraint is not a `PydanticModel` or a `JsonSchema`.
+        """
+        if isinstance(constraint, PydanticModel):
+            key: Hashable = constraint.model
+        elif isinstance(constraint, JsonSchema):
+            key = json.dumps(constraint.schema_dict, sort_keys=True)
+        else:
+            raise ValueError(f"Only JSON constraints can be compiled, got '{constraint.constraint_type}'.")
+
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return compiled
+            self._misses += 1
+
+        if isinstance(constraint, PydanticModel):
+            compiled = CompiledConstraint(self._compile(constraint), TypeAdapter(constraint.model))
+        else:
+            compiled = CompiledConstraint(
+                self._compile(JsonSchema(schema_dict=copy.deepcopy(constraint.schema_dict)))
+            )
+        with self._lock:
+            self._entries[key] = compiled
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        """Forget all the compilations."""
+        with self._lock:
+            self._entries.clear()
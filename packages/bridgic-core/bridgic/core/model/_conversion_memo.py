@@ -0,0 +1,140 @@
+import weakref
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Generic, List, Tuple, TypeVar
+
+from bridgic.core.model.types import Message, TextBlock, Tool, ToolCallBlock, ToolResultBlock
+
+
+T = TypeVar("T")
+
+
+class ConversionMemo(Generic[T]):
+    """
+    A memo of the conversions of `Message` / `Tool` objects to the format of a provider, so
+    that the conversation history and the tools sent on every call of an agent loop are only
+    converted once.
+
+    The conversions are remembered per object identity, and are reused only while the
+    fingerprint of the object is unchanged, so that an object modified since its conversion
+    is converted again. The fingerprint copies the top level of the dictionaries it covers
+    (e.g. the arguments of a tool call); modifying their nested values in place is not
+    detected.
+
+    The converted values are shared between the calls and must not be modified.
+
+    Parameters
+    ----------
+    convert : Callable[[Any], T]
+        The conversion of an object.
+    fingerprint : Callable[[Any], Any]
+        A cheap snapshot of the content of an object, compared with `==`.
+    max_entries : int, default=4096
+        The number of conversions remembered; the least recently used ones are forgotten.
+    """
+
+    _convert: Callable[[Any], T]
+    _fingerprint: Callable[[Any], Any]
+    _max_entries: int
+    _entries: "OrderedDict[int, Tuple[weakref.ref, Any, T]]"
+    _hits: int
+    _misses: int
+    _lock: Lock
+
+    def __init__(self, convert: Callable[[Any], T], fingerprint: Callable[[Any], Any], max_entries: int = 4096):
+        self._convert = convert
+        self._fingerprint = fingerprint
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    @property
+    def hits(self) -> int:
+        """The number of conversions reused."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """The number of conversions computed."""
+        return self._misses
+
+    def __call__(self, obj: Any) -> T:
+        return self.convert_all([obj])[0]
+
+    def convert_all(self, objs: List[Any]) -> List[T]:
+        """
+        Convert a list of objects, reusing the remembered conversions.
+
+        Parameters
+        ----------
+        objs : List[Any]
+            The objects to convert.
+
+        Returns
+        -------
+        List[T]
+            The conversions of the objects, in order.
+        """
+        fingerprints = [self._fingerprint(obj) for obj in objs]
+        values: List[Any] = []
+        missing: List[int] = []
+        entries = self._entries
+        with self._lock:
+            for index, obj in enumerate(objs):
+                key = id(obj)
+                entry = entries.get(key)
+                # The identity of a collected object may be reused by a new one.
+                if entry is not None and entry[0]() is obj and entry[1] == fingerprints[index]:
+                    entries.move_to_end(key)
+                    values.append(entry[2])
+                else:
+                    values.append(None)
+                    missing.append(index)
+            self._hits += len(objs) - len(missing)
+            self._misses += len(missing)
+        if not missing:
+            return values
+
+        converted = []
+        for index in missing:
+            obj = objs[index]
+            values[index] = self._convert(obj)
+            try:
+                converted.append((id(obj), weakref.ref(obj), fingerprints[index], values[index]))
+            except TypeError:
+                pass
+        with self._lock:
+            for key, ref, fingerprint, value in converted:
+                entries[key] = (ref, fingerprint, value)
+                entries.move_to_end(key)
+            while len(entries) > self._max_entries:
+                entries.popitem(last=False)
+        return values
+
+    def clear(self) -> None:
+        """Forget all the conversions."""
+        with self._lock:
+            self._entries.clear()
+
+
+def message_fingerprint(message: Message) -> Any:
+    """The fingerprint of the content of a message, for `ConversionMemo`."""
+    return (message.role, dict(message.extras), [_block_fingerprint(block) for block in message.blocks])
+
+
+def tool_fingerprint(tool: Tool) -> Any:
+    """The fingerprint of the content of a tool, for `ConversionMemo`."""
+    return (tool.name, tool.description, dict(tool.parameters))
+
+
+def _block_fingerprint(block: Any) -> Tuple[Any, ...]:
+    if isinstance(block, TextBlock):
+        return ("text", block.text)
+    if isinstance(block, ToolCallBlock):
+        return ("tool_call", block.id, block.name, dict(block.arguments))
+    if isinstance(block, ToolResultBlock):
+        return ("tool_result", block.id, block.content)
+    return (type(block), block.model_dump())
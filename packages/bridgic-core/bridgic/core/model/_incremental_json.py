@@ -0,0 +1,319 @@
+import collections.abc
+import json
+import re
+
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Union, get_args, get_origin
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from bridgic.core.model.protocols import Constraint, JsonSchema, PydanticModel
+from bridgic.core.model.types import StructuredOutputChunk
+
+
+JsonPath = Tuple[Union[str, int], ...]
+"""The location of a value in a JSON document, as object keys and array indices."""
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    """An object or an array being parsed."""
+
+    __slots__ = ("is_array", "path", "key", "expecting_key", "index", "element_start")
+
+    def __init__(self, is_array: bool, path: JsonPath):
+        self.is_array = is_array
+        self.path = path
+        self.key: Optional[str] = None
+        self.expecting_key = not is_array
+        self.index = 0
+        self.element_start: Optional[int] = None
+
+    def child_path(self) -> JsonPath:
+        return self.path + ((self.index,) if self.is_array else (self.key,))
+
+
+class IncrementalJsonParser:
+    """
+    A parser of a JSON document received in chunks, which reports each element of an array
+    as soon as it is complete, at any depth of the document.
+
+    The document is scanned once: the state of the scan (the open objects and arrays, and
+    whether it is inside a string) is kept between the chunks, and only the completed
+    elements are decoded. The text before the first `{` or `[` and after the end of the
+    document is ignored.
+
+    Examples
+    --------
+    >>> parser = IncrementalJsonParser()
+    >>> parser.feed('{"steps": [{"tool": "search"}, {"to')
+    [(('steps', 0), {'tool': 'search'})]
+    >>> parser.feed('ol": "read"}]}')
+    [(('steps', 1), {'tool': 'read'})]
+    """
+
+    _buffer: str
+    _pos: int
+    _stack: List[_Frame]
+    _in_string: bool
+    _string_start: int
+    _document_start: Optional[int]
+    _document_end: Optional[int]
+    _started: bool
+    _done: bool
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._string_start = 0
+        self._document_start = None
+        self._document_end = None
+        self._started = False
+        self._done = False
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return self._buffer
+
+    @property
+    def document(self) -> str:
+        """
+        The text of the document received so far, without the text before and after it. If 
+        the document has not started yet, the whole text received so far.
+        """
+        if self._document_start is None:
+            return self._buffer
+        return self._buffer[self._document_start:self._document_end]
+
+    @property
+    def done(self) -> bool:
+        """Whether the document is complete."""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[JsonPath, Any]]:
+        """
+        Parse the next chunk of the document.
+
+        Parameters
+        ----------
+        chunk : str
+            The next chunk of the text of the document.
+
+        Returns
+        -------
+        List[Tuple[JsonPath, Any]]
+            The array elements completed by the chunk, in document order, with their paths.
+
+        Raises
+        ------
+        json.JSONDecodeError
+            If a completed element is not valid JSON.
+        """
+        self._buffer += chunk
+        completed: List[Tuple[JsonPath, Any]] = []
+        buffer = self._buffer
+        end = len(buffer)
+        pos = self._pos
+        stack = self._stack
+
+        while pos < end and not self._done:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.start()
+                if buffer[pos] == "\\":
+                    # Wait for the escaped character before skipping it.
+                    if pos + 1 >= end:
+                        break
+                    pos += 2
+                    continue
+                pos += 1
+                self._in_string = False
+                frame = stack[-1]
+                if frame.expecting_key:
+                    frame.key = json.loads(buffer[self._string_start:pos])
+                    frame.expecting_key = False
+                elif frame.is_array:
+                    self._complete_element(frame, pos, completed)
+                continue
+
+            char = buffer[pos]
+            if not self._started:
+                if char == "{" or char == "[":
+                    self._started = True
+                    self._document_start = pos
+                    stack.append(_Frame(char == "[", ()))
+                pos += 1
+                continue
+
+            frame = stack[-1]
+            if char in _WHITESPACE or char == ":":
+                pass
+            elif char == '"':
+                self._in_string = True
+                self._string_start = pos
+                if frame.is_array:
+                    frame.element_start = pos
+            elif char == "{" or char == "[":
+                if frame.is_array:
+                    frame.element_start = pos
+                stack.append(_Frame(char == "[", frame.child_path()))
+            elif char == "}" or char == "]":
+                if frame.is_array and frame.element_start is not None:
+                    self._complete_element(frame, pos, completed)
+                stack.pop()
+                if not stack:
+                    self._done = True
+                    self._document_end = pos + 1
+                elif stack[-1].is_array:
+                    self._complete_element(stack[-1], pos + 1, completed)
+            elif char == ",":
+                if frame.is_array:
+                    if frame.element_start is not None:
+                        self._complete_element(frame, pos, completed)
+                    frame.index += 1
+                else:
+                    frame.expecting_key = True
+            elif frame.is_array and frame.element_start is None:
+                # The first character of a number or a literal.
+                frame.element_start = pos
+            pos += 1
+
+        self._pos = pos
+        return completed
+
+    def _complete_element(self, frame: _Frame, end: int, completed: List[Tuple[JsonPath, Any]]) -> None:
+        value = json.loads(self._buffer[frame.element_start:end])
+        completed.append((frame.path + (frame.index,), value))
+        frame.element_start = None
+
+
+class StructuredOutputStream:
+    """
+    The incremental parsing of a structured output streamed by a model, which turns the
+    chunks of its text into `StructuredOutputChunk`s.
+
+    Each element of an array is reported as soon as it is complete. With a `PydanticModel`
+    constraint, the elements are validated against the type of the array items declared by
+    the model, and the elements that do not validate on their own are not reported; the
+    whole output is validated when the stream ends, as by `astructured_output`.
+
+    Parameters
+    ----------
+    constraint : Constraint
+        The constraint of the output, which must be a `PydanticModel` or a `JsonSchema`.
+    """
+
+    _constraint: Union[PydanticModel, JsonSchema]
+    _parser: IncrementalJsonParser
+    _adapters: Dict[JsonPath, Optional[TypeAdapter]]
+
+    def __init__(self, constraint: Constraint):
+        if not isinstance(constraint, (PydanticModel, JsonSchema)):
+            raise ValueError(
+                f"Streaming structured output requires a JSON constraint, got '{constraint.constraint_type}'."
+            )
+        self._constraint = constraint
+        self._parser = IncrementalJsonParser()
+        self._adapters = {}
+
+    @property
+    def text(self) -> str:
+        """The text of the output received so far."""
+        return self._parser.text
+
+    def feed(self, delta: str) -> List[StructuredOutputChunk]:
+        """
+        Parse the next chunk of the text of the output.
+
+        Parameters
+        ----------
+        delta : str
+            The next chunk of the text.
+
+        Returns
+        -------
+        List[StructuredOutputChunk]
+            The array elements completed by the chunk.
+        """
+        chunks = []
+        for path, value in self._parser.feed(delta):
+            adapter = self._get_adapter(path)
+            if adapter is not None:
+                try:
+                    value = adapter.validate_python(value)
+                except ValidationError:
+                    continue
+            chunks.append(StructuredOutputChunk(path=path, value=value))
+        return chunks
+
+    def finish(self) -> StructuredOutputChunk:
+        """
+        Validate the whole output once the stream has ended. Like the elements, the output 
+        is the JSON document in the text, so the text around it (e.g. a Markdown code fence) 
+        is ignored.
+
+        Returns
+        -------
+        StructuredOutputChunk
+            The chunk of the whole output, with an empty path.
+        """
+        text = self._parser.document
+        if isinstance(self._constraint, PydanticModel):
+            value = self._constraint.model.model_validate_json(text)
+        else:
+            value = json.loads(text)
+        return StructuredOutputChunk(path=(), value=value)
+
+    def _get_adapter(self, path: JsonPath) -> Optional[TypeAdapter]:
+        if not isinstance(self._constraint, PydanticModel):
+            return None
+        # The elements of an array share the adapter of their type.
+        template = tuple(None if isinstance(key, int) else key for key in path)
+        if template not in self._adapters:
+            annotation: Any = self._constraint.model
+            for key in path:
+                annotation = _resolve_child_type(annotation, key)
+                if annotation is None:
+                    break
+            self._adapters[template] = None if annotation is None else TypeAdapter(annotation)
+        return self._adapters[template]
+
+
+def _resolve_child_type(annotation: Any, key: Union[str, int]) -> Any:
+    """The type of the value at `key` in a value of type `annotation`, or None if unknown."""
+    while True:
+        origin = get_origin(annotation)
+        if origin is Annotated:
+            annotation = get_args(annotation)[0]
+        elif origin is Union or type(annotation).__name__ == "UnionType":
+            options = [arg for arg in get_args(annotation) if arg is not type(None)]
+            if len(options) != 1:
+                return None
+            annotation = options[0]
+        else:
+            break
+
+    if isinstance(key, str):
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            for name, field in annotation.model_fields.items():
+                if key == (field.alias or name):
+                    return field.annotation
+            return None
+        if origin is dict:
+            return get_args(annotation)[1]
+        return None
+
+    args = get_args(annotation)
+    if origin in (list, set, frozenset, collections.abc.Sequence) and args:
+        return args[0]
+    if origin is tuple and args:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return args[0]
+        return args[key] if key < len(args) else None
+    return None
@@ -0,0 +1,329 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import warnings
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+from bridgic.core.types._serialization import Serializable
+from bridgic.core.model.types import Message, Response, Tool, ToolCall
+
+
+class LlmCache(ABC, Serializable):
+    """
+    Base class of the stores of cached LLM results, which are used by `CachedLlm`.
+
+    A store maps the cache keys (as computed by `compute_llm_cache_key()`) to the results
+    of LLM calls. Each entry may have a time-to-live, after which it is treated as missing.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        Tuple[bool, Any]
+            A tuple of whether the key is found (and not expired), and the cached result.
+        """
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a result in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        value : Any
+            The result to be cached.
+        ttl : Optional[float]
+            The time-to-live of the entry in seconds. If None, the entry never expires.
+        """
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Remove all the entries from the cache.
+        """
+        ...
+
+
+class InMemoryLlmCache(LlmCache):
+    """
+    An in-process LRU store of cached LLM results.
+
+    Results are deep-copied when they are stored and when they are returned, so that callers
+    mutating a returned result never corrupt the cache.
+
+    Parameters
+    ----------
+    max_entries : int, default=1024
+        The maximum number of entries. The least recently used entries are evicted beyond it.
+    """
+
+    _max_entries: int
+    _entries: "OrderedDict[str, Tuple[Any, Optional[float]]]"
+    _lock: Lock
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+        return True, copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        value = copy.deepcopy(value)
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        # The cached results are not persisted with the store.
+        return {"max_entries": self._max_entries}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(max_entries=state_dict["max_entries"])
+
+
+class SqliteLlmCache(LlmCache):
+    """
+    An on-disk store of cached LLM results, backed by a SQLite database file.
+
+    The cache survives process restarts and can be shared by the processes on the same machine,
+    which makes it suitable for development replays and evaluation sweeps. Results are stored
+    as JSON, so that reading a cache file never runs code: responses (without their `raw`
+    provider data), tool selections, JSON values and the instances of pydantic models are
+    cached, and other results are not. An instance of a pydantic model is only restored if
+    its class is already imported.
+
+    Parameters
+    ----------
+    path : str
+        The path of the SQLite database file. It is created if it does not exist.
+    """
+
+    _path: str
+    _connection: sqlite3.Connection
+    _lock: Lock
+
+    def __init__(self, path: str):
+        self._path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._lock = Lock()
+
+    @property
+    def path(self) -> str:
+        """The path of the SQLite database file."""
+        return self._path
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return False, None
+        try:
+            return True, _decode_value(json.loads(value))
+        except Exception:
+            # The entry is malformed, or refers to a class that is not loaded.
+            return False, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            data = json.dumps(_encode_value(value), ensure_ascii=False)
+        except Exception as e:
+            warnings.warn(f"The LLM result is not cached on disk since it cannot be serialized to JSON: {e}")
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, expires_at),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {"path": self._path}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(path=state_dict["path"])
+
+
+def compute_llm_cache_key(
+    operation: str,
+    messages: List[Message],
+    tools: Optional[List[Tool]] = None,
+    constraint: Optional[BaseModel] = None,
+    configuration: Optional[Dict[str, Any]] = None,
+    endpoint: Optional[str] = None,
+    **kwargs: Any,
+) -> str:
+    """
+    Compute the content-addressed cache key of an LLM call.
+
+    The key is the SHA-256 digest of a canonical JSON form of everything that determines the
+    result of the call: the operation, the messages, the tools, the schema of the constraint,
+    the default configuration of the model, the endpoint serving it and the per-call parameters
+    (e.g. `model` and the sampling parameters). Parameters set to None are ignored, since they fall back to the
+    defaults of the configuration.
+
+    Parameters
+    ----------
+    operation : str
+        The kind of the call, such as `chat`, `structured_output` or `select_tool`. The sync
+        and async variants of an operation share their keys.
+    messages : List[Message]
+        The messages sent to the LLM.
+    tools : Optional[List[Tool]]
+        The tools offered to the LLM, if any.
+    constraint : Optional[BaseModel]
+        The constraint of a structured output, if any.
+    configuration : Optional[Dict[str, Any]]
+        The default configuration of the model, if any.
+    endpoint : Optional[str]
+        The base URL of the API serving the model, if any, so that the servers exposing the
+        same model name do not share their results.
+    **kwargs : Any
+        The per-call parameters.
+
+    Returns
+    -------
+    str
+        The hexadecimal cache key.
+    """
+    payload = {
+        "operation": operation,
+        "messages": [message.model_dump(mode="json") for message in messages],
+        "tools": [tool.model_dump(mode="json") for tool in tools] if tools is not None else None,
+        "constraint": _canonicalize_constraint(constraint) if constraint is not None else None,
+        "configuration": configuration,
+        "endpoint": endpoint,
+        "params": {key: value for key, value in kwargs.items() if value is not None},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_canonicalize_value)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _canonicalize_constraint(constraint: BaseModel) -> Dict[str, Any]:
+    model = getattr(constraint, "model", None)
+    if isinstance(model, type) and issubclass(model, BaseModel):
+        # The results of a `PydanticModel` constraint depend on both the schema and the class.
+        return {
+            "constraint_type": getattr(constraint, "constraint_type", None),
+            "model": f"{model.__module__}.{model.__qualname__}",
+            "schema": model.model_json_schema(),
+        }
+    return constraint.model_dump(mode="json")
+
+
+def _canonicalize_value(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def _encode_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, Response):
+        return {"type": "response", "value": value.model_dump(mode="json", exclude={"raw"})}
+    if (
+        isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], list)
+        and all(isinstance(tool_call, ToolCall) for tool_call in value[0])
+        and (value[1] is None or isinstance(value[1], str))
+    ):
+        return {
+            "type": "tool_selection",
+            "tool_calls": [tool_call.model_dump(mode="json") for tool_call in value[0]],
+            "content": value[1],
+        }
+    if isinstance(value, BaseModel):
+        model = type(value)
+        return {
+            "type": "model",
+            "module": model.__module__,
+            "qualname": model.__qualname__,
+            "value": value.model_dump(mode="json"),
+        }
+    # Other values must be JSON values, e.g. the outputs of JSON schema or choice constraints.
+    json.dumps(value)
+    return {"type": "json", "value": value}
+
+
+def _decode_value(data: Dict[str, Any]) -> Any:
+    value_type = data["type"]
+    if value_type == "response":
+        return Response.model_validate(data["value"])
+    if value_type == "tool_selection":
+        return [ToolCall.model_validate(tool_call) for tool_call in data["tool_calls"]], data["content"]
+    if value_type == "model":
+        # The class is looked up among the loaded modules only, so no module is imported.
+        model: Any = sys.modules[data["module"]]
+        for name in data["qualname"].split("."):
+            model = getattr(model, name)
+        if not (isinstance(model, type) and issubclass(model, BaseModel)):
+            raise TypeError(f"'{data['qualname']}' is not a pydantic model.")
+        return model.model_validate(data["value"])
+    if value_type == "json":
+        return data["value"]
+    raise ValueError(f"Unknown type of cached value: '{value_type}'.")
@@ -0,0 +1,400 @@
+import bisect
+import time
+
+from threading import Lock
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Tuple
+
+from bridgic.core.model.types import TokenUsage
+
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+"""Default upper bounds (in seconds) of the latency histogram buckets."""
+
+
+class _Histogram:
+    """
+    A cumulative histogram with fixed bucket upper bounds, in the same shape as a Prometheus histogram.
+    """
+    __slots__ = ("bounds", "bucket_counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        # The last bucket is the implicit `+Inf` bucket.
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds, self.bucket_counts):
+            total += count
+            buckets.append((_format_bound(bound), total))
+        buckets.append(("+Inf", self.count))
+        return buckets
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative_buckets()),
+        }
+
+
+class _OperationMetrics:
+    __slots__ = ("calls", "errors", "retries", "hedges", "hedge_wins", "latency", "time_to_first_token")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latency = _Histogram(bounds)
+        self.time_to_first_token = _Histogram(bounds)
+
+
+class _ModelMetrics:
+    __slots__ = ("operations", "prompt_tokens", "completion_tokens")
+
+    def __init__(self):
+        self.operations: Dict[str, _OperationMetrics] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class LlmMetricsRegistry:
+    """
+    An in-process registry of the metrics of LLM calls, fed by all the `BaseLlm` implementations.
+
+    It records, per model and per operation (e.g. `chat`, `astream`, `select_tool`):
+
+    - a latency histogram of the requests;
+    - a time-to-first-token histogram of the streaming requests;
+    - the numbers of calls, errors (by exception class) and retries (by exception class);
+    - the numbers of hedged requests and of hedges that won;
+
+    and, per model, the prompt and completion token counters.
+
+    The process-wide registry is returned by `LlmMetricsRegistry.read()`. The metrics can be
+    exported as a dict by `snapshot()`, or in the Prometheus text exposition format by
+    `to_prometheus()`.
+
+    Parameters
+    ----------
+    latency_buckets : Sequence[float], default=DEFAULT_LATENCY_BUCKETS
+        The upper bounds (in seconds) of the histogram buckets, in increasing order.
+
+    Examples
+    --------
+    ```python
+    response = await llm.achat(messages=messages, model="gpt-4o")
+    metrics = LlmMetricsRegistry.read().snapshot()
+    print(metrics["gpt-4o"]["operations"]["achat"]["latency"]["count"])
+    ```
+    """
+
+    _instance: ClassVar[Optional["LlmMetricsRegistry"]] = None
+    _instance_lock: ClassVar[Lock] = Lock()
+
+    _latency_buckets: Tuple[float, ...]
+    _models: Dict[str, _ModelMetrics]
+    _lock: Lock
+
+    def __init__(self, latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self._latency_buckets = tuple(sorted(latency_buckets))
+        self._models = {}
+        self._lock = Lock()
+
+    @classmethod
+    def read(cls) -> "LlmMetricsRegistry":
+        """
+        Get the process-wide metrics registry.
+
+        Returns
+        -------
+        LlmMetricsRegistry
+            The process-wide metrics registry.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _get_operation(self, model: str, operation: str) -> Tuple[_ModelMetrics, _OperationMetrics]:
+        model_metrics = self._models.get(model)
+        if model_metrics is None:
+            model_metrics = self._models[model] = _ModelMetrics()
+        operation_metrics = model_metrics.operations.get(operation)
+        if operation_metrics is None:
+            operation_metrics = model_metrics.operations[operation] = _OperationMetrics(self._latency_buckets)
+        return model_metrics, operation_metrics
+
+    def record_call(
+        self,
+        model: Optional[str],
+        operation: str,
+        duration: float,
+        usage: Optional[TokenUsage] = None,
+        error: Optional[BaseException] = None,
+        time_to_first_token: Optional[float] = None,
+    ) -> None:
+        """
+        Record a finished request to a model.
+
+        Parameters
+        ----------
+        model : Optional[str]
+            The model identifier. Recorded as `unknown` if None.
+        operation : str
+            The name of the called operation, such as `chat` or `astream`.
+        duration : float
+            The duration of the request in seconds.
+        usage : Optional[TokenUsage]
+            The token usage reported by the model, if any.
+        error : Optional[BaseException]
+            The exception raised by the request, if any.
+        time_to_first_token : Optional[float]
+            The time (in seconds) until the first chunk arrived, for streaming requests.
+        """
+        with self._lock:
+            model_metrics, operation_metrics = self._get_operation(model or "unknown", operation)
+            operation_metrics.calls += 1
+            operation_metrics.latency.observe(duration)
+            if time_to_first_token is not None:
+                operation_metrics.time_to_first_token.observe(time_to_first_token)
+            if error is not None:
+                error_class = type(error).__name__
+                operation_metrics.errors[error_class] = operation_metrics.errors.get(error_class, 0) + 1
+            if usage is not None:
+                model_metrics.prompt_tokens += usage.prompt_tokens or 0
+                model_metrics.completion_tokens += usage.completion_tokens or 0
+
+    def record_retry(self, model: Optional[str], operation: str, error: BaseException) -> None:
+        """
+        Record a retry of a request to a model.
+
+        Parameters
+        ----------
+        model : Optional[str]
+            The model identifier. Recorded as `unknown` if None.
+        operation : str
+            The name of the retried operation.
+        error : BaseException
+            The recoverable exception that caused the retry.
+        """
+        with self._lock:
+            _, operation_metrics = self._get_operation(model or "unknown", operation)
+            error_class = type(error).__name__
+            operation_metrics.retries[error_class] = operation_metrics.retries.get(error_class, 0) + 1
+
+    def record_hedge(self, model: Optional[str], operation: str, won: bool = False) -> None:
+        """
+        Record a hedge of a request to a model, i.e. an extra identical request sent because the
+        first one was slow.
+
+        Parameters
+        ----------
+        model : Optional[str]
+            The model identifier. Recorded as `unknown` if None.
+        operation : str
+            The name of the hedged operation.
+        won : bool, default=False
+            If False, record that a hedge is sent; if True, record that a sent hedge finished
+            before the request it hedged.
+        """
+        with self._lock:
+            _, operation_metrics = self._get_operation(model or "unknown", operation)
+            if won:
+                operation_metrics.hedge_wins += 1
+            else:
+                operation_metrics.hedges += 1
+
+    def track(self, model: Optional[str], operation: str) -> "LlmCallTracker":
+        """
+        Create a tracker that measures and records one request to a model.
+
+        Parameters
+        ----------
+        model : Optional[str]
+            The model identifier.
+        operation : str
+            The name of the called operation.
+
+        Returns
+        -------
+        LlmCallTracker
+            A context manager that records the request when it exits.
+        """
+        return LlmCallTracker(self, model, operation)
+
+    def reset(self) -> None:
+        """
+        Clear all the recorded metrics.
+        """
+        with self._lock:
+            self._models = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Export the recorded metrics as a dict.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The metrics keyed by model identifier. Each model has its `prompt_tokens` and
+            `completion_tokens` counters, and its `operations` keyed by operation name, each of
+            which has `calls`, `errors`, `retries`, `hedges`, `hedge_wins`, `latency` and
+            `time_to_first_token`.
+        """
+        with self._lock:
+            return {
+                model: {
+                    "prompt_tokens": model_metrics.prompt_tokens,
+                    "completion_tokens": model_metrics.completion_tokens,
+                    "operations": {
+                        operation: {
+                            "calls": operation_metrics.calls,
+                            "errors": dict(operation_metrics.errors),
+                            "retries": dict(operation_metrics.retries),
+                            "hedges": operation_metrics.hedges,
+                            "hedge_wins": operation_metrics.hedge_wins,
+                            "latency": operation_metrics.latency.to_dict(),
+                            "time_to_first_token": operation_metrics.time_to_first_token.to_dict(),
+                        }
+                        for operation, operation_metrics in model_metrics.operations.items()
+                    },
+                }
+                for model, model_metrics in self._models.items()
+            }
+
+    def to_prometheus(self, prefix: str = "bridgic_llm") -> str:
+        """
+        Export the recorded metrics in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        prefix : str, default="bridgic_llm"
+            The prefix of the metric names.
+
+        Returns
+        -------
+        str
+            The metrics in the Prometheus text exposition format.
+        """
+        requests, errors, retries, prompt_tokens, completion_tokens = [], [], [], [], []
+        hedges, hedge_wins = [], []
+        latency, time_to_first_token = [], []
+
+        with self._lock:
+            for model, model_metrics in self._models.items():
+                prompt_tokens.append(f"{prefix}_prompt_tokens_total{_labels(model=model)} {model_metrics.prompt_tokens}")
+                completion_tokens.append(f"{prefix}_completion_tokens_total{_labels(model=model)} {model_metrics.completion_tokens}")
+                for operation, operation_metrics in model_metrics.operations.items():
+                    requests.append(f"{prefix}_requests_total{_labels(model=model, operation=operation)} {operation_metrics.calls}")
+                    for error_class, count in operation_metrics.errors.items():
+                        errors.append(f"{prefix}_errors_total{_labels(model=model, operation=operation, error=error_class)} {count}")
+                    for error_class, count in operation_metrics.retries.items():
+                        retries.append(f"{prefix}_retries_total{_labels(model=model, operation=operation, error=error_class)} {count}")
+                    if operation_metrics.hedges:
+                        hedges.append(f"{prefix}_hedges_total{_labels(model=model, operation=operation)} {operation_metrics.hedges}")
+                        hedge_wins.append(f"{prefix}_hedge_wins_total{_labels(model=model, operation=operation)} {operation_metrics.hedge_wins}")
+                    latency.extend(_histogram_samples(f"{prefix}_request_duration_seconds", operation_metrics.latency, model, operation))
+                    if operation_metrics.time_to_first_token.count:
+                        time_to_first_token.extend(_histogram_samples(f"{prefix}_time_to_first_token_seconds", operation_metrics.time_to_first_token, model, operation))
+
+        lines = []
+        families = (
+            (f"{prefix}_requests_total", "counter", "Number of requests to LLMs.", requests),
+            (f"{prefix}_errors_total", "counter", "Number of failed requests to LLMs, by exception class.", errors),
+            (f"{prefix}_retries_total", "counter", "Number of retried requests to LLMs, by exception class.", retries),
+            (f"{prefix}_hedges_total", "counter", "Number of hedged requests sent to LLMs.", hedges),
+            (f"{prefix}_hedge_wins_total", "counter", "Number of hedged requests that finished first.", hedge_wins),
+            (f"{prefix}_prompt_tokens_total", "counter", "Number of prompt tokens consumed.", prompt_tokens),
+            (f"{prefix}_completion_tokens_total", "counter", "Number of completion tokens generated.", completion_tokens),
+            (f"{prefix}_request_duration_seconds", "histogram", "Latency of requests to LLMs.", latency),
+            (f"{prefix}_time_to_first_token_seconds", "histogram", "Time to the first chunk of streaming requests.", time_to_first_token),
+        )
+        for name, metric_type, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class LlmCallTracker:
+    """
+    A context manager that measures one request to a model and records it in a `LlmMetricsRegistry`
+    when it exits, including the exception class if the request fails.
+
+    It is usually created by `LlmMetricsRegistry.track()`. For streaming requests, call
+    `first_token()` when the first chunk arrives.
+    """
+    __slots__ = ("_registry", "_model", "_operation", "_start_time", "_time_to_first_token", "_usage")
+
+    def __init__(self, registry: LlmMetricsRegistry, model: Optional[str], operation: str):
+        self._registry = registry
+        self._model = model
+        self._operation = operation
+        self._start_time = None
+        self._time_to_first_token = None
+        self._usage = None
+
+    def __enter__(self) -> "LlmCallTracker":
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        duration = time.perf_counter() - self._start_time
+        # A stream closed early by the consumer is not an error of the model.
+        error = exc_value if isinstance(exc_value, Exception) else None
+        self._registry.record_call(
+            self._model,
+            self._operation,
+            duration,
+            usage=self._usage,
+            error=error,
+            time_to_first_token=self._time_to_first_token,
+        )
+
+    def first_token(self) -> None:
+        """
+        Mark the arrival of the first chunk of a streaming request. Later calls are ignored.
+        """
+        if self._time_to_first_token is None:
+            self._time_to_first_token = time.perf_counter() - self._start_time
+
+    def usage(self, usage: Optional[TokenUsage]) -> None:
+        """
+        Set the token usage reported by the model for the request.
+        """
+        if usage is not None:
+            self._usage = usage
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape_label_value(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _histogram_samples(name: str, histogram: _Histogram, model: str, operation: str) -> List[str]:
+    samples = [
+        f"{name}_bucket{_labels(model=model, operation=operation, le=bound)} {count}"
+        for bound, count in histogram.cumulative_buckets()
+    ]
+    samples.append(f"{name}_sum{_labels(model=model, operation=operation)} {histogram.sum}")
+    samples.append(f"{name}_count{_labels(model=model, operation=operation)} {histogram.count}")
+    return samples
@@ -0,0 +1,275 @@
+import hashlib
+import random
+import time
+
+from threading import Lock
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from bridgic.core.model._base_llm import BaseLlm
+from bridgic.core.model._model_error import ModelCircuitOpenError, ModelRetryLimitError, ModelUnrecoverableError
+from bridgic.core.model._model_retry import is_recoverable_exception
+from bridgic.core.model.protocols import StructuredOutput, ToolSelection, Constraint
+from bridgic.core.model.types import *
+
+
+LoadBalancePolicy = Literal["least_outstanding", "power_of_two"]
+"""The policies of choosing an endpoint for a request."""
+
+
+class _Endpoint:
+    __slots__ = ("index", "llm", "name", "outstanding", "requests", "failures", "consecutive_failures", "ejections", "ejected_until")
+
+    def __init__(self, index: int, llm: BaseLlm):
+        self.index = index
+        self.llm = llm
+        self.name = getattr(llm, "api_base", None) or f"endpoint-{index}"
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+
+class LoadBalancedLlm(BaseLlm, StructuredOutput, ToolSelection):
+    """
+    A LLM that balances the requests over several endpoints (e.g. the replicas of a vLLM server),
+    each of which is served by a wrapped LLM instance such as `OpenAILikeLlm` or `VllmServerLlm`.
+
+    Each request is sent to one endpoint chosen by the `policy`:
+
+    - `least_outstanding`: the endpoint with the fewest in-flight requests.
+    - `power_of_two`: the less loaded of two endpoints picked at random, which avoids herding
+      on the same endpoint when many clients balance independently.
+
+    If `sticky_prefix_messages` is set, the requests that share their first messages (e.g. the
+    same system prompt and task) are routed to the same endpoint by rendezvous hashing, so that
+    the prefix cache of the server stays warm, unless that endpoint has `max_imbalance` more
+    in-flight requests than the least loaded one.
+
+    Endpoints are checked passively: an endpoint failing `max_failures` requests in a row (with
+    errors other than invalid requests) is ejected for `ejection_duration` seconds. If all the
+    endpoints are ejected, the one to be readmitted first is used.
+
+    Parameters
+    ----------
+    llms : List[BaseLlm]
+        The LLM instances of the endpoints. They must implement `StructuredOutput` /
+        `ToolSelection` for the corresponding methods to be used.
+    policy : LoadBalancePolicy, default="least_outstanding"
+        The policy of choosing an endpoint.
+    sticky_prefix_messages : Optional[int]
+        The number of leading messages whose content pins the requests to an endpoint.
+        If None, requests are not pinned.
+    max_imbalance : int, default=4
+        The tolerated excess of in-flight requests of the pinned endpoint.
+    max_failures : int, default=3
+        The number of consecutive failures after which an endpoint is ejected.
+    ejection_duration : float, default=30.0
+        The number of seconds an endpoint stays ejected.
+
+    Examples
+    --------
+    ```python
+    llm = LoadBalancedLlm(
+        [VllmServerLlm(api_base=api_base, api_key=api_key) for api_base in replica_api_bases],
+        policy="power_of_two",
+        sticky_prefix_messages=1,
+    )
+    ```
+    """
+
+    _endpoints: List[_Endpoint]
+    _policy: LoadBalancePolicy
+    _sticky_prefix_messages: Optional[int]
+    _max_imbalance: int
+    _max_failures: int
+    _ejection_duration: float
+    _lock: Lock
+
+    def __init__(
+        self,
+        llms: List[BaseLlm],
+        policy: LoadBalancePolicy = "least_outstanding",
+        sticky_prefix_messages: Optional[int] = None,
+        max_imbalance: int = 4,
+        max_failures: int = 3,
+        ejection_duration: float = 30.0,
+    ):
+        if not llms:
+            raise ValueError("At least one LLM instance is required for load balancing.")
+        if policy not in ("least_outstanding", "power_of_two"):
+            raise ValueError(f"Invalid load balancing policy: {policy}")
+        self._endpoints = [_Endpoint(index, llm) for index, llm in enumerate(llms)]
+        self._policy = policy
+        self._sticky_prefix_messages = sticky_prefix_messages
+        self._max_imbalance = max_imbalance
+        self._max_failures = max_failures
+        self._ejection_duration = ejection_duration
+        self._lock = Lock()
+
+    @property
+    def llms(self) -> List[BaseLlm]:
+        """The LLM instances of the endpoints."""
+        return [endpoint.llm for endpoint in self._endpoints]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Export the current state of the endpoints.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            For each endpoint, its `name`, its `outstanding` requests, its `requests`, `failures`
+            and `ejections` counters, and whether it is currently `ejected`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "name": endpoint.name,
+                    "outstanding": endpoint.outstanding,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                    "ejections": endpoint.ejections,
+                    "ejected": endpoint.ejected_until > now,
+                }
+                for endpoint in self._endpoints
+            ]
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        endpoint = self._acquire(messages)
+        return self._call(endpoint, lambda: endpoint.llm.chat(messages=messages, **kwargs))
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        endpoint = self._acquire(messages)
+        return await self._acall(endpoint, lambda: endpoint.llm.achat(messages=messages, **kwargs))
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        endpoint = self._acquire(messages)
+        failure = None
+        try:
+            yield from endpoint.llm.stream(messages=messages, **kwargs)
+        except Exception as e:
+            failure = e
+            raise
+        finally:
+            self._release(endpoint, failure)
+
+    async def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        endpoint = self._acquire(messages)
+        failure = None
+        try:
+            async for chunk in endpoint.llm.astream(messages=messages, **kwargs):
+                yield chunk
+        except Exception as e:
+            failure = e
+            raise
+        finally:
+            self._release(endpoint, failure)
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        endpoint = self._acquire(messages)
+        return self._call(endpoint, lambda: endpoint.llm.structured_output(messages=messages, constraint=constraint, **kwargs))
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        endpoint = self._acquire(messages)
+        return await self._acall(endpoint, lambda: endpoint.llm.astructured_output(messages=messages, constraint=constraint, **kwargs))
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        endpoint = self._acquire(messages)
+        return self._call(endpoint, lambda: endpoint.llm.select_tool(messages=messages, tools=tools, **kwargs))
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        endpoint = self._acquire(messages)
+        return await self._acall(endpoint, lambda: endpoint.llm.aselect_tool(messages=messages, tools=tools, **kwargs))
+
+    def _call(self, endpoint: _Endpoint, call: Any) -> Any:
+        try:
+            result = call()
+        except BaseException as e:
+            self._release(endpoint, e if isinstance(e, Exception) else None)
+            raise
+        self._release(endpoint, None)
+        return result
+
+    async def _acall(self, endpoint: _Endpoint, call: Any) -> Any:
+        try:
+            result = await call()
+        except BaseException as e:
+            self._release(endpoint, e if isinstance(e, Exception) else None)
+            raise
+        self._release(endpoint, None)
+        return result
+
+    def _acquire(self, messages: List[Message]) -> _Endpoint:
+        prefix_key = self._get_prefix_key(messages)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self._endpoints if endpoint.ejected_until <= now]
+            if not candidates:
+                candidates = [min(self._endpoints, key=lambda endpoint: endpoint.ejected_until)]
+
+            chosen = None
+            if prefix_key is not None:
+                pinned = max(candidates, key=lambda endpoint: _rendezvous_weight(prefix_key, endpoint.name))
+                least_outstanding = min(endpoint.outstanding for endpoint in candidates)
+                if pinned.outstanding <= least_outstanding + self._max_imbalance:
+                    chosen = pinned
+            if chosen is None:
+                if self._policy == "power_of_two" and len(candidates) > 2:
+                    candidates = random.sample(candidates, 2)
+                chosen = min(candidates, key=lambda endpoint: (endpoint.outstanding, endpoint.requests))
+
+            chosen.outstanding += 1
+            chosen.requests += 1
+        return chosen
+
+    def _release(self, endpoint: _Endpoint, error: Optional[Exception]) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None or not _is_endpoint_failure(error):
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self._max_failures:
+                endpoint.consecutive_failures = 0
+                endpoint.ejections += 1
+                endpoint.ejected_until = time.monotonic() + self._ejection_duration
+
+    def _get_prefix_key(self, messages: List[Message]) -> Optional[str]:
+        if not self._sticky_prefix_messages or not messages:
+            return None
+        prefix = messages[:self._sticky_prefix_messages]
+        digest = hashlib.blake2b(digest_size=16)
+        for message in prefix:
+            digest.update(message.model_dump_json().encode("utf-8"))
+        return digest.hexdigest()
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {
+            "llms": self.llms,
+            "policy": self._policy,
+            "sticky_prefix_messages": self._sticky_prefix_messages,
+            "max_imbalance": self._max_imbalance,
+            "max_failures": self._max_failures,
+            "ejection_duration": self._ejection_duration,
+        }
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(**state_dict)
+
+
+def _rendezvous_weight(key: str, endpoint_name: str) -> int:
+    digest = hashlib.blake2b(f"{key}|{endpoint_name}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _is_endpoint_failure(error: Exception) -> bool:
+    # Invalid requests say nothing about the health of the endpoint.
+    if isinstance(error, (ModelRetryLimitError, ModelCircuitOpenError)):
+        return True
+    if isinstance(error, ModelUnrecoverableError):
+        return False
+    return is_recoverable_exception(error)
@@ -33,3 +33,21 @@ class ModelUnrecoverableError(RuntimeError):
         super().__init__(message)
         self.operation = operation
         self.original_exception = original_exception
+
+
+class ModelCircuitOpenError(RuntimeError):
+    """
+    Raised without sending the request when the circuit breaker of the endpoint is open,
+    i.e. the endpoint is considered down.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        operation: str,
+        endpoint: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.operation = operation
+        self.endpoint = endpoint
@@ -1,17 +1,54 @@
 import asyncio
+import inspect
 import random
 import time
+import weakref
+import httpx
+from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Callable, Optional
+from threading import Lock
+from typing import Any, Callable, Optional, Tuple
 from typing_extensions import ParamSpec, TypeVar
 from pydantic import BaseModel, Field
 
-from bridgic.core.model._model_error import ModelRetryLimitError, ModelUnrecoverableError
+from bridgic.core.model._model_error import ModelCircuitOpenError, ModelRetryLimitError, ModelUnrecoverableError
+from bridgic.core.model._llm_metrics import LlmMetricsRegistry
+from bridgic.core.model._circuit_breaker import CircuitBreaker
+from bridgic.core.model._rate_limiter import RateLimiter, estimate_tokens, get_response_headers, parse_retry_after
 
 
 P = ParamSpec("P")
 R = TypeVar("R")
 
+_inside_model_call: ContextVar[bool] = ContextVar("_inside_model_call", default=False)
+
+# The HTTP status codes of transient failures, which are worth retrying.
+_RECOVERABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+# The error codes of responses that fail the same way however many times they are retried.
+_UNRECOVERABLE_ERROR_CODES = frozenset({
+    "insufficient_quota",
+    "invalid_api_key",
+    "context_length_exceeded",
+    "content_filter",
+    "content_policy_violation",
+})
+# The connection errors of the OpenAI SDK, which wrap the `httpx` ones.
+_CONNECTION_ERROR_NAMES = frozenset({"APIConnectionError", "APITimeoutError"})
+# The markers of transient failures in the messages of unknown exception types.
+_RETRY_MARKERS = (
+    "429",
+    "503",
+    "timeout",
+    "timed out",
+    "rate limit",
+    "overloaded",
+    "too many requests",
+    "temporarily unavailable",
+    "connection reset",
+    "connection refused",
+    "connection aborted",
+)
+
 
 class RetryPolicyConfig(BaseModel):
     """
@@ -23,37 +60,58 @@ class RetryPolicyConfig(BaseModel):
     max_delay: float = Field(default=2.0, ge=0.0)
     exponential_base: float = Field(default=2.0, ge=1.0)
     jitter_ratio: float = Field(default=0.2, ge=0.0, le=1.0)
+    max_retry_after: float = Field(default=30.0, ge=0.0)
+    """The longest `Retry-After` delay waited for; a longer one ends the retries."""
+    retry_budget_ratio: Optional[float] = Field(default=None, ge=0.0)
+    """
+    The retries earned by each call of a model instance. If None (the default), retries are not
+    budgeted. Set it, e.g. `RetryPolicyConfig(retry_budget_ratio=0.2)`, to stop the retries of an
+    instance once they exceed a fifth of its calls and the reserve, so that an outage is not
+    amplified by retry storms.
+    """
+    retry_budget_reserve: float = Field(default=10.0, ge=0.0)
+    """The retries available to a model instance at start, and the most it can save up."""
 
 
 def is_recoverable_exception(exc: Exception) -> bool:
     """
-    Heuristic classifier for retryable exceptions.
+    Classify whether an exception is a transient failure worth retrying.
+
+    - Timeouts and connection errors (built-in, `httpx` and OpenAI SDK ones) are recoverable.
+    - HTTP errors are recoverable for the transient status codes (408, 409, 425, 429 and 5xx),
+      unless the error code of the response can never succeed (e.g. `insufficient_quota` or
+      `content_filter`).
+    - Errors of the model calls that were already retried, or rejected by an open circuit
+      breaker, are not recoverable.
+    - Other exceptions are recoverable only if their message reports a transient failure.
     """
-    if isinstance(exc, (TimeoutError, ConnectionError)):
+    if isinstance(exc, (ModelRetryLimitError, ModelUnrecoverableError, ModelCircuitOpenError)):
+        return False
+    if isinstance(exc, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
         return True
 
-    text = (
-        f"{exc.__class__.__name__} "
-        f"{exc.__class__.__module__} "
-        f"{str(exc)}"
-    ).lower()
-    retry_markers = (
-        "429",
-        "timeout",
-        "timed out",
-        "limit",
-        "exceeded",
-        "overloaded",
-        "too many requests",
-        "network",
-        "connection",
-        "harmful",
-        "policy",
-        "violated",
-        "violation",
-        "not allowed",
-    )
-    return any(marker in text for marker in retry_markers)
+    status_code = get_status_code(exc)
+    if status_code is not None:
+        if _get_error_code(exc) in _UNRECOVERABLE_ERROR_CODES:
+            return False
+        return status_code in _RECOVERABLE_STATUS_CODES or status_code >= 500
+
+    if any(cls.__name__ in _CONNECTION_ERROR_NAMES for cls in type(exc).__mro__):
+        return True
+    text = str(exc).lower()
+    return any(marker in text for marker in _RETRY_MARKERS)
+
+
+def get_status_code(exc: BaseException) -> Optional[int]:
+    """
+    Get the HTTP status code of the response carried by the exception of a failed request, if any.
+    """
+    status_code = getattr(exc, "status_code", None)
+    if not isinstance(status_code, int):
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
 
 
 def retryable_model_call(
@@ -61,82 +119,336 @@ def retryable_model_call(
     recoverable_checker: Optional[Callable[[Exception], bool]] = None,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """
-    Decorator for model non-streaming methods.
+    Decorator for model methods.
 
     Behavior:
-    - Retry recoverable exceptions up to max attempts.
+    - Retry recoverable exceptions up to max attempts, waiting for the exponential backoff
+      or the `Retry-After` delay of the response, whichever is longer.
     - Raise `ModelUnrecoverableError` immediately for non-recoverable exceptions.
-    - Raise `ModelRetryLimitError` after retry attempts are exhausted.
+    - Raise `ModelRetryLimitError` after retry attempts are exhausted, when the `Retry-After`
+      delay exceeds `max_retry_after`, or when the retry budget of the model instance is spent.
+    - Count every retry in the `LlmMetricsRegistry`.
+    - If the model instance has a `rate_limit` (a `RateLimitConfig`), wait for the budget of
+      its shared `RateLimiter` before each attempt, and adjust the limiter to the rate-limit
+      headers of failed attempts.
+    - If the model instance has a `circuit_breaker` (a `CircuitBreakerConfig`), raise
+      `ModelCircuitOpenError` without sending the request while the shared `CircuitBreaker`
+      of its endpoint is open.
+    - For streaming methods (async generators), only the start of the stream is guarded: the
+      attempts failing before the first item is received are retried, and the failures of a
+      stream that has started are raised as is.
     """
     config = config or RetryPolicyConfig()
     checker = recoverable_checker or is_recoverable_exception
 
     def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        if inspect.isasyncgenfunction(func):
+
+            @wraps(func)
+            async def async_gen_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
+                op = func.__name__
+                nested = _inside_model_call.get()
+                limiter, tokens = _resolve_rate_limiter(args, kwargs, nested)
+                breaker = _resolve_circuit_breaker(args, nested)
+                budget = _resolve_retry_budget(args, op, config)
+                last_exc: Optional[Exception] = None
+                for attempt in range(1, config.max_attempts + 1):
+                    _check_circuit(breaker, args, op, last_exc)
+                    if limiter is not None:
+                        await limiter.aacquire(tokens)
+                    stream = func(*args, **kwargs)
+                    context_token = _inside_model_call.set(True)
+                    try:
+                        first_item = await stream.__anext__()
+                    except StopAsyncIteration:
+                        _handle_success(limiter, tokens, breaker, None)
+                        return
+                    except Exception as exc:
+                        last_exc = _handle_failure(exc, op, checker, limiter, breaker)
+                        delay = _retry_delay(attempt, config, exc, budget)
+                        if delay is None:
+                            break
+                        LlmMetricsRegistry.read().record_retry(_resolve_model_name(args, kwargs), op, exc)
+                        await asyncio.sleep(delay)
+                        continue
+                    except BaseException:
+                        _abandon(breaker)
+                        raise
+                    finally:
+                        _inside_model_call.reset(context_token)
+
+                    # The stream has started, it is not retried any more.
+                    _handle_success(limiter, tokens, breaker, None)
+                    try:
+                        yield first_item
+                        async for item in stream:
+                            yield item
+                    finally:
+                        await stream.aclose()
+                    return
+                raise _retry_limit_error(op, attempt, config, last_exc) from last_exc
+
+            return async_gen_wrapper
+
         if asyncio.iscoroutinefunction(func):
 
             @wraps(func)
             async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
                 op = func.__name__
+                nested = _inside_model_call.get()
+                limiter, tokens = _resolve_rate_limiter(args, kwargs, nested)
+                breaker = _resolve_circuit_breaker(args, nested)
+                budget = _resolve_retry_budget(args, op, config)
                 last_exc: Optional[Exception] = None
                 for attempt in range(1, config.max_attempts + 1):
+                    _check_circuit(breaker, args, op, last_exc)
+                    if limiter is not None:
+                        await limiter.aacquire(tokens)
+                    context_token = _inside_model_call.set(True)
                     try:
-                        return await func(*args, **kwargs)
+                        result = await func(*args, **kwargs)
                     except Exception as exc:
-                        if not checker(exc):
-                            raise ModelUnrecoverableError(
-                                f"Model operation `{op}` failed with non-recoverable error",
-                                operation=op,
-                                original_exception=exc,
-                            ) from exc
-                        else:
-                            last_exc = exc
-                            if attempt < config.max_attempts:
-                                await asyncio.sleep(_backoff_delay(attempt, config))
-                raise ModelRetryLimitError(
-                    (
-                        f"Model operation `{op}` exceeded retry attempts "
-                        f"({config.max_attempts} attempts)"
-                    ),
-                    operation=op,
-                    original_exception=last_exc,
-                ) from last_exc
+                        last_exc = _handle_failure(exc, op, checker, limiter, breaker)
+                        delay = _retry_delay(attempt, config, exc, budget)
+                        if delay is None:
+                            break
+                        LlmMetricsRegistry.read().record_retry(_resolve_model_name(args, kwargs), op, exc)
+                        await asyncio.sleep(delay)
+                    except BaseException:
+                        _abandon(breaker)
+                        raise
+                    else:
+                        _handle_success(limiter, tokens, breaker, result)
+                        return result
+                    finally:
+                        _inside_model_call.reset(context_token)
+                raise _retry_limit_error(op, attempt, config, last_exc) from last_exc
 
             return async_wrapper
 
         @wraps(func)
         def sync_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
             op = func.__name__
+            nested = _inside_model_call.get()
+            limiter, tokens = _resolve_rate_limiter(args, kwargs, nested)
+            breaker = _resolve_circuit_breaker(args, nested)
+            budget = _resolve_retry_budget(args, op, config)
             last_exc: Optional[Exception] = None
             for attempt in range(1, config.max_attempts + 1):
+                _check_circuit(breaker, args, op, last_exc)
+                if limiter is not None:
+                    limiter.acquire(tokens)
+                context_token = _inside_model_call.set(True)
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as exc:
-                    if not checker(exc):
-                        raise ModelUnrecoverableError(
-                            f"Model operation `{op}` failed with non-recoverable error",
-                            operation=op,
-                            original_exception=exc,
-                        ) from exc
-                    else:
-                        last_exc = exc
-                        if attempt < config.max_attempts:
-                            delay = _backoff_delay(attempt, config)
-                            if delay > 0:
-                                time.sleep(delay)
-            raise ModelRetryLimitError(
-                (
-                    f"Model operation `{op}` exceeded retry attempts "
-                    f"({config.max_attempts} attempts)"
-                ),
-                operation=op,
-                original_exception=last_exc,
-            ) from last_exc
+                    last_exc = _handle_failure(exc, op, checker, limiter, breaker)
+                    delay = _retry_delay(attempt, config, exc, budget)
+                    if delay is None:
+                        break
+                    LlmMetricsRegistry.read().record_retry(_resolve_model_name(args, kwargs), op, exc)
+                    if delay > 0:
+                        time.sleep(delay)
+                except BaseException:
+                    _abandon(breaker)
+                    raise
+                else:
+                    _handle_success(limiter, tokens, breaker, result)
+                    return result
+                finally:
+                    _inside_model_call.reset(context_token)
+            raise _retry_limit_error(op, attempt, config, last_exc) from last_exc
 
         return sync_wrapper
 
     return decorator
 
 
+class _RetryBudget:
+    """
+    The retries available to a model instance. Each call earns `retry_budget_ratio` of a
+    retry, so that a failing endpoint cannot multiply the load by the number of attempts.
+    """
+    __slots__ = ("balance", "lock")
+
+    def __init__(self, reserve: float):
+        self.balance = reserve
+        self.lock = Lock()
+
+    def deposit(self, amount: float, reserve: float) -> None:
+        with self.lock:
+            self.balance = min(reserve, self.balance + amount)
+
+    def withdraw(self) -> bool:
+        with self.lock:
+            if self.balance < 1.0:
+                return False
+            self.balance -= 1.0
+            return True
+
+
+_retry_budgets: "weakref.WeakKeyDictionary[Any, _RetryBudget]" = weakref.WeakKeyDictionary()
+_retry_budgets_lock = Lock()
+
+
+def _resolve_retry_budget(args: Any, op: str, config: RetryPolicyConfig) -> Optional[_RetryBudget]:
+    # Retries are budgeted per model instance, i.e. the first argument of the decorated method.
+    if config.retry_budget_ratio is None or not args or not hasattr(args[0], op):
+        return None
+    owner = args[0]
+    try:
+        with _retry_budgets_lock:
+            budget = _retry_budgets.get(owner)
+            if budget is None:
+                budget = _retry_budgets[owner] = _RetryBudget(config.retry_budget_reserve)
+    except TypeError:
+        # The instance cannot be referenced weakly.
+        return None
+    budget.deposit(config.retry_budget_ratio, config.retry_budget_reserve)
+    return budget
+
+
+def _resolve_circuit_breaker(args: Any, nested: bool) -> Optional[CircuitBreaker]:
+    # A call nested in a model call (e.g. `structured_output` calling `chat`) is guarded by
+    # the outer one.
+    owner = args[0] if args else None
+    circuit_breaker = getattr(owner, "circuit_breaker", None)
+    if circuit_breaker is None or nested:
+        return None
+    return CircuitBreaker.shared(getattr(owner, "api_base", None), circuit_breaker)
+
+
+def _check_circuit(breaker: Optional[CircuitBreaker], args: Any, op: str, last_exc: Optional[Exception]) -> None:
+    if breaker is None or breaker.allow_request():
+        return
+    endpoint = getattr(args[0], "api_base", None)
+    raise ModelCircuitOpenError(
+        f"Model operation `{op}` rejected: the circuit breaker of {endpoint or 'the endpoint'} is open",
+        operation=op,
+        endpoint=endpoint,
+    ) from last_exc
+
+
+def _handle_failure(
+    exc: Exception,
+    op: str,
+    checker: Callable[[Exception], bool],
+    limiter: Optional[RateLimiter],
+    breaker: Optional[CircuitBreaker],
+) -> Exception:
+    if isinstance(exc, (ModelRetryLimitError, ModelUnrecoverableError, ModelCircuitOpenError)):
+        # A nested model call has already retried.
+        _abandon(breaker)
+        raise exc
+    _update_rate_limiter(limiter, exc)
+    recoverable = checker(exc)
+    if breaker is not None:
+        if recoverable:
+            breaker.record_failure()
+        else:
+            # The endpoint is up, the request itself is invalid.
+            breaker.record_success()
+    if not recoverable:
+        raise ModelUnrecoverableError(
+            f"Model operation `{op}` failed with non-recoverable error",
+            operation=op,
+            original_exception=exc,
+        ) from exc
+    return exc
+
+
+def _handle_success(limiter: Optional[RateLimiter], tokens: int, breaker: Optional[CircuitBreaker], result: Any) -> None:
+    if breaker is not None:
+        breaker.record_success()
+    _reconcile_rate_limiter(limiter, tokens, result)
+
+
+def _abandon(breaker: Optional[CircuitBreaker]) -> None:
+    if breaker is not None:
+        breaker.record_abandon()
+
+
+def _retry_delay(attempt: int, config: RetryPolicyConfig, exc: Exception, budget: Optional[_RetryBudget]) -> Optional[float]:
+    # The delay before the next attempt, or None if the call should not be retried.
+    if attempt >= config.max_attempts:
+        return None
+    delay = _backoff_delay(attempt, config)
+    headers = get_response_headers(exc)
+    retry_after = parse_retry_after(headers) if headers is not None else None
+    if retry_after is not None:
+        if retry_after > config.max_retry_after:
+            return None
+        delay = max(delay, retry_after)
+    if budget is not None and not budget.withdraw():
+        return None
+    return delay
+
+
+def _retry_limit_error(op: str, attempts: int, config: RetryPolicyConfig, last_exc: Optional[Exception]) -> ModelRetryLimitError:
+    if attempts < config.max_attempts:
+        reason = f"gave up retrying after {attempts} of {config.max_attempts} attempts"
+    else:
+        reason = f"exceeded retry attempts ({config.max_attempts} attempts)"
+    return ModelRetryLimitError(
+        f"Model operation `{op}` {reason}",
+        operation=op,
+        original_exception=last_exc,
+    )
+
+
+def _get_error_code(exc: BaseException) -> Optional[str]:
+    # The OpenAI SDK exposes the `code` of the error body; other clients may only have the body.
+    code = getattr(exc, "code", None)
+    if code is None:
+        body = getattr(exc, "body", None)
+        if isinstance(body, dict):
+            error = body.get("error", body)
+            code = error.get("code") if isinstance(error, dict) else None
+    return code if isinstance(code, str) else None
+
+
+def _resolve_model_name(args: Any, kwargs: Any) -> Optional[str]:
+    # The model is either passed to the call, or configured on the model instance (the first argument).
+    model = kwargs.get("model")
+    if model is None and args:
+        model = getattr(getattr(args[0], "configuration", None), "model", None)
+    return model
+
+
+def _resolve_rate_limiter(args: Any, kwargs: Any, nested: bool) -> Tuple[Optional[RateLimiter], int]:
+    # The rate limits are configured on the model instance (the first argument).
+    owner = args[0] if args else None
+    rate_limit = getattr(owner, "rate_limit", None)
+    if rate_limit is None or nested:
+        # A call nested in a rate-limited call (e.g. `structured_output` calling `chat`) is
+        # covered by the budget of the outer one.
+        return None, 0
+    limiter = RateLimiter.shared(getattr(owner, "api_base", None), _resolve_model_name(args, kwargs), rate_limit)
+    if rate_limit.tokens_per_minute is None:
+        return limiter, 0
+    messages = kwargs.get("messages", args[1] if len(args) > 1 else None)
+    max_tokens = kwargs.get("max_tokens")
+    if max_tokens is None:
+        max_tokens = getattr(getattr(owner, "configuration", None), "max_tokens", None)
+    return limiter, estimate_tokens(messages, max_tokens)
+
+
+def _update_rate_limiter(limiter: Optional[RateLimiter], exc: Exception) -> None:
+    if limiter is None:
+        return
+    headers = get_response_headers(exc)
+    if headers is not None:
+        limiter.update_from_headers(headers)
+
+
+def _reconcile_rate_limiter(limiter: Optional[RateLimiter], tokens: int, result: Any) -> None:
+    if limiter is None or not tokens:
+        return
+    total_tokens = getattr(getattr(result, "usage", None), "total_tokens", None)
+    if total_tokens:
+        limiter.reconcile(tokens, total_tokens)
+
+
 def _backoff_delay(attempt: int, config: RetryPolicyConfig) -> float:
     if config.base_delay <= 0:
         return 0.0
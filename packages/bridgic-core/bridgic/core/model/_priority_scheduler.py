@@ -0,0 +1,355 @@
+import asyncio
+import threading
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from bridgic.core.model._base_llm import BaseLlm
+from bridgic.core.model.protocols import StructuredOutput, ToolSelection, Constraint
+from bridgic.core.model.types import *
+
+
+RequestPriority = Literal["interactive", "background"]
+"""
+The priority classes of the LLM requests: `interactive` requests are on the critical path of
+an agent step (e.g. thinking or tool selection), `background` requests are not (e.g. memory
+compression).
+"""
+
+_current_priority: ContextVar[RequestPriority] = ContextVar("_current_priority", default="interactive")
+
+
+@contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """
+    Set the priority of the LLM requests made in the block (in the current thread or task, and
+    the tasks it creates), as read by the `ScheduledLlm` instances.
+
+    Parameters
+    ----------
+    priority : RequestPriority
+        The priority of the requests.
+
+    Examples
+    --------
+    ```python
+    with request_priority("background"):
+        response = await llm.achat(messages=compression_messages)
+    ```
+    """
+    if priority not in ("interactive", "background"):
+        raise ValueError(f"Invalid request priority: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def get_request_priority() -> RequestPriority:
+    """Get the priority of the LLM requests made in the current context."""
+    return _current_priority.get()
+
+
+class PrioritySchedulerConfig(BaseModel):
+    """
+    Configuration of the scheduling of the requests of different priorities over a shared
+    concurrency budget.
+    """
+    max_concurrency: int = Field(default=8, ge=1)
+    """The maximum number of in-flight requests of all priorities."""
+    max_background_concurrency: Optional[int] = Field(default=None, ge=1)
+    """
+    The maximum number of in-flight background requests, which keeps slots free for the
+    interactive requests. If None, background requests may use all the slots.
+    """
+    max_background_wait: float = Field(default=10.0, ge=0.0)
+    """
+    The number of seconds after which a waiting background request is served before the
+    interactive ones, so that background work is not starved by a steady interactive load.
+    """
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued_at", "event", "loop", "future", "granted")
+
+    def __init__(
+        self,
+        priority: RequestPriority,
+        event: Optional[threading.Event] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        future: Optional["asyncio.Future[None]"] = None,
+    ):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+class PriorityScheduler:
+    """
+    A scheduler of the LLM requests sharing a concurrency budget (e.g. the requests to the same
+    endpoint), which serves the interactive requests before the background ones.
+
+    A request holds one of the `max_concurrency` slots while it is in flight. When no slot is
+    available, the requests wait: the interactive ones are served first, in FIFO order, and the
+    background ones are served when no interactive request waits, without exceeding
+    `max_background_concurrency`. A background request waiting for more than
+    `max_background_wait` seconds is served before the interactive requests.
+
+    Requests wait both in threads (`slot()`) and in event loops (`aslot()`). A scheduler is
+    shared by passing it to several `ScheduledLlm` instances.
+
+    Parameters
+    ----------
+    config : Optional[PrioritySchedulerConfig]
+        The configuration of the scheduler. If None, the default configuration is used.
+    """
+
+    _config: PrioritySchedulerConfig
+    _inflight: int
+    _background_inflight: int
+    _waiters: Dict[RequestPriority, Deque[_Waiter]]
+    _granted: Dict[RequestPriority, int]
+    _promotions: int
+    _lock: threading.Lock
+
+    def __init__(self, config: Optional[PrioritySchedulerConfig] = None):
+        self._config = config or PrioritySchedulerConfig()
+        self._inflight = 0
+        self._background_inflight = 0
+        self._waiters = {"interactive": deque(), "background": deque()}
+        self._granted = {"interactive": 0, "background": 0}
+        self._promotions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def config(self) -> PrioritySchedulerConfig:
+        """The configuration of the scheduler."""
+        return self._config
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Export the current state of the scheduler.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The `inflight` and `background_inflight` gauges, the number of waiting requests
+            by priority (`waiting`), the number of requests served by priority (`granted`), and
+            the number of background requests served ahead of interactive ones after waiting
+            too long (`promotions`).
+        """
+        with self._lock:
+            return {
+                "inflight": self._inflight,
+                "background_inflight": self._background_inflight,
+                "waiting": {priority: len(waiters) for priority, waiters in self._waiters.items()},
+                "granted": dict(self._granted),
+                "promotions": self._promotions,
+            }
+
+    @contextmanager
+    def slot(self, priority: Optional[RequestPriority] = None) -> Iterator[None]:
+        """
+        Hold a slot of in-flight request (blocking until one is available) for the duration of
+        the block.
+
+        Parameters
+        ----------
+        priority : Optional[RequestPriority]
+            The priority of the request. If None, the priority of the current context is used.
+        """
+        priority = priority or get_request_priority()
+        waiter = self._enqueue(_Waiter(priority, event=threading.Event()))
+        if not waiter.granted:
+            waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    @asynccontextmanager
+    async def aslot(self, priority: Optional[RequestPriority] = None) -> AsyncIterator[None]:
+        """
+        Hold a slot of in-flight request (waiting asynchronously until one is available) for the
+        duration of the block.
+
+        Parameters
+        ----------
+        priority : Optional[RequestPriority]
+            The priority of the request. If None, the priority of the current context is used.
+        """
+        priority = priority or get_request_priority()
+        loop = asyncio.get_running_loop()
+        waiter = self._enqueue(_Waiter(priority, loop=loop, future=loop.create_future()))
+        if not waiter.granted:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter.granted:
+                        # The slot was handed over just before the cancellation.
+                        self._release_locked(priority)
+                    else:
+                        self._waiters[priority].remove(waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _enqueue(self, waiter: _Waiter) -> _Waiter:
+        with self._lock:
+            self._waiters[waiter.priority].append(waiter)
+            self._dispatch()
+        return waiter
+
+    def _release(self, priority: RequestPriority) -> None:
+        with self._lock:
+            self._release_locked(priority)
+
+    def _release_locked(self, priority: RequestPriority) -> None:
+        self._inflight -= 1
+        if priority == "background":
+            self._background_inflight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Hand the available slots over to the waiters by priority. Must be called with the lock held.
+        while self._inflight < self._config.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            waiter.granted = True
+            self._inflight += 1
+            self._granted[waiter.priority] += 1
+            if waiter.priority == "background":
+                self._background_inflight += 1
+            if waiter.event is not None:
+                waiter.event.set()
+            elif waiter.loop is not None:
+                waiter.loop.call_soon_threadsafe(self._resolve, waiter)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        interactive, background = self._waiters["interactive"], self._waiters["background"]
+        max_background = self._config.max_background_concurrency
+        background_allowed = bool(background) and (
+            max_background is None or self._background_inflight < max_background
+        )
+        if background_allowed and interactive:
+            if time.monotonic() - background[0].enqueued_at >= self._config.max_background_wait:
+                self._promotions += 1
+                return background.popleft()
+        if interactive:
+            return interactive.popleft()
+        if background_allowed:
+            return background.popleft()
+        return None
+
+    def _resolve(self, waiter: _Waiter) -> None:
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+
+class ScheduledLlm(BaseLlm, StructuredOutput, ToolSelection):
+    """
+    A LLM whose requests are scheduled by a `PriorityScheduler`, so that the requests of lower
+    priority (e.g. memory compression) yield to the latency-critical ones when the LLM instances
+    sharing the scheduler are saturated.
+
+    The priority of a request is the one set by `request_priority()` in the calling context,
+    unless the instance has a fixed `priority`. Streams hold their slot until they are consumed.
+
+    Parameters
+    ----------
+    llm : BaseLlm
+        The wrapped LLM instance. It must implement `StructuredOutput` / `ToolSelection` for
+        the corresponding methods to be used.
+    scheduler : PriorityScheduler
+        The scheduler, which may be shared with other instances.
+    priority : Optional[RequestPriority]
+        The fixed priority of the requests of this instance. If None, the priority of the
+        calling context is used.
+
+    Examples
+    --------
+    ```python
+    scheduler = PriorityScheduler(PrioritySchedulerConfig(max_concurrency=16, max_background_concurrency=4))
+    llm = ScheduledLlm(OpenAILikeLlm(api_base=api_base, api_key=api_key), scheduler)
+    summary_llm = ScheduledLlm(OpenAILikeLlm(api_base=api_base, api_key=api_key), scheduler, priority="background")
+    ```
+    """
+
+    _llm: BaseLlm
+    _scheduler: PriorityScheduler
+    _priority: Optional[RequestPriority]
+
+    def __init__(self, llm: BaseLlm, scheduler: PriorityScheduler, priority: Optional[RequestPriority] = None):
+        self._llm = llm
+        self._scheduler = scheduler
+        self._priority = priority
+
+    @property
+    def llm(self) -> BaseLlm:
+        """The wrapped LLM instance."""
+        return self._llm
+
+    @property
+    def scheduler(self) -> PriorityScheduler:
+        """The scheduler of the requests."""
+        return self._scheduler
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        with self._scheduler.slot(self._priority):
+            return self._llm.chat(messages=messages, **kwargs)
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        async with self._scheduler.aslot(self._priority):
+            return await self._llm.achat(messages=messages, **kwargs)
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        with self._scheduler.slot(self._priority):
+            yield from self._llm.stream(messages=messages, **kwargs)
+
+    async def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        async with self._scheduler.aslot(self._priority):
+            async for chunk in self._llm.astream(messages=messages, **kwargs):
+                yield chunk
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        with self._scheduler.slot(self._priority):
+            return self._llm.structured_output(messages=messages, constraint=constraint, **kwargs)
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        async with self._scheduler.aslot(self._priority):
+            return await self._llm.astructured_output(messages=messages, constraint=constraint, **kwargs)
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        with self._scheduler.slot(self._priority):
+            return self._llm.select_tool(messages=messages, tools=tools, **kwargs)
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        async with self._scheduler.aslot(self._priority):
+            return await self._llm.aselect_tool(messages=messages, tools=tools, **kwargs)
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {
+            "llm": self._llm,
+            "scheduler_config": self._scheduler.config,
+            "priority": self._priority,
+        }
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        # The scheduler is shared by live instances; a restored instance gets its own one.
+        self.__init__(
+            llm=state_dict["llm"],
+            scheduler=PriorityScheduler(state_dict["scheduler_config"]),
+            priority=state_dict["priority"],
+        )
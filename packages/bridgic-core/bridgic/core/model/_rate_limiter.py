@@ -0,0 +1,326 @@
+import asyncio
+import email.utils
+import re
+import time
+
+from threading import Lock
+from typing import Any, ClassVar, Dict, List, Mapping, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from bridgic.core.model.types import Message
+
+
+class RateLimitConfig(BaseModel):
+    """
+    Client-side rate limits of the requests to a model endpoint.
+
+    Attributes
+    ----------
+    requests_per_minute : Optional[int]
+        The maximum number of requests per minute. If None, requests are not limited.
+    tokens_per_minute : Optional[int]
+        The maximum number of (estimated) tokens per minute. If None, tokens are not limited.
+    max_wait : Optional[float]
+        The maximum number of seconds a caller waits for the budget before sending anyway.
+        If None, callers wait as long as needed.
+    """
+    requests_per_minute: Optional[int] = Field(default=None, gt=0)
+    tokens_per_minute: Optional[int] = Field(default=None, gt=0)
+    max_wait: Optional[float] = Field(default=None, ge=0.0)
+
+
+class _Bucket:
+    """
+    A token bucket that allows a negative balance, so that callers reserve their budget in
+    order and wait until the balance they consumed has been refilled.
+    """
+    __slots__ = ("capacity", "rate", "balance", "updated_at")
+
+    def __init__(self, per_minute: int, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.balance = float(per_minute)
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        self.balance = min(self.capacity, self.balance + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        self.balance -= min(amount, self.capacity)
+        return -self.balance / self.rate if self.balance < 0 else 0.0
+
+
+class RateLimiter:
+    """
+    A proactive client-side rate limiter of the requests to one model of one endpoint.
+
+    It tracks a request budget and an estimated-token budget with token buckets refilled
+    continuously at the configured per-minute rates. Callers reserve their budget before
+    sending a request and wait until it is available, instead of being rejected by the server
+    and retried. The limits signaled by the server (`Retry-After` and `x-ratelimit-*` headers)
+    are used to pause or shrink the budgets.
+
+    The limiters are shared by all the LLM instances calling the same model of the same
+    endpoint, see `RateLimiter.shared()`. LLM implementations that have a `rate_limit`
+    attribute (a `RateLimitConfig`) are limited automatically by `retryable_model_call`.
+
+    Parameters
+    ----------
+    config : RateLimitConfig
+        The rate limits.
+    """
+
+    _registry: ClassVar[Dict[Tuple[Optional[str], Optional[str]], "RateLimiter"]] = {}
+    _registry_lock: ClassVar[Lock] = Lock()
+
+    _config: RateLimitConfig
+    _requests: Optional[_Bucket]
+    _tokens: Optional[_Bucket]
+    _blocked_until: float
+    _lock: Lock
+
+    def __init__(self, config: RateLimitConfig):
+        now = time.monotonic()
+        self._config = config
+        self._requests = _Bucket(config.requests_per_minute, now) if config.requests_per_minute else None
+        self._tokens = _Bucket(config.tokens_per_minute, now) if config.tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._lock = Lock()
+
+    @classmethod
+    def shared(cls, endpoint: Optional[str], model: Optional[str], config: RateLimitConfig) -> "RateLimiter":
+        """
+        Get the limiter shared by all the callers of a model of an endpoint.
+
+        Parameters
+        ----------
+        endpoint : Optional[str]
+            The base URL of the endpoint.
+        model : Optional[str]
+            The model identifier.
+        config : RateLimitConfig
+            The rate limits. If the shared limiter was created with different limits, it is
+            replaced with a new one.
+
+        Returns
+        -------
+        RateLimiter
+            The shared limiter.
+        """
+        key = (endpoint, model)
+        limiter = cls._registry.get(key)
+        if limiter is None or limiter._config != config:
+            with cls._registry_lock:
+                limiter = cls._registry.get(key)
+                if limiter is None or limiter._config != config:
+                    limiter = cls._registry[key] = cls(config)
+        return limiter
+
+    @property
+    def config(self) -> RateLimitConfig:
+        """The rate limits."""
+        return self._config
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserve the budget of one request without waiting.
+
+        Parameters
+        ----------
+        tokens : int, default=0
+            The estimated number of tokens of the request.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                self._requests.refill(now)
+                wait = max(wait, self._requests.reserve(1))
+            if self._tokens is not None and tokens > 0:
+                self._tokens.refill(now)
+                wait = max(wait, self._tokens.reserve(tokens))
+        if self._config.max_wait is not None:
+            wait = min(wait, self._config.max_wait)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait (blocking) until the budget of one request is available.
+
+        Parameters
+        ----------
+        tokens : int, default=0
+            The estimated number of tokens of the request.
+
+        Returns
+        -------
+        float
+            The number of seconds waited.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """
+        Wait (asynchronously) until the budget of one request is available.
+
+        Parameters
+        ----------
+        tokens : int, default=0
+            The estimated number of tokens of the request.
+
+        Returns
+        -------
+        float
+            The number of seconds waited.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token budget with the actual usage of a finished request.
+
+        Parameters
+        ----------
+        estimated_tokens : int
+            The number of tokens reserved for the request.
+        actual_tokens : int
+            The number of tokens reported by the model.
+        """
+        if self._tokens is None:
+            return
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.balance = min(self._tokens.capacity, self._tokens.balance + estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adjust the budgets to the limits signaled by the server in the response headers.
+
+        `Retry-After` / `retry-after-ms` pause all the requests for the given duration. The
+        `x-ratelimit-remaining-*` headers shrink the budgets to what the server has left, and
+        pause the requests until `x-ratelimit-reset-*` if nothing is left.
+
+        Parameters
+        ----------
+        headers : Mapping[str, str]
+            The response headers.
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        now = time.monotonic()
+        pause = parse_retry_after(headers)
+
+        for kind, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+            remaining = _parse_float(headers.get(f"x-ratelimit-remaining-{kind}"))
+            if remaining is None:
+                continue
+            if remaining <= 0:
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset is not None:
+                    pause = max(pause or 0.0, reset)
+            if bucket is not None:
+                with self._lock:
+                    bucket.refill(now)
+                    bucket.balance = min(bucket.balance, remaining)
+
+        if pause:
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, now + pause)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Parse the delay requested by the server from `retry-after-ms` or `Retry-After` headers.
+
+    Parameters
+    ----------
+    headers : Mapping[str, str]
+        The response headers, with lower-case names.
+
+    Returns
+    -------
+    Optional[float]
+        The delay in seconds, or None if the server did not request one.
+    """
+    retry_after_ms = _parse_float(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return max(0.0, retry_after_ms / 1000.0)
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    seconds = _parse_float(retry_after)
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        # An HTTP date.
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def get_response_headers(exc: BaseException) -> Optional[Mapping[str, str]]:
+    """
+    Get the HTTP response headers carried by the exception of a failed request, if any.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    return headers if isinstance(headers, Mapping) else None
+
+
+def estimate_tokens(messages: Optional[List[Message]], max_tokens: Optional[int] = None) -> int:
+    """
+    Roughly estimate the number of tokens of a request, as 4 characters per token of the
+    messages plus the maximum number of completion tokens.
+
+    Parameters
+    ----------
+    messages : Optional[List[Message]]
+        The messages of the request.
+    max_tokens : Optional[int]
+        The maximum number of completion tokens of the request.
+
+    Returns
+    -------
+    int
+        The estimated number of tokens.
+    """
+    characters = 0
+    for message in messages or []:
+        for block in getattr(message, "blocks", None) or []:
+            characters += len(str(getattr(block, "text", None) or getattr(block, "content", None) or getattr(block, "arguments", "")))
+    return characters // 4 + (max_tokens or 0)
+
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    # Durations look like `1s`, `6m0s` or `20ms`; plain numbers are seconds.
+    if value is None:
+        return None
+    seconds = _parse_float(value)
+    if seconds is not None:
+        return seconds
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+from collections import deque
+from threading import Lock
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from pydantic import BaseModel, Field, model_validator
+
+from bridgic.core.model._llm_metrics import LlmMetricsRegistry
+
+
+class HedgingConfig(BaseModel):
+    """
+    Configuration of the hedging of the requests to a model.
+
+    A hedged request sends a second identical request when the first one is slower than the
+    hedging delay. The first response wins and the other request is cancelled.
+
+    Attributes
+    ----------
+    delay : Optional[float]
+        A fixed hedging delay in seconds. If None, the delay is the `percentile` of the recently
+        observed latencies.
+    percentile : float
+        The percentile (between 0 and 1) of the recent latencies used as the hedging delay.
+    min_samples : int
+        The number of observed latencies required before hedging with the `percentile` delay.
+    window_size : int
+        The number of recent latencies to keep per model and operation.
+    max_extra_ratio : float
+        The budget of hedges, as the maximum ratio of extra requests to the requests.
+    """
+    delay: Optional[float] = Field(default=None, gt=0.0)
+    percentile: float = Field(default=0.95, gt=0.0, lt=1.0)
+    min_samples: int = Field(default=20, ge=1)
+    window_size: int = Field(default=200, ge=1)
+    max_extra_ratio: float = Field(default=0.05, ge=0.0, le=1.0)
+
+    @model_validator(mode="after")
+    def _check_window(self) -> "HedgingConfig":
+        if self.min_samples > self.window_size:
+            raise ValueError("min_samples must not be greater than window_size")
+        return self
+
+
+class _LatencyWindow:
+    __slots__ = ("samples", "percentile_value", "dirty")
+
+    def __init__(self, window_size: int):
+        self.samples: Deque[float] = deque(maxlen=window_size)
+        self.percentile_value: Optional[float] = None
+        self.dirty = 0
+
+
+class RequestHedger:
+    """
+    Hedges the asynchronous requests to models, to cut their tail latency.
+
+    Hedges are budgeted: each request earns `max_extra_ratio` of a hedge, and a hedge is only
+    sent if a whole one has been earned. Hedges (and whether they won) are counted in the
+    `LlmMetricsRegistry`.
+
+    Parameters
+    ----------
+    config : HedgingConfig
+        The hedging policy.
+    """
+
+    # The percentile delay is recomputed after this many new samples.
+    _PERCENTILE_REFRESH = 10
+    # The most hedges that can be saved up during quiet periods.
+    _MAX_BUDGET = 10.0
+
+    _config: HedgingConfig
+    _windows: Dict[Tuple[Optional[str], str], _LatencyWindow]
+    _budget: float
+    _lock: Lock
+
+    def __init__(self, config: HedgingConfig):
+        self._config = config
+        self._windows = {}
+        self._budget = 0.0
+        self._lock = Lock()
+
+    @property
+    def config(self) -> HedgingConfig:
+        """The hedging policy."""
+        return self._config
+
+    def get_delay(self, model: Optional[str], operation: str) -> Optional[float]:
+        """
+        Get the current hedging delay of the requests of an operation on a model.
+
+        Returns
+        -------
+        Optional[float]
+            The delay in seconds, or None if not enough latencies have been observed yet.
+        """
+        if self._config.delay is not None:
+            return self._config.delay
+        with self._lock:
+            window = self._windows.get((model, operation))
+            if window is None or len(window.samples) < self._config.min_samples:
+                return None
+            if window.percentile_value is None or window.dirty >= self._PERCENTILE_REFRESH:
+                ordered = sorted(window.samples)
+                window.percentile_value = ordered[min(len(ordered) - 1, int(len(ordered) * self._config.percentile))]
+                window.dirty = 0
+            return window.percentile_value
+
+    async def run(self, call: Callable[[], Awaitable[Any]], model: Optional[str], operation: str) -> Any:
+        """
+        Run a request with hedging.
+
+        Parameters
+        ----------
+        call : Callable[[], Awaitable[Any]]
+            The factory of the request. It is called once more for the hedge.
+        model : Optional[str]
+            The model identifier.
+        operation : str
+            The name of the operation.
+
+        Returns
+        -------
+        Any
+            The result of the request that finishes first successfully.
+        """
+        delay = self.get_delay(model, operation)
+        self._earn_budget()
+        start_time = time.perf_counter()
+        if delay is None:
+            result = await call()
+            self._observe(model, operation, time.perf_counter() - start_time)
+            return result
+
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self._spend_budget():
+                hedge = asyncio.ensure_future(call())
+                pending.add(hedge)
+                LlmMetricsRegistry.read().record_hedge(model, operation)
+
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        winner = winner or task
+                    elif first_error is None or task is primary:
+                        first_error = task.exception()
+                if winner is not None:
+                    self._observe(model, operation, time.perf_counter() - start_time)
+                    if winner is not primary:
+                        LlmMetricsRegistry.read().record_hedge(model, operation, won=True)
+                    return winner.result()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _observe(self, model: Optional[str], operation: str, latency: float) -> None:
+        with self._lock:
+            window = self._windows.get((model, operation))
+            if window is None:
+                window = self._windows[(model, operation)] = _LatencyWindow(self._config.window_size)
+            window.samples.append(latency)
+            window.dirty += 1
+
+    def _earn_budget(self) -> None:
+        with self._lock:
+            self._budget = min(self._MAX_BUDGET, self._budget + self._config.max_extra_ratio)
+
+    def _spend_budget(self) -> bool:
+        with self._lock:
+            if self._budget < 1.0:
+                return False
+            self._budget -= 1.0
+            return True
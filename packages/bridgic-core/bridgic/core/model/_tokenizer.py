@@ -0,0 +1,432 @@
+import base64
+import os
+import re
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from bridgic.core.model.types import Message, TextBlock, ToolCallBlock, ToolResultBlock
+from bridgic.core.model._conversion_memo import ConversionMemo, message_fingerprint
+
+
+class Tokenizer(ABC):
+    """
+    The interface of the tokenizers used to count the tokens of texts, e.g. to decide when to
+    compress a memory or how much of a context fits in a prompt.
+
+    A tokenizer is also a `Callable[[str], int]`, so it can be used wherever a token count
+    callback is expected.
+    """
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Parameters
+        ----------
+        text : str
+            The text to count the tokens of.
+
+        Returns
+        -------
+        int
+            The number of tokens.
+        """
+        ...
+
+    def __call__(self, text: str) -> int:
+        return self.count(text)
+
+
+_CJK_RANGES = (
+    r"\u1100-\u11ff"  # Hangul Jamo
+    r"\u2e80-\u2fdf"  # CJK radicals
+    r"\u3000-\u30ff"  # CJK punctuation, Hiragana, Katakana
+    r"\u3100-\u31ff"  # Bopomofo, Katakana extensions
+    r"\u3400-\u4dbf"  # CJK extension A
+    r"\u4e00-\u9fff"  # CJK unified ideographs
+    r"\uac00-\ud7af"  # Hangul syllables
+    r"\uf900-\ufaff"  # CJK compatibility ideographs
+    r"\uff00-\uffef"  # Halfwidth and fullwidth forms
+)
+
+_HEURISTIC_PATTERN = re.compile(
+    rf"(?P<cjk>[{_CJK_RANGES}])"
+    r"|(?P<ascii>[A-Za-z]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<letters>[^\W\d_]+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<symbols>(?:[^\s\w]|_)+)"
+)
+
+
+class HeuristicTokenizer(Tokenizer):
+    """
+    A tokenizer estimating the token counts of the usual BPE vocabularies without a vocabulary,
+    which is the default tokenizer.
+
+    Unlike counting 4 characters per token, the text is split by kind of characters: runs of
+    ASCII letters count a token per 5 letters, runs of other letters (e.g. accented or Cyrillic)
+    a token per 2 letters, numbers a token per 3 digits, each CJK character a token, runs of
+    punctuation and symbols a token per 2 characters, and whitespace a token per run except
+    single spaces, which are merged with the next word. This keeps the estimates of code and
+    of CJK text close to the ones of English prose.
+    """
+
+    def count(self, text: str) -> int:
+        tokens = 0
+        for match in _HEURISTIC_PATTERN.finditer(text):
+            kind = match.lastgroup
+            length = match.end() - match.start()
+            if kind == "cjk":
+                tokens += 1
+            elif kind == "ascii":
+                tokens += (length + 4) // 5
+            elif kind == "digits":
+                tokens += (length + 2) // 3
+            elif kind == "letters":
+                tokens += (length + 1) // 2
+            elif kind == "symbols":
+                tokens += (length + 1) // 2
+            elif length > 1 or match.group() != " ":
+                tokens += 1
+        return tokens
+
+
+# The pre-tokenization of `cl100k_base` and later vocabularies, translated to the `re` module,
+# in which letters are `[^\W\d_]` and numbers are `\d`.
+DEFAULT_BPE_PATTERN = (
+    r"'(?i:[sdmt]|ll|ve|re)"
+    r"|(?:[^\r\n\w]|_)?[^\W\d_]+"
+    r"|\d{1,3}"
+    r"| ?(?:[^\s\w]|_)+[\r\n]*"
+    r"|\s*[\r\n]+"
+    r"|\s+(?!\S)"
+    r"|\s+"
+)
+
+
+class BpeTokenizer(Tokenizer):
+    """
+    A byte-level BPE tokenizer, which counts the exact tokens of a vocabulary offline from its
+    mergeable ranks, e.g. loaded with `from_file` from a `.tiktoken` vocabulary file stored
+    along with the application.
+
+    The text is split into pieces by the pre-tokenization pattern, and the bytes of each piece
+    are merged by ascending rank. The tokens of the recent pieces are remembered, so the words
+    repeated across texts are only merged once.
+
+    A tokenizer loaded with `from_file` is serialized as the path of its vocabulary file, which
+    is read again on deserialization, rather than as its whole vocabulary.
+
+    Parameters
+    ----------
+    mergeable_ranks : Dict[bytes, int]
+        The rank of each token of the vocabulary, including the 256 single bytes.
+    pattern : str, default=DEFAULT_BPE_PATTERN
+        The regular expression splitting a text into pieces before the merges.
+    cache_size : int, default=65536
+        The number of pieces whose tokens are remembered.
+
+    Examples
+    --------
+    ```python
+    tokenizer = BpeTokenizer.from_file("vocab/cl100k_base.tiktoken")
+    set_default_tokenizer(tokenizer)
+    ```
+    """
+
+    _ranks: Dict[bytes, int]
+    _pattern: str
+    _regex: "re.Pattern[str]"
+    _cache_size: int
+    _cache: Dict[str, Tuple[int, ...]]
+    _path: Optional[str]
+
+    def __init__(
+        self,
+        mergeable_ranks: Dict[bytes, int],
+        pattern: str = DEFAULT_BPE_PATTERN,
+        cache_size: int = 65536,
+    ):
+        self._ranks = mergeable_ranks
+        self._pattern = pattern
+        self._regex = re.compile(pattern)
+        self._cache_size = cache_size
+        self._cache = {}
+        self._path = None
+
+    @property
+    def path(self) -> Optional[str]:
+        """The path of the vocabulary file of a tokenizer loaded with `from_file`, if any."""
+        return self._path
+
+    @property
+    def pattern(self) -> str:
+        """The pre-tokenization pattern."""
+        return self._pattern
+
+    @property
+    def cache_size(self) -> int:
+        """The number of pieces whose tokens are remembered."""
+        return self._cache_size
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], pattern: str = DEFAULT_BPE_PATTERN, cache_size: int = 65536) -> "BpeTokenizer":
+        """
+        Load a tokenizer from a vocabulary file in the `tiktoken` format, with a base64 token
+        and its rank per line.
+
+        Parameters
+        ----------
+        path : Union[str, Path]
+            The path of the vocabulary file.
+        pattern : str, default=DEFAULT_BPE_PATTERN
+            The pre-tokenization pattern of the vocabulary.
+        cache_size : int, default=65536
+            The number of pieces whose tokens are remembered.
+
+        Returns
+        -------
+        BpeTokenizer
+            The tokenizer of the vocabulary.
+        """
+        tokenizer = cls(_read_mergeable_ranks(path), pattern=pattern, cache_size=cache_size)
+        tokenizer._path = os.fspath(path)
+        return tokenizer
+
+    def encode(self, text: str) -> List[int]:
+        """
+        Encode a text into the ranks of its tokens.
+
+        Parameters
+        ----------
+        text : str
+            The text to encode.
+
+        Returns
+        -------
+        List[int]
+            The token ranks.
+        """
+        tokens: List[int] = []
+        for match in self._regex.finditer(text):
+            tokens.extend(self._encode_piece(match.group()))
+        return tokens
+
+    def count(self, text: str) -> int:
+        return sum(len(self._encode_piece(match.group())) for match in self._regex.finditer(text))
+
+    def _encode_piece(self, piece: str) -> Tuple[int, ...]:
+        tokens = self._cache.get(piece)
+        if tokens is not None:
+            return tokens
+
+        ranks = self._ranks
+        data = piece.encode("utf-8")
+        rank = ranks.get(data)
+        if rank is not None:
+            tokens = (rank,)
+        else:
+            parts = [data[i:i + 1] for i in range(len(data))]
+            while len(parts) > 1:
+                best_rank, best_index = None, -1
+                for i in range(len(parts) - 1):
+                    rank = ranks.get(parts[i] + parts[i + 1])
+                    if rank is not None and (best_rank is None or rank < best_rank):
+                        best_rank, best_index = rank, i
+                if best_index < 0:
+                    break
+                parts[best_index:best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+            try:
+                tokens = tuple(ranks[part] for part in parts)
+            except KeyError as e:
+                raise ValueError(f"The vocabulary has no token for the byte {e.args[0]!r}.") from None
+
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[piece] = tokens
+        return tokens
+
+    def __getstate__(self):
+        if self._path is not None:
+            return {"path": self._path, "pattern": self._pattern, "cache_size": self._cache_size}
+        return {"mergeable_ranks": self._ranks, "pattern": self._pattern, "cache_size": self._cache_size}
+
+    def __setstate__(self, state):
+        path = state.pop("path", None)
+        if path is not None:
+            state["mergeable_ranks"] = _read_mergeable_ranks(path)
+        self.__init__(**state)
+        self._path = path
+
+
+def _read_mergeable_ranks(path: Union[str, Path]) -> Dict[bytes, int]:
+    ranks: Dict[bytes, int] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+class TokenCounter:
+    """
+    A memo of the token counts of messages and texts, so that the unchanged messages of a
+    growing conversation are not counted again every time its size is checked.
+
+    The counts of messages are remembered per message like `ConversionMemo`, and recounted
+    when the content of a message changes. The counts of texts are remembered per text.
+
+    Parameters
+    ----------
+    tokenizer : Union[Tokenizer, Callable[[str], int]]
+        The tokenizer, or any function counting the tokens of a text.
+    max_entries : int, default=4096
+        The number of messages, and of texts, whose counts are remembered.
+    """
+
+    _tokenizer: Callable[[str], int]
+    _max_entries: int
+    _texts: "OrderedDict[str, int]"
+    _messages: ConversionMemo[int]
+    _lock: Lock
+
+    def __init__(self, tokenizer: Union[Tokenizer, Callable[[str], int]], max_entries: int = 4096):
+        self._tokenizer = tokenizer
+        self._max_entries = max_entries
+        self._texts = OrderedDict()
+        self._messages = ConversionMemo(self._count_message, message_fingerprint, max_entries=max_entries)
+        self._lock = Lock()
+
+    @property
+    def tokenizer(self) -> Callable[[str], int]:
+        """The tokenizer counting the texts."""
+        return self._tokenizer
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Parameters
+        ----------
+        text : str
+            The text to count the tokens of.
+
+        Returns
+        -------
+        int
+            The number of tokens.
+        """
+        with self._lock:
+            tokens = self._texts.get(text)
+            if tokens is not None:
+                self._texts.move_to_end(text)
+                return tokens
+        tokens = self._tokenizer(text)
+        with self._lock:
+            self._texts[text] = tokens
+            while len(self._texts) > self._max_entries:
+                self._texts.popitem(last=False)
+        return tokens
+
+    def count_messages(self, messages: List[Message]) -> int:
+        """
+        Count the tokens of the content of messages.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            The messages to count the tokens of.
+
+        Returns
+        -------
+        int
+            The total number of tokens of the messages.
+        """
+        return sum(self._messages.convert_all(messages))
+
+    def count_message(self, message: Message) -> int:
+        """
+        Count the tokens of the content of a message, i.e. of its texts, tool calls and tool
+        results.
+
+        Parameters
+        ----------
+        message : Message
+            The message to count the tokens of.
+
+        Returns
+        -------
+        int
+            The number of tokens of the message.
+        """
+        return self._messages(message)
+
+    def _count_message(self, message: Message) -> int:
+        return sum(self._tokenizer(text) for text in _message_texts(message))
+
+
+def _message_texts(message: Message) -> List[str]:
+    texts = []
+    for block in message.blocks:
+        if isinstance(block, TextBlock):
+            texts.append(block.text)
+        elif isinstance(block, ToolCallBlock):
+            texts.append("{" + f"\"id\": \"{block.id}\", \"name\": \"{block.name}\", \"arguments\": {block.arguments}" + "}")
+        elif isinstance(block, ToolResultBlock):
+            texts.append(block.content)
+        else:
+            raise ValueError(f"Not supported block type: {type(block)}")
+    return texts
+
+
+_default_counter = TokenCounter(HeuristicTokenizer())
+
+
+def set_default_tokenizer(tokenizer: Optional[Union[Tokenizer, Callable[[str], int]]]) -> None:
+    """
+    Set the tokenizer used to count tokens by default, e.g. a `BpeTokenizer` of the vocabulary
+    of the models in use.
+
+    Parameters
+    ----------
+    tokenizer : Optional[Union[Tokenizer, Callable[[str], int]]]
+        The tokenizer. If None, the `HeuristicTokenizer` is restored.
+    """
+    global _default_counter
+    _default_counter = TokenCounter(tokenizer if tokenizer is not None else HeuristicTokenizer())
+
+
+def get_token_counter() -> TokenCounter:
+    """
+    Get the token counter of the default tokenizer.
+
+    Returns
+    -------
+    TokenCounter
+        The shared counter of the tokenizer set by `set_default_tokenizer`.
+    """
+    return _default_counter
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text with the default tokenizer.
+
+    Parameters
+    ----------
+    text : str
+        The text to count the tokens of.
+
+    Returns
+    -------
+    int
+        The number of tokens.
+    """
+    return _default_counter.count(text)
@@ -24,6 +24,9 @@ __all__ = [
     "Response",
     "StreamResponse",
     "AsyncStreamResponse",
+    "StructuredOutputChunk",
+    "AsyncStructuredStreamResponse",
+    "AsyncToolSelectionStreamResponse",
     "Tool",
     "ToolCall",
     "ToolCallDict",
@@ -1,7 +1,8 @@
 from pydantic import BaseModel
-from typing import Optional, Any, Generator, AsyncGenerator
+from typing import Optional, Any, Generator, AsyncGenerator, Tuple, Union
 
 from bridgic.core.model.types._message import Message, MessageChunk
+from bridgic.core.model.types._tool_use import ToolCall
 from bridgic.core.model.types._usage import TokenUsage
 
 class Response(BaseModel):
@@ -27,3 +28,24 @@ class Response(BaseModel):
 
 StreamResponse = Generator[MessageChunk, None, None]
 AsyncStreamResponse = AsyncGenerator[MessageChunk, None]
+
+class StructuredOutputChunk(BaseModel):
+    """
+    A value completed while streaming a structured output.
+
+    Attributes
+    ----------
+    path : Tuple[Union[str, int], ...]
+        The location of the value in the output, as the keys of the objects and the indices
+        of the arrays leading to it, e.g. `("output", 0)` for the first element of the
+        `output` field. The empty path designates the whole output.
+    value : Any
+        The completed value, validated against the type it has in the constraint when it
+        is known.
+    """
+    path: Tuple[Union[str, int], ...] = ()
+    value: Any = None
+
+AsyncStructuredStreamResponse = AsyncGenerator[StructuredOutputChunk, None]
+
+AsyncToolSelectionStreamResponse = AsyncGenerator[Union[ToolCall, MessageChunk], None]
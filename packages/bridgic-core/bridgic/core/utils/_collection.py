@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Mapping, Optional
+from typing import List, Dict, Any, Iterable, Mapping, Optional
 from collections.abc import Hashable
 
 def unique_list_in_order(ele_list: List[Any]) -> List[Any]:
@@ -197,7 +197,12 @@ def validate_required_params(params: Dict[str, Any], required_params: List[str])
         raise ValueError(f"Missing required parameters: {', '.join(missing_params)}")
 
 
-def serialize_data(value: Any, depth: int = 5) -> Any:
+def serialize_data(
+    value: Any,
+    depth: int = 5,
+    max_nodes: Optional[int] = None,
+    redact_keys: Optional[Iterable[str]] = None,
+) -> Any:
     """
     Convert data into a structure that can be serialized (e.g. to JSON/msgpack).
 
@@ -206,6 +211,7 @@ def serialize_data(value: Any, depth: int = 5) -> Any:
     - Recursively sanitizes mappings (dict-like) and sequences (list/tuple-like)
     - Falls back to repr(...) for unknown/custom objects
     - Limits recursion by depth to prevent infinite loops
+    - Optionally limits the number of traversed values and redacts sensitive keys
 
     Parameters
     ----------
@@ -213,12 +219,24 @@ def serialize_data(value: Any, depth: int = 5) -> Any:
         The value to sanitize.
     depth : int
         Maximum recursive depth to avoid infinite recursion.
+    max_nodes : Optional[int]
+        Maximum number of values to traverse. Once the budget is exhausted, the remaining
+        values are represented by repr(...) without traversing into them.
+    redact_keys : Optional[Iterable[str]]
+        Keys (case-insensitive) of the mappings whose values are replaced with "[REDACTED]".
 
     Returns
     -------
     Any
         A sanitized value suitable for serialization.
     """
+    if max_nodes is None and not redact_keys:
+        return _serialize_data(value, depth)
+    budget = [max_nodes if max_nodes is not None else float("inf")]
+    redacted = frozenset(key.lower() for key in redact_keys) if redact_keys else frozenset()
+    return _serialize_data_with_policy(value, depth, budget, redacted)
+
+def _serialize_data(value: Any, depth: int) -> Any:
     if depth <= 0:
         return repr(value)
 
@@ -227,19 +245,55 @@ def serialize_data(value: Any, depth: int = 5) -> Any:
 
     if isinstance(value, Mapping):
         return {
-            str(key): serialize_data(val, depth - 1)
+            str(key): _serialize_data(val, depth - 1)
             for key, val in value.items()
         }
 
     # Accept generic sequences but not bytes-likes or strings (already handled)
     if isinstance(value, (list, tuple)):
-        return [serialize_data(item, depth - 1) for item in value]
+        return [_serialize_data(item, depth - 1) for item in value]
+
+    if hasattr(value, "__iter__") and not isinstance(value, (str, bytes, bytearray)):
+        try:
+            return [_serialize_data(item, depth - 1) for item in value]
+        except Exception:
+            return repr(value)
+
+    return repr(value)
+
+def _serialize_data_with_policy(value: Any, depth: int, budget: List[float], redacted: frozenset) -> Any:
+    # The budget is shared by the whole traversal, so that wide payloads are cut as well as deep ones.
+    budget[0] -= 1
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+
+    if depth <= 0 or budget[0] < 0:
+        return repr(value)
+
+    if isinstance(value, Mapping):
+        result = {}
+        for key, val in value.items():
+            if budget[0] <= 0:
+                result["..."] = f"{len(value) - len(result)} more items"
+                break
+            key = str(key)
+            if key.lower() in redacted:
+                result[key] = "[REDACTED]"
+            else:
+                result[key] = _serialize_data_with_policy(val, depth - 1, budget, redacted)
+        return result
 
     if hasattr(value, "__iter__") and not isinstance(value, (str, bytes, bytearray)):
+        result = []
         try:
-            return [serialize_data(item, depth - 1) for item in value]
+            for item in value:
+                if budget[0] <= 0:
+                    result.append("...")
+                    break
+                result.append(_serialize_data_with_policy(item, depth - 1, budget, redacted))
         except Exception:
             return repr(value)
+        return result
 
     return repr(value)
 
@@ -0,0 +1,227 @@
+import atexit
+import queue
+import threading
+import time
+import warnings
+import weakref
+
+from typing import Callable, List, Optional
+
+
+class TraceExporter:
+    """
+    A background exporter that takes trace export work off the hot path of worker execution.
+
+    Tracing callbacks submit span events as zero-argument callables. The callables are run
+    on a dedicated daemon thread, where the expensive work (serializing arguments and results,
+    building backend payloads and calling the backend client) happens lazily. Events that
+    pile up while the thread is busy are drained in batches, and the `flush` hook of the
+    backend is called once per batch rather than once per event.
+
+    The queue is bounded. When the backend is too slow to keep up, newly submitted events
+    are dropped (and counted in `dropped_count`) instead of growing memory without limit
+    or blocking the running automa.
+
+    Parameters
+    ----------
+    flush : Optional[Callable[[], None]], default=None
+        The hook called on the exporter thread after each batch of events is exported,
+        typically used to flush the buffer of the backend client.
+    max_queue_size : int, default=2048
+        The maximum number of pending events. Events submitted beyond it are dropped.
+    max_batch_size : int, default=256
+        The maximum number of events exported between two calls of the `flush` hook.
+    name : str, default="bridgic-trace-exporter"
+        The name of the exporter thread.
+
+    Notes
+    -----
+    Since payloads are serialized on the exporter thread, objects that are mutated after
+    their span is finished may be reported in their mutated state.
+    """
+
+    _flush_hook: Optional[Callable[[], None]]
+    _queue: "queue.Queue[Callable[[], None]]"
+    _max_batch_size: int
+    _name: str
+    _thread: Optional[threading.Thread]
+    _lock: threading.Lock
+    _idle: threading.Condition
+    _pending: int
+    _dropped_count: int
+    _is_shutdown: bool
+
+    def __init__(
+        self,
+        flush: Optional[Callable[[], None]] = None,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 256,
+        name: str = "bridgic-trace-exporter",
+    ):
+        self._flush_hook = flush
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._max_batch_size = max_batch_size
+        self._name = name
+        self._thread = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._dropped_count = 0
+        self._is_shutdown = False
+
+    @property
+    def dropped_count(self) -> int:
+        """The number of events dropped because the queue was full."""
+        return self._dropped_count
+
+    @property
+    def pending_count(self) -> int:
+        """The number of events submitted but not yet exported."""
+        return self._pending
+
+    def submit(self, event: Callable[[], None]) -> bool:
+        """
+        Submit a span event to be exported on the exporter thread. Never blocks.
+
+        Parameters
+        ----------
+        event : Callable[[], None]
+            The export work of the event.
+
+        Returns
+        -------
+        bool
+            True if the event is accepted; False if it is dropped because the queue
+            is full or the exporter is shut down.
+        """
+        with self._lock:
+            if self._is_shutdown:
+                return False
+            if self._thread is None:
+                self._start_thread()
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._dropped_count += 1
+                if self._dropped_count == 1:
+                    warnings.warn(
+                        f"The trace exporter '{self._name}' is falling behind, "
+                        f"trace events are being dropped."
+                    )
+                return False
+            self._pending += 1
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all submitted events are exported and the backend is flushed.
+
+        Parameters
+        ----------
+        timeout : Optional[float], default=None
+            The maximum number of seconds to wait. Wait forever if None.
+
+        Returns
+        -------
+        bool
+            True if all the events are exported in time; False otherwise.
+        """
+        with self._idle:
+            if self._thread is threading.current_thread():
+                return self._pending == 0
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """
+        Flush the pending events, stop accepting new ones and stop the exporter thread.
+
+        Parameters
+        ----------
+        timeout : Optional[float], default=None
+            The maximum number of seconds to wait for the pending events and the thread.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.flush(timeout=timeout)
+        with self._lock:
+            self._is_shutdown = True
+            thread = self._thread
+        if thread is None or thread is threading.current_thread():
+            return
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            # The events were not exported in time; the thread stops once it drains them.
+            pass
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def _start_thread(self) -> None:
+        self._thread = threading.Thread(
+            target=_run_exporter,
+            args=(weakref.ref(self), self._queue),
+            name=self._name,
+            daemon=True,
+        )
+        self._thread.start()
+        _live_exporters.add(self)
+
+    def _export_batch(self, batch: List[Callable[[], None]]) -> None:
+        try:
+            for event in batch:
+                try:
+                    event()
+                except Exception as e:
+                    warnings.warn(f"Failed to export trace event in '{self._name}': {e}")
+            if self._flush_hook is not None:
+                try:
+                    self._flush_hook()
+                except Exception as e:
+                    warnings.warn(f"Failed to flush trace events in '{self._name}': {e}")
+        finally:
+            with self._idle:
+                self._pending -= len(batch)
+                if self._pending == 0:
+                    self._idle.notify_all()
+
+
+# Put in the queue by `TraceExporter.shutdown()` to stop the exporter thread.
+def _STOP() -> None:
+    pass
+
+
+def _run_exporter(exporter_ref: "weakref.ref[TraceExporter]", events: "queue.Queue[Callable[[], None]]") -> None:
+    while True:
+        try:
+            event = events.get(timeout=1.0)
+        except queue.Empty:
+            if exporter_ref() is None:
+                return
+            continue
+
+        exporter = exporter_ref()
+        if exporter is None or event is _STOP:
+            return
+        batch = [event]
+        is_stopped = False
+        while len(batch) < exporter._max_batch_size:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            if event is _STOP:
+                is_stopped = True
+                break
+            batch.append(event)
+        exporter._export_batch(batch)
+        del exporter
+        if is_stopped:
+            return
+
+
+_live_exporters: "weakref.WeakSet[TraceExporter]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_exporters() -> None:
+    # Give the exporters a bounded chance to deliver their pending events at interpreter exit.
+    for exporter in list(_live_exporters):
+        exporter.shutdown(timeout=5.0)
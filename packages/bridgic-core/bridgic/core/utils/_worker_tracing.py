@@ -1,7 +1,12 @@
-from typing import Any, Dict
+import json
+
+from typing import Any, Dict, NamedTuple, Optional
 
 from bridgic.core.automa import Automa
+from bridgic.core.automa._automa import _run_trace_sampled
 from bridgic.core.automa.worker import Worker
+from bridgic.core.config import GlobalSetting, TraceSamplingConfig, TracePayloadConfig
+from bridgic.core.utils._collection import serialize_data
 
 def get_worker_tracing_step_name(key: str, worker: Worker) -> str:
 	"""
@@ -25,6 +30,59 @@ def get_worker_tracing_step_name(key: str, worker: Worker) -> str:
 		return f"{key}  <{nested_automa.name}>"
 	return key
 
+class WorkerTracingRecord(NamedTuple):
+	"""
+	The ancestry-derived tracing metadata of a worker, which only changes when the worker 
+	(or one of its ancestors) is attached to another automa.
+	"""
+	nesting_level: int
+	"""The number of automa levels from the top-level automa down to the worker."""
+	parent_automa_name: str
+	"""The name of the automa containing the worker."""
+	parent_automa_class: str
+	"""The class name of the automa containing the worker."""
+	top_automa_name: str
+	"""The name of the top-level automa."""
+
+def get_worker_tracing_record(worker: Worker, parent: "Automa") -> WorkerTracingRecord:
+	"""
+	Get the tracing metadata of a worker, which is computed once and cached on the worker 
+	until its parent automa, or one of the ancestors of that automa, is re-parented.
+	
+	Parameters
+	----------
+	worker : Worker
+		The worker instance to get tracing metadata for.
+	parent : Automa
+		The parent automa instance containing this worker.
+	
+	Returns
+	-------
+	WorkerTracingRecord
+		The cached tracing metadata of the worker.
+	"""
+	cached = worker._cached_tracing_record
+	# Re-parenting an automa bumps the ancestry versions of all the automas nested in it.
+	if cached is not None and cached[0] is parent and cached[1] == parent._ancestry_version:
+		return cached[2]
+
+	# Calculate nesting level
+	current = parent
+	nesting_level = 1
+	while not current.is_top_level():
+		current = current.parent
+		nesting_level += 1
+
+	record = WorkerTracingRecord(
+		nesting_level=nesting_level,
+		parent_automa_name=parent.name,
+		parent_automa_class=parent.__class__.__name__,
+		# The loop above ends at the top-level automa.
+		top_automa_name=current.name,
+	)
+	worker._cached_tracing_record = (parent, parent._ancestry_version, record)
+	return record
+
 def build_worker_tracing_dict(worker: Worker, parent: "Automa") -> Dict[str, Any]:
 	"""
 	Build worker tracing information as a dictionary.
@@ -41,29 +99,146 @@ def build_worker_tracing_dict(worker: Worker, parent: "Automa") -> Dict[str, Any
 	Dict[str, Any]
 		A dictionary containing worker tracing information.
 	"""
-	report_info = worker.get_report_info()
-
-	other_report_info = {
-		"nesting_level": 0,
-		"parent_automa_name": parent.name,
-		"parent_automa_class": parent.__class__.__name__,
+	payload_config = get_trace_payload_config(parent)
+	report_info = {
+		key: serialize_trace_payload(value, payload_config)
+		for key, value in worker.get_report_info().items()
 	}
-	# Calculate nesting level
-	current = parent
-	nesting_level = 1 
-	while True:
-		if current.is_top_level():
-			other_report_info["nesting_level"] = nesting_level
-			break
-		else:
-			current = current.parent
-			nesting_level += 1
 
-	# Get top-level automa
-	top = worker._get_top_level_automa()
-	other_report_info["top_automa_name"] = top.name
+	other_report_info = get_worker_tracing_record(worker, parent)._asdict()
 
 	return {
 		**other_report_info,
 		**report_info,
 	}
+
+def get_trace_sampling_config(automa: Optional[Automa]) -> TraceSamplingConfig:
+	"""
+	Get the trace sampling policy in effect for the run of the given automa.
+	
+	Parameters
+	----------
+	automa : Optional[Automa]
+		Any automa of the run. If None, the global policy is returned.
+	
+	Returns
+	-------
+	TraceSamplingConfig
+		The policy set by the top-level automa, or the global one if it is not set.
+	"""
+	if automa is None:
+		return GlobalSetting.read().trace_sampling
+	return automa._get_trace_sampling_config()
+
+def get_trace_payload_config(automa: Optional[Automa]) -> TracePayloadConfig:
+	"""
+	Get the trace payload policy in effect for the run of the given automa.
+	
+	Parameters
+	----------
+	automa : Optional[Automa]
+		Any automa of the run. If None, the global policy is returned.
+	
+	Returns
+	-------
+	TracePayloadConfig
+		The policy set by the top-level automa, or the global one if it is not set.
+	"""
+	if automa is None:
+		return GlobalSetting.read().trace_payload
+	return automa._get_trace_payload_config()
+
+def is_trace_sampled(automa: Optional[Automa]) -> bool:
+	"""
+	Check whether the current run of the given automa is selected by head sampling.
+	
+	The decision is made by the top-level automa when the run starts and is scoped to the 
+	run, so concurrent runs of the same automa each keep their own decision.
+	
+	Parameters
+	----------
+	automa : Optional[Automa]
+		Any automa of the run.
+	
+	Returns
+	-------
+	bool
+		True if the spans of the run should be recorded.
+	"""
+	if automa is None:
+		return True
+	return _run_trace_sampled.get() is not False
+
+def serialize_trace_payload(value: Any, payload_config: TracePayloadConfig) -> Any:
+	"""
+	Serialize a single argument or result to be recorded in a trace, following the payload policy.
+	
+	Parameters
+	----------
+	value : Any
+		The argument or result to serialize.
+	payload_config : TracePayloadConfig
+		The payload policy in effect.
+	
+	Returns
+	-------
+	Any
+		The serialized value, which is replaced by a truncated preview string if it exceeds
+		`payload_config.max_bytes`.
+	"""
+	serialized = serialize_data(
+		value,
+		depth=payload_config.max_depth,
+		max_nodes=payload_config.max_nodes,
+		redact_keys=payload_config.redact_keys,
+	)
+	max_bytes = payload_config.max_bytes
+	if max_bytes is None:
+		return serialized
+	if isinstance(serialized, str):
+		encoded = serialized.encode("utf-8")
+	else:
+		encoded = json.dumps(serialized, ensure_ascii=False, default=str).encode("utf-8")
+	if len(encoded) <= max_bytes:
+		return serialized
+	preview = encoded[:max_bytes].decode("utf-8", errors="ignore")
+	return f"{preview}...[truncated {len(encoded) - max_bytes} bytes]"
+
+def serialize_trace_arguments(
+	arguments: Optional[Dict[str, Any]],
+	payload_config: TracePayloadConfig,
+) -> Optional[Dict[str, Any]]:
+	"""
+	Serialize the execution arguments of a worker to be recorded in a trace, applying the payload
+	policy to each positional and keyword argument separately.
+	
+	Parameters
+	----------
+	arguments : Optional[Dict[str, Any]]
+		Execution arguments with keys "args" and "kwargs".
+	payload_config : TracePayloadConfig
+		The payload policy in effect.
+	
+	Returns
+	-------
+	Optional[Dict[str, Any]]
+		The serialized arguments.
+	"""
+	if arguments is None:
+		return None
+	redacted = {key.lower() for key in payload_config.redact_keys}
+
+	def serialize_named(name: Any, value: Any) -> Any:
+		if str(name).lower() in redacted:
+			return "[REDACTED]"
+		return serialize_trace_payload(value, payload_config)
+
+	serialized = {}
+	for name, value in arguments.items():
+		if name == "args" and isinstance(value, (list, tuple)):
+			serialized[name] = [serialize_trace_payload(arg, payload_config) for arg in value]
+		elif name == "kwargs" and isinstance(value, dict):
+			serialized[name] = {str(key): serialize_named(key, arg) for key, arg in value.items()}
+		else:
+			serialized[name] = serialize_named(name, value)
+	return serialized
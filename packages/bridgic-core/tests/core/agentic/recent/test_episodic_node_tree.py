@@ -10,6 +10,7 @@ from bridgic.core.agentic.recent._episodic_node import (
     CompressionEpisodicNode,
     NodeType,
 )
+from bridgic.core.model import TokenCounter
 from bridgic.core.model.types import Message, Role
 
 
@@ -200,6 +201,65 @@ class TestEpisodicNodeTreeQuery:
         assert tail_node_2.timestep == leaf_timestep_2
         assert tail_node_2.message_appendable is True
 
+    def test_push_messages(self):
+        """Test pushing messages to the tail appendable leaf node, or to a new one."""
+        tree = EpisodicNodeTree()
+        tree.add_goal_node(goal="Goal")
+        message = Message.from_text(text="hi", role=Role.USER)
+
+        # No appendable leaf node: a new one is added.
+        leaf_timestep = tree.push_messages([message])
+        assert tree.get_node(leaf_timestep).messages == [message]
+
+        # The messages are appended to the tail appendable leaf node.
+        assert tree.push_messages([message]) == leaf_timestep
+        assert tree.get_node(leaf_timestep).messages == [message, message]
+
+
+class TestEpisodicNodeTreeCounts:
+    """Test the running node and token counts of EpisodicNodeTree."""
+
+    def test_counts_follow_goals_messages_and_compressions(self):
+        """Test that the counts are updated as nodes are added, without walking the history."""
+        tree = EpisodicNodeTree(token_counter=TokenCounter(lambda text: len(text.split())))
+        assert (tree.node_count, tree.token_count) == (0, 0)
+
+        tree.add_goal_node(goal="Find the answer", guidance="Be brief")
+        assert (tree.node_count, tree.token_count) == (1, 5)
+        leaf_timestep = tree.add_leaf_node(messages=[Message.from_text(text="one two", role=Role.USER)])
+        assert tree.append_messages([Message.from_text(text="three", role=Role.AI)]) == leaf_timestep
+        assert (tree.node_count, tree.token_count) == (2, 8)
+
+        # A pending summary is counted once it is ready.
+        compression_timestep = tree.add_compression_node(compressed_timesteps=[leaf_timestep])
+        assert (tree.node_count, tree.token_count) == (2, 5)
+        tree.get_node(compression_timestep).summary.set_result("short summary")
+        assert tree.token_count == 7
+
+        # Replacing the goal replaces its tokens.
+        tree.add_goal_node(goal="New goal")
+        assert (tree.node_count, tree.token_count) == (2, 4)
+        assert tree.append_messages([Message.from_text(text="lost", role=Role.USER)]) is None
+
+        state_dict = tree.dump_to_dict()
+        new_tree = EpisodicNodeTree.__new__(EpisodicNodeTree)
+        new_tree.load_from_dict(state_dict)
+        new_tree.token_counter = TokenCounter(lambda text: len(text.split()))
+        assert (new_tree.node_count, new_tree.token_count) == (2, 4)
+
+    def test_recounts_do_not_watch_pending_summaries_again(self):
+        """Test that a pending summary is counted once ready, however many times the tree is recounted."""
+        tree = EpisodicNodeTree(token_counter=TokenCounter(lambda text: len(text.split())))
+        leaf_timestep = tree.add_leaf_node(messages=[Message.from_text(text="one two", role=Role.USER)])
+        compression_timestep = tree.add_compression_node(compressed_timesteps=[leaf_timestep])
+        summary = tree.get_node(compression_timestep).summary
+        for _ in range(3):
+            tree.token_counter = TokenCounter(lambda text: 2 * len(text.split()))
+        assert len(summary._done_callbacks) == 1
+
+        summary.set_result("short summary")
+        assert tree.token_count == 4
+
 
 class TestEpisodicNodeTreeSerialization:
     """Test serialization of EpisodicNodeTree."""
@@ -0,0 +1,221 @@
+"""
+Unit tests for the tool execution and the prompts of ReCentAutoma.
+"""
+import asyncio
+import time
+import pytest
+
+from bridgic.core.agentic.recent import AnswerTaskConfig, ReCentAutoma, ReCentMemoryConfig
+from bridgic.core.agentic.recent._recent_automa import GoalStatus
+from bridgic.core.automa import RunningOptions
+from bridgic.core.automa.worker import WorkerCallback, WorkerCallbackBuilder
+from bridgic.core.model import BaseLlm
+from bridgic.core.model.types import Message, MessageChunk, Response, Role, ToolCall, ToolResultBlock
+
+
+events = []
+
+
+async def search(query: str) -> str:
+    events.append("search started")
+    await asyncio.sleep(0.05)
+    return f"results of {query}"
+
+
+def read(url: str) -> str:
+    events.append("read started")
+    return f"content of {url}"
+
+
+class StreamingToolLlm(BaseLlm):
+    """Mock LLM whose tool selection waits for the first tool to start before selecting the second one."""
+
+    def __init__(self):
+        self.observations = 0
+
+    async def achat(self, messages, **kwargs) -> Response:
+        return Response(message=Message.from_text(text="final answer", role=Role.AI))
+
+    def chat(self, messages, **kwargs) -> Response:
+        raise NotImplementedError
+
+    def stream(self, messages, **kwargs):
+        raise NotImplementedError
+
+    async def astream(self, messages, **kwargs):
+        raise NotImplementedError
+
+    def structured_output(self, messages, constraint, **kwargs):
+        raise NotImplementedError
+
+    async def astructured_output(self, messages, constraint, **kwargs):
+        self.observations += 1
+        return GoalStatus(brief_thinking="thinking", goal_achieved=self.observations > 1)
+
+    def select_tool(self, messages, tools, **kwargs):
+        raise NotImplementedError
+
+    async def aselect_tool(self, messages, tools, **kwargs):
+        raise AssertionError("The tool selection should be streamed.")
+
+    async def astream_select_tool(self, messages, tools, **kwargs):
+        yield MessageChunk(delta="Searching and reading.")
+        yield ToolCall(id="call_1", name="search", arguments={"query": "bridgic"})
+        # The second call is generated while the first tool runs.
+        start = time.monotonic()
+        while "search started" not in events and time.monotonic() - start < 1.0:
+            await asyncio.sleep(0.01)
+        events.append("read selected")
+        yield ToolCall(id="call_2", name="read", arguments={"url": "https://bridgic.ai"})
+
+    def dump_to_dict(self):
+        return {}
+
+    def load_from_dict(self, state_dict):
+        pass
+
+
+class ToolRecordingCallback(WorkerCallback):
+    async def on_worker_start(self, key, is_top_level=False, parent=None, arguments=None):
+        if key.startswith("tool-"):
+            # The callbacks can find the tool worker by its key, like the tracing ones do.
+            assert parent._get_worker_instance(key) is not None
+            events.append(f"{key} callback")
+
+
+@pytest.mark.asyncio
+async def test_tools_start_while_the_selection_is_generated():
+    events.clear()
+    llm = StreamingToolLlm()
+    automa = ReCentAutoma(
+        llm=llm,
+        tools=[search, read],
+        early_tool_execution=True,
+        running_options=RunningOptions(callback_builders=[WorkerCallbackBuilder(ToolRecordingCallback)]),
+    )
+
+    answer = await automa.arun(goal="Find out what bridgic is.")
+
+    assert answer == "final answer"
+    assert events == [
+        "tool-<search>-<call_1> callback",
+        "search started",
+        "read selected",
+        "tool-<read>-<call_2> callback",
+        "read started",
+    ]
+    assert automa._early_tool_workers == {}
+
+    # The tool calls and their results are recorded in memory as usual.
+    context = await automa._memory_manager.abuild_context()
+    results = {
+        block.id: block.content
+        for message in context["memory_messages"]
+        for block in message.blocks
+        if isinstance(block, ToolResultBlock)
+    }
+    assert results == {"call_1": "results of bridgic", "call_2": "content of https://bridgic.ai"}
+
+
+class HangingToolLlm(StreamingToolLlm):
+    """Mock LLM whose tool selection hangs after selecting the first tool."""
+
+    async def astream_select_tool(self, messages, tools, **kwargs):
+        yield ToolCall(id="call_1", name="slow_search", arguments={"query": "bridgic"})
+        await asyncio.sleep(10)
+
+
+async def slow_search(query: str) -> str:
+    try:
+        await asyncio.sleep(10)
+    except asyncio.CancelledError:
+        events.append("search cancelled")
+        raise
+
+
+@pytest.mark.asyncio
+async def test_started_tools_are_cancelled_with_the_selection():
+    events.clear()
+    automa = ReCentAutoma(llm=HangingToolLlm(), tools=[slow_search], early_tool_execution=True)
+
+    run = asyncio.ensure_future(automa.arun(goal="Find out what bridgic is."))
+    while not automa._early_tool_workers:
+        await asyncio.sleep(0.01)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    await asyncio.sleep(0.01)
+
+    assert events == ["search cancelled"]
+    assert automa._early_tool_workers == {}
+
+
+def dump_logs() -> str:
+    return " ".join(f"line{i}" for i in range(2000))
+
+
+class RecordingLlm(BaseLlm):
+    """Mock LLM selecting the `dump_logs` tool once, and recording the prompt of the answer."""
+
+    def __init__(self):
+        self.observations = 0
+        self.answer_messages = None
+
+    async def achat(self, messages, **kwargs) -> Response:
+        self.answer_messages = messages
+        return Response(message=Message.from_text(text="final answer", role=Role.AI))
+
+    def chat(self, messages, **kwargs) -> Response:
+        raise NotImplementedError
+
+    def stream(self, messages, **kwargs):
+        raise NotImplementedError
+
+    async def astream(self, messages, **kwargs):
+        raise NotImplementedError
+
+    def structured_output(self, messages, constraint, **kwargs):
+        raise NotImplementedError
+
+    async def astructured_output(self, messages, constraint, **kwargs):
+        self.observations += 1
+        return GoalStatus(brief_thinking="thinking", goal_achieved=self.observations > 1)
+
+    def select_tool(self, messages, tools, **kwargs):
+        raise NotImplementedError
+
+    async def aselect_tool(self, messages, tools, **kwargs):
+        return [ToolCall(id="call_1", name="dump_logs", arguments={})], None
+
+    def dump_to_dict(self):
+        return {}
+
+    def load_from_dict(self, state_dict):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_prompt_is_packed_in_the_token_budget_of_the_task():
+    llm = RecordingLlm()
+    automa = ReCentAutoma(
+        llm=llm,
+        tools=[dump_logs],
+        memory_config=ReCentMemoryConfig(llm=llm, token_count_callback=lambda text: len(text.split())),
+        answer_task_config=AnswerTaskConfig(llm=llm, max_context_tokens=400, max_tool_result_tokens=100),
+    )
+
+    assert await automa.arun(goal="Summarize the logs.") == "final answer"
+
+    prompt_tokens = sum(len(message.content.split()) for message in llm.answer_messages)
+    assert prompt_tokens <= 400
+    result = next(
+        block for message in llm.answer_messages for block in message.blocks if isinstance(block, ToolResultBlock)
+    )
+    assert result.content.startswith("line0 line1") and "'call_1'" in result.content
+
+    # The memory keeps the whole result.
+    context = await automa._memory_manager.abuild_context()
+    assert any(
+        isinstance(block, ToolResultBlock) and block.content == dump_logs()
+        for message in context["memory_messages"] for block in message.blocks
+    )
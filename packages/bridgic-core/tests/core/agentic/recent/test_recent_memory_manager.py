@@ -1,6 +1,7 @@
 """
 Unit tests for ReCentMemoryManager.
 """
+import base64
 import pytest
 import asyncio
 import time
@@ -13,7 +14,7 @@ from bridgic.core.agentic.recent._episodic_node import (
     CompressionEpisodicNode,
 )
 from bridgic.core.model import BaseLlm
-from bridgic.core.model.types import Message, Role, Response
+from bridgic.core.model.types import Message, Role, Response, ToolCall, ToolResultBlock
 from bridgic.core.utils._console import printer
 
 
@@ -119,6 +120,47 @@ class TestReCentMemoryManagerPushMessages:
         assert timestep3 != timestep1
 
 
+class TestReCentMemoryManagerTrigger:
+    """Test the compression trigger of ReCentMemoryManager."""
+
+    def test_should_trigger_compression(self, mock_llm):
+        """Test that the node and token thresholds trigger the compression."""
+        config = ReCentMemoryConfig(
+            llm=mock_llm,
+            max_node_size=3,
+            max_token_size=6,
+            token_count_callback=lambda text: len(text.split()),
+        )
+        manager = ReCentMemoryManager(compression_config=config)
+        manager.create_goal(goal="Say hi")
+        manager.push_messages([Message.from_text(text="hi", role=Role.USER)])
+        assert not manager.should_trigger_compression()
+
+        manager.push_messages([Message.from_text(text="hi there you", role=Role.AI)])
+        assert manager.should_trigger_compression()
+
+        manager.create_compression()
+        assert not manager.should_trigger_compression()
+        manager.create_leaf()
+        manager.push_messages([Message.from_text(text="bye", role=Role.USER)])
+        assert manager.should_trigger_compression()
+
+    def test_changed_token_count_callback_is_used(self, mock_llm):
+        """Test that the tokens are recounted when the token count callback of the config is changed."""
+        config = ReCentMemoryConfig(
+            llm=mock_llm,
+            max_token_size=6,
+            token_count_callback=lambda text: len(text.split()),
+        )
+        manager = ReCentMemoryManager(compression_config=config)
+        manager.push_messages([Message.from_text(text="hi there", role=Role.USER)])
+        assert not manager.should_trigger_compression()
+
+        config.token_count_callback = lambda text: 3 * len(text.split())
+        assert manager.should_trigger_compression()
+        assert manager._episodic_node_tree.token_count == 6
+
+
 class TestReCentMemoryManagerCompression:
     """Test compression node creation in ReCentMemoryManager."""
 
@@ -238,6 +280,78 @@ class TestReCentMemoryManagerBuildContext:
         assert "[Stage Summary]" in context["memory_messages"][0].content
 
 
+    @pytest.mark.asyncio
+    async def test_context_is_reused_until_compression(self, memory_config, sample_messages):
+        """Test that the materialized context is shared, appended to, and rebuilt after compressions."""
+        manager = ReCentMemoryManager(compression_config=memory_config)
+        manager.push_messages(sample_messages[:1])
+        await manager.acreate_compression()
+
+        context = await manager.abuild_context()
+        summary_message = context["memory_messages"][0]
+        assert (await manager.abuild_context())["memory_messages"][0] is summary_message
+
+        # Pushed messages are appended without rebuilding the summary messages.
+        previous_messages = context["memory_messages"]
+        version = manager.context_version
+        manager.push_messages(sample_messages[1:3])
+        assert manager.context_version == version + 1
+        context = manager.build_context()
+        assert context["memory_messages"][0] is summary_message
+        assert [message.content for message in context["memory_messages"][1:]] == [m.content for m in sample_messages[1:3]]
+        assert context["memory_messages"][-1] is sample_messages[2]
+        # The contexts built before are not changed by the push, nor by the callers.
+        assert previous_messages == [summary_message]
+        context["memory_messages"].clear()
+        assert len(manager.build_context()["memory_messages"]) == 3
+
+        await manager.acreate_compression()
+        context = await manager.abuild_context()
+        assert len(context["memory_messages"]) == 1
+        assert context["memory_messages"][0] is not summary_message
+
+
+
+class TestReCentMemoryManagerPacking:
+    """Test packing memory messages in a token budget."""
+
+    @pytest.fixture
+    def manager(self, mock_llm):
+        config = ReCentMemoryConfig(llm=mock_llm, token_count_callback=lambda text: len(text.split()))
+        return ReCentMemoryManager(compression_config=config)
+
+    @pytest.fixture
+    def history(self):
+        return [
+            Message.from_text(text=" ".join(["find the weather"] * 7), role=Role.USER),
+            Message.from_tool_call(tool_calls=[ToolCall(id="c1", name="search", arguments={"q": "x"})]),
+            Message.from_tool_result(tool_id="c1", content=" ".join(f"word{i}" for i in range(40))),
+            Message.from_text(text="it is sunny", role=Role.AI),
+        ]
+
+    def test_recent_messages_are_packed_with_their_tool_calls(self, manager, history):
+        """Test that the earlier messages are elided, and a tool result is kept with its call."""
+        assert manager.pack_memory_messages(history, max_tokens=1000) == history
+
+        # The tool result does not fit: only the last message is kept, after a note.
+        packed = manager.pack_memory_messages(history, max_tokens=30)
+        assert [m.content for m in packed] == [
+            "[Elided Memory] 3 earlier messages are omitted to fit the context budget.",
+            "it is sunny",
+        ]
+
+        # Once truncated, the tool result fits with its call.
+        packed = manager.pack_memory_messages(history, max_tokens=50, max_tool_result_tokens=10)
+        assert packed[0].content.startswith("[Elided Memory] 1 earlier messages")
+        assert packed[1] is history[1] and packed[3] is history[3]
+        result = packed[2].blocks[0]
+        assert isinstance(result, ToolResultBlock) and result.id == "c1"
+        assert result.content.startswith("word0 word1") and "30 more tokens" in result.content and "'c1'" in result.content
+        # The memory keeps the whole result, and the truncation is reused.
+        assert len(history[2].blocks[0].content.split()) == 40
+        assert manager.pack_memory_messages(history, max_tokens=50, max_tool_result_tokens=10)[2] is packed[2]
+
+
 class TestReCentMemoryConfigPromptRendering:
     """Test prompt template rendering in ReCentMemoryConfig."""
 
@@ -301,3 +415,20 @@ class TestReCentMemoryManagerSerialization:
         
         non_goal_nodes = new_manager._episodic_node_tree.get_non_goal_nodes()
         assert len(non_goal_nodes) == 2  # Two leaf nodes
+
+    def test_bpe_tokenizer_is_serialized_by_reference(self, mock_llm, tmp_path):
+        """Test that a vocabulary file tokenizer is dumped as its path rather than its vocabulary."""
+        from bridgic.core.model import BpeTokenizer
+
+        path = tmp_path / "bytes.tiktoken"
+        path.write_text("\n".join(f"{base64.b64encode(bytes([i])).decode()} {i}" for i in range(256)))
+        tokenizer = BpeTokenizer.from_file(path, cache_size=128)
+        config = ReCentMemoryConfig(llm=mock_llm, token_count_callback=tokenizer)
+
+        state_dict = config.dump_to_dict()
+        assert state_dict["token_count_callback"] == {"bpe_path": str(path), "pattern": tokenizer.pattern, "cache_size": 128}
+
+        new_config = ReCentMemoryConfig.__new__(ReCentMemoryConfig)
+        new_config.load_from_dict(state_dict)
+        assert isinstance(new_config.token_count_callback, BpeTokenizer)
+        assert new_config.token_count_callback.count("hello") == 5
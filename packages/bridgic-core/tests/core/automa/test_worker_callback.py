@@ -823,3 +823,68 @@ async def test_context_isolation(
         f"Got {len(unique_trace_ids)} unique values out of {len(all_trace_ids)} total. "
         f"Trace IDs: {all_trace_ids}"
     )
+
+
+# - - - - - - - - - - - - - - - -
+# test case: precompiled callback dispatcher
+# - - - - - - - - - - - - - - - -
+class EndOnlyCallback(WorkerCallback):
+    async def on_worker_end(
+        self,
+        key: str,
+        is_top_level: bool = False,
+        parent: Optional["Automa"] = None,
+        arguments: Dict[str, Any] = None,
+        result: Any = None,
+    ) -> None:
+        print(f"end-only: {key} -> {result}")
+
+
+def test_callback_dispatcher_resolves_overridden_hooks_only():
+    from bridgic.core.automa.worker._worker_callback import _WorkerCallbackDispatcher
+
+    assert not _WorkerCallbackDispatcher([])
+    # A callback that overrides nothing never needs to be dispatched.
+    assert not _WorkerCallbackDispatcher([WorkerCallback()])
+
+    end_only = EndOnlyCallback()
+    dispatcher = _WorkerCallbackDispatcher([WorkerCallback(), end_only])
+    assert dispatcher
+    assert dispatcher.start_callbacks == []
+    assert dispatcher.end_callbacks == [end_only]
+    assert dispatcher.error_callbacks == []
+
+
+@pytest.mark.asyncio
+async def test_callback_dispatcher_rebuilt_after_propagation(capsys):
+    class InnerGraph(GraphAutoma):
+        @worker(is_start=True, is_output=True)
+        async def inner_worker(self, x: int) -> int:
+            return x + 1
+
+    class OuterGraph(GraphAutoma):
+        @worker(is_start=True)
+        async def outer_worker(self, x: int) -> int:
+            return x + 1
+
+    inner = InnerGraph(name="inner")
+    inner_worker = inner._workers["inner_worker"]
+    # Build the dispatcher before any ancestor callback is propagated.
+    assert not inner_worker._get_callback_dispatcher()
+
+    outer = OuterGraph(
+        name="outer",
+        running_options=RunningOptions(callback_builders=[WorkerCallbackBuilder(EndOnlyCallback)]),
+    )
+    outer.add_worker("inner", inner, dependencies=["outer_worker"], is_output=True)
+
+    # Propagating the ancestor callbacks must invalidate the previously built dispatcher.
+    assert inner_worker._get_callback_dispatcher()
+
+    result = await outer.arun(x=1)
+    assert result == 3
+
+    output = capsys.readouterr().out
+    assert "end-only: inner_worker -> 3" in output
+    assert "end-only: inner -> 3" in output
+    assert "end-only: outer -> 3" in output
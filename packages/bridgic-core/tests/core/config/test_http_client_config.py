@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import httpx
+import pytest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bridgic.core.config import (
+    HttpClientConfig,
+    close_shared_http_clients,
+    create_http_client_from_config,
+    get_shared_http_client,
+)
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_limits_and_http2_are_configured():
+    config: HttpClientConfig = {
+        "limits": {"max_connections": 7, "max_keepalive_connections": 3, "keepalive_expiry": 12.0},
+    }
+    client = create_http_client_from_config(config, is_async=False)
+    pool = client._transport._pool
+    assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (7, 3, 12.0)
+
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError):
+            create_http_client_from_config({"http2": True}, is_async=False)
+
+
+def test_shared_clients_are_reused_per_base_url_and_config():
+    config: HttpClientConfig = {"limits": {"max_connections": 10}}
+    client = get_shared_http_client("http://a.test", config, is_async=False)
+    assert get_shared_http_client("http://a.test", {"limits": {"max_connections": 10}}, is_async=False) is client
+    assert get_shared_http_client("http://a.test", {"limits": {"max_connections": 20}}, is_async=False) is not client
+    assert get_shared_http_client("http://b.test", config, is_async=False) is not client
+    assert get_shared_http_client("http://a.test", config, is_async=True) is not client
+
+    # Users cannot close the shared clients.
+    client.close()
+    assert not client.is_closed
+
+    close_shared_http_clients()
+    assert client.is_closed
+    assert get_shared_http_client("http://a.test", config, is_async=False) is not client
+
+
+def test_shared_clients_serve_requests(base_url):
+    client = get_shared_http_client(base_url, is_async=False)
+    assert client.get(base_url).text == "ok"
+    assert client.get(base_url).text == "ok"
+
+
+def test_shared_async_client_serves_several_event_loops(base_url):
+    client = get_shared_http_client(base_url, is_async=True)
+
+    async def request():
+        async with client:
+            response = await client.get(base_url)
+        return response.text
+
+    # The keep-alive connections of a closed event loop are not reused by the next one.
+    for _ in range(3):
+        assert asyncio.run(request()) == "ok"
+    assert not client.is_closed
+
+
+def test_shared_async_client_pools_are_closed(base_url):
+    client = get_shared_http_client(base_url, {"limits": {"max_connections": 5}}, is_async=True)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(client.get(base_url)).text == "ok"
+        pools = list(client._transport._transports.values())
+        assert len(pools) == 1 and pools[0]._pool._connections != []
+
+        close_shared_http_clients()
+        assert pools[0]._pool._connections == []
+        assert len(client._transport._transports) == 0
+    finally:
+        loop.close()
+
+
+def test_shared_async_client_releases_closed_event_loops(base_url):
+    client = get_shared_http_client(base_url, {"limits": {"max_connections": 6}}, is_async=True)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(client.get(base_url))
+    loop.close()
+
+    # The pool of the closed event loop is released on the next request, from any event loop.
+    async def request():
+        await client.get(base_url)
+        return list(client._transport._transports)
+
+    assert loop not in asyncio.run(request())
+
+
+class _CookieHandler(_OkHandler):
+
+    def do_GET(self):
+        body = (self.headers.get("Cookie") or "").encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=secret; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_shared_clients_keep_no_cookies():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CookieHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        client = get_shared_http_client(url, is_async=False)
+        client.get(url)
+        assert client.get(url).text == ""
+        assert len(client.cookies.jar) == 0
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,204 @@
+import asyncio
+import pickle
+import pytest
+
+from typing import Any, Dict, List
+from pydantic import BaseModel
+
+from bridgic.core.model import BaseLlm, CachedLlm, InMemoryLlmCache, SqliteLlmCache, compute_llm_cache_key
+from bridgic.core.model.protocols import PydanticModel, JsonSchema
+from bridgic.core.model.types import Message, Response, Tool, ToolCall
+from bridgic.core.utils._msgpackx import dump_bytes, load_bytes
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class CountingConfiguration(BaseModel):
+    temperature: float = 0.7
+
+
+class CountingLlm(BaseLlm):
+    def __init__(self):
+        self.configuration = CountingConfiguration()
+        self.calls = []
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        self.calls.append(("chat", kwargs))
+        return Response(message=Message.from_text(f"answer {len(self.calls)}", role="assistant"))
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        return self.chat(messages, **kwargs)
+
+    def stream(self, messages: List[Message], **kwargs):
+        self.calls.append(("stream", kwargs))
+        yield from ()
+
+    async def astream(self, messages: List[Message], **kwargs):
+        yield
+
+    def structured_output(self, messages: List[Message], constraint: Any, **kwargs) -> Any:
+        self.calls.append(("structured_output", kwargs))
+        return Answer(text=f"answer {len(self.calls)}")
+
+    async def astructured_output(self, messages: List[Message], constraint: Any, **kwargs) -> Any:
+        return self.structured_output(messages, constraint, **kwargs)
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs):
+        self.calls.append(("select_tool", kwargs))
+        return [ToolCall(id="call_1", name=tools[0].name, arguments={"n": len(self.calls)})], None
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs):
+        return self.select_tool(messages, tools, **kwargs)
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__()
+
+
+@pytest.fixture
+def messages():
+    return [
+        Message.from_text("You are a helpful assistant.", role="system"),
+        Message.from_text("What is the capital of France?", role="user"),
+    ]
+
+
+def test_identical_requests_are_served_from_cache(messages):
+    llm = CachedLlm(CountingLlm())
+    first = llm.chat(messages=messages, model="m", temperature=0)
+    second = asyncio.run(llm.achat(messages=list(messages), model="m", temperature=0))
+
+    assert len(llm.llm.calls) == 1
+    assert first == second
+    assert (llm.hits, llm.misses) == (1, 1)
+
+    # Different sampling parameters or models are different requests.
+    llm.chat(messages=messages, model="m", temperature=0.5)
+    llm.chat(messages=messages, model="other", temperature=0)
+    assert len(llm.llm.calls) == 3
+
+
+def test_cached_results_are_isolated_from_callers(messages):
+    llm = CachedLlm(CountingLlm())
+    result = llm.structured_output(messages=messages, constraint=PydanticModel(model=Answer), model="m")
+    result.text = "mutated"
+    cached = llm.structured_output(messages=messages, constraint=PydanticModel(model=Answer), model="m")
+    assert cached.text == "answer 1"
+    assert len(llm.llm.calls) == 1
+
+
+def test_tool_selection_and_constraints_are_part_of_the_key(messages):
+    tool_a = Tool(name="a", description="Tool a.", parameters={"type": "object"})
+    tool_b = Tool(name="b", description="Tool b.", parameters={"type": "object"})
+    llm = CachedLlm(CountingLlm())
+
+    assert llm.select_tool(messages=messages, tools=[tool_a], model="m")[0][0].name == "a"
+    assert llm.select_tool(messages=messages, tools=[tool_a], model="m")[0][0].arguments == {"n": 1}
+    assert llm.select_tool(messages=messages, tools=[tool_b], model="m")[0][0].name == "b"
+    assert len(llm.llm.calls) == 2
+
+    key_a = compute_llm_cache_key("structured_output", messages, constraint=JsonSchema(schema_dict={"type": "string"}))
+    key_b = compute_llm_cache_key("structured_output", messages, constraint=JsonSchema(schema_dict={"type": "integer"}))
+    assert key_a != key_b
+    # Parameters left as None fall back to the defaults and do not change the key.
+    assert compute_llm_cache_key("chat", messages, model="m") == compute_llm_cache_key("chat", messages, model="m", top_p=None)
+
+
+def test_only_deterministic_guard(messages):
+    llm = CachedLlm(CountingLlm(), only_deterministic=True)
+    llm.chat(messages=messages, model="m")
+    llm.chat(messages=messages, model="m")
+    # The configured temperature (0.7) is not deterministic.
+    assert len(llm.llm.calls) == 2
+    assert (llm.hits, llm.misses) == (0, 0)
+
+    llm.chat(messages=messages, model="m", temperature=0)
+    llm.chat(messages=messages, model="m", temperature=0)
+    assert len(llm.llm.calls) == 3
+
+
+def test_streaming_is_not_cached(messages):
+    llm = CachedLlm(CountingLlm())
+    list(llm.stream(messages=messages, model="m"))
+    list(llm.stream(messages=messages, model="m"))
+    assert len(llm.llm.calls) == 2
+
+
+def test_in_memory_cache_lru_and_ttl():
+    cache = InMemoryLlmCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+    # "b" is the least recently used entry.
+    assert cache.get("b") == (False, None)
+    assert len(cache) == 2
+
+    cache.set("expired", 4, ttl=-1)
+    assert cache.get("expired") == (False, None)
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path, messages):
+    path = str(tmp_path / "llm_cache.sqlite")
+    llm = CachedLlm(CountingLlm(), cache=SqliteLlmCache(path))
+    first = llm.chat(messages=messages, model="m")
+
+    replay = CachedLlm(CountingLlm(), cache=SqliteLlmCache(path))
+    assert replay.chat(messages=messages, model="m") == first
+    assert replay.llm.calls == []
+
+    cache = SqliteLlmCache(path)
+    cache.set("expired", "value", ttl=-1)
+    assert cache.get("expired") == (False, None)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_stores_json_only(tmp_path, messages):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = SqliteLlmCache(path)
+    llm = CachedLlm(CountingLlm(), cache=cache)
+    tools = [Tool(name="count", description="Count.", parameters={"type": "object", "properties": {}})]
+    answer = llm.structured_output(messages=messages, constraint=PydanticModel(model=Answer))
+    tool_calls, content = llm.select_tool(messages=messages, tools=tools)
+    cache.set("schema", {"labels": ["a", "b"]})
+
+    replay = CachedLlm(CountingLlm(), cache=SqliteLlmCache(path))
+    assert replay.structured_output(messages=messages, constraint=PydanticModel(model=Answer)) == answer
+    assert replay.select_tool(messages=messages, tools=tools) == (tool_calls, content)
+    assert replay.cache.get("schema") == (True, {"labels": ["a", "b"]})
+    assert replay.llm.calls == []
+
+    # The entries are never unpickled, even if the file is written by someone else.
+    cache._connection.execute(
+        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, NULL)",
+        ("pickled", pickle.dumps(Answer(text="x"))),
+    )
+    assert cache.get("pickled") == (False, None)
+    with pytest.warns(UserWarning):
+        cache.set("object", object())
+
+
+def test_cache_keys_depend_on_the_endpoint(messages):
+    local, remote = CountingLlm(), CountingLlm()
+    local.api_base, remote.api_base = "http://localhost:8000/v1", "https://api.example.com/v1"
+    cache = InMemoryLlmCache()
+    CachedLlm(local, cache=cache).chat(messages=messages, model="m")
+    CachedLlm(remote, cache=cache).chat(messages=messages, model="m")
+    assert len(local.calls) == len(remote.calls) == 1
+
+
+def test_cached_llm_serialization(tmp_path, messages):
+    llm = CachedLlm(CountingLlm(), cache=SqliteLlmCache(str(tmp_path / "llm_cache.sqlite")), ttl=60, only_deterministic=True)
+    llm.chat(messages=messages, model="m", temperature=0)
+
+    loaded = load_bytes(dump_bytes(llm))
+    assert isinstance(loaded.llm, CountingLlm)
+    assert isinstance(loaded.cache, SqliteLlmCache)
+    loaded.chat(messages=messages, model="m", temperature=0)
+    assert loaded.llm.calls == []
+    assert loaded.hits == 1
@@ -0,0 +1,171 @@
+import pytest
+
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, ValidationError
+
+from bridgic.core.model import BaseLlm, CascadeLlm, ModelRetryLimitError
+from bridgic.core.model.protocols import PydanticModel, StructuredOutput, ToolSelection
+from bridgic.core.model.types import Message, MessageChunk, Response, Tool, ToolCall
+from bridgic.core.utils._msgpackx import dump_bytes, load_bytes
+
+
+class Verdict(BaseModel):
+    answer: str
+    confidence: float
+
+
+SEARCH = Tool(
+    name="search",
+    description="Search the web.",
+    parameters={"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+)
+
+
+class TierLlm(BaseLlm):
+    def __init__(self, name: str, outputs: List[Any] = None, tool_calls: List[ToolCall] = None):
+        self.name = name
+        self.outputs = list(outputs or [])
+        self.tool_calls = tool_calls or []
+        self.requests = 0
+
+    def _next(self) -> Any:
+        self.requests += 1
+        output = self.outputs.pop(0) if self.outputs else Verdict(answer=self.name, confidence=1.0)
+        if isinstance(output, Exception):
+            raise output
+        return output
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        output = self._next()
+        return Response(message=Message.from_text(output if isinstance(output, str) else self.name, role="assistant"))
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        return self.chat(messages, **kwargs)
+
+    def stream(self, messages: List[Message], **kwargs):
+        self._next()
+        yield MessageChunk(delta=self.name)
+
+    async def astream(self, messages: List[Message], **kwargs):
+        self._next()
+        yield MessageChunk(delta=self.name)
+
+    def structured_output(self, messages: List[Message], constraint, **kwargs) -> Any:
+        return self._next()
+
+    async def astructured_output(self, messages: List[Message], constraint, **kwargs) -> Any:
+        return self._next()
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs):
+        self.requests += 1
+        return self.tool_calls, self.name
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs):
+        return self.select_tool(messages, tools, **kwargs)
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(**state_dict)
+
+
+def _invalid_verdict() -> ValidationError:
+    try:
+        Verdict.model_validate_json('{"answer": "cheap"}')
+    except ValidationError as e:
+        return e
+
+
+def _messages() -> List[Message]:
+    return [Message.from_text("question", role="user")]
+
+
+def test_implements_the_llm_protocols():
+    llm = CascadeLlm([TierLlm("cheap"), TierLlm("strong")])
+    assert isinstance(llm, StructuredOutput)
+    assert isinstance(llm, ToolSelection)
+    with pytest.raises(ValueError):
+        CascadeLlm([])
+
+
+@pytest.mark.asyncio
+async def test_structured_outputs_are_escalated_when_invalid_or_unconfident():
+    cheap = TierLlm("cheap", outputs=[
+        Verdict(answer="cheap", confidence=0.9),
+        _invalid_verdict(),
+        Verdict(answer="cheap", confidence=0.2),
+        Verdict(answer="cheap", confidence=0.9),
+    ])
+    strong = TierLlm("strong")
+    llm = CascadeLlm(
+        [cheap, strong],
+        confidence_field="confidence",
+        min_confidence=0.5,
+        should_escalate=lambda operation, result: result.answer == "cheap" and cheap.requests == 4,
+    )
+    constraint = PydanticModel(model=Verdict)
+
+    answers = [(await llm.astructured_output(messages=_messages(), constraint=constraint)).answer for _ in range(4)]
+    assert answers == ["cheap", "strong", "strong", "strong"]
+
+    cheap_tier, strong_tier = llm.snapshot()
+    assert (cheap_tier["requests"], cheap_tier["accepted"], cheap_tier["hit_rate"]) == (4, 1, 0.25)
+    assert cheap_tier["escalations"] == {"error": 0, "validation": 1, "confidence": 1, "predicate": 1}
+    assert (strong_tier["requests"], strong_tier["accepted"]) == (3, 3)
+
+
+def test_the_last_tier_is_not_escalated():
+    cheap = TierLlm("cheap", outputs=[ModelRetryLimitError("timed out", operation="chat")])
+    strong = TierLlm("strong", outputs=[ModelRetryLimitError("timed out", operation="chat")])
+    llm = CascadeLlm([cheap, strong])
+    with pytest.raises(ModelRetryLimitError):
+        llm.chat(messages=_messages())
+    assert llm.snapshot()[0]["escalations"]["error"] == 1
+
+    llm = CascadeLlm([cheap, strong], confidence_field="confidence")
+    cheap.outputs = [Verdict(answer="cheap", confidence=0.1)]
+    strong.outputs = [Verdict(answer="strong", confidence=0.0)]
+    assert llm.structured_output(messages=_messages(), constraint=PydanticModel(model=Verdict)).answer == "strong"
+
+
+@pytest.mark.asyncio
+async def test_invalid_tool_calls_are_escalated():
+    cheap = TierLlm("cheap", tool_calls=[ToolCall(id="1", name="search", arguments={})])
+    strong = TierLlm("strong", tool_calls=[ToolCall(id="2", name="search", arguments={"query": "bridgic"})])
+    llm = CascadeLlm([cheap, strong])
+
+    tool_calls, text = await llm.aselect_tool(messages=_messages(), tools=[SEARCH])
+    assert (tool_calls[0].id, text) == ("2", "strong")
+
+    cheap.tool_calls = [ToolCall(id="3", name="search", arguments={"query": "bridgic"})]
+    tool_calls, text = llm.select_tool(messages=_messages(), tools=[SEARCH])
+    assert (tool_calls[0].id, text) == ("3", "cheap")
+    assert llm.snapshot()[0]["escalations"]["validation"] == 1
+
+
+@pytest.mark.asyncio
+async def test_streams_are_escalated_before_their_first_chunk():
+    cheap = TierLlm("cheap", outputs=[ModelRetryLimitError("timed out", operation="stream"), "ok"])
+    strong = TierLlm("strong")
+    llm = CascadeLlm([cheap, strong])
+
+    assert [chunk.delta async for chunk in llm.astream(messages=_messages())] == ["strong"]
+    assert [chunk.delta for chunk in llm.stream(messages=_messages())] == ["cheap"]
+    assert [tier["accepted"] for tier in llm.snapshot()] == [1, 1]
+
+
+def escalate_cheap_answers(operation: str, result: Any) -> bool:
+    return result.answer == "cheap"
+
+
+def test_the_predicate_is_serialized_by_qualified_name():
+    llm = CascadeLlm([TierLlm("cheap"), TierLlm("strong")], should_escalate=escalate_cheap_answers)
+    restored = load_bytes(dump_bytes(llm))
+    assert restored._should_escalate is escalate_cheap_answers
+    assert [tier.name for tier in restored.llms] == ["cheap", "strong"]
+
+    llm = CascadeLlm([TierLlm("cheap")], should_escalate=lambda operation, result: True)
+    with pytest.raises(ValueError):
+        llm.dump_to_dict()
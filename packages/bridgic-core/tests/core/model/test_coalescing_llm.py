@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+
+from typing import Any, Dict, List
+from pydantic import BaseModel
+
+from bridgic.core.model import BaseLlm, CoalescingLlm
+from bridgic.core.model.protocols import PydanticModel
+from bridgic.core.model.types import Message, Response
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class SlowLlm(BaseLlm):
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def _call(self, result: Any) -> Any:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return result
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        raise NotImplementedError
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        return await self._call(Response(message=Message.from_text(f"answer {self.calls + 1}", role="assistant")))
+
+    def stream(self, messages: List[Message], **kwargs):
+        raise NotImplementedError
+
+    async def astream(self, messages: List[Message], **kwargs):
+        raise NotImplementedError
+
+    async def astructured_output(self, messages: List[Message], constraint: Any, **kwargs) -> Any:
+        return await self._call(Answer(text="answer"))
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__()
+
+
+@pytest.fixture
+def messages():
+    return [Message.from_text("What is the capital of France?", role="user")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(messages):
+    llm = CoalescingLlm(SlowLlm())
+    responses = await asyncio.gather(*[llm.achat(messages=messages, model="m") for _ in range(10)])
+
+    assert llm.llm.calls == 1
+    assert llm.coalesced_count == 9
+    assert llm.inflight_count == 0
+    assert all(response == responses[0] for response in responses)
+    # Each caller owns its result.
+    assert len({id(response) for response in responses}) == 10
+
+    # Finished requests are not reused.
+    await llm.achat(messages=messages, model="m")
+    assert llm.llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_different_requests_are_not_shared(messages):
+    llm = CoalescingLlm(SlowLlm())
+    await asyncio.gather(
+        llm.achat(messages=messages, model="m"),
+        llm.achat(messages=messages, model="other"),
+        llm.astructured_output(messages=messages, constraint=PydanticModel(model=Answer), model="m"),
+    )
+    assert llm.llm.calls == 3
+    assert llm.coalesced_count == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_propagated_to_all_callers(messages):
+    llm = CoalescingLlm(SlowLlm(error=ConnectionError("server is down")))
+    results = await asyncio.gather(*[llm.achat(messages=messages, model="m") for _ in range(3)], return_exceptions=True)
+
+    assert llm.llm.calls == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert llm.inflight_count == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_shared_request(messages):
+    llm = CoalescingLlm(SlowLlm())
+    first = asyncio.create_task(llm.achat(messages=messages, model="m"))
+    second = asyncio.create_task(llm.achat(messages=messages, model="m"))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    response = await second
+    assert first.cancelled()
+    assert response.message.content == "answer 1"
+    assert llm.llm.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_all_callers_cancels_the_shared_request(messages):
+    llm = CoalescingLlm(SlowLlm())
+    tasks = [asyncio.create_task(llm.achat(messages=messages, model="m")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert llm.llm.cancelled == 1
+    assert llm.inflight_count == 0
+    # A new request is sent afterwards.
+    await llm.achat(messages=messages, model="m")
+    assert llm.llm.calls == 2
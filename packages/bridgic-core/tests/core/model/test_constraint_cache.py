@@ -0,0 +1,48 @@
+import pytest
+
+from pydantic import BaseModel
+
+from bridgic.core.model import ConstraintCache
+from bridgic.core.model.protocols import JsonSchema, PydanticModel, Regex
+
+
+class Answer(BaseModel):
+    thought: str
+    answer: int
+
+
+def compile_schema(constraint):
+    if isinstance(constraint, PydanticModel):
+        schema = constraint.model.model_json_schema()
+    else:
+        schema = constraint.schema_dict
+    schema["additionalProperties"] = False
+    return {"schema": schema}
+
+
+def test_constraints_are_compiled_once():
+    cache = ConstraintCache(compile_schema)
+    compiled = cache.get(PydanticModel(model=Answer))
+    assert cache.get(PydanticModel(model=Answer)) is compiled
+    assert compiled.payload["schema"]["additionalProperties"] is False
+    assert compiled.validate_json('{"thought": "t", "answer": "42"}') == Answer(thought="t", answer=42)
+
+    schema = {"type": "object", "properties": {"a": {"type": "string"}}}
+    compiled = cache.get(JsonSchema(schema_dict=schema))
+    # Equal schemas share their compilation, and the schema of the caller is not modified.
+    assert cache.get(JsonSchema(schema_dict={"properties": {"a": {"type": "string"}}, "type": "object"})) is compiled
+    assert "additionalProperties" not in schema
+    assert compiled.validate_json('{"a": "b"}') == {"a": "b"}
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    with pytest.raises(ValueError):
+        cache.get(Regex(pattern=r"\d+"))
+
+
+def test_cache_is_bounded():
+    cache = ConstraintCache(compile_schema, max_entries=2)
+    constraints = [JsonSchema(schema_dict={"title": str(i)}) for i in range(3)]
+    for constraint in constraints:
+        cache.get(constraint)
+    cache.get(constraints[0])
+    assert cache.misses == 4
@@ -0,0 +1,74 @@
+from bridgic.core.model import ConversionMemo, message_fingerprint, tool_fingerprint
+from bridgic.core.model.types import Message, Tool, ToolCallBlock
+
+
+class CountingConverter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, message: Message):
+        self.calls += 1
+        return {"role": message.role.value, "content": message.content}
+
+
+def test_unchanged_messages_are_converted_once():
+    convert = CountingConverter()
+    memo = ConversionMemo(convert, message_fingerprint)
+    history = [Message.from_text(f"message {i}", role="user") for i in range(10)]
+
+    for turn in range(3):
+        history.append(Message.from_text(f"answer {turn}", role="assistant"))
+        converted = [memo(message) for message in history]
+        assert converted[-1] == {"role": "assistant", "content": f"answer {turn}"}
+    # Only the new messages of each turn are converted.
+    assert convert.calls == 13
+    assert (memo.hits, memo.misses) == (11 + 12, 13)
+
+
+def test_modified_messages_are_converted_again():
+    convert = CountingConverter()
+    memo = ConversionMemo(convert, message_fingerprint)
+    message = Message.from_text("before", role="user")
+    assert memo(message)["content"] == "before"
+
+    message.content = "after"
+    assert memo(message)["content"] == "after"
+
+    message.extras["name"] = "alice"
+    memo(message)
+    assert convert.calls == 3
+
+    tool_call = Message(role="assistant", blocks=[ToolCallBlock(id="1", name="search", arguments={"q": "a"})])
+    memo(tool_call)
+    tool_call.blocks[0].arguments["q"] = "b"
+    memo(tool_call)
+    assert convert.calls == 5
+
+
+def test_memo_is_bounded_and_ignores_reused_identities():
+    convert = CountingConverter()
+    memo = ConversionMemo(convert, message_fingerprint, max_entries=2)
+    messages = [Message.from_text(f"message {i}") for i in range(3)]
+    for message in messages:
+        memo(message)
+    # The least recently used conversion was forgotten.
+    memo(messages[0])
+    assert convert.calls == 4
+
+    # A new object with the identity of a collected one is converted anew.
+    key = id(messages[2])
+    del messages[2]
+    for _ in range(100):
+        message = Message.from_text("message 2")
+        if id(message) == key:
+            break
+    memo(message)
+    assert convert.calls == 5
+
+
+def test_tool_fingerprint():
+    tool = Tool(name="search", description="Search the web.", parameters={"type": "object", "properties": {}})
+    same = Tool(name="search", description="Search the web.", parameters={"type": "object", "properties": {}})
+    assert tool_fingerprint(tool) == tool_fingerprint(same)
+    tool.description = "Search the news."
+    assert tool_fingerprint(tool) != tool_fingerprint(same)
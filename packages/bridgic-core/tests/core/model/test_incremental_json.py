@@ -0,0 +1,98 @@
+import json
+import pytest
+
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, BeforeValidator, ValidationError
+
+from bridgic.core.model import IncrementalJsonParser, StructuredOutputStream
+from bridgic.core.model.protocols import JsonSchema, PydanticModel, Regex
+
+
+DOCUMENT = {
+    "numbers": [1, -2.5e3, True, None],
+    "strings": ["a \"quoted\" ]", "\\", "é"],
+    "nested": [[1, 2], {"inner": [{"x": 1}]}],
+    "empty": [],
+    "text": "not [an, array]",
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 10_000])
+def test_array_elements_are_reported_once_complete(chunk_size):
+    text = "Here is the output: " + json.dumps(DOCUMENT, indent=2)
+    parser = IncrementalJsonParser()
+    completed = []
+    for i in range(0, len(text), chunk_size):
+        completed += parser.feed(text[i:i + chunk_size])
+
+    assert parser.done
+    assert completed == [
+        (("numbers", 0), 1),
+        (("numbers", 1), -2500.0),
+        (("numbers", 2), True),
+        (("numbers", 3), None),
+        (("strings", 0), "a \"quoted\" ]"),
+        (("strings", 1), "\\"),
+        (("strings", 2), "é"),
+        (("nested", 0, 0), 1),
+        (("nested", 0, 1), 2),
+        (("nested", 0), [1, 2]),
+        (("nested", 1, "inner", 0), {"x": 1}),
+        (("nested", 1), {"inner": [{"x": 1}]}),
+    ]
+
+
+def test_elements_are_reported_before_the_document_ends():
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"steps": [{"tool": "search"}, 4') == [(("steps", 0), {"tool": "search"})]
+    # A number may continue in the next chunk.
+    assert parser.feed("2") == []
+    assert parser.feed("]") == [(("steps", 1), 42)]
+    assert not parser.done
+    parser.feed("}")
+    assert parser.done
+
+
+class Step(BaseModel):
+    tool: str
+    count: int = 1
+
+
+class Plan(BaseModel):
+    thought: str
+    steps: Annotated[List[Step], BeforeValidator(lambda value: value or [])]
+    tags: Optional[List[str]] = None
+
+
+def test_stream_validates_elements_against_the_model():
+    stream = StructuredOutputStream(PydanticModel(model=Plan))
+    text = '{"thought": "go", "steps": [{"tool": "a", "count": "2"}, {"bad": 1}, {"tool": "b"}], "tags": ["x"]}'
+    chunks = [chunk for char in text for chunk in stream.feed(char)]
+
+    # The element that does not validate on its own is not reported.
+    assert [(chunk.path, chunk.value) for chunk in chunks] == [
+        (("steps", 0), Step(tool="a", count=2)),
+        (("steps", 2), Step(tool="b")),
+        (("tags", 0), "x"),
+    ]
+    with pytest.raises(ValidationError):
+        stream.finish()
+
+
+def test_stream_ignores_the_text_around_the_document():
+    stream = StructuredOutputStream(PydanticModel(model=Plan))
+    text = 'Here is the plan:\n```json\n{"thought": "go", "steps": [{"tool": "a"}]}\n```\nDone.'
+    chunks = [chunk for char in text for chunk in stream.feed(char)]
+    assert [chunk.value for chunk in chunks] == [Step(tool="a")]
+    assert stream.finish().value == Plan(thought="go", steps=[Step(tool="a")])
+
+
+def test_stream_with_json_schema_and_invalid_constraints():
+    stream = StructuredOutputStream(JsonSchema(schema_dict={"type": "object"}))
+    assert [chunk.value for chunk in stream.feed('{"a": [{"b": "1"}]')] == [{"b": "1"}]
+    stream.feed("}")
+    final = stream.finish()
+    assert final.path == () and final.value == {"a": [{"b": "1"}]}
+
+    with pytest.raises(ValueError):
+        StructuredOutputStream(Regex(pattern=r"\d+"))
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+
+from bridgic.core.model import LlmMetricsRegistry, RetryPolicyConfig, retryable_model_call
+from bridgic.core.model._model_error import ModelRetryLimitError
+from bridgic.core.model.types import TokenUsage
+
+
+@pytest.fixture
+def registry():
+    registry = LlmMetricsRegistry.read()
+    registry.reset()
+    yield registry
+    registry.reset()
+
+
+def test_record_call_counts_tokens_and_latency(registry):
+    usage = TokenUsage(model="m", prompt_tokens=10, completion_tokens=5, total_tokens=15)
+    registry.record_call("m", "chat", 0.3, usage=usage)
+    registry.record_call("m", "chat", 7.0, usage=usage)
+    registry.record_call("m", "achat", 0.01, error=TimeoutError())
+
+    metrics = registry.snapshot()["m"]
+    assert metrics["prompt_tokens"] == 20
+    assert metrics["completion_tokens"] == 10
+
+    chat = metrics["operations"]["chat"]
+    assert chat["calls"] == 2
+    assert chat["errors"] == {}
+    assert chat["latency"]["count"] == 2
+    assert chat["latency"]["sum"] == pytest.approx(7.3)
+    assert chat["latency"]["buckets"]["0.25"] == 0
+    assert chat["latency"]["buckets"]["0.5"] == 1
+    assert chat["latency"]["buckets"]["10.0"] == 2
+    assert chat["latency"]["buckets"]["+Inf"] == 2
+
+    assert metrics["operations"]["achat"]["errors"] == {"TimeoutError": 1}
+
+
+def test_tracker_records_time_to_first_token_and_errors(registry):
+    def stream():
+        with registry.track("m", "stream") as call:
+            for delta in ["a", "b"]:
+                call.first_token()
+                yield delta
+
+    assert list(stream()) == ["a", "b"]
+
+    # Closing a stream early is not an error of the model.
+    closed_stream = stream()
+    next(closed_stream)
+    closed_stream.close()
+
+    with pytest.raises(ValueError):
+        with registry.track("m", "chat"):
+            raise ValueError("bad request")
+
+    operations = registry.snapshot()["m"]["operations"]
+    assert operations["stream"]["calls"] == 2
+    assert operations["stream"]["errors"] == {}
+    assert operations["stream"]["time_to_first_token"]["count"] == 2
+    assert operations["chat"]["errors"] == {"ValueError": 1}
+    assert operations["chat"]["time_to_first_token"]["count"] == 0
+
+
+def test_retries_are_counted_by_retryable_model_call(registry):
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0))
+    def chat(model: str):
+        raise ConnectionError("connection reset")
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=2, base_delay=0.0))
+    async def achat(model: str):
+        raise TimeoutError("timed out")
+
+    with pytest.raises(ModelRetryLimitError):
+        chat(model="m")
+    with pytest.raises(ModelRetryLimitError):
+        asyncio.run(achat(model="m"))
+
+    operations = registry.snapshot()["m"]["operations"]
+    assert operations["chat"]["retries"] == {"ConnectionError": 2}
+    assert operations["achat"]["retries"] == {"TimeoutError": 1}
+
+
+def test_prometheus_exposition(registry):
+    usage = TokenUsage(model="m", prompt_tokens=3, completion_tokens=4, total_tokens=7)
+    registry.record_call("m", "astream", 0.2, usage=usage, time_to_first_token=0.07)
+    registry.record_retry("m", "astream", TimeoutError())
+
+    text = registry.to_prometheus()
+    assert "# TYPE bridgic_llm_requests_total counter" in text
+    assert 'bridgic_llm_requests_total{model="m",operation="astream"} 1' in text
+    assert 'bridgic_llm_retries_total{model="m",operation="astream",error="TimeoutError"} 1' in text
+    assert 'bridgic_llm_prompt_tokens_total{model="m"} 3' in text
+    assert 'bridgic_llm_completion_tokens_total{model="m"} 4' in text
+    assert "# TYPE bridgic_llm_request_duration_seconds histogram" in text
+    assert 'bridgic_llm_request_duration_seconds_bucket{model="m",operation="astream",le="0.25"} 1' in text
+    assert 'bridgic_llm_request_duration_seconds_bucket{model="m",operation="astream",le="+Inf"} 1' in text
+    assert 'bridgic_llm_time_to_first_token_seconds_bucket{model="m",operation="astream",le="0.05"} 0' in text
+    assert 'bridgic_llm_time_to_first_token_seconds_bucket{model="m",operation="astream",le="0.1"} 1' in text
+    assert text.endswith("\n")
@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+
+from typing import Any, Dict, List
+
+from bridgic.core.model import BaseLlm, LoadBalancedLlm, ModelRetryLimitError, ModelUnrecoverableError
+from bridgic.core.model.protocols import StructuredOutput, ToolSelection
+from bridgic.core.model.types import Message, MessageChunk, Response
+
+
+class ReplicaLlm(BaseLlm):
+    def __init__(self, api_base: str, delay: float = 0.0):
+        self.api_base = api_base
+        self.delay = delay
+        self.requests = 0
+        self.error = None
+
+    def _respond(self) -> Response:
+        self.requests += 1
+        if self.error is not None:
+            raise self.error
+        return Response(message=Message.from_text(self.api_base, role="assistant"))
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        return self._respond()
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        await asyncio.sleep(self.delay)
+        return self._respond()
+
+    def stream(self, messages: List[Message], **kwargs):
+        self.requests += 1
+        yield MessageChunk(delta=self.api_base)
+        if self.error is not None:
+            raise self.error
+
+    async def astream(self, messages: List[Message], **kwargs):
+        yield MessageChunk(delta=self.api_base)
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {"api_base": self.api_base}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(**state_dict)
+
+
+def _conversation(system_prompt: str, question: str = "question") -> List[Message]:
+    return [Message.from_text(system_prompt, role="system"), Message.from_text(question, role="user")]
+
+
+def test_implements_the_llm_protocols():
+    llm = LoadBalancedLlm([ReplicaLlm("http://a"), ReplicaLlm("http://b")])
+    assert isinstance(llm, BaseLlm)
+    assert isinstance(llm, StructuredOutput)
+    assert isinstance(llm, ToolSelection)
+    with pytest.raises(ValueError):
+        LoadBalancedLlm([])
+
+
+@pytest.mark.parametrize("policy", ["least_outstanding", "power_of_two"])
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_spread_over_endpoints(policy):
+    replicas = [ReplicaLlm(f"http://replica-{i}", delay=0.01) for i in range(3)]
+    llm = LoadBalancedLlm(replicas, policy=policy)
+
+    await asyncio.gather(*[llm.achat(messages=_conversation(f"prompt {i}")) for i in range(30)])
+    assert sum(replica.requests for replica in replicas) == 30
+    assert all(replica.requests >= 5 for replica in replicas)
+    assert all(endpoint["outstanding"] == 0 for endpoint in llm.snapshot())
+
+
+def test_least_outstanding_rotates_sequential_requests():
+    replicas = [ReplicaLlm("http://a"), ReplicaLlm("http://b")]
+    llm = LoadBalancedLlm(replicas)
+    answers = [llm.chat(messages=_conversation("prompt")).message.content for _ in range(4)]
+    assert answers == ["http://a", "http://b", "http://a", "http://b"]
+
+
+@pytest.mark.asyncio
+async def test_sticky_routing_by_conversation_prefix():
+    replicas = [ReplicaLlm(f"http://replica-{i}") for i in range(4)]
+    llm = LoadBalancedLlm(replicas, sticky_prefix_messages=1)
+
+    # Requests sharing the same system prompt go to the same endpoint.
+    answers = {llm.chat(messages=_conversation("shared prompt", f"question {i}")).message.content for i in range(10)}
+    assert len(answers) == 1
+
+    # Different prefixes are spread over the endpoints.
+    answers = {llm.chat(messages=_conversation(f"prompt {i}")).message.content for i in range(40)}
+    assert len(answers) > 1
+
+    # The pinned endpoint is left when it is overloaded.
+    slow = LoadBalancedLlm([ReplicaLlm("http://a", delay=0.02), ReplicaLlm("http://b", delay=0.02)], sticky_prefix_messages=1, max_imbalance=2)
+    responses = await asyncio.gather(*[slow.achat(messages=_conversation("shared prompt")) for _ in range(10)])
+    assert {response.message.content for response in responses} == {"http://a", "http://b"}
+
+
+def test_failing_endpoints_are_ejected():
+    healthy, failing = ReplicaLlm("http://healthy"), ReplicaLlm("http://failing")
+    failing.error = ModelRetryLimitError("timed out", operation="chat")
+    llm = LoadBalancedLlm([failing, healthy], max_failures=2, ejection_duration=60)
+
+    for _ in range(4):
+        try:
+            llm.chat(messages=_conversation("prompt"))
+        except ModelRetryLimitError:
+            pass
+    assert failing.requests == 2
+    assert llm.snapshot()[0]["ejected"]
+
+    for _ in range(5):
+        assert llm.chat(messages=_conversation("prompt")).message.content == "http://healthy"
+    assert failing.requests == 2
+
+
+def test_invalid_requests_do_not_eject_endpoints():
+    replica = ReplicaLlm("http://a")
+    replica.error = ModelUnrecoverableError("invalid request", operation="chat")
+    llm = LoadBalancedLlm([replica], max_failures=1)
+    with pytest.raises(ModelUnrecoverableError):
+        llm.chat(messages=_conversation("prompt"))
+    assert llm.snapshot()[0] == {
+        "name": "http://a", "outstanding": 0, "requests": 1, "failures": 0, "ejections": 0, "ejected": False,
+    }
+
+
+def test_all_endpoints_ejected_still_serves():
+    replica = ReplicaLlm("http://a")
+    replica.error = ConnectionError("connection refused")
+    llm = LoadBalancedLlm([replica], max_failures=1)
+    with pytest.raises(ConnectionError):
+        list(llm.stream(messages=_conversation("prompt")))
+    assert llm.snapshot()[0]["ejected"]
+
+    replica.error = None
+    assert [chunk.delta for chunk in llm.stream(messages=_conversation("prompt"))] == ["http://a"]
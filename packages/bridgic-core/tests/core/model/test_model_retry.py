@@ -0,0 +1,205 @@
+import time
+import httpx
+import pytest
+
+from bridgic.core.model import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    ModelCircuitOpenError,
+    ModelRetryLimitError,
+    ModelUnrecoverableError,
+    RetryPolicyConfig,
+    is_recoverable_exception,
+    retryable_model_call,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class APIStatusError(Exception):
+    """Shaped like the status errors of the OpenAI SDK."""
+
+    def __init__(self, status_code: int, code: str = None, headers=None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = FakeResponse(status_code, headers)
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class FlakyModel:
+    def __init__(self, api_base: str = "http://flaky.test/v1", circuit_breaker: CircuitBreakerConfig = None):
+        self.api_base = api_base
+        self.circuit_breaker = circuit_breaker
+        self.failures = []
+        self.calls = 0
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0, retry_budget_reserve=2.0, retry_budget_ratio=0.5))
+    def chat(self, messages=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return "ok"
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0))
+    def structured_output(self, messages=None):
+        return self.chat(messages=messages)
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0, max_retry_after=0.5, retry_budget_ratio=None))
+    async def achat(self, messages=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return "ok"
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0, retry_budget_ratio=None))
+    async def astream(self, messages=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        yield "o"
+        if self.failures:
+            raise self.failures.pop(0)
+        yield "k"
+
+
+def test_error_classification():
+    assert is_recoverable_exception(APIStatusError(503))
+    assert is_recoverable_exception(APIStatusError(429))
+    assert is_recoverable_exception(APIStatusError(529))
+    assert not is_recoverable_exception(APIStatusError(429, code="insufficient_quota"))
+    assert not is_recoverable_exception(APIStatusError(400, code="content_filter"))
+    assert not is_recoverable_exception(APIStatusError(401))
+
+    request = httpx.Request("POST", "http://test.local")
+    assert is_recoverable_exception(httpx.ConnectTimeout("timed out", request=request))
+    assert is_recoverable_exception(httpx.RemoteProtocolError("server disconnected", request=request))
+    status_error = httpx.HTTPStatusError("bad gateway", request=request, response=httpx.Response(502, request=request))
+    assert is_recoverable_exception(status_error)
+    assert is_recoverable_exception(APIConnectionError("Connection error."))
+
+    # Content-filter rejections are not retried just because of their message.
+    assert not is_recoverable_exception(ValueError("the request violated the usage policy"))
+    assert not is_recoverable_exception(ModelRetryLimitError("exceeded", operation="chat"))
+    assert is_recoverable_exception(RuntimeError("upstream timed out"))
+
+
+def test_nested_retry_errors_are_not_retried_again():
+    model = FlakyModel()
+    model.failures = [APIStatusError(503)] * 3
+    with pytest.raises(ModelRetryLimitError) as exc_info:
+        model.structured_output()
+    assert exc_info.value.operation == "chat"
+    assert model.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_respected():
+    model = FlakyModel()
+    model.failures = [APIStatusError(429, headers={"retry-after": "0.2"})]
+    start_time = time.monotonic()
+    assert await model.achat() == "ok"
+    assert time.monotonic() - start_time >= 0.2
+    assert model.calls == 2
+
+    # A longer delay than `max_retry_after` is not waited for.
+    model.calls = 0
+    model.failures = [APIStatusError(429, headers={"retry-after": "60"})]
+    with pytest.raises(ModelRetryLimitError, match="gave up retrying after 1 of 3 attempts"):
+        await model.achat()
+    assert model.calls == 1
+
+
+def test_retries_are_budgeted_per_instance():
+    model = FlakyModel()
+    model.failures = [APIStatusError(503)] * 3
+    with pytest.raises(ModelRetryLimitError):
+        model.chat()
+    assert model.calls == 3
+
+    # The two retries of the reserve are spent: the next failing call is not retried.
+    model.calls = 0
+    model.failures = [APIStatusError(503)] * 3
+    with pytest.raises(ModelRetryLimitError):
+        model.chat()
+    assert model.calls == 1
+
+    # Successful calls earn retries back, and other instances have their own budget.
+    model.failures = []
+    model.chat()
+    model.calls = 0
+    model.failures = [APIStatusError(503), APIStatusError(503)]
+    with pytest.raises(ModelRetryLimitError):
+        model.chat()
+    assert model.calls == 2
+
+    other = FlakyModel()
+    other.failures = [APIStatusError(503)] * 2
+    assert other.chat() == "ok"
+
+
+def test_circuit_breaker_fails_fast_while_the_endpoint_is_down():
+    config = CircuitBreakerConfig(failure_threshold=3, recovery_time=0.1)
+    model = FlakyModel(api_base="http://down.test/v1", circuit_breaker=config)
+    breaker = CircuitBreaker.shared(model.api_base, config)
+
+    model.failures = [ConnectionError("connection refused")] * 3
+    with pytest.raises(ModelRetryLimitError):
+        model.chat()
+    assert breaker.state == "open"
+
+    # Requests are rejected without being sent, by every instance of the endpoint.
+    model.calls = 0
+    other = FlakyModel(api_base="http://down.test/v1", circuit_breaker=config)
+    with pytest.raises(ModelCircuitOpenError):
+        model.chat()
+    with pytest.raises(ModelCircuitOpenError):
+        other.structured_output()
+    assert model.calls == 0 and other.calls == 0
+    assert breaker.snapshot()["rejections"] == 2
+
+    # A failed probe opens the circuit again, a successful one closes it.
+    time.sleep(0.1)
+    assert breaker.state == "half_open"
+    model.failures = [ConnectionError("connection refused")]
+    with pytest.raises(ModelCircuitOpenError):
+        model.chat()
+    assert model.calls == 1
+
+    time.sleep(0.1)
+    assert model.chat() == "ok"
+    assert breaker.state == "closed"
+
+
+def test_invalid_requests_do_not_open_the_circuit():
+    config = CircuitBreakerConfig(failure_threshold=1)
+    model = FlakyModel(api_base="http://invalid.test/v1", circuit_breaker=config)
+    model.failures = [APIStatusError(400)]
+    with pytest.raises(ModelUnrecoverableError):
+        model.chat()
+    assert CircuitBreaker.shared(model.api_base, config).state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_stream_is_retried_until_it_starts():
+    model = FlakyModel()
+    model.failures = [APIStatusError(503), APIStatusError(503)]
+    assert [item async for item in model.astream()] == ["o", "k"]
+    assert model.calls == 3
+
+    # A stream that has started is not retried.
+    model = FlakyModel()
+    model.failures = []
+    stream = model.astream()
+    assert await stream.__anext__() == "o"
+    model.failures = [APIStatusError(503)]
+    with pytest.raises(APIStatusError):
+        await stream.__anext__()
+    assert model.calls == 1
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import pytest
+
+from typing import Any, Dict, List
+
+from bridgic.core.model import (
+    BaseLlm,
+    PriorityScheduler,
+    PrioritySchedulerConfig,
+    ScheduledLlm,
+    get_request_priority,
+    request_priority,
+)
+from bridgic.core.model.types import Message, MessageChunk, Response
+
+
+class SlowLlm(BaseLlm):
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.order: List[str] = []
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        self.order.append(messages[0].content)
+        return Response(message=Message.from_text("ok", role="assistant"))
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        self.order.append(messages[0].content)
+        await asyncio.sleep(self.delay)
+        return Response(message=Message.from_text("ok", role="assistant"))
+
+    def stream(self, messages: List[Message], **kwargs):
+        yield MessageChunk(delta="ok")
+
+    async def astream(self, messages: List[Message], **kwargs):
+        yield MessageChunk(delta="ok")
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {"delay": self.delay}
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(**state_dict)
+
+
+def _messages(text: str) -> List[Message]:
+    return [Message.from_text(text, role="user")]
+
+
+async def _background_chat(llm: BaseLlm, text: str) -> Response:
+    with request_priority("background"):
+        return await llm.achat(messages=_messages(text))
+
+
+def test_request_priority_is_scoped():
+    assert get_request_priority() == "interactive"
+    with request_priority("background"):
+        assert get_request_priority() == "background"
+    assert get_request_priority() == "interactive"
+    with pytest.raises(ValueError):
+        with request_priority("urgent"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_are_served_first():
+    inner = SlowLlm()
+    llm = ScheduledLlm(inner, PriorityScheduler(PrioritySchedulerConfig(max_concurrency=1)))
+
+    # The first request takes the only slot; the others queue, background ones first.
+    calls = [asyncio.ensure_future(llm.achat(messages=_messages("first")))]
+    await asyncio.sleep(0)
+    calls += [asyncio.ensure_future(_background_chat(llm, f"background {i}")) for i in range(2)]
+    await asyncio.sleep(0)
+    calls += [asyncio.ensure_future(llm.achat(messages=_messages(f"interactive {i}"))) for i in range(2)]
+    await asyncio.gather(*calls)
+
+    assert inner.order == ["first", "interactive 0", "interactive 1", "background 0", "background 1"]
+    snapshot = llm.scheduler.snapshot()
+    assert snapshot["granted"] == {"interactive": 3, "background": 2}
+    assert snapshot["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_background_concurrency_is_capped_and_not_starved():
+    inner = SlowLlm(delay=0.02)
+    scheduler = PriorityScheduler(PrioritySchedulerConfig(max_concurrency=2, max_background_concurrency=1, max_background_wait=0.03))
+    llm = ScheduledLlm(inner, scheduler)
+
+    # Background requests never hold more than one slot.
+    calls = [asyncio.ensure_future(_background_chat(llm, f"background {i}")) for i in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.snapshot()["background_inflight"] == 1
+    assert scheduler.snapshot()["waiting"]["background"] == 1
+
+    await asyncio.gather(*calls)
+
+
+@pytest.mark.asyncio
+async def test_background_requests_are_not_starved():
+    inner = SlowLlm(delay=0.01)
+    scheduler = PriorityScheduler(PrioritySchedulerConfig(max_concurrency=1, max_background_wait=0.03))
+    llm = ScheduledLlm(inner, scheduler)
+
+    # Interactive requests keep waiting for the only slot, yet the background request is served.
+    async def interactive_client(client: int):
+        for i in range(10):
+            await llm.achat(messages=_messages(f"interactive {client}-{i}"))
+
+    clients = [asyncio.ensure_future(interactive_client(client)) for client in range(3)]
+    await asyncio.sleep(0)
+    await asyncio.gather(_background_chat(llm, "background"), *clients)
+    assert inner.order.index("background") < len(inner.order) - 10
+    assert scheduler.snapshot()["promotions"] == 1
+
+
+def test_threads_share_the_budget():
+    inner = SlowLlm()
+    scheduler = PriorityScheduler(PrioritySchedulerConfig(max_concurrency=2))
+    llms = [ScheduledLlm(inner, scheduler), ScheduledLlm(inner, scheduler, priority="background")]
+    threads = [threading.Thread(target=llms[i % 2].chat, kwargs={"messages": _messages(str(i))}) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scheduler.snapshot()["granted"] == {"interactive": 5, "background": 5}
+    assert scheduler.snapshot()["inflight"] == 0
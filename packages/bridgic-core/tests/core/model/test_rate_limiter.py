@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+
+from bridgic.core.model import RateLimitConfig, RateLimiter, RetryPolicyConfig, retryable_model_call
+from bridgic.core.model._model_error import ModelRetryLimitError
+from bridgic.core.model._rate_limiter import estimate_tokens, parse_retry_after, _parse_duration
+from bridgic.core.model.types import Message, Response, TokenUsage
+
+
+class RateLimitedModel:
+    def __init__(self, rate_limit: RateLimitConfig, api_base: str = "http://rate-limited.test/v1"):
+        self.rate_limit = rate_limit
+        self.api_base = api_base
+        self.failures = []
+        self.calls = 0
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0))
+    def chat(self, messages, model=None, max_tokens=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return Response(usage=TokenUsage(model=model, prompt_tokens=5, completion_tokens=5, total_tokens=10))
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0))
+    def structured_output(self, messages, model=None):
+        return self.chat(messages=messages, model=model)
+
+    @retryable_model_call(RetryPolicyConfig(max_attempts=3, base_delay=0.0))
+    async def achat(self, messages, model=None):
+        self.calls += 1
+        return Response()
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class RateLimitError(Exception):
+    def __init__(self, headers):
+        super().__init__("Error code: 429 - rate limit exceeded")
+        self.response = FakeResponse(headers)
+
+
+def test_requests_wait_for_the_budget():
+    limiter = RateLimiter(RateLimitConfig(requests_per_minute=2))
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    # The third request waits for one request to be refilled at 2 per minute.
+    assert limiter.reserve() == pytest.approx(30, abs=0.1)
+    # Callers queue up behind each other.
+    assert limiter.reserve() == pytest.approx(60, abs=0.1)
+
+    capped = RateLimiter(RateLimitConfig(requests_per_minute=1, max_wait=0.5))
+    capped.reserve()
+    assert capped.reserve() == 0.5
+
+
+def test_tokens_wait_for_the_budget():
+    limiter = RateLimiter(RateLimitConfig(tokens_per_minute=600))
+    assert limiter.reserve(tokens=500) == 0
+    assert limiter.reserve(tokens=200) == pytest.approx(10, abs=0.1)
+    # Requests larger than the budget only wait for the full budget.
+    assert limiter.reserve(tokens=10_000) == pytest.approx(70, abs=0.1)
+
+    limiter = RateLimiter(RateLimitConfig(tokens_per_minute=600))
+    limiter.reserve(tokens=600)
+    limiter.reconcile(estimated_tokens=600, actual_tokens=100)
+    assert limiter.reserve(tokens=500) == 0
+
+
+def test_headers_adjust_the_budget():
+    limiter = RateLimiter(RateLimitConfig(requests_per_minute=100))
+    limiter.update_from_headers({"Retry-After": "2"})
+    assert limiter.reserve() == pytest.approx(2, abs=0.1)
+
+    limiter = RateLimiter(RateLimitConfig(requests_per_minute=100))
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m30s"})
+    assert limiter.reserve() == pytest.approx(90, abs=0.1)
+
+    limiter = RateLimiter(RateLimitConfig(requests_per_minute=60))
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "1"})
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(1, abs=0.1)
+
+
+def test_parse_headers():
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({"retry-after": "3"}) == 3
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert parse_retry_after({}) is None
+    assert _parse_duration("6m0s") == 360
+    assert _parse_duration("20ms") == pytest.approx(0.02)
+    assert _parse_duration("1.5") == 1.5
+
+
+def test_estimate_tokens():
+    messages = [Message.from_text("a" * 400, role="user")]
+    assert estimate_tokens(messages) == 100
+    assert estimate_tokens(messages, max_tokens=50) == 150
+
+
+def test_limiters_are_shared_per_endpoint_and_model():
+    config = RateLimitConfig(requests_per_minute=10)
+    limiter = RateLimiter.shared("http://a.test", "m", config)
+    assert RateLimiter.shared("http://a.test", "m", RateLimitConfig(requests_per_minute=10)) is limiter
+    assert RateLimiter.shared("http://a.test", "other", config) is not limiter
+    assert RateLimiter.shared("http://b.test", "m", config) is not limiter
+    assert RateLimiter.shared("http://a.test", "m", RateLimitConfig(requests_per_minute=20)) is not limiter
+
+
+def test_retryable_model_call_acquires_the_shared_limiter():
+    config = RateLimitConfig(requests_per_minute=6000, tokens_per_minute=6000)
+    model = RateLimitedModel(config, api_base="http://acquire.test/v1")
+    limiter = RateLimiter.shared(model.api_base, "m", config)
+    messages = [Message.from_text("a" * 400, role="user")]
+
+    model.chat(messages=messages, model="m", max_tokens=100)
+    # One request, and the estimated tokens reconciled with the actual usage.
+    assert limiter._requests.balance == pytest.approx(5999, abs=1)
+    assert limiter._tokens.balance == pytest.approx(5990, abs=1)
+
+    # Nested rate-limited calls only take the budget once.
+    model.structured_output(messages=messages, model="m")
+    assert limiter._requests.balance == pytest.approx(5998, abs=1)
+
+    asyncio.run(model.achat(messages=messages, model="m"))
+    assert limiter._requests.balance == pytest.approx(5997, abs=1)
+
+
+def test_retryable_model_call_honors_rate_limit_headers():
+    config = RateLimitConfig(requests_per_minute=6000, max_wait=0.2)
+    model = RateLimitedModel(config, api_base="http://headers.test/v1")
+    limiter = RateLimiter.shared(model.api_base, "m", config)
+    model.failures = [RateLimitError({"retry-after": "0.1"})]
+
+    model.chat(messages=[], model="m")
+    assert model.calls == 2
+    assert limiter._blocked_until > 0
+
+    model.failures = [RateLimitError({"retry-after": "0"})] * 3
+    with pytest.raises(ModelRetryLimitError):
+        model.chat(messages=[], model="m")
+
+
+def test_models_without_rate_limit_are_not_limited():
+    model = RateLimitedModel(rate_limit=None)
+    model.chat(messages=[], model="m")
+    assert model.calls == 1
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+
+from bridgic.core.model import HedgingConfig, LlmMetricsRegistry, RequestHedger
+
+
+class FakeBackend:
+    """Serves the requests with the given latencies, in order."""
+
+    def __init__(self, *latencies, error: Exception = None):
+        self.latencies = list(latencies)
+        self.error = error
+        self.started = 0
+        self.cancelled = 0
+
+    async def request(self):
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.latencies[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return f"response {index}"
+
+
+@pytest.fixture
+def metrics():
+    registry = LlmMetricsRegistry.read()
+    registry.reset()
+    yield registry
+    registry.reset()
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_loser_cancelled(metrics):
+    hedger = RequestHedger(HedgingConfig(delay=0.02, max_extra_ratio=1.0))
+    backend = FakeBackend(1.0, 0.01)
+
+    assert await hedger.run(backend.request, "m", "achat") == "response 1"
+    assert backend.started == 2
+    await asyncio.sleep(0)
+    assert backend.cancelled == 1
+
+    operation = metrics.snapshot()["m"]["operations"]["achat"]
+    assert operation["hedges"] == 1
+    assert operation["hedge_wins"] == 1
+    assert 'bridgic_llm_hedges_total{model="m",operation="achat"} 1' in metrics.to_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_hedged(metrics):
+    hedger = RequestHedger(HedgingConfig(delay=0.05, max_extra_ratio=1.0))
+    backend = FakeBackend(0.0)
+    assert await hedger.run(backend.request, "m", "achat") == "response 0"
+    assert backend.started == 1
+    assert metrics.snapshot() == {}
+
+
+@pytest.mark.asyncio
+async def test_primary_wins_if_it_finishes_first(metrics):
+    hedger = RequestHedger(HedgingConfig(delay=0.01, max_extra_ratio=1.0))
+    backend = FakeBackend(0.03, 1.0)
+    assert await hedger.run(backend.request, "m", "achat") == "response 0"
+    operation = metrics.snapshot()["m"]["operations"]["achat"]
+    assert (operation["hedges"], operation["hedge_wins"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_hedges_are_budgeted():
+    hedger = RequestHedger(HedgingConfig(delay=0.001, max_extra_ratio=0.25))
+    backend = FakeBackend(*([0.01] * 20))
+    for _ in range(8):
+        await hedger.run(backend.request, "m", "achat")
+    # 8 requests earn 2 hedges.
+    assert backend.started == 8 + 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_when_all_requests_fail():
+    hedger = RequestHedger(HedgingConfig(delay=0.001, max_extra_ratio=1.0))
+    backend = FakeBackend(0.01, 0.01, error=ConnectionError("server is down"))
+    with pytest.raises(ConnectionError):
+        await hedger.run(backend.request, "m", "achat")
+    assert backend.started == 2
+
+
+@pytest.mark.asyncio
+async def test_percentile_delay_from_recent_latencies():
+    hedger = RequestHedger(HedgingConfig(percentile=0.9, min_samples=10, window_size=10))
+    assert hedger.get_delay("m", "achat") is None
+    for index in range(10):
+        hedger._observe("m", "achat", latency=(index + 1) / 10)
+    assert hedger.get_delay("m", "achat") == 1.0
+    assert hedger.get_delay("m", "other") is None
+
+    with pytest.raises(ValueError):
+        HedgingConfig(min_samples=20, window_size=10)
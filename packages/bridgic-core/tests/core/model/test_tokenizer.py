@@ -0,0 +1,94 @@
+import base64
+import pickle
+import pytest
+
+from bridgic.core.model import (
+    BpeTokenizer,
+    HeuristicTokenizer,
+    TokenCounter,
+    count_tokens,
+    get_token_counter,
+    set_default_tokenizer,
+)
+from bridgic.core.model.types import Message, ToolCallBlock
+
+
+# Byte-level ranks with a few merges, each merging two tokens of lower ranks.
+MERGES = [b"he", b"ll", b"hell", b"hello", b" w", b"or", b" wor", b"ld", b" world", b"in", b"ing", b"  ", b"    "]
+RANKS = {bytes([i]): i for i in range(256)}
+RANKS.update({token: 256 + i for i, token in enumerate(MERGES)})
+
+
+class CountingTokenizer:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, text: str) -> int:
+        self.texts.append(text)
+        return len(text.split())
+
+
+def test_heuristic_counts_code_and_cjk_closer_than_characters():
+    tokenizer = HeuristicTokenizer()
+    assert tokenizer("Hello, world! This is a test of the tokenizer.") == 13
+    # 4 characters per token would count 3 tokens for 13 CJK characters.
+    assert tokenizer("你好，世界。今天天气很好。") == 13
+    assert tokenizer("def f(x):\n    return x[0] + 1\n") > len("def f(x):\n    return x[0] + 1\n") // 4
+    assert tokenizer("") == 0
+
+
+def test_bpe_merges_pieces_by_rank(tmp_path):
+    tokenizer = BpeTokenizer(RANKS)
+    assert tokenizer.encode("hello world") == [259, 264]
+    assert tokenizer.encode("hello wording") == [259, 262, ord("d"), 266]
+    assert tokenizer.count("hello\n    hello") == 6
+    with pytest.raises(ValueError):
+        BpeTokenizer({b"a": 0}).encode("b")
+
+    # The vocabulary file has a base64 token and its rank per line.
+    path = tmp_path / "test.tiktoken"
+    path.write_text("\n".join(f"{base64.b64encode(token).decode()} {rank}" for token, rank in RANKS.items()))
+    loaded = BpeTokenizer.from_file(path)
+    assert loaded.encode("hello world") == [259, 264]
+    assert pickle.loads(pickle.dumps(loaded)).count("hello world") == 2
+    # A tokenizer loaded from a file is pickled as the path of its vocabulary.
+    assert loaded.__getstate__() == {"path": str(path), "pattern": loaded.pattern, "cache_size": loaded.cache_size}
+
+
+def test_bpe_matches_tiktoken():
+    tiktoken = pytest.importorskip("tiktoken")
+    pattern = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"""
+    encoding = tiktoken.Encoding(name="test", pat_str=pattern, mergeable_ranks=RANKS, special_tokens={})
+    tokenizer = BpeTokenizer(RANKS)
+    for text in [
+        "hello world, hello wording!",
+        "def hello(world):\n    return world['hello'] + 123456\n\n",
+        "It's ringing in the  hello_world   ",
+    ]:
+        assert tokenizer.encode(text) == encoding.encode(text)
+
+
+def test_counter_counts_unchanged_messages_once():
+    tokenizer = CountingTokenizer()
+    counter = TokenCounter(tokenizer)
+    history = [Message.from_text(f"message number {i}", role="user") for i in range(5)]
+    assert counter.count_messages(history) == 15
+
+    history.append(Message(role="assistant", blocks=[ToolCallBlock(id="1", name="search", arguments={"q": "x"})]))
+    assert counter.count_messages(history) == 15 + 7
+    assert len(tokenizer.texts) == 6
+
+    history[0].content = "changed"
+    assert counter.count_messages(history) == 13 + 7
+    assert counter.count("a b") == counter.count("a b") == 2
+    assert len(tokenizer.texts) == 8
+
+
+def test_default_tokenizer_can_be_replaced():
+    try:
+        set_default_tokenizer(BpeTokenizer(RANKS))
+        assert count_tokens("hello world") == 2
+        assert get_token_counter().count_message(Message.from_text("hello world", role="user")) == 2
+    finally:
+        set_default_tokenizer(None)
+    assert isinstance(get_token_counter().tokenizer, HeuristicTokenizer)
@@ -2,7 +2,7 @@
 Test cases for collection utility functions.
 """
 import pytest
-from bridgic.core.utils._collection import filter_dict, unique_list_in_order, deep_hash, validate_required_params
+from bridgic.core.utils._collection import filter_dict, unique_list_in_order, deep_hash, validate_required_params, serialize_data
 
 
 def test_filter_dict_basic_none_filtering():
@@ -327,3 +327,16 @@ def test_validate_required_params_empty_dict():
     validate_required_params(params, ["messages", "model", "extra"])
     # Should not raise any exception
 
+
+def test_serialize_data_redacts_keys():
+    """Test that the values of redacted keys are hidden at any depth."""
+    data = {"user": "alice", "API_KEY": "sk-1", "nested": [{"api_key": "sk-2", "ok": 1}]}
+    result = serialize_data(data, redact_keys=["api_key"])
+    assert result == {"user": "alice", "API_KEY": "[REDACTED]", "nested": [{"api_key": "[REDACTED]", "ok": 1}]}
+
+
+def test_serialize_data_stops_traversal_beyond_budget():
+    """Test that wide payloads are cut once the traversal budget is exhausted."""
+    assert serialize_data(list(range(1000)), max_nodes=4) == [0, 1, 2, "..."]
+    assert serialize_data({f"k{i}": i for i in range(10)}, max_nodes=3) == {"k0": 0, "k1": 1, "...": "8 more items"}
+    assert serialize_data([1, [2, 3]], max_nodes=100) == serialize_data([1, [2, 3]])
@@ -0,0 +1,172 @@
+"""
+Test cases for the background trace exporter.
+"""
+import json
+import threading
+import time
+import urllib.request
+import pytest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bridgic.core.utils._trace_exporter import TraceExporter
+
+
+@pytest.fixture
+def stub_trace_server():
+    """A local stub of a tracing backend, which accepts batches of spans slowly."""
+    received_batches = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(self.server.delay)
+            received_batches.append(json.loads(body))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.delay = 0.0
+    server.received_batches = received_batches
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class BatchingClient:
+    """A minimal backend client that buffers spans and sends them as one batch on flush."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.buffer = []
+
+    def span(self, **span_data):
+        self.buffer.append(span_data)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(batch).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(request).close()
+
+
+def test_events_are_exported_off_the_calling_thread():
+    exported_on = []
+    exporter = TraceExporter()
+
+    assert exporter.submit(lambda: exported_on.append(threading.current_thread()))
+    assert exporter.flush(timeout=5)
+
+    assert exported_on == [exporter._thread]
+    assert exported_on[0] is not threading.current_thread()
+    assert exporter.pending_count == 0
+
+
+def test_flush_hook_is_called_once_per_batch():
+    gate = threading.Event()
+    flushed_batch_sizes = []
+    exported = []
+
+    exporter = TraceExporter(flush=lambda: flushed_batch_sizes.append(len(exported)))
+    # Block the exporter thread so that the following events pile up into one batch.
+    exporter.submit(gate.wait)
+    for i in range(10):
+        exporter.submit(lambda i=i: exported.append(i))
+    gate.set()
+
+    assert exporter.flush(timeout=5)
+    assert exported == list(range(10))
+    assert flushed_batch_sizes[-1] == 10
+    assert len(flushed_batch_sizes) <= 2
+
+
+def test_events_are_dropped_when_queue_is_full():
+    gate = threading.Event()
+    exporter = TraceExporter(max_queue_size=3)
+    exporter.submit(gate.wait)
+    # Wait for the blocking event to be taken by the exporter thread.
+    while exporter._queue.qsize() > 0:
+        time.sleep(0.01)
+
+    with pytest.warns(UserWarning, match="falling behind"):
+        accepted = [exporter.submit(lambda: None) for _ in range(5)]
+    assert accepted == [True, True, True, False, False]
+    assert exporter.dropped_count == 2
+
+    gate.set()
+    assert exporter.flush(timeout=5)
+
+
+def test_failed_events_do_not_stop_the_exporter():
+    exported = []
+
+    def failing_event():
+        raise RuntimeError("backend is down")
+
+    exporter = TraceExporter()
+    with pytest.warns(UserWarning, match="backend is down"):
+        exporter.submit(failing_event)
+        exporter.submit(lambda: exported.append("ok"))
+        assert exporter.flush(timeout=5)
+    assert exported == ["ok"]
+
+
+def test_flush_times_out_when_backend_is_slow():
+    gate = threading.Event()
+    exporter = TraceExporter()
+    exporter.submit(gate.wait)
+    assert not exporter.flush(timeout=0.05)
+    gate.set()
+    assert exporter.flush(timeout=5)
+
+
+def test_shutdown_rejects_new_events():
+    exporter = TraceExporter()
+    exporter.submit(lambda: None)
+    exporter.shutdown(timeout=5)
+    assert not exporter.submit(lambda: None)
+    assert not exporter._thread.is_alive()
+
+
+def test_export_to_stub_server_in_batches(stub_trace_server):
+    client = BatchingClient(f"http://127.0.0.1:{stub_trace_server.server_port}/spans")
+    exporter = TraceExporter(flush=client.flush, max_batch_size=50)
+    stub_trace_server.delay = 0.05
+
+    start = time.perf_counter()
+    for i in range(200):
+        exporter.submit(lambda i=i: client.span(id=i, output={"value": i}))
+    submit_duration = time.perf_counter() - start
+
+    # Submitting never waits for the slow backend.
+    assert submit_duration < 0.05
+    assert exporter.flush(timeout=10)
+
+    batches = stub_trace_server.received_batches
+    assert sorted(span["id"] for batch in batches for span in batch) == list(range(200))
+    # Spans are sent in batches rather than one request per span.
+    assert len(batches) < 200
+    assert all(len(batch) <= 50 for batch in batches)
+
+
+def test_bounded_memory_with_stub_server_down(stub_trace_server):
+    client = BatchingClient(f"http://127.0.0.1:{stub_trace_server.server_port}/spans")
+    exporter = TraceExporter(flush=client.flush, max_queue_size=20, max_batch_size=10)
+    stub_trace_server.delay = 0.5
+
+    with pytest.warns(UserWarning, match="falling behind"):
+        for i in range(100):
+            exporter.submit(lambda i=i: client.span(id=i))
+    assert exporter.pending_count <= 20 + 10
+    assert exporter.dropped_count >= 100 - 20 - 10
+    assert exporter.flush(timeout=10)
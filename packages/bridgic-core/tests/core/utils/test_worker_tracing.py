@@ -0,0 +1,168 @@
+"""
+Test cases for the trace sampling and payload policies used by tracing callbacks.
+"""
+import pytest
+
+from bridgic.core.automa import GraphAutoma, RunningOptions, worker
+from bridgic.core.automa.interaction import Event, InteractionException, InteractionFeedback
+from bridgic.core.automa.worker import WorkerCallback, WorkerCallbackBuilder
+from bridgic.core.config import GlobalSetting, TraceSamplingConfig, TracePayloadConfig
+from bridgic.core.utils._worker_tracing import (
+    build_worker_tracing_dict,
+    get_worker_tracing_record,
+    get_trace_payload_config,
+    is_trace_sampled,
+    serialize_trace_arguments,
+    serialize_trace_payload,
+)
+
+
+class SampledRunRecorder(WorkerCallback):
+    def __init__(self):
+        self.records = []
+
+    async def on_worker_start(self, key, is_top_level=False, parent=None, arguments=None):
+        if is_trace_sampled(parent):
+            self.records.append(key)
+
+
+class SimpleAutoma(GraphAutoma):
+    @worker(is_start=True, is_output=True)
+    async def step1(self, x: int):
+        self.local_space["secret"] = "hidden"
+        return x
+
+
+def test_tail_sampling_keeps_failed_or_slow_runs():
+    config = TraceSamplingConfig(tail_sampling=True, slow_threshold=1.0)
+    assert config.should_keep(0.1, failed=True)
+    assert config.should_keep(1.5, failed=False)
+    assert not config.should_keep(0.1, failed=False)
+    assert TraceSamplingConfig().should_keep(0.1, failed=False)
+    assert not TraceSamplingConfig(tail_sampling=True, keep_failed=False).should_keep(0.1, failed=True)
+
+
+def test_trace_payload_is_truncated_by_bytes():
+    config = TracePayloadConfig(max_bytes=8)
+    assert serialize_trace_payload("short", config) == "short"
+    assert serialize_trace_payload("é" * 10, config) == "éééé...[truncated 12 bytes]"
+    assert serialize_trace_payload({"a": "b" * 20}, config) == "{\"a\": \"b...[truncated 21 bytes]"
+
+
+def test_trace_arguments_are_redacted_and_truncated_one_by_one():
+    config = TracePayloadConfig(max_bytes=5, redact_keys=["token"])
+    arguments = {"args": ["a" * 10, 1], "kwargs": {"token": "abc", "q": "ok"}, "feedback_data": None}
+    assert serialize_trace_arguments(arguments, config) == {
+        "args": ["aaaaa...[truncated 5 bytes]", 1],
+        "kwargs": {"token": "[REDACTED]", "q": "ok"},
+        "feedback_data": None,
+    }
+    assert serialize_trace_arguments(None, config) is None
+
+
+@pytest.mark.asyncio
+async def test_head_sampling_is_decided_per_top_level_run():
+    recorder = SampledRunRecorder()
+
+    class RecorderBuilder(WorkerCallbackBuilder):
+        def build(self):
+            return recorder
+
+    automa = SimpleAutoma(name="unsampled", running_options=RunningOptions(
+        callback_builders=[RecorderBuilder(SampledRunRecorder)],
+        trace_sampling=TraceSamplingConfig(head_sample_rate=0.0),
+    ))
+    assert await automa.arun(x=1) == 1
+    assert recorder.records == []
+
+    automa = SimpleAutoma(name="sampled", running_options=RunningOptions(
+        callback_builders=[RecorderBuilder(SampledRunRecorder)],
+        trace_sampling=TraceSamplingConfig(head_sample_rate=1.0),
+    ))
+    assert await automa.arun(x=1) == 1
+    assert recorder.records == ["sampled", "step1"]
+
+
+@pytest.mark.asyncio
+async def test_head_sampling_decision_is_kept_when_resumed(monkeypatch):
+    recorder = SampledRunRecorder()
+    decisions = iter([False, True])
+    monkeypatch.setattr(TraceSamplingConfig, "sample_head", lambda self: next(decisions))
+
+    class RecorderBuilder(WorkerCallbackBuilder):
+        def build(self):
+            return recorder
+
+    class AskingAutoma(GraphAutoma):
+        @worker(is_start=True, is_output=True)
+        async def ask(self, x: int):
+            feedback = self.interact_with_human(Event(event_type="ask"))
+            return x + feedback.data
+
+    automa = AskingAutoma(name="asking", running_options=RunningOptions(
+        callback_builders=[RecorderBuilder(SampledRunRecorder)],
+    ))
+    with pytest.raises(InteractionException) as exc_info:
+        await automa.arun(x=1)
+    feedback = InteractionFeedback(interaction_id=exc_info.value.interactions[0].interaction_id, data=2)
+    assert await automa.arun(feedback_data=feedback) == 3
+    assert recorder.records == []
+    # The decision does not outlive the run.
+    assert is_trace_sampled(automa)
+
+
+def test_running_options_override_global_trace_payload():
+    global_config = TracePayloadConfig(max_bytes=100)
+    GlobalSetting.set(trace_payload=global_config)
+    try:
+        assert get_trace_payload_config(SimpleAutoma()) is global_config
+        automa_config = TracePayloadConfig(max_bytes=10)
+        automa = SimpleAutoma(running_options=RunningOptions(trace_payload=automa_config))
+        assert get_trace_payload_config(automa) is automa_config
+        assert get_trace_payload_config(None) is global_config
+    finally:
+        GlobalSetting.set(trace_payload=TracePayloadConfig())
+
+
+def test_worker_tracing_dict_honors_payload_policy():
+    automa = SimpleAutoma(running_options=RunningOptions(trace_payload=TracePayloadConfig(redact_keys=["secret"])))
+    worker_instance = automa._get_worker_instance("step1")
+    worker_instance.local_space["secret"] = "hidden"
+    worker_instance.local_space["visible"] = 1
+    tracing_dict = build_worker_tracing_dict(worker_instance, automa)
+    assert tracing_dict["local_space"] == {"secret": "[REDACTED]", "visible": 1}
+    assert tracing_dict["nesting_level"] == 1
+
+
+def test_worker_tracing_record_is_cached_until_ancestry_changes():
+    inner = SimpleAutoma(name="inner")
+    worker_instance = inner._get_worker_instance("step1")
+    record = get_worker_tracing_record(worker_instance, inner)
+    assert record.nesting_level == 1
+    assert record.top_automa_name == "inner"
+    assert get_worker_tracing_record(worker_instance, inner) is record
+
+    # Re-parenting unrelated workers does not invalidate the record.
+    other = SimpleAutoma(name="other")
+    other._get_worker_instance("step1").parent = inner
+    assert get_worker_tracing_record(worker_instance, inner) is record
+
+    class OuterAutoma(GraphAutoma):
+        pass
+
+    outer = OuterAutoma(name="outer")
+    outer.add_worker("inner", inner, is_start=True, is_output=True)
+    nested_record = get_worker_tracing_record(worker_instance, inner)
+    assert nested_record is not record
+    assert nested_record.nesting_level == 2
+    assert nested_record.parent_automa_name == "inner"
+    assert nested_record.top_automa_name == "outer"
+    with pytest.raises(AttributeError):
+        nested_record.nesting_level = 3
+
+    # Re-parenting an ancestor invalidates the records of the workers of the automas nested in it.
+    assert get_worker_tracing_record(worker_instance, inner) is nested_record
+    outermost = OuterAutoma(name="outermost")
+    outermost.add_worker("outer", outer, is_start=True, is_output=True)
+    deeper_record = get_worker_tracing_record(worker_instance, inner)
+    assert (deeper_record.nesting_level, deeper_record.top_automa_name) == (3, "outermost")
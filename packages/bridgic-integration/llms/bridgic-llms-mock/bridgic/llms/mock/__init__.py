@@ -0,0 +1,46 @@
+"""
+The Mock integration module provides a deterministic offline LLM for tests, load tests and 
+benchmarks.
+
+This module implements an LLM that simulates the responses (scripted, rule-based, or 
+generated from the requested schema), the latency, the token rate and the failures of a 
+model service, and a local OpenAI-compatible server backed by it, so that the whole stack 
+can be measured reproducibly without a live model.
+
+You can install the Mock integration package for Bridgic by running:
+
+```shell
+pip install bridgic-llms-mock
+```
+
+The server can also be started from the command line:
+
+```shell
+python -m bridgic.llms.mock --port 8000 --latency-mean 0.2 --tokens-per-second 50
+```
+"""
+
+from importlib.metadata import version
+from ._mock_llm import (
+    MockLlm,
+    MockResponse,
+    MockRule,
+    LatencyModel,
+    FailureInjection,
+    MockLlmError,
+    example_from_schema,
+)
+from ._mock_server import MockServer
+
+__version__ = version("bridgic-llms-mock")
+__all__ = [
+    "MockLlm",
+    "MockResponse",
+    "MockRule",
+    "LatencyModel",
+    "FailureInjection",
+    "MockLlmError",
+    "MockServer",
+    "example_from_schema",
+    "__version__",
+]
@@ -0,0 +1,48 @@
+import argparse
+
+from bridgic.llms.mock import FailureInjection, LatencyModel, MockLlm, MockServer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI-compatible chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default="mock")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-distribution", default="constant",
+                        choices=["constant", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--latency-mean", type=float, default=0.0)
+    parser.add_argument("--latency-stddev", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+
+    llm = MockLlm(
+        latency=LatencyModel(
+            distribution=args.latency_distribution,
+            mean=args.latency_mean,
+            stddev=args.latency_stddev,
+            tokens_per_second=args.tokens_per_second,
+        ),
+        failures=FailureInjection(
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+        ),
+        model=args.model,
+        seed=args.seed,
+    )
+    server = MockServer(llm, host=args.host, port=args.port)
+    print(f"Serving the mock chat completions API at {server.api_base}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
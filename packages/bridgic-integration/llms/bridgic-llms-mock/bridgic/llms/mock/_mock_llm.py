@@ -0,0 +1,440 @@
+import asyncio
+import json
+import math
+import random
+import re
+import time
+
+from threading import Lock
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from bridgic.core.model import BaseLlm, LlmMetricsRegistry
+from bridgic.core.model.protocols import Choice, Constraint, JsonSchema, PydanticModel, StructuredOutput, ToolSelection
+from bridgic.core.model.types import *
+
+
+class MockResponse(BaseModel):
+    """
+    A response of a `MockLlm`. The same response serves the different operations: `chat` and
+    `stream` return the `text` (or the JSON of the `output`), `structured_output` returns the
+    `output` (or the JSON parsed from the `text`), and `select_tool` returns the `tool_calls`
+    and the `text`.
+    """
+    text: Optional[str] = None
+    """The text of the response."""
+    output: Optional[Any] = None
+    """The JSON value of a structured output."""
+    tool_calls: List[ToolCall] = Field(default_factory=list)
+    """The tool calls of a tool selection."""
+
+
+class MockRule(BaseModel):
+    """A response given to the requests whose last message matches a pattern."""
+    pattern: str
+    """The regular expression searched in the text of the last message."""
+    response: MockResponse
+    """The response to the matching requests."""
+
+
+class LatencyModel(BaseModel):
+    """
+    The simulated latency of the responses: the time to the first token, drawn from a
+    distribution, then the generation of the completion tokens at `tokens_per_second`.
+    """
+    distribution: Literal["constant", "uniform", "normal", "lognormal", "exponential"] = "constant"
+    """The distribution of the time to the first token."""
+    mean: float = Field(default=0.0, ge=0.0)
+    """The mean time to the first token, in seconds."""
+    stddev: float = Field(default=0.0, ge=0.0)
+    """
+    The standard deviation of the time to the first token (`normal` and `lognormal`), or the
+    half-width of its range (`uniform`).
+    """
+    tokens_per_second: Optional[float] = Field(default=None, gt=0.0)
+    """The generation rate of the completion tokens. If None, the completion is instant."""
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a time to the first token, in seconds."""
+        if self.distribution == "uniform":
+            value = rng.uniform(self.mean - self.stddev, self.mean + self.stddev)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.mean, self.stddev)
+        elif self.distribution == "lognormal":
+            if self.mean <= 0.0:
+                return 0.0
+            # The parameters of the underlying normal distribution giving this mean and deviation.
+            sigma2 = math.log(1.0 + (self.stddev / self.mean) ** 2)
+            value = rng.lognormvariate(math.log(self.mean) - sigma2 / 2.0, math.sqrt(sigma2))
+        elif self.distribution == "exponential":
+            value = rng.expovariate(1.0 / self.mean) if self.mean > 0.0 else 0.0
+        else:
+            value = self.mean
+        return max(0.0, value)
+
+
+class FailureInjection(BaseModel):
+    """The simulated failures of the requests."""
+    error_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    """The probability of a request to fail with a `500 Internal Server Error`."""
+    rate_limit_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    """The probability of a request to be rejected with a `429 Too Many Requests`."""
+    retry_after: Optional[float] = Field(default=None, ge=0.0)
+    """The delay advised by the rate limit rejections, in seconds."""
+
+
+class MockLlmError(RuntimeError):
+    """
+    A simulated failure of a `MockLlm`, carrying the HTTP status code of the equivalent
+    response, so that it is classified like the errors of the real providers.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class MockLlm(BaseLlm, StructuredOutput, ToolSelection):
+    """
+    A deterministic offline LLM for tests, load tests and benchmarks, which simulates the
+    responses, the latency and the failures of a model service without calling any.
+
+    The response of a request is chosen in this order:
+
+    1. the next of the scripted `responses`, until they are all used;
+    2. the response of the first of the `rules` whose pattern matches the last message;
+    3. a default response: the echo of the last message for a chat, an example value of the
+       schema for a structured output, and no tool call for a tool selection.
+
+    The latency, the token rate of the streams and the failures are drawn from a random
+    generator seeded with `seed`, so that runs are reproducible.
+
+    Parameters
+    ----------
+    responses : Optional[List[MockResponse]]
+        The scripted responses, used in order.
+    rules : Optional[List[MockRule]]
+        The responses by pattern of the last message.
+    latency : Optional[LatencyModel]
+        The simulated latency. If None, responses are instant.
+    failures : Optional[FailureInjection]
+        The simulated failures. If None, requests do not fail.
+    model : str, default="mock"
+        The model name reported in the usage and the metrics.
+    seed : int, default=0
+        The seed of the random generator.
+
+    Examples
+    --------
+    ```python
+    llm = MockLlm(
+        rules=[MockRule(pattern="weather", response=MockResponse(
+            tool_calls=[ToolCall(id="call_1", name="get_weather", arguments={"city": "Paris"})],
+        ))],
+        latency=LatencyModel(distribution="lognormal", mean=0.3, stddev=0.1, tokens_per_second=50),
+        failures=FailureInjection(rate_limit_rate=0.01),
+    )
+    ```
+    """
+
+    responses: List[MockResponse]
+    rules: List[MockRule]
+    latency: LatencyModel
+    failures: FailureInjection
+    model: str
+    seed: int
+
+    _compiled_rules: List[Tuple["re.Pattern[str]", MockResponse]]
+    _next_response: int
+    _rng: random.Random
+    _lock: Lock
+
+    def __init__(
+        self,
+        responses: Optional[List[MockResponse]] = None,
+        rules: Optional[List[MockRule]] = None,
+        latency: Optional[LatencyModel] = None,
+        failures: Optional[FailureInjection] = None,
+        model: str = "mock",
+        seed: int = 0,
+    ):
+        self.responses = list(responses or [])
+        self.rules = list(rules or [])
+        self.latency = latency or LatencyModel()
+        self.failures = failures or FailureInjection()
+        self.model = model
+        self.seed = seed
+
+        self._compiled_rules = [(re.compile(rule.pattern), rule.response) for rule in self.rules]
+        self._next_response = 0
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        with LlmMetricsRegistry.read().track(self.model, "chat") as call:
+            text = self.get_text(self.respond(messages))
+            time.sleep(self.plan_delays(text)[0])
+            usage = self.count_usage(messages, text)
+            call.usage(usage)
+        return Response(message=Message.from_text(text, role=Role.AI), usage=usage)
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        with LlmMetricsRegistry.read().track(self.model, "achat") as call:
+            text = self.get_text(self.respond(messages))
+            await asyncio.sleep(self.plan_delays(text)[0])
+            usage = self.count_usage(messages, text)
+            call.usage(usage)
+        return Response(message=Message.from_text(text, role=Role.AI), usage=usage)
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        with LlmMetricsRegistry.read().track(self.model, "stream") as call:
+            text = self.get_text(self.respond(messages))
+            first_token_delay, token_delay = self.plan_delays(text, streaming=True)
+            time.sleep(first_token_delay)
+            for index, token in enumerate(self.split_tokens(text)):
+                if index:
+                    time.sleep(token_delay)
+                else:
+                    call.first_token()
+                yield MessageChunk(delta=token)
+            call.usage(self.count_usage(messages, text))
+
+    async def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        with LlmMetricsRegistry.read().track(self.model, "astream") as call:
+            text = self.get_text(self.respond(messages))
+            first_token_delay, token_delay = self.plan_delays(text, streaming=True)
+            await asyncio.sleep(first_token_delay)
+            for index, token in enumerate(self.split_tokens(text)):
+                if index:
+                    await asyncio.sleep(token_delay)
+                else:
+                    call.first_token()
+                yield MessageChunk(delta=token)
+            call.usage(self.count_usage(messages, text))
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        with LlmMetricsRegistry.read().track(self.model, "structured_output") as call:
+            output = self.get_output(self.respond(messages), constraint)
+            text = json.dumps(_to_jsonable(output))
+            time.sleep(self.plan_delays(text)[0])
+            call.usage(self.count_usage(messages, text))
+        return output
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        with LlmMetricsRegistry.read().track(self.model, "astructured_output") as call:
+            output = self.get_output(self.respond(messages), constraint)
+            text = json.dumps(_to_jsonable(output))
+            await asyncio.sleep(self.plan_delays(text)[0])
+            call.usage(self.count_usage(messages, text))
+        return output
+
+    def select_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        with LlmMetricsRegistry.read().track(self.model, "select_tool") as call:
+            response = self.respond(messages)
+            time.sleep(self.plan_delays(_tool_selection_text(response))[0])
+            call.usage(self.count_usage(messages, _tool_selection_text(response)))
+        return list(response.tool_calls), response.text
+
+    async def aselect_tool(self, messages: List[Message], tools: List[Tool], **kwargs) -> Tuple[List[ToolCall], Optional[str]]:
+        with LlmMetricsRegistry.read().track(self.model, "aselect_tool") as call:
+            response = self.respond(messages)
+            await asyncio.sleep(self.plan_delays(_tool_selection_text(response))[0])
+            call.usage(self.count_usage(messages, _tool_selection_text(response)))
+        return list(response.tool_calls), response.text
+
+    def respond(self, messages: List[Message]) -> MockResponse:
+        """
+        Choose the response to a request.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            The messages of the request.
+
+        Returns
+        -------
+        MockResponse
+            The scripted, matched or default response.
+        """
+        with self._lock:
+            if self._next_response < len(self.responses):
+                self._next_response += 1
+                return self.responses[self._next_response - 1]
+        last_text = messages[-1].content if messages else ""
+        for pattern, response in self._compiled_rules:
+            if pattern.search(last_text):
+                return response
+        return MockResponse(text=last_text)
+
+    def get_output(self, response: MockResponse, constraint: Constraint) -> Any:
+        """
+        Get the structured output of a response under a constraint.
+
+        Parameters
+        ----------
+        response : MockResponse
+            The response.
+        constraint : Constraint
+            The constraint of the output. Unscripted outputs are generated for the
+            `PydanticModel`, `JsonSchema` and `Choice` constraints.
+
+        Returns
+        -------
+        Any
+            An instance of the model of a `PydanticModel` constraint, the JSON value of a
+            `JsonSchema` constraint, or the text of other constraints.
+        """
+        output = response.output
+        if output is None and response.text is not None and isinstance(constraint, (PydanticModel, JsonSchema)):
+            try:
+                output = json.loads(response.text)
+            except ValueError:
+                output = None
+        if isinstance(constraint, PydanticModel):
+            if output is None:
+                output = example_from_schema(constraint.model.model_json_schema())
+            return constraint.model.model_validate(output)
+        if isinstance(constraint, JsonSchema):
+            return output if output is not None else example_from_schema(constraint.schema_dict)
+        if isinstance(constraint, Choice):
+            return response.text if response.text in constraint.choices else constraint.choices[0]
+        if response.text is None:
+            raise ValueError(f"No response scripted for the constraint '{constraint.constraint_type}'.")
+        return response.text
+
+    def plan_delays(self, text: str, streaming: bool = False) -> Tuple[float, float]:
+        """
+        Draw the simulated failure and delays of a request.
+
+        Parameters
+        ----------
+        text : str
+            The text of the completion.
+        streaming : bool, default=False
+            Whether the completion is streamed.
+
+        Returns
+        -------
+        Tuple[float, float]
+            The delay before the response (before the first token when streaming), and the delay
+            between two tokens of a stream, in seconds.
+
+        Raises
+        ------
+        MockLlmError
+            If the request fails.
+        """
+        with self._lock:
+            failure = self._rng.random()
+            first_token_delay = self.latency.sample(self._rng)
+        if failure < self.failures.rate_limit_rate:
+            raise MockLlmError("Rate limit exceeded (simulated).", status_code=429, retry_after=self.failures.retry_after)
+        if failure < self.failures.rate_limit_rate + self.failures.error_rate:
+            raise MockLlmError("Internal server error (simulated).", status_code=500)
+
+        token_delay = 1.0 / self.latency.tokens_per_second if self.latency.tokens_per_second else 0.0
+        if streaming:
+            return first_token_delay, token_delay
+        return first_token_delay + token_delay * max(0, len(self.split_tokens(text)) - 1), token_delay
+
+    def split_tokens(self, text: str) -> List[str]:
+        """Split a text into the simulated tokens of a stream (words with their trailing spaces)."""
+        return _TOKEN_PATTERN.findall(text)
+
+    def count_usage(self, messages: List[Message], text: str) -> TokenUsage:
+        """Count the simulated token usage of a request and its completion."""
+        prompt_tokens = sum(len(self.split_tokens(message.content)) for message in messages)
+        completion_tokens = len(self.split_tokens(text))
+        return TokenUsage(
+            model=self.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    def get_text(self, response: MockResponse) -> str:
+        """Get the text of a response, or the JSON of its output."""
+        if response.text is not None:
+            return response.text
+        if response.output is not None:
+            return json.dumps(response.output)
+        return ""
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {
+            "responses": self.responses,
+            "rules": self.rules,
+            "latency": self.latency,
+            "failures": self.failures,
+            "model": self.model,
+            "seed": self.seed,
+        }
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(**state_dict)
+
+
+def example_from_schema(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Generate a deterministic example value of a JSON schema: the first enumerated or constant
+    value, the first alternative of a union, all the properties of an object, one item of an
+    array, and placeholder scalars.
+
+    Parameters
+    ----------
+    schema : Dict[str, Any]
+        The JSON schema.
+    root : Optional[Dict[str, Any]]
+        The root schema, where the `$ref` references are resolved. Defaults to `schema`.
+
+    Returns
+    -------
+    Any
+        An example value satisfying the structural constraints of the schema.
+    """
+    root = root if root is not None else schema
+    if "$ref" in schema:
+        target: Any = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        return example_from_schema(target, root)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if schema.get(key):
+            return example_from_schema(schema[key][0], root)
+
+    schema_type = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type == "object":
+        return {name: example_from_schema(prop, root) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        items = schema.get("items") or {}
+        return [example_from_schema(items, root) for _ in range(max(1, schema.get("minItems", 1)))]
+    if schema_type == "integer":
+        return int(schema.get("minimum", 0))
+    if schema_type == "number":
+        return float(schema.get("minimum", 0.0))
+    if schema_type == "boolean":
+        return True
+    if schema_type == "null":
+        return None
+    return "x" * schema.get("minLength", 0) or "mock"
+
+
+def _tool_selection_text(response: MockResponse) -> str:
+    calls = [json.dumps({"name": call.name, "arguments": call.arguments}) for call in response.tool_calls]
+    return " ".join(filter(None, [response.text] + calls))
+
+
+def _to_jsonable(output: Any) -> Any:
+    return output.model_dump(mode="json") if isinstance(output, BaseModel) else output
@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from bridgic.core.model.protocols import JsonSchema
+from bridgic.core.model.types import Message, Role
+from bridgic.llms.mock._mock_llm import MockLlm, MockLlmError
+
+
+class MockServer:
+    """
+    A local OpenAI-compatible chat completions server backed by a `MockLlm`, so that the whole
+    client stack (HTTP clients, retries, rate limiting, concurrency control, ...) can be load
+    tested and benchmarked offline, e.g. with `OpenAILikeLlm(api_base=server.api_base, ...)`.
+
+    It serves `POST /v1/chat/completions`, streamed or not: the tool calls of the response when
+    `tools` are given, the structured output when a `json_schema` response format is given,
+    and the text otherwise. The latency, the token rate of the streams and the failures of the
+    `MockLlm` are simulated, the rate limit rejections being `429` responses with a
+    `Retry-After` header.
+
+    Parameters
+    ----------
+    llm : Optional[MockLlm]
+        The LLM generating the responses. If None, a `MockLlm` with the default settings.
+    host : str, default="127.0.0.1"
+        The host to listen on.
+    port : int, default=0
+        The port to listen on. If 0, a free port is chosen.
+
+    Examples
+    --------
+    ```python
+    with MockServer(MockLlm(latency=LatencyModel(mean=0.2, tokens_per_second=50))) as server:
+        llm = OpenAILikeLlm(api_base=server.api_base, api_key="mock")
+        response = await llm.achat(messages=messages, model="mock")
+    ```
+    """
+
+    llm: MockLlm
+
+    _server: ThreadingHTTPServer
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, llm: Optional[MockLlm] = None, host: str = "127.0.0.1", port: int = 0):
+        self.llm = llm or MockLlm()
+        self._server = ThreadingHTTPServer((host, port), _MockHandler)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self._server.mock_llm = self.llm
+        self._thread = None
+
+    @property
+    def api_base(self) -> str:
+        """The base URL of the API."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        """Start serving in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the current thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path: {self.path}", "type": "not_found"}})
+            return
+
+        llm: MockLlm = self.server.mock_llm
+        messages = [_to_message(message) for message in request.get("messages", [])]
+        model = request.get("model") or llm.model
+        stream = bool(request.get("stream"))
+
+        response = llm.respond(messages)
+        tool_calls: List[Dict[str, Any]] = []
+        if request.get("tools"):
+            text = response.text or ""
+            tool_calls = [
+                {
+                    "id": call.id or f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": call.name, "arguments": json.dumps(call.arguments)},
+                }
+                for call in response.tool_calls
+            ]
+        elif (request.get("response_format") or {}).get("type") == "json_schema":
+            schema = request["response_format"]["json_schema"].get("schema", {})
+            text = json.dumps(llm.get_output(response, JsonSchema(schema_dict=schema)))
+        else:
+            text = llm.get_text(response)
+
+        generated = text + "".join(call["function"]["arguments"] for call in tool_calls)
+        try:
+            first_token_delay, token_delay = llm.plan_delays(generated, streaming=stream)
+        except MockLlmError as e:
+            headers = {"Retry-After": str(e.retry_after)} if e.retry_after is not None else {}
+            error_type = "rate_limit_exceeded" if e.status_code == 429 else "server_error"
+            self._send_json(e.status_code, {"error": {"message": str(e), "type": error_type, "code": error_type}}, headers)
+            return
+
+        usage = llm.count_usage(messages, generated)
+        usage_dict = {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        time.sleep(first_token_delay)
+
+        if not stream:
+            message: Dict[str, Any] = {"role": "assistant", "content": text}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage_dict,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_chunk(delta: Dict[str, Any], finish: Optional[str] = None, usage: Optional[Dict[str, int]] = None) -> None:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if usage is not None else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if usage is not None:
+                chunk["usage"] = usage
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+
+        for index, token in enumerate(llm.split_tokens(text)):
+            if index:
+                time.sleep(token_delay)
+            send_chunk({"role": "assistant", "content": token} if index == 0 else {"content": token})
+        for index, call in enumerate(tool_calls):
+            send_chunk({"tool_calls": [{"index": index, **call}]})
+        send_chunk({}, finish=finish_reason)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send_chunk({}, usage=usage_dict)
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def _to_message(message: Dict[str, Any]) -> Message:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = "\n\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    try:
+        role = Role(message.get("role", "user"))
+    except ValueError:
+        role = Role.USER
+    return Message.from_text(content, role=role)
@@ -0,0 +1,138 @@
+import time
+import pytest
+
+from typing import List
+from pydantic import BaseModel
+
+from bridgic.core.model import is_recoverable_exception
+from bridgic.core.model.protocols import Choice, JsonSchema, PydanticModel, StructuredOutput, ToolSelection
+from bridgic.core.model.types import Message, Role, Tool, ToolCall
+from bridgic.llms.mock import (
+    FailureInjection,
+    LatencyModel,
+    MockLlm,
+    MockLlmError,
+    MockResponse,
+    MockRule,
+    MockServer,
+    example_from_schema,
+)
+
+
+class Step(BaseModel):
+    tool: str
+    count: int
+
+
+class Plan(BaseModel):
+    thought: str
+    steps: List[Step]
+    done: bool
+
+
+WEATHER = Tool(
+    name="get_weather",
+    description="Get the weather of a city.",
+    parameters={"type": "object", "properties": {"city": {"type": "string"}}, "required": ["city"]},
+)
+WEATHER_CALL = ToolCall(id="call_1", name="get_weather", arguments={"city": "Paris"})
+
+
+def _messages(text: str) -> List[Message]:
+    return [Message.from_text("You are a helpful assistant.", role=Role.SYSTEM), Message.from_text(text, role=Role.USER)]
+
+
+@pytest.mark.asyncio
+async def test_scripted_rule_based_and_default_responses():
+    llm = MockLlm(
+        responses=[MockResponse(text="scripted")],
+        rules=[MockRule(pattern="weather", response=MockResponse(text="Checking.", tool_calls=[WEATHER_CALL]))],
+    )
+    assert isinstance(llm, StructuredOutput) and isinstance(llm, ToolSelection)
+
+    assert (await llm.achat(messages=_messages("hello"))).message.content == "scripted"
+    assert (await llm.achat(messages=_messages("hello"))).message.content == "hello"
+    assert await llm.aselect_tool(messages=_messages("what is the weather?"), tools=[WEATHER]) == ([WEATHER_CALL], "Checking.")
+    assert llm.select_tool(messages=_messages("hello"), tools=[WEATHER]) == ([], "hello")
+
+    # Unscripted structured outputs are generated from the schema.
+    plan = await llm.astructured_output(messages=_messages("plan"), constraint=PydanticModel(model=Plan))
+    assert plan == Plan(thought="mock", steps=[Step(tool="mock", count=0)], done=True)
+    assert llm.structured_output(messages=_messages("pick"), constraint=Choice(choices=["a", "b"])) == "a"
+    assert example_from_schema({"type": "object", "properties": {"n": {"type": ["null", "integer"], "minimum": 3}}}) == {"n": 3}
+
+
+def test_streams_are_paced_by_the_token_rate():
+    llm = MockLlm(latency=LatencyModel(mean=0.05, tokens_per_second=100))
+    start = time.perf_counter()
+    arrivals = []
+    for chunk in llm.stream(messages=_messages("one two three four five")):
+        arrivals.append((chunk.delta, time.perf_counter() - start))
+    assert "".join(delta for delta, _ in arrivals) == "one two three four five"
+    assert len(arrivals) == 5
+    assert 0.05 <= arrivals[0][1] < arrivals[-1][1]
+    assert arrivals[-1][1] >= 0.05 + 4 * 0.01
+
+    usage = llm.chat(messages=_messages("one two")).usage
+    assert (usage.prompt_tokens, usage.completion_tokens) == (7, 2)
+
+
+def test_latency_and_failures_are_reproducible():
+    def draw(seed: int):
+        llm = MockLlm(
+            latency=LatencyModel(distribution="lognormal", mean=1.0, stddev=0.5),
+            failures=FailureInjection(error_rate=0.2, rate_limit_rate=0.2, retry_after=1.0),
+            seed=seed,
+        )
+        outcomes = []
+        for _ in range(200):
+            try:
+                outcomes.append(round(llm.plan_delays("text")[0], 6))
+            except MockLlmError as e:
+                outcomes.append(e.status_code)
+        return outcomes
+
+    outcomes = draw(seed=7)
+    assert outcomes == draw(seed=7)
+    assert outcomes != draw(seed=8)
+    assert 20 < outcomes.count(429) < 60 and 20 < outcomes.count(500) < 60
+    delays = [outcome for outcome in outcomes if isinstance(outcome, float)]
+    assert 0.8 < sum(delays) / len(delays) < 1.2
+
+    assert is_recoverable_exception(MockLlmError("rate limited", status_code=429))
+
+
+@pytest.mark.asyncio
+async def test_server_is_compatible_with_openai_clients():
+    from openai import OpenAI, RateLimitError
+    from bridgic.llms.openai_like import OpenAILikeLlm
+
+    llm = MockLlm(rules=[MockRule(pattern="weather", response=MockResponse(tool_calls=[WEATHER_CALL]))])
+    with MockServer(llm) as server:
+        client = OpenAILikeLlm(api_base=server.api_base, api_key="mock")
+        response = await client.achat(messages=_messages("hello there"), model="mock")
+        assert response.message.content == "hello there"
+        assert response.usage.completion_tokens == 2
+
+        chunks = [chunk.delta async for chunk in client.astream(messages=_messages("hello there"), model="mock")]
+        assert "".join(chunks) == "hello there"
+
+        openai_client = OpenAI(base_url=server.api_base, api_key="mock", max_retries=0)
+        completion = openai_client.chat.completions.create(
+            model="mock",
+            messages=[{"role": "user", "content": "what is the weather?"}],
+            tools=[{"type": "function", "function": WEATHER.model_dump()}],
+        )
+        assert completion.choices[0].message.tool_calls[0].function.name == "get_weather"
+
+        completion = openai_client.chat.completions.create(
+            model="mock",
+            messages=[{"role": "user", "content": "plan"}],
+            response_format={"type": "json_schema", "json_schema": {"name": "Plan", "schema": Plan.model_json_schema()}},
+        )
+        assert Plan.model_validate_json(completion.choices[0].message.content).done
+
+        llm.failures = FailureInjection(rate_limit_rate=1.0, retry_after=2.0)
+        with pytest.raises(RateLimitError) as error:
+            openai_client.chat.completions.create(model="mock", messages=[{"role": "user", "content": "hello"}])
+        assert error.value.response.headers["retry-after"] == "2.0"
@@ -19,6 +19,18 @@ pip install bridgic-llms-openai-like
 
 from importlib.metadata import version
 from ._openai_like_llm import OpenAILikeConfiguration, OpenAILikeLlm
+from ._adaptive_concurrency import AdaptiveConcurrencyConfig, AdaptiveConcurrencyLimiter
+from ._tool_call_stream import ToolCallStream
+from ._batch_llm import BatchLlm, BatchRetrievalError
 
 __version__ = version("bridgic-llms-openai-like")
-__all__ = ["OpenAILikeConfiguration", "OpenAILikeLlm", "__version__"]
\ No newline at end of file
+__all__ = [
+    "OpenAILikeConfiguration",
+    "OpenAILikeLlm",
+    "AdaptiveConcurrencyConfig",
+    "AdaptiveConcurrencyLimiter",
+    "ToolCallStream",
+    "BatchLlm",
+    "BatchRetrievalError",
+    "__version__",
+]
\ No newline at end of file
@@ -0,0 +1,287 @@
+import asyncio
+import threading
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, ClassVar, Deque, Dict, Iterator, Optional
+from pydantic import BaseModel, Field
+
+
+class AdaptiveConcurrencyConfig(BaseModel):
+    """
+    Configuration of the adaptive concurrency control of the requests to a self-hosted server.
+
+    The allowed number of in-flight requests is adjusted with AIMD (additive increase,
+    multiplicative decrease): it grows by about `additive_increase` per round of requests
+    while the latency stays close to the lowest latency observed, and it is multiplied by
+    `decrease_ratio` when the latency rises above `latency_tolerance` times that baseline
+    or when the server reports to be overloaded.
+    """
+    initial_limit: int = Field(default=8, ge=1)
+    """The allowed number of in-flight requests at start."""
+    min_limit: int = Field(default=1, ge=1)
+    """The lowest allowed number of in-flight requests."""
+    max_limit: int = Field(default=256, ge=1)
+    """The highest allowed number of in-flight requests."""
+    additive_increase: float = Field(default=1.0, gt=0.0)
+    """The growth of the limit per round (a limit's worth) of fast successful requests."""
+    decrease_ratio: float = Field(default=0.7, gt=0.0, lt=1.0)
+    """The factor applied to the limit when the server is congested."""
+    latency_tolerance: float = Field(default=2.0, gt=1.0)
+    """The ratio to the baseline latency from which the server is considered congested."""
+    latency_smoothing: float = Field(default=0.2, gt=0.0, le=1.0)
+    """The weight of the newest sample in the moving average of the latency."""
+    baseline_drift: float = Field(default=0.001, ge=0.0)
+    """The relative growth of the baseline latency per sample, which forgets stale baselines."""
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(
+        self,
+        event: Optional[threading.Event] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        future: Optional["asyncio.Future[None]"] = None,
+    ):
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    A limiter of the in-flight requests to a server, whose limit adapts to the latency and the
+    overload errors of the server, so that the requests are kept near the concurrency where the
+    throughput of the server peaks rather than piling up in its queue.
+
+    Requests beyond the limit wait in FIFO order, both in threads (`slot()`) and in event loops
+    (`aslot()`). The limiters are shared by all the LLM instances of the same server, see
+    `AdaptiveConcurrencyLimiter.shared()`.
+
+    Parameters
+    ----------
+    config : AdaptiveConcurrencyConfig
+        The configuration of the limiter.
+    """
+
+    _registry: ClassVar[Dict[Optional[str], "AdaptiveConcurrencyLimiter"]] = {}
+    _registry_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    _config: AdaptiveConcurrencyConfig
+    _limit: float
+    _inflight: int
+    _waiters: Deque[_Waiter]
+    _latency: Optional[float]
+    _baseline: Optional[float]
+    _decreases: int
+    _overloads: int
+    _lock: threading.Lock
+
+    def __init__(self, config: AdaptiveConcurrencyConfig):
+        self._config = config
+        self._limit = float(min(max(config.initial_limit, config.min_limit), config.max_limit))
+        self._inflight = 0
+        self._waiters = deque()
+        self._latency = None
+        self._baseline = None
+        self._decreases = 0
+        self._overloads = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, endpoint: Optional[str], config: AdaptiveConcurrencyConfig) -> "AdaptiveConcurrencyLimiter":
+        """
+        Get the limiter shared by all the callers of a server.
+
+        Parameters
+        ----------
+        endpoint : Optional[str]
+            The base URL of the server.
+        config : AdaptiveConcurrencyConfig
+            The configuration. If the shared limiter was created with a different configuration,
+            it is replaced with a new one.
+
+        Returns
+        -------
+        AdaptiveConcurrencyLimiter
+            The shared limiter.
+        """
+        with cls._registry_lock:
+            limiter = cls._registry.get(endpoint)
+            if limiter is None or limiter._config != config:
+                limiter = cls._registry[endpoint] = cls(config)
+            return limiter
+
+    @property
+    def limit(self) -> int:
+        """The current allowed number of in-flight requests."""
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        """The current number of in-flight requests."""
+        return self._inflight
+
+    @property
+    def waiting(self) -> int:
+        """The current number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Export the current state of the limiter.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The `limit`, `inflight` and `waiting` gauges, the smoothed `latency` and its
+            `baseline` (in seconds), and the `decreases` and `overloads` counters.
+        """
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "inflight": self._inflight,
+                "waiting": len(self._waiters),
+                "latency": self._latency,
+                "baseline": self._baseline,
+                "decreases": self._decreases,
+                "overloads": self._overloads,
+            }
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold a slot of in-flight request (blocking until one is available) for the duration of
+        the block, and feed the latency or the error of the request to the limiter.
+        """
+        self._acquire()
+        start_time = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self._release(time.perf_counter() - start_time, e)
+            raise
+        self._release(time.perf_counter() - start_time, None)
+
+    @asynccontextmanager
+    async def aslot(self, observe_cancellation: bool = False) -> AsyncIterator[None]:
+        """
+        Hold a slot of in-flight request (waiting asynchronously until one is available) for the
+        duration of the block, and feed the latency or the error of the request to the limiter.
+
+        Parameters
+        ----------
+        observe_cancellation : bool, default=False
+            Whether to feed the time spent until the request is cancelled as its latency, e.g.
+            for a slow request cancelled because its hedge finished first.
+        """
+        await self._aacquire()
+        start_time = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError as e:
+            self._release(time.perf_counter() - start_time, None if observe_cancellation else e)
+            raise
+        except BaseException as e:
+            self._release(time.perf_counter() - start_time, e)
+            raise
+        self._release(time.perf_counter() - start_time, None)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if not self._waiters and self._inflight < int(self._limit):
+                self._inflight += 1
+                return
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def _aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self._inflight < int(self._limit):
+                self._inflight += 1
+                return
+            waiter = _Waiter(loop=loop, future=loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    # The slot was handed over just before the cancellation.
+                    self._inflight -= 1
+                    self._dispatch()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def _release(self, latency: float, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._inflight -= 1
+            if error is None:
+                self._on_success(latency)
+            elif is_overload_error(error):
+                self._overloads += 1
+                self._decrease()
+            self._dispatch()
+
+    def _on_success(self, latency: float) -> None:
+        config = self._config
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline = min(latency, self._baseline * (1.0 + config.baseline_drift))
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += config.latency_smoothing * (latency - self._latency)
+
+        if self._latency > self._baseline * config.latency_tolerance:
+            self._decrease()
+        else:
+            self._limit = min(float(config.max_limit), self._limit + config.additive_increase / self._limit)
+
+    def _decrease(self) -> None:
+        self._limit = max(float(self._config.min_limit), self._limit * self._config.decrease_ratio)
+        self._decreases += 1
+        # Restart the moving average, so that one congestion is only reacted to once.
+        self._latency = None
+
+    def _dispatch(self) -> None:
+        # Hand the available slots over to the waiters in FIFO order. Must be called with the lock held.
+        while self._waiters and self._inflight < int(self._limit):
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self._inflight += 1
+            if waiter.event is not None:
+                waiter.event.set()
+            else:
+                waiter.loop.call_soon_threadsafe(self._resolve, waiter)
+
+    def _resolve(self, waiter: _Waiter) -> None:
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Tell whether an error of a request means that the server is overloaded: a timeout, or a
+    `429 Too Many Requests` / `503 Service Unavailable` response.
+    """
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code in (429, 503):
+        return True
+    return "timeout" in type(error).__name__.lower()
+
+
+@asynccontextmanager
+async def _async_null_slot() -> AsyncIterator[None]:
+    yield
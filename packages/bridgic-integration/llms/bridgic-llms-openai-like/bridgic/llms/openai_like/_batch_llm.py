@@ -0,0 +1,341 @@
+import asyncio
+import json
+import uuid
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+from openai.types.chat import ChatCompletion
+
+from bridgic.core.model import BaseLlm, ModelRetryLimitError, ModelUnrecoverableError, RetryPolicyConfig, retryable_model_call
+from bridgic.core.model.protocols import Constraint, StructuredOutput
+from bridgic.core.model.types import *
+from bridgic.core.utils._collection import validate_required_params
+
+
+_BATCH_ENDPOINT = "/v1/chat/completions"
+_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# The transient failures of the status checks and of the downloads of the results of a batch,
+# which may run for hours, are retried with a longer backoff than the one of the SDK.
+_POLL_RETRY_POLICY = RetryPolicyConfig(max_attempts=5, base_delay=1.0, max_delay=30.0)
+
+
+class BatchRetrievalError(RuntimeError):
+    """
+    Raised when the status or the results of a submitted batch cannot be retrieved. The batch
+    may still be processed by the provider: its results can be recovered with `batch_id`.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        batch_id: str,
+        original_exception: Optional[Exception] = None,
+    ):
+        super().__init__(message)
+        self.batch_id = batch_id
+        self.original_exception = original_exception
+
+
+class _BatchRequest:
+    __slots__ = ("custom_id", "body", "future")
+
+    def __init__(self, body: Dict[str, Any], future: "asyncio.Future[Dict[str, Any]]"):
+        self.custom_id = f"request-{uuid.uuid4().hex}"
+        self.body = body
+        self.future = future
+
+
+class BatchLlm(BaseLlm, StructuredOutput):
+    """
+    A LLM that sends the `achat` and `astructured_output` requests of an `OpenAILikeLlm` or an
+    `OpenAILlm` through the batch API of the provider, which is cheaper than the real-time API
+    in exchange for a completion within hours rather than seconds. It suits the offline
+    workloads of many independent requests, such as evaluation sweeps or bulk classification,
+    e.g. by running many automas that use it concurrently.
+
+    The requests are accumulated and submitted as a JSONL batch file when `max_batch_size`
+    requests are pending or `max_delay` seconds after the first one. The batch is polled
+    every `poll_interval` seconds until it ends, and each caller gets the result of its own
+    request. The transient failures of the status checks are retried with backoff; if the batch
+    still cannot be retrieved, its callers get a `BatchRetrievalError` carrying its `batch_id`.
+    The other calls (synchronous calls and streams) are sent to the real-time API of the
+    wrapped LLM.
+
+    Parameters
+    ----------
+    llm : BaseLlm
+        The wrapped `OpenAILikeLlm` or `OpenAILlm`, whose `build_request_parameters`,
+        `parse_structured_output` and asynchronous client are used to build and submit the
+        requests and to parse their results.
+    max_batch_size : int, default=1000
+        The number of requests after which a batch is submitted.
+    max_delay : float, default=5.0
+        The number of seconds a request waits for other requests before its batch is submitted.
+    poll_interval : float, default=30.0
+        The number of seconds between two checks of the status of a batch.
+    completion_window : str, default="24h"
+        The time frame within which the batch must be processed.
+
+    Examples
+    --------
+    ```python
+    llm = BatchLlm(OpenAILlm(api_key=api_key, configuration=OpenAIConfiguration(model="gpt-4o-mini")))
+    answers = await asyncio.gather(*[
+        llm.astructured_output(messages=messages, constraint=PydanticModel(model=Label))
+        for messages in dataset
+    ])
+    ```
+    """
+
+    _llm: BaseLlm
+    _max_batch_size: int
+    _max_delay: float
+    _poll_interval: float
+    _completion_window: str
+    _pending: List[_BatchRequest]
+    _flush_handle: Optional[asyncio.TimerHandle]
+    _batch_tasks: Set["asyncio.Task[None]"]
+    _submitted_batches: int
+    _submitted_requests: int
+
+    def __init__(
+        self,
+        llm: BaseLlm,
+        max_batch_size: int = 1000,
+        max_delay: float = 5.0,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("The maximum batch size must be at least 1.")
+        self._llm = llm
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._poll_interval = poll_interval
+        self._completion_window = completion_window
+        self._pending = []
+        self._flush_handle = None
+        self._batch_tasks = set()
+        self._submitted_batches = 0
+        self._submitted_requests = 0
+
+    @property
+    def llm(self) -> BaseLlm:
+        """The wrapped LLM instance."""
+        return self._llm
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Export the current state of the batching.
+
+        Returns
+        -------
+        Dict[str, int]
+            The number of `pending` requests not submitted yet, of `running_batches`, and of
+            `submitted_batches` and `submitted_requests` so far.
+        """
+        return {
+            "pending": len(self._pending),
+            "running_batches": len(self._batch_tasks),
+            "submitted_batches": self._submitted_batches,
+            "submitted_requests": self._submitted_requests,
+        }
+
+    def chat(self, messages: List[Message], **kwargs) -> Response:
+        return self._llm.chat(messages=messages, **kwargs)
+
+    def stream(self, messages: List[Message], **kwargs) -> StreamResponse:
+        return self._llm.stream(messages=messages, **kwargs)
+
+    def astream(self, messages: List[Message], **kwargs) -> AsyncStreamResponse:
+        return self._llm.astream(messages=messages, **kwargs)
+
+    def structured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        return self._llm.structured_output(messages=messages, constraint=constraint, **kwargs)
+
+    async def achat(self, messages: List[Message], **kwargs) -> Response:
+        """
+        Send a chat completion request in the next batch.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            Conversation messages.
+        **kwargs
+            The parameters of the request, as for `achat` of the wrapped LLM.
+
+        Returns
+        -------
+        Response
+            The response of the request, once its batch is completed.
+        """
+        params = self._llm.build_request_parameters(messages=messages, **kwargs)
+        body = await self._submit(params)
+        completion = ChatCompletion.model_validate(body)
+        return Response(
+            message=Message.from_text(completion.choices[0].message.content or "", role=Role.AI),
+            usage=_extract_usage(completion),
+            raw=completion,
+        )
+
+    async def astructured_output(self, messages: List[Message], constraint: Constraint, **kwargs) -> Any:
+        """
+        Send a structured output request in the next batch.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            Conversation messages.
+        constraint : Constraint
+            The format of the output, a `PydanticModel` or a `JsonSchema`.
+        **kwargs
+            The parameters of the request, as for `achat` of the wrapped LLM.
+
+        Returns
+        -------
+        Any
+            An instance of the model of a `PydanticModel` constraint, or the parsed JSON value
+            of a `JsonSchema` constraint, once its batch is completed.
+        """
+        params = self._llm.build_request_parameters(messages=messages, constraint=constraint, **kwargs)
+        body = await self._submit(params)
+        content = body["choices"][0]["message"].get("content") or ""
+        return self._llm.parse_structured_output(content, constraint)
+
+    def flush(self) -> None:
+        """Submit the pending requests now, without waiting for `max_delay`."""
+        self._flush()
+
+    async def _submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        validate_required_params(params, ["messages", "model"])
+        body = dict(params)
+        # The extra body of the SDK is merged into the request body.
+        body.update(body.pop("extra_body", None) or {})
+
+        loop = asyncio.get_running_loop()
+        request = _BatchRequest(body, loop.create_future())
+        self._pending.append(request)
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._max_delay, self._flush)
+        return await request.future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        requests = [request for request in self._pending if not request.future.done()]
+        self._pending = []
+        if not requests:
+            return
+        task = asyncio.ensure_future(self._run_batch(requests))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, requests: List[_BatchRequest]) -> None:
+        client = self._llm.async_client
+        try:
+            lines = [
+                json.dumps({"custom_id": request.custom_id, "method": "POST", "url": _BATCH_ENDPOINT, "body": request.body})
+                for request in requests
+            ]
+            input_file = await client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl"),
+                purpose="batch",
+            )
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=_BATCH_ENDPOINT,
+                completion_window=self._completion_window,
+            )
+            self._submitted_batches += 1
+            self._submitted_requests += len(requests)
+            try:
+                while batch.status not in _FINAL_STATUSES:
+                    await asyncio.sleep(self._poll_interval)
+                    batch = await self._retrieve_batch(batch.id)
+
+                results: Dict[str, Dict[str, Any]] = {}
+                for file_id in (batch.output_file_id, batch.error_file_id):
+                    if not file_id:
+                        continue
+                    for line in (await self._download_file(file_id)).splitlines():
+                        if line.strip():
+                            result = json.loads(line)
+                            results[result["custom_id"]] = result
+            except Exception as e:
+                raise BatchRetrievalError(
+                    f"The batch '{batch.id}' could not be retrieved: {e}",
+                    batch_id=batch.id,
+                    original_exception=e,
+                ) from e
+
+            for request in requests:
+                if request.future.done():
+                    continue
+                body, error = _resolve_result(results.get(request.custom_id), batch.id, batch.status)
+                if error is None:
+                    request.future.set_result(body)
+                else:
+                    request.future.set_exception(error)
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        except BaseException:
+            # E.g. the batch task is cancelled when its loop shuts down, and the callers would
+            # otherwise wait for their results forever.
+            for request in requests:
+                request.future.cancel()
+            raise
+
+    @retryable_model_call(_POLL_RETRY_POLICY)
+    async def _retrieve_batch(self, batch_id: str) -> Any:
+        return await self._llm.async_client.batches.retrieve(batch_id)
+
+    @retryable_model_call(_POLL_RETRY_POLICY)
+    async def _download_file(self, file_id: str) -> str:
+        content = await self._llm.async_client.files.content(file_id)
+        return content.text
+
+    def dump_to_dict(self) -> Dict[str, Any]:
+        return {
+            "llm": self._llm,
+            "max_batch_size": self._max_batch_size,
+            "max_delay": self._max_delay,
+            "poll_interval": self._poll_interval,
+            "completion_window": self._completion_window,
+        }
+
+    def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__init__(**state_dict)
+
+
+def _resolve_result(
+    result: Optional[Dict[str, Any]],
+    batch_id: str,
+    batch_status: str,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+    if result is None:
+        if batch_status == "completed":
+            return None, ModelUnrecoverableError(f"The batch '{batch_id}' has no result for the request.", operation="batch")
+        # The request was not processed, e.g. the batch expired; it may be sent again.
+        return None, ModelRetryLimitError(f"The batch '{batch_id}' ended with status '{batch_status}'.", operation="batch")
+
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code", 200) >= 400:
+        error = result.get("error") or response.get("body", {}).get("error")
+        return None, ModelUnrecoverableError(f"The request failed in the batch '{batch_id}': {error}", operation="batch")
+    return response["body"], None
+
+
+def _extract_usage(completion: ChatCompletion) -> Optional[TokenUsage]:
+    if completion.usage is None:
+        return None
+    return TokenUsage(
+        model=completion.model,
+        prompt_tokens=completion.usage.prompt_tokens,
+        completion_tokens=completion.usage.completion_tokens,
+        total_tokens=completion.usage.total_tokens,
+    )
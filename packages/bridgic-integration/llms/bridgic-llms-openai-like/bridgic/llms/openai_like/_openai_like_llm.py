@@ -2,7 +2,8 @@ import httpx
 import warnings
 import json
 
-from typing import List, Dict, Any, Optional
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Union, Callable, Awaitable, ContextManager, AsyncContextManager
 from typing_extensions import override
 from openai import OpenAI, AsyncOpenAI
 from openai.types.chat.chat_completion_message import ChatCompletionMessage
@@ -14,9 +15,16 @@ from openai.types.chat.chat_completion_tool_message_param import ChatCompletionT
 from openai.types.chat.chat_completion_message_function_tool_call_param import ChatCompletionMessageFunctionToolCallParam
 from pydantic import BaseModel
 
-from bridgic.core.model import BaseLlm, RetryPolicyConfig, retryable_model_call
+from bridgic.core.model import BaseLlm, CircuitBreakerConfig, ConversionMemo, ConstraintCache, HedgingConfig, LlmMetricsRegistry, RateLimitConfig, RequestHedger, RetryPolicyConfig, StructuredOutputStream, message_fingerprint, retryable_model_call
 from bridgic.core.model.types import *
+from bridgic.core.model.protocols import Constraint, JsonSchema, PydanticModel
+from bridgic.core.config import HttpClientConfig, create_http_client_from_config, get_shared_http_client
 from bridgic.core.utils._collection import filter_dict, merge_dict, validate_required_params
+from bridgic.llms.openai_like._adaptive_concurrency import (
+    AdaptiveConcurrencyConfig,
+    AdaptiveConcurrencyLimiter,
+    _async_null_slot,
+)
 
 class OpenAILikeConfiguration(BaseModel):
     """
@@ -55,9 +63,31 @@ class OpenAILikeLlm(BaseLlm):
     timeout: Optional[float]
         The timeout in seconds. If None, no timeout is applied.
     http_client : Optional[httpx.Client]
-        Custom synchronous HTTP client for requests. If None, creates a default client.
+        Custom synchronous HTTP client for requests. If None, uses a client created from
+        `http_client_config`.
     http_async_client : Optional[httpx.AsyncClient]
-        Custom asynchronous HTTP client for requests. If None, creates a default client.
+        Custom asynchronous HTTP client for requests. If None, uses a client created from
+        `http_client_config`.
+    http_client_config : Optional[HttpClientConfig]
+        The configuration (connection limits, keepalive, HTTP/2, ...) of the HTTP clients of the
+        instances that do not pass their own clients, kept on serialization. With `"share": True`,
+        the clients are shared process-wide by the instances of `api_base` with the same
+        configuration, so that they reuse warm connections. If None, the default clients of
+        the OpenAI SDK are used.
+    rate_limit : Optional[RateLimitConfig]
+        The client-side rate limits of the requests, shared by all the instances calling the
+        same model of the same endpoint. If None, requests are not limited.
+    circuit_breaker : Optional[CircuitBreakerConfig]
+        The circuit breaker of the requests, shared by all the instances calling the same
+        endpoint, which fails the requests fast while the endpoint is down. If None, requests
+        are always sent.
+    adaptive_concurrency : Optional[AdaptiveConcurrencyConfig]
+        The adaptive control of the number of in-flight requests, shared by all the instances
+        calling the same endpoint. Mostly useful for self-hosted servers. If None, the number
+        of in-flight requests is not limited.
+    hedging : Optional[HedgingConfig]
+        The hedging policy of `achat`, which sends a second identical request when the first
+        one is slow, to cut tail latency. If None, requests are not hedged.
     """
 
     api_base: str
@@ -66,9 +96,19 @@ class OpenAILikeLlm(BaseLlm):
     timeout: float
     http_client: httpx.Client
     http_async_client: httpx.AsyncClient
+    http_client_config: Optional[HttpClientConfig]
+    rate_limit: Optional[RateLimitConfig]
+    circuit_breaker: Optional[CircuitBreakerConfig]
+    adaptive_concurrency: Optional[AdaptiveConcurrencyConfig]
+    hedging: Optional[HedgingConfig]
 
     client: OpenAI
     async_client: AsyncOpenAI
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+    hedger: Optional[RequestHedger]
+    _message_memo: ConversionMemo[ChatCompletionMessageParam]
+    _strict_message_memo: ConversionMemo[ChatCompletionMessageParam]
+    _constraint_cache: ConstraintCache[Any]
 
     def __init__(
         self,
@@ -78,6 +118,11 @@ class OpenAILikeLlm(BaseLlm):
         timeout: Optional[float] = None,
         http_client: Optional[httpx.Client] = None,
         http_async_client: Optional[httpx.AsyncClient] = None,
+        http_client_config: Optional[HttpClientConfig] = None,
+        rate_limit: Optional[RateLimitConfig] = None,
+        circuit_breaker: Optional[CircuitBreakerConfig] = None,
+        adaptive_concurrency: Optional[AdaptiveConcurrencyConfig] = None,
+        hedging: Optional[HedgingConfig] = None,
     ):
         # Record for serialization / deserialization.
         self.api_base = api_base
@@ -86,10 +131,17 @@ class OpenAILikeLlm(BaseLlm):
         self.timeout = timeout
         self.http_client = http_client
         self.http_async_client = http_async_client
+        self.http_client_config = http_client_config
+        self.rate_limit = rate_limit
+        self.circuit_breaker = circuit_breaker
+        self.adaptive_concurrency = adaptive_concurrency
+        self.hedging = hedging
 
         # Initialize clients.
-        self.client = OpenAI(base_url=api_base, api_key=api_key, timeout=timeout, http_client=http_client)
-        self.async_client = AsyncOpenAI(base_url=api_base, api_key=api_key, timeout=timeout, http_client=http_async_client)
+        self._create_clients()
+        self.concurrency_limiter = self._create_concurrency_limiter()
+        self.hedger = RequestHedger(hedging) if hedging else None
+        self._create_conversion_memos()
 
     @retryable_model_call(RetryPolicyConfig())
     def chat(
@@ -155,7 +207,9 @@ class OpenAILikeLlm(BaseLlm):
         )
         validate_required_params(params, ["messages", "model"])
         model_name = params["model"]
-        response = self.client.chat.completions.create(**params)
+        with self._request_slot(), LlmMetricsRegistry.read().track(model_name, "chat") as call:
+            response = self.client.chat.completions.create(**params)
+            call.usage(self._extract_usage(response, model_name))
         openai_message: ChatCompletionMessage = response.choices[0].message
         text: str = openai_message.content if openai_message.content else ""
 
@@ -218,11 +272,16 @@ class OpenAILikeLlm(BaseLlm):
             **kwargs,
         )
         validate_required_params(params, ["messages", "model", "stream"])
-        response = self.client.chat.completions.create(**params)
-        for chunk in response:
-            delta_content = chunk.choices[0].delta.content
-            delta_content = delta_content if delta_content else ""
-            yield MessageChunk(delta=delta_content, raw=chunk)
+        model_name = params["model"]
+        with self._request_slot(), LlmMetricsRegistry.read().track(model_name, "stream") as call:
+            response = self.client.chat.completions.create(**params)
+            for chunk in response:
+                call.usage(self._extract_usage(chunk, model_name))
+                delta_content = chunk.choices[0].delta.content
+                if delta_content:
+                    call.first_token()
+                delta_content = delta_content if delta_content else ""
+                yield MessageChunk(delta=delta_content, raw=chunk)
 
     @retryable_model_call(RetryPolicyConfig())
     async def achat(
@@ -271,7 +330,13 @@ class OpenAILikeLlm(BaseLlm):
         )
         validate_required_params(params, ["messages", "model"])
         model_name = params["model"]
-        response = await self.async_client.chat.completions.create(**params)
+        with LlmMetricsRegistry.read().track(model_name, "achat") as call:
+            response = await self._ahedged(
+                lambda: self.async_client.chat.completions.create(**params),
+                model_name,
+                "achat",
+            )
+            call.usage(self._extract_usage(response, model_name))
         openai_message: ChatCompletionMessage = response.choices[0].message
         text: str = openai_message.content if openai_message.content else ""
 
@@ -334,11 +399,143 @@ class OpenAILikeLlm(BaseLlm):
             **kwargs,
         )
         validate_required_params(params, ["messages", "model", "stream"])
-        response = await self.async_client.chat.completions.create(**params)
-        async for chunk in response:
-            delta_content = chunk.choices[0].delta.content
-            delta_content = delta_content if delta_content else ""
-            yield MessageChunk(delta=delta_content, raw=chunk)
+        model_name = params["model"]
+        async with self._arequest_slot():
+            with LlmMetricsRegistry.read().track(model_name, "astream") as call:
+                response = await self.async_client.chat.completions.create(**params)
+                async for chunk in response:
+                    call.usage(self._extract_usage(chunk, model_name))
+                    delta_content = chunk.choices[0].delta.content
+                    if delta_content:
+                        call.first_token()
+                    delta_content = delta_content if delta_content else ""
+                    yield MessageChunk(delta=delta_content, raw=chunk)
+
+    async def astream_structured_output(
+        self,
+        messages: List[Message],
+        constraint: Constraint,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        presence_penalty: Optional[float] = None,
+        frequency_penalty: Optional[float] = None,
+        extra_body: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> AsyncStructuredStreamResponse:
+        """
+        Stream a JSON structured output, yielding its parts as soon as they are generated.
+
+        The output is constrained by the `response_format` of the OpenAI API, and its text is
+        parsed incrementally as it is streamed: each element of an array is yielded as soon
+        as it is complete, so that it can be acted upon while the rest is being generated.
+
+        Parameters
+        ----------
+        messages : list[Message]
+            Conversation messages.
+        constraint : Constraint
+            The format of the output, a `PydanticModel` or a `JsonSchema`.
+        model : str, optional
+            Model ID to use. Required unless provided in `configuration.model`.
+        temperature, top_p, presence_penalty, frequency_penalty, extra_body
+            See `chat` for details.
+        **kwargs
+            Additional provider-specific arguments.
+
+        Yields
+        ------
+        StructuredOutputChunk
+            Each completed array element, with its path in the output and its value
+            validated against the item type declared by a `PydanticModel`, then a last chunk
+            with an empty path and the whole validated output.
+        """
+        stream = StructuredOutputStream(constraint)
+        async for chunk in self.astream(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            top_p=top_p,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+            **self._constrain_parameters(constraint, extra_body),
+            **kwargs,
+        ):
+            for output_chunk in stream.feed(chunk.delta):
+                yield output_chunk
+        yield stream.finish()
+
+    def build_request_parameters(
+        self,
+        messages: List[Message],
+        constraint: Optional[Constraint] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Build the parameters of a chat completion request without sending it, e.g. to send it
+        through the batch API.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            Conversation messages.
+        constraint : Optional[Constraint]
+            The format of the output, as for `astructured_output`. If None, the parameters are
+            the ones of `achat`.
+        **kwargs
+            The parameters of the request, as for `achat`.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The parameters of the request.
+        """
+        if constraint is not None:
+            kwargs.update(self._constrain_parameters(constraint, kwargs.pop("extra_body", None)))
+        return self._build_parameters(messages=messages, **kwargs)
+
+    def parse_structured_output(self, content: str, constraint: Constraint) -> Any:
+        """
+        Parse the content of a completion requested with the parameters of `build_request_parameters`
+        and a constraint.
+
+        Parameters
+        ----------
+        content : str
+            The content of the completion.
+        constraint : Constraint
+            The format of the output.
+
+        Returns
+        -------
+        Any
+            The output, as returned by `astructured_output`.
+        """
+        return self._constraint_cache.get(constraint).validate_json(content)
+
+    def _constrain_parameters(
+        self,
+        constraint: Constraint,
+        extra_body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """The request parameters constraining the output to a JSON constraint."""
+        if not isinstance(constraint, (PydanticModel, JsonSchema)):
+            raise ValueError(f"Unsupported constraint type '{constraint.constraint_type}'.")
+        return {
+            "extra_body": extra_body,
+            "response_format": self._constraint_cache.get(constraint).payload,
+        }
+
+    def _compile_constraint(self, constraint: Union[PydanticModel, JsonSchema]) -> Any:
+        """The request payload of a JSON constraint, computed once per constraint."""
+        if isinstance(constraint, PydanticModel):
+            schema, name = constraint.model.model_json_schema(), constraint.model.__name__
+        else:
+            schema, name = constraint.schema_dict, "schema"
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": schema},
+        }
 
     def _build_parameters(
         self,
@@ -373,7 +570,7 @@ class OpenAILikeLlm(BaseLlm):
         dict
             Final parameter dictionary for the OpenAI-compatible API.
         """
-        msgs: List[ChatCompletionMessageParam] = [self._convert_message(msg) for msg in messages]
+        msgs: List[ChatCompletionMessageParam] = self._message_memo.convert_all(messages)
         merge_params = merge_dict(self.configuration.model_dump(), {
             "messages": msgs,
             "model": model,
@@ -391,9 +588,9 @@ class OpenAILikeLlm(BaseLlm):
 
     def _convert_message(self, message: Message, strict: bool = False) -> ChatCompletionMessageParam:
         if strict:
-            return self._convert_message_strict(message)
+            return self._strict_message_memo(message)
         else:
-            return self._convert_message_normal(message)
+            return self._message_memo(message)
 
     def _convert_message_normal(self, message: Message) -> ChatCompletionMessageParam:
         content_list = []
@@ -497,6 +694,11 @@ class OpenAILikeLlm(BaseLlm):
             "api_key": self.api_key,
             "timeout": self.timeout,
             "configuration": self.configuration.model_dump(),
+            "http_client_config": self.http_client_config,
+            "rate_limit": self.rate_limit.model_dump() if self.rate_limit else None,
+            "circuit_breaker": self.circuit_breaker.model_dump() if self.circuit_breaker else None,
+            "adaptive_concurrency": self.adaptive_concurrency.model_dump() if self.adaptive_concurrency else None,
+            "hedging": self.hedging.model_dump() if self.hedging else None,
         }
         if self.http_client:
             warnings.warn(
@@ -516,19 +718,75 @@ class OpenAILikeLlm(BaseLlm):
         self.api_key = state_dict["api_key"]
         self.timeout = state_dict["timeout"]
         self.configuration = OpenAILikeConfiguration(**state_dict.get("configuration", {}))
+        rate_limit = state_dict.get("rate_limit")
+        self.rate_limit = RateLimitConfig(**rate_limit) if rate_limit else None
+        circuit_breaker = state_dict.get("circuit_breaker")
+        self.circuit_breaker = CircuitBreakerConfig(**circuit_breaker) if circuit_breaker else None
+        adaptive_concurrency = state_dict.get("adaptive_concurrency")
+        self.adaptive_concurrency = AdaptiveConcurrencyConfig(**adaptive_concurrency) if adaptive_concurrency else None
+        hedging = state_dict.get("hedging")
+        self.hedging = HedgingConfig(**hedging) if hedging else None
 
         self.http_client = None
         self.http_async_client = None
-
-        self.client = OpenAI(
-            base_url=self.api_base,
-            api_key=self.api_key,
-            timeout=self.timeout,
-            http_client=self.http_client,
-        )
-        self.async_client = AsyncOpenAI(
-            base_url=self.api_base,
-            api_key=self.api_key,
-            timeout=self.timeout,
-            http_client=self.http_async_client,
-        )
+        self.http_client_config = state_dict.get("http_client_config")
+
+        self._create_clients()
+        self.concurrency_limiter = self._create_concurrency_limiter()
+        self.hedger = RequestHedger(self.hedging) if self.hedging else None
+        self._create_conversion_memos()
+
+    def _create_clients(self) -> None:
+        http_client = self.http_client or self._create_http_client(is_async=False)
+        http_async_client = self.http_async_client or self._create_http_client(is_async=True)
+        self.client = OpenAI(base_url=self.api_base, api_key=self.api_key, timeout=self.timeout, http_client=http_client)
+        self.async_client = AsyncOpenAI(base_url=self.api_base, api_key=self.api_key, timeout=self.timeout, http_client=http_async_client)
+
+    def _create_http_client(self, is_async: bool) -> Optional[Union[httpx.Client, httpx.AsyncClient]]:
+        if self.http_client_config and self.http_client_config.get("share"):
+            # The instances of the same endpoint opted in to share warm connections.
+            return get_shared_http_client(self.api_base, self.http_client_config, is_async=is_async)
+        return create_http_client_from_config(self.http_client_config, is_async=is_async)
+
+    def _create_conversion_memos(self) -> None:
+        # The history is mostly unchanged between the calls of an agent loop.
+        self._message_memo = ConversionMemo(self._convert_message_normal, message_fingerprint)
+        self._strict_message_memo = ConversionMemo(self._convert_message_strict, message_fingerprint)
+        # So are the output models of the structured outputs, whose schemas are compiled once.
+        self._constraint_cache = ConstraintCache(self._compile_constraint)
+
+    def _create_concurrency_limiter(self) -> Optional[AdaptiveConcurrencyLimiter]:
+        if self.adaptive_concurrency is None:
+            return None
+        return AdaptiveConcurrencyLimiter.shared(self.api_base, self.adaptive_concurrency)
+
+    def _request_slot(self) -> ContextManager[None]:
+        # Hold a slot of the adaptive concurrency limiter (if any) during a request.
+        if self.concurrency_limiter is None:
+            return nullcontext()
+        return self.concurrency_limiter.slot()
+
+    def _arequest_slot(self, observe_cancellation: bool = False) -> AsyncContextManager[None]:
+        if self.concurrency_limiter is None:
+            return _async_null_slot()
+        return self.concurrency_limiter.aslot(observe_cancellation=observe_cancellation)
+
+    async def _ahedged(self, call: Callable[[], Awaitable[Any]], model: str, operation: str) -> Any:
+        # Send the request, hedged if a hedging policy is configured. Each attempt holds its own slot of
+        # the limiter, so that a hedge counts as an in-flight request and waits when the limit is reached.
+        if self.hedger is None:
+            async with self._arequest_slot():
+                return await call()
+
+        attempts = 0
+
+        async def attempt() -> Any:
+            nonlocal attempts
+            # The primary request is the first attempt. If it is cancelled because its hedge won, the
+            # time it has been in flight is still fed to the limiter, since it is the slow one.
+            is_primary = attempts == 0
+            attempts += 1
+            async with self._arequest_slot(observe_cancellation=is_primary):
+                return await call()
+
+        return await self.hedger.run(attempt, model, operation)
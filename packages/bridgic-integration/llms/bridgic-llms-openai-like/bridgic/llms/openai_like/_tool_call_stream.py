@@ -0,0 +1,87 @@
+import json
+
+from typing import Any, Dict, List, Optional
+
+from bridgic.core.model import IncrementalJsonParser
+from bridgic.core.model.types import ToolCall
+from bridgic.core.utils._tool_calling import generate_tool_id
+
+
+class _PendingToolCall:
+    __slots__ = ("name", "parser", "emitted")
+
+    def __init__(self):
+        self.name = ""
+        self.parser = IncrementalJsonParser()
+        self.emitted = False
+
+
+class ToolCallStream:
+    """
+    The assembly of the tool calls streamed by an OpenAI-compatible chat completion, which
+    reports each tool call as soon as its arguments are complete.
+
+    The fragments of the tool calls arrive as `delta.tool_calls` of the chunks, identified by
+    their `index`. The arguments of each call are parsed incrementally, so that a call is
+    complete as soon as its JSON object closes, without waiting for the following calls or
+    for the end of the stream.
+    """
+
+    _calls: Dict[int, _PendingToolCall]
+
+    def __init__(self):
+        self._calls = {}
+
+    def feed(self, delta_tool_calls: Optional[List[Any]]) -> List[ToolCall]:
+        """
+        Add the tool call fragments of a chunk.
+
+        Parameters
+        ----------
+        delta_tool_calls : Optional[List[Any]]
+            The `delta.tool_calls` of a chunk.
+
+        Returns
+        -------
+        List[ToolCall]
+            The tool calls completed by the fragments.
+        """
+        completed = []
+        for fragment in delta_tool_calls or []:
+            call = self._calls.get(fragment.index)
+            if call is None:
+                call = self._calls[fragment.index] = _PendingToolCall()
+            function = fragment.function
+            if function is None:
+                continue
+            if function.name:
+                call.name += function.name
+            if function.arguments and not call.emitted:
+                call.parser.feed(function.arguments)
+                if call.parser.done:
+                    completed.append(self._emit(call))
+        return completed
+
+    def finish(self) -> List[ToolCall]:
+        """
+        End the stream.
+
+        Returns
+        -------
+        List[ToolCall]
+            The tool calls not reported yet (e.g. without arguments), in order.
+        """
+        return [
+            self._emit(call)
+            for _, call in sorted(self._calls.items())
+            if not call.emitted
+        ]
+
+    def _emit(self, call: _PendingToolCall) -> ToolCall:
+        call.emitted = True
+        text = call.parser.text.strip()
+        return ToolCall(
+            id=generate_tool_id(),
+            name=call.name,
+            arguments=json.loads(text) if text else {},
+        )
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bridgic.core.model.types import Message, Role
+from bridgic.llms.openai_like import AdaptiveConcurrencyConfig, AdaptiveConcurrencyLimiter, OpenAILikeLlm
+
+
+class QueueingServer(ThreadingHTTPServer):
+    """
+    A fake OpenAI-compatible server that serves `capacity` requests at a time in `service_time`
+    seconds; the requests beyond its capacity wait in its queue.
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, capacity: int, service_time: float):
+        super().__init__(("127.0.0.1", 0), _QueueingHandler)
+        self.capacity = capacity
+        self.service_time = service_time
+        self.slots = threading.Semaphore(capacity)
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.peak_inflight = 0
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class _QueueingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server: QueueingServer = self.server
+        with server.lock:
+            server.inflight += 1
+            server.peak_inflight = max(server.peak_inflight, server.inflight)
+        try:
+            with server.slots:
+                time.sleep(server.service_time)
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+        body = json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "fake-model",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def queueing_server():
+    servers = []
+
+    def start(capacity: int, service_time: float) -> QueueingServer:
+        server = QueueingServer(capacity, service_time)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+async def _run_requests(llm: OpenAILikeLlm, count: int):
+    messages = [Message.from_text(text="hello", role=Role.USER)]
+    return await asyncio.gather(*[llm.achat(messages=messages, model="fake-model") for _ in range(count)])
+
+
+def _observe(limiter: AdaptiveConcurrencyLimiter, latency: float, count: int) -> None:
+    # Feed the latencies of successful requests to the limiter, one request at a time.
+    for _ in range(count):
+        limiter._acquire()
+        limiter._release(latency, None)
+
+
+def test_limit_grows_while_latency_is_flat():
+    limiter = AdaptiveConcurrencyLimiter(AdaptiveConcurrencyConfig(initial_limit=2, max_limit=16))
+    _observe(limiter, 0.01, 20)
+    assert 2 < limiter.limit < 16
+
+    # The limit grows by about one per round of requests, up to the maximum.
+    _observe(limiter, 0.01, 200)
+    assert limiter.limit == 16
+    assert limiter.snapshot()["decreases"] == 0
+
+
+def test_limit_shrinks_when_the_latency_rises():
+    limiter = AdaptiveConcurrencyLimiter(AdaptiveConcurrencyConfig(initial_limit=32, decrease_ratio=0.5))
+    _observe(limiter, 0.01, 5)
+    assert limiter.snapshot()["baseline"] == 0.01
+
+    # A latency twice the baseline is tolerated, a longer one cuts the limit.
+    _observe(limiter, 0.015, 5)
+    assert limiter.snapshot()["decreases"] == 0
+    _observe(limiter, 0.1, 1)
+    assert limiter.limit == 16
+    assert limiter.snapshot()["decreases"] == 1
+    # The moving average restarts, so each congested request cuts the limit again.
+    _observe(limiter, 0.1, 1)
+    assert limiter.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_requests_to_a_queueing_server_are_limited(queueing_server):
+    server = queueing_server(capacity=2, service_time=0.01)
+    llm = OpenAILikeLlm(
+        api_base=server.api_base,
+        api_key="test-key",
+        adaptive_concurrency=AdaptiveConcurrencyConfig(initial_limit=4, max_limit=8),
+    )
+
+    responses = await _run_requests(llm, 50)
+    assert all(response.message.content == "ok" for response in responses)
+    snapshot = llm.concurrency_limiter.snapshot()
+    assert snapshot["inflight"] == 0 and snapshot["waiting"] == 0
+    assert server.peak_inflight <= 8
+
+
+def test_limiter_is_shared_and_serialized(queueing_server):
+    config = AdaptiveConcurrencyConfig(initial_limit=4)
+    llm = OpenAILikeLlm(api_base="http://shared.test/v1", api_key="test-key", adaptive_concurrency=config)
+    other = OpenAILikeLlm(api_base="http://shared.test/v1", api_key="test-key", adaptive_concurrency=config)
+    assert llm.concurrency_limiter is other.concurrency_limiter
+
+    loaded = OpenAILikeLlm.__new__(OpenAILikeLlm)
+    loaded.load_from_dict(llm.dump_to_dict())
+    assert loaded.adaptive_concurrency == config
+    assert loaded.concurrency_limiter is llm.concurrency_limiter
+
+    assert OpenAILikeLlm(api_base="http://shared.test/v1", api_key="test-key").concurrency_limiter is None
+
+
+class OverloadedError(Exception):
+    status_code = 503
+
+
+def test_overload_errors_cut_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(AdaptiveConcurrencyConfig(initial_limit=10, decrease_ratio=0.5))
+    with pytest.raises(OverloadedError):
+        with limiter.slot():
+            raise OverloadedError()
+    assert limiter.limit == 5
+
+    # Other errors do not change the limit.
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError()
+    assert limiter.limit == 5
+    assert limiter.snapshot()["overloads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_order_and_can_be_cancelled():
+    limiter = AdaptiveConcurrencyLimiter(AdaptiveConcurrencyConfig(initial_limit=1, max_limit=1))
+    order = []
+    gate = asyncio.Event()
+
+    async def request(name: str):
+        async with limiter.aslot():
+            order.append(name)
+            await gate.wait()
+
+    first = asyncio.create_task(request("first"))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(request("cancelled"))
+    second = asyncio.create_task(request("second"))
+    await asyncio.sleep(0)
+    assert limiter.inflight == 1 and limiter.waiting == 2
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+
+    gate.set()
+    await asyncio.gather(first, second)
+    assert order == ["first", "second"]
+    assert limiter.inflight == 0
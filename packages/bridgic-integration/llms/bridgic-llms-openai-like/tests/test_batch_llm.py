@@ -0,0 +1,205 @@
+import asyncio
+import json
+import threading
+import pytest
+
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pydantic import BaseModel
+
+from bridgic.core.model import ModelUnrecoverableError
+from bridgic.core.model.protocols import PydanticModel
+from bridgic.core.model.types import Message, Role
+from bridgic.llms.openai_like import BatchLlm, BatchRetrievalError, OpenAILikeConfiguration, OpenAILikeLlm
+
+
+class Label(BaseModel):
+    label: str
+
+
+class BatchServer(ThreadingHTTPServer):
+    """
+    A fake server of the OpenAI files and batches APIs, which completes a batch on its first
+    status check. The completion of a request echoes its last message in upper case, and a
+    request whose last message is "fail" fails. The status checks answer with the status codes
+    of `retrieval_failures` first.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _BatchHandler)
+        self.files = {}
+        self.batches = {}
+        self.batch_sizes = []
+        self.retrieval_failures = []
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+    def add_file(self, content: str) -> dict:
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = content
+        return {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+            "filename": "batch.jsonl", "purpose": "batch", "status": "processed",
+        }
+
+    def complete(self, batch: dict) -> None:
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            body = request["body"]
+            text = body["messages"][-1]["content"]
+            if text == "fail":
+                errors.append({"id": "r", "custom_id": request["custom_id"], "response": {
+                    "status_code": 400, "body": {"error": {"message": "invalid request"}},
+                }, "error": None})
+                continue
+            content = text.upper()
+            if "response_format" in body:
+                content = json.dumps({"label": content})
+            outputs.append({"id": "r", "custom_id": request["custom_id"], "response": {"status_code": 200, "body": {
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }}, "error": None})
+        batch["status"] = "completed"
+        batch["output_file_id"] = self.add_file("\n".join(json.dumps(output) for output in outputs))["id"]
+        if errors:
+            batch["error_file_id"] = self.add_file("\n".join(json.dumps(error) for error in errors))["id"]
+
+
+class _BatchHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server: BatchServer = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/v1/files":
+            form = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            content = next(part for part in form.iter_parts() if part.get_param("name", header="content-disposition") == "file")
+            self._respond(server.add_file(content.get_payload(decode=True).decode()))
+        elif self.path == "/v1/batches":
+            request = json.loads(body)
+            batch = {
+                "id": f"batch-{len(server.batches)}", "object": "batch", "status": "in_progress",
+                "endpoint": request["endpoint"], "input_file_id": request["input_file_id"],
+                "completion_window": request["completion_window"], "created_at": 0,
+            }
+            server.batches[batch["id"]] = batch
+            server.batch_sizes.append(len(server.files[request["input_file_id"]].splitlines()))
+            self._respond(batch)
+
+    def do_GET(self):
+        server: BatchServer = self.server
+        if self.path.startswith("/v1/batches/") and server.retrieval_failures:
+            self._respond({"error": {"message": "unavailable"}}, server.retrieval_failures.pop(0))
+        elif self.path.startswith("/v1/batches/"):
+            batch = server.batches[self.path.rsplit("/", 1)[1]]
+            server.complete(batch)
+            self._respond(batch)
+        elif self.path.startswith("/v1/files/"):
+            content = server.files[self.path.split("/")[3]].encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    def _respond(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def batch_server():
+    server = BatchServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _messages(text: str):
+    return [Message.from_text(text=text, role=Role.USER)]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_resolved_from_batches(batch_server):
+    llm = BatchLlm(
+        OpenAILikeLlm(api_base=batch_server.api_base, api_key="test-key", configuration=OpenAILikeConfiguration(model="fake-model")),
+        max_batch_size=3,
+        max_delay=0.05,
+        poll_interval=0.01,
+    )
+
+    chats = [llm.achat(messages=_messages(f"question {i}")) for i in range(4)]
+    labels = [llm.astructured_output(messages=_messages(f"item {i}"), constraint=PydanticModel(model=Label)) for i in range(2)]
+    responses = await asyncio.gather(*chats, *labels)
+
+    assert [response.message.content for response in responses[:4]] == [f"QUESTION {i}" for i in range(4)]
+    assert responses[4:] == [Label(label="ITEM 0"), Label(label="ITEM 1")]
+    assert responses[0].usage.total_tokens == 2
+    # Full batches are submitted at once, the rest after the delay.
+    assert batch_server.batch_sizes == [3, 3]
+    snapshot = llm.snapshot()
+    assert (snapshot["pending"], snapshot["submitted_batches"], snapshot["submitted_requests"]) == (0, 2, 6)
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_raise_without_failing_the_batch(batch_server):
+    llm = BatchLlm(
+        OpenAILikeLlm(api_base=batch_server.api_base, api_key="test-key"),
+        poll_interval=0.01,
+    )
+    ok = asyncio.ensure_future(llm.achat(messages=_messages("ok"), model="fake-model"))
+    failed = asyncio.ensure_future(llm.achat(messages=_messages("fail"), model="fake-model"))
+    await asyncio.sleep(0)
+    llm.flush()
+
+    assert (await ok).message.content == "OK"
+    with pytest.raises(ModelUnrecoverableError, match="invalid request"):
+        await failed
+    assert batch_server.batch_sizes == [2]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_cancelled_with_their_batch(batch_server):
+    llm = BatchLlm(
+        OpenAILikeLlm(api_base=batch_server.api_base, api_key="test-key"),
+        poll_interval=10.0,
+    )
+    request = asyncio.ensure_future(llm.achat(messages=_messages("ok"), model="fake-model"))
+    await asyncio.sleep(0)
+    llm.flush()
+    while llm.snapshot()["submitted_batches"] == 0:
+        await asyncio.sleep(0.01)
+
+    for task in list(llm._batch_tasks):
+        task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(request, timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_status_checks_are_retried_and_failures_expose_the_batch(batch_server):
+    wrapped = OpenAILikeLlm(api_base=batch_server.api_base, api_key="test-key")
+    wrapped.async_client = wrapped.async_client.with_options(max_retries=0)
+    llm = BatchLlm(wrapped, max_delay=0.0, poll_interval=0.01)
+
+    batch_server.retrieval_failures = [503]
+    assert (await llm.achat(messages=_messages("ok"), model="fake-model")).message.content == "OK"
+
+    batch_server.retrieval_failures = [404]
+    with pytest.raises(BatchRetrievalError) as exc_info:
+        await llm.achat(messages=_messages("lost"), model="fake-model")
+    assert exc_info.value.batch_id == "batch-1"
@@ -1,12 +1,17 @@
+import asyncio
 import pytest
 import os
 import httpx_aiohttp
 from types import SimpleNamespace
 
+from typing import List
+from pydantic import BaseModel
+
 from bridgic.core.model.types import *
-from bridgic.core.model import ModelRetryLimitError, ModelUnrecoverableError
+from bridgic.core.model.protocols import PydanticModel
+from bridgic.core.model import HedgingConfig, ModelRetryLimitError, ModelUnrecoverableError
 from bridgic.core.utils._console import printer
-from bridgic.llms.openai_like import OpenAILikeLlm
+from bridgic.llms.openai_like import AdaptiveConcurrencyConfig, OpenAILikeLlm, ToolCallStream
 
 _api_base = os.environ.get("OPENAI_LIKE_API_BASE")
 _api_key = os.environ.get("OPENAI_LIKE_API_KEY")
@@ -93,6 +98,149 @@ async def test_openai_like_achat_retry_limit_error(monkeypatch):
             model="test-model",
         )
 
+@pytest.mark.asyncio
+async def test_openai_like_achat_hedging(monkeypatch):
+    llm = OpenAILikeLlm(
+        api_base="http://test.local",
+        api_key="test-key",
+        hedging=HedgingConfig(delay=0.02, max_extra_ratio=1.0),
+    )
+    attempts = {"count": 0}
+
+    async def fake_create(**kwargs):
+        attempts["count"] += 1
+        if attempts["count"] == 1:
+            await asyncio.sleep(1.0)
+            return _mock_chat_completion("slow")
+        return _mock_chat_completion("hedged")
+
+    monkeypatch.setattr(llm.async_client.chat.completions, "create", fake_create)
+
+    response = await llm.achat(
+        messages=[Message.from_text(text="hello", role=Role.USER)],
+        model="test-model",
+    )
+    assert response.message.content == "hedged"
+    assert attempts["count"] == 2
+
+    loaded = OpenAILikeLlm.__new__(OpenAILikeLlm)
+    loaded.load_from_dict(llm.dump_to_dict())
+    assert loaded.hedger.config == llm.hedging
+
+@pytest.mark.asyncio
+async def test_openai_like_hedges_hold_their_own_concurrency_slots(monkeypatch):
+    llm = OpenAILikeLlm(
+        api_base="http://hedged-slots.local",
+        api_key="test-key",
+        hedging=HedgingConfig(delay=0.02, max_extra_ratio=1.0),
+        adaptive_concurrency=AdaptiveConcurrencyConfig(initial_limit=2, max_limit=2),
+    )
+    inflight = []
+
+    async def fake_create(**kwargs):
+        inflight.append(llm.concurrency_limiter.inflight)
+        if len(inflight) == 1:
+            await asyncio.sleep(1.0)
+            return _mock_chat_completion("slow")
+        return _mock_chat_completion("hedged")
+
+    monkeypatch.setattr(llm.async_client.chat.completions, "create", fake_create)
+
+    response = await llm.achat(
+        messages=[Message.from_text(text="hello", role=Role.USER)],
+        model="test-model",
+    )
+    assert response.message.content == "hedged"
+    # The hedge is counted as a second in-flight request.
+    assert inflight == [1, 2]
+    # Let the cancelled primary request release its slot.
+    await asyncio.sleep(0.01)
+    snapshot = llm.concurrency_limiter.snapshot()
+    assert snapshot["inflight"] == 0
+    # The latency of the slow primary request is observed along with the one of the hedge.
+    assert snapshot["decreases"] == 1
+
+
+def test_openai_like_shares_http_clients_on_demand():
+    config = {"limits": {"max_connections": 16, "keepalive_expiry": 30.0}, "share": True}
+    llm = OpenAILikeLlm(api_base="http://shared-pool.local", api_key="test-key", http_client_config=config)
+    other = OpenAILikeLlm(api_base="http://shared-pool.local", api_key="other-key", http_client_config=config)
+    assert llm.client._client is other.client._client
+    assert llm.async_client._client is other.async_client._client
+
+    # Instances recreated from a snapshot reuse the warm connections.
+    loaded = OpenAILikeLlm.__new__(OpenAILikeLlm)
+    loaded.load_from_dict(llm.dump_to_dict())
+    assert loaded.http_client_config == config
+    assert loaded.client._client is llm.client._client
+
+    # The instances do not share their clients unless they opt in.
+    assert OpenAILikeLlm(api_base="http://shared-pool.local", api_key="test-key").client._client is not llm.client._client
+    config = {"limits": {"max_connections": 16}}
+    llm = OpenAILikeLlm(api_base="http://shared-pool.local", api_key="test-key", http_client_config=config)
+    other = OpenAILikeLlm(api_base="http://shared-pool.local", api_key="test-key", http_client_config=config)
+    assert llm.client._client is not other.client._client
+    assert llm.client._client._transport._pool._max_connections == 16
+
+class PlanStep(BaseModel):
+    tool: str
+    argument: str
+
+
+class Plan(BaseModel):
+    thought: str
+    steps: List[PlanStep]
+
+
+@pytest.mark.asyncio
+async def test_openai_like_astream_structured_output(monkeypatch):
+    llm = OpenAILikeLlm(api_base="http://test.local", api_key="test-key")
+    text = '{"thought": "search first", "steps": [{"tool": "search", "argument": "a"}, {"tool": "read", "argument": "b"}]}'
+    requests = []
+    received = []
+
+    async def fake_stream():
+        for i in range(0, len(text), 5):
+            received.append(text[i:i + 5])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 5]))])
+
+    async def fake_create(**kwargs):
+        requests.append(kwargs)
+        return fake_stream()
+
+    monkeypatch.setattr(llm.async_client.chat.completions, "create", fake_create)
+
+    chunks = []
+    async for chunk in llm.astream_structured_output(
+        messages=[Message.from_text(text="plan", role=Role.USER)],
+        constraint=PydanticModel(model=Plan),
+        model="test-model",
+    ):
+        chunks.append((chunk, len("".join(received))))
+
+    assert requests[0]["stream"] is True
+    assert requests[0]["response_format"]["json_schema"]["schema"] == Plan.model_json_schema()
+    assert [chunk.path for chunk, _ in chunks] == [("steps", 0), ("steps", 1), ()]
+    # The first step is yielded before the rest of the output is generated.
+    first_step, received_length = chunks[0]
+    assert first_step.value == PlanStep(tool="search", argument="a")
+    assert received_length <= text.index('{"tool": "read"')
+    assert chunks[-1][0].value == Plan.model_validate_json(text)
+
+
+def test_tool_call_stream_reports_calls_as_their_arguments_close():
+    def fragment(index, name=None, arguments=None):
+        return SimpleNamespace(index=index, function=SimpleNamespace(name=name, arguments=arguments))
+
+    stream = ToolCallStream()
+    assert stream.feed([fragment(0, name="search", arguments='{"query": ')]) == []
+    [search] = stream.feed([fragment(0, arguments='"bridgic"}'), fragment(1, name="now")])
+    assert (search.name, search.arguments) == ("search", {"query": "bridgic"})
+    assert stream.feed(None) == []
+    [now] = stream.finish()
+    assert (now.name, now.arguments) == ("now", {})
+    assert search.id != now.id
+
 @pytest.fixture
 def llm():
     llm = OpenAILikeLlm(
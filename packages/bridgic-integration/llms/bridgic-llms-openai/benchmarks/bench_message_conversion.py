@@ -0,0 +1,82 @@
+"""
+Microbenchmark of the conversion of the conversation history and the tools on every call.
+
+It measures `OpenAILlm._build_parameters()` on an agent loop where a 200-message history
+and 50 tools are sent again on each turn with one new message, with the conversions
+memoized (the default) and recomputed on every call.
+
+Usage:
+    python benchmarks/bench_message_conversion.py [--iterations N]
+"""
+import argparse
+import time
+
+from typing import List
+
+from bridgic.core.model.types import Message, Tool, ToolCallBlock
+from bridgic.llms.openai import OpenAILlm
+
+
+def build_history(num_messages: int) -> List[Message]:
+    history = [Message.from_text("You are a helpful research assistant. " * 20, role="system")]
+    for i in range(num_messages - 1):
+        if i % 3 == 0:
+            history.append(Message.from_text(f"Question {i}: " + "please look this up. " * 10, role="user"))
+        elif i % 3 == 1:
+            history.append(Message(
+                role="assistant",
+                blocks=[ToolCallBlock(id=f"call_{i}", name="search", arguments={"query": f"topic {i}", "limit": 10})],
+            ))
+        else:
+            history.append(Message.from_tool_result(tool_id=f"call_{i - 1}", content="A search result. " * 30))
+    return history
+
+
+def build_tools(num_tools: int) -> List[Tool]:
+    return [
+        Tool(
+            name=f"tool_{i}",
+            description=f"Tool number {i}, which does something useful.",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "The query."},
+                    "limit": {"type": "integer", "description": "The maximum number of results."},
+                },
+                "required": ["query"],
+            },
+        )
+        for i in range(num_tools)
+    ]
+
+
+def measure(llm: OpenAILlm, history: List[Message], tools: List[Tool], iterations: int, memoized: bool) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        if not memoized:
+            llm._message_memo.clear()
+            llm._tool_memo.clear()
+        history[-1] = Message.from_text(f"New question {i}", role="user")
+        llm._build_parameters(messages=history, model="gpt-4o", tools=tools)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations: int) -> None:
+    llm = OpenAILlm(api_key="bench-key")
+    history = build_history(200)
+    tools = build_tools(50)
+
+    # Warm up.
+    measure(llm, history, tools, 10, memoized=True)
+
+    recomputed = measure(llm, history, tools, iterations, memoized=False)
+    memoized = measure(llm, history, tools, iterations, memoized=True)
+    print(f"{'history':>8} {'tools':>6} {'recomputed (us)':>16} {'memoized (us)':>14} {'speedup':>8}")
+    print(f"{len(history):>8} {len(tools):>6} {recomputed:>16.1f} {memoized:>14.1f} {recomputed / memoized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -2,7 +2,7 @@ import json
 import httpx
 import warnings
 
-from typing import List, Dict, Tuple, Optional, overload, Any, Union, Literal
+from typing import List, Dict, Tuple, Optional, overload, Any, Union, Literal, Callable, Awaitable
 from typing_extensions import override
 from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessageFunctionToolCall, ChatCompletionNamedToolChoiceParam, ChatCompletionToolChoiceOptionParam
 from openai.types.chat.chat_completion_message_tool_call_param import ChatCompletionMessageToolCallParam, Function
@@ -15,13 +15,14 @@ from openai.types.chat.chat_completion_user_message_param import ChatCompletionU
 from openai.types.chat.chat_completion_assistant_message_param import ChatCompletionAssistantMessageParam
 from openai.types.chat.chat_completion_tool_message_param import ChatCompletionToolMessageParam
 
-from bridgic.core.model import BaseLlm, RetryPolicyConfig, retryable_model_call
+from bridgic.core.model import BaseLlm, CircuitBreakerConfig, ConversionMemo, HedgingConfig, LlmMetricsRegistry, RateLimitConfig, CompiledConstraint, ConstraintCache, RequestHedger, RetryPolicyConfig, StructuredOutputStream, message_fingerprint, retryable_model_call, tool_fingerprint
 from bridgic.core.model.types import *
+from bridgic.core.config import HttpClientConfig, create_http_client_from_config, get_shared_http_client
 from bridgic.core.model.protocols import StructuredOutput, ToolSelection, PydanticModel, JsonSchema, Constraint
 from bridgic.core.utils._console import printer
 from bridgic.core.utils._collection import filter_dict, merge_dict, validate_required_params
 from bridgic.core.utils._tool_calling import generate_tool_id
-from bridgic.llms.openai_like import OpenAILikeConfiguration
+from bridgic.llms.openai_like import OpenAILikeConfiguration, ToolCallStream
 
 class OpenAIConfiguration(OpenAILikeConfiguration):
     """
@@ -45,9 +46,27 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
     timeout : Optional[float]
         Request timeout in seconds. If None, no timeout is applied.
     http_client : Optional[httpx.Client]
-        Custom synchronous HTTP client for requests. If None, creates a default client.
+        Custom synchronous HTTP client for requests. If None, uses a client created from
+        `http_client_config`.
     http_async_client : Optional[httpx.AsyncClient]
-        Custom asynchronous HTTP client for requests. If None, creates a default client.
+        Custom asynchronous HTTP client for requests. If None, uses a client created from
+        `http_client_config`.
+    http_client_config : Optional[HttpClientConfig]
+        The configuration (connection limits, keepalive, HTTP/2, ...) of the HTTP clients of the
+        instances that do not pass their own clients, kept on serialization. With `"share": True`,
+        the clients are shared process-wide by the instances of `api_base` with the same
+        configuration, so that they reuse warm connections. If None, the default clients of
+        the OpenAI SDK are used.
+    rate_limit : Optional[RateLimitConfig]
+        The client-side rate limits of the requests, shared by all the instances calling the
+        same model of the same endpoint. If None, requests are not limited.
+    circuit_breaker : Optional[CircuitBreakerConfig]
+        The circuit breaker of the requests, shared by all the instances calling the same
+        endpoint, which fails the requests fast while the endpoint is down. If None, requests
+        are always sent.
+    hedging : Optional[HedgingConfig]
+        The hedging policy of `achat` and `astructured_output`, which sends a second identical
+        request when the first one is slow, to cut tail latency. If None, requests are not hedged.
 
     Examples
     --------
@@ -88,9 +107,17 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
     timeout: float
     http_client: httpx.Client
     http_async_client: httpx.AsyncClient
+    http_client_config: Optional[HttpClientConfig]
+    rate_limit: Optional[RateLimitConfig]
+    circuit_breaker: Optional[CircuitBreakerConfig]
+    hedging: Optional[HedgingConfig]
 
     client: OpenAI
     async_client: AsyncOpenAI
+    hedger: Optional[RequestHedger]
+    _message_memo: ConversionMemo[ChatCompletionMessageParam]
+    _tool_memo: ConversionMemo[Dict[str, Any]]
+    _constraint_cache: ConstraintCache[Dict[str, Any]]
 
     def __init__(
         self,
@@ -100,6 +127,10 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         timeout: Optional[float] = None,
         http_client: Optional[httpx.Client] = None,
         http_async_client: Optional[httpx.AsyncClient] = None,
+        http_client_config: Optional[HttpClientConfig] = None,
+        rate_limit: Optional[RateLimitConfig] = None,
+        circuit_breaker: Optional[CircuitBreakerConfig] = None,
+        hedging: Optional[HedgingConfig] = None,
     ):
         """
         Initialize the OpenAI LLM client with configuration parameters.
@@ -115,9 +146,19 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         timeout : Optional[float]
             Request timeout in seconds. If None, no timeout is applied.
         http_client : Optional[httpx.Client]
-            Custom synchronous HTTP client for requests. If None, creates a default client.
+            Custom synchronous HTTP client for requests. If None, uses a client created from
+            `http_client_config`.
         http_async_client : Optional[httpx.AsyncClient]
-            Custom asynchronous HTTP client for requests. If None, creates a default client.
+            Custom asynchronous HTTP client for requests. If None, uses a client created from
+            `http_client_config`.
+        http_client_config : Optional[HttpClientConfig]
+            The configuration of the HTTP clients, which are shared with `"share": True`.
+        rate_limit : Optional[RateLimitConfig]
+            The client-side rate limits of the requests. If None, requests are not limited.
+        circuit_breaker : Optional[CircuitBreakerConfig]
+            The circuit breaker of the requests. If None, requests are always sent.
+        hedging : Optional[HedgingConfig]
+            The hedging policy of the asynchronous requests. If None, requests are not hedged.
         """
         # Record for serialization / deserialization.
         self.api_base = api_base
@@ -126,10 +167,15 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         self.timeout = timeout
         self.http_client = http_client
         self.http_async_client = http_async_client
+        self.http_client_config = http_client_config
+        self.rate_limit = rate_limit
+        self.circuit_breaker = circuit_breaker
+        self.hedging = hedging
 
         # Initialize clients.
-        self.client = OpenAI(base_url=api_base, api_key=api_key, timeout=timeout, http_client=http_client)
-        self.async_client = AsyncOpenAI(base_url=api_base, api_key=api_key, timeout=timeout, http_client=http_async_client)
+        self._create_clients()
+        self.hedger = RequestHedger(hedging) if hedging else None
+        self._create_conversion_memos()
 
     @retryable_model_call(RetryPolicyConfig())
     def chat(
@@ -203,7 +249,9 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for non-streaming chat completion
         validate_required_params(params, ["messages", "model"])
         
-        response: ChatCompletion = self.client.chat.completions.create(**params)
+        with LlmMetricsRegistry.read().track(params["model"], "chat") as call:
+            response: ChatCompletion = self.client.chat.completions.create(**params)
+            call.usage(self._extract_usage(response))
         return self._handle_chat_response(response)
 
     def stream(
@@ -281,12 +329,15 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for streaming chat completion
         validate_required_params(params, ["messages", "model", "stream"])
         
-        response: Stream[ChatCompletionChunk] = self.client.chat.completions.create(**params)
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                delta_content = chunk.choices[0].delta.content
-                delta_content = delta_content if delta_content else ""
-                yield MessageChunk(delta=delta_content, raw=chunk)
+        with LlmMetricsRegistry.read().track(params["model"], "stream") as call:
+            response: Stream[ChatCompletionChunk] = self.client.chat.completions.create(**params)
+            for chunk in response:
+                call.usage(self._extract_usage(chunk))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    call.first_token()
+                    delta_content = chunk.choices[0].delta.content
+                    delta_content = delta_content if delta_content else ""
+                    yield MessageChunk(delta=delta_content, raw=chunk)
 
     @retryable_model_call(RetryPolicyConfig())
     async def achat(
@@ -365,7 +416,13 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for non-streaming chat completion
         validate_required_params(params, ["messages", "model"])
         
-        response = await self.async_client.chat.completions.create(**params)
+        with LlmMetricsRegistry.read().track(params["model"], "achat") as call:
+            response = await self._ahedged(
+                lambda: self.async_client.chat.completions.create(**params),
+                params["model"],
+                "achat",
+            )
+            call.usage(self._extract_usage(response))
         return self._handle_chat_response(response)
 
     async def astream(
@@ -443,12 +500,15 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for streaming chat completion
         validate_required_params(params, ["messages", "model", "stream"])
         
-        response = await self.async_client.chat.completions.create(**params)
-        async for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                delta_content = chunk.choices[0].delta.content
-                delta_content = delta_content if delta_content else ""
-                yield MessageChunk(delta=delta_content, raw=chunk)
+        with LlmMetricsRegistry.read().track(params["model"], "astream") as call:
+            response = await self.async_client.chat.completions.create(**params)
+            async for chunk in response:
+                call.usage(self._extract_usage(chunk))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    call.first_token()
+                    delta_content = chunk.choices[0].delta.content
+                    delta_content = delta_content if delta_content else ""
+                    yield MessageChunk(delta=delta_content, raw=chunk)
 
     def _build_parameters(
         self,
@@ -468,10 +528,10 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         parallel_tool_calls: Optional[bool] = None,
         **kwargs,
     ) -> Dict[str, Any]:
-        msgs: List[ChatCompletionMessageParam] = [self._convert_chat_completions_message(msg) for msg in messages]
+        msgs: List[ChatCompletionMessageParam] = self._message_memo.convert_all(messages)
         
         # Handle tools parameter - convert to list if provided, otherwise use empty list
-        json_desc_tools = [self._convert_tool_to_json(tool) for tool in tools] if tools is not None else None
+        json_desc_tools = self._tool_memo.convert_all(tools) if tools is not None else None
         
         # Build parameters dictionary and filter out None values
         # The priority order is as follows: configuration passed through the interface > configuration of the instance itself.
@@ -516,23 +576,25 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         if openai_message.refusal:
             warnings.warn(openai_message.refusal, RuntimeWarning)
 
-        # Extract usage information
-        if hasattr(response, "usage") and response.usage is not None:
-            usage = TokenUsage(
-                model=response.model,
-                prompt_tokens=response.usage.prompt_tokens,
-                completion_tokens=response.usage.completion_tokens,
-                total_tokens=response.usage.total_tokens,
-            )
-        else:
-            usage = None
-
         return Response(
             message=Message.from_text(text, role=Role.AI),
-            usage=usage,
+            usage=self._extract_usage(response),
             raw=response,
         )
 
+    def _extract_usage(self, response: Union[ChatCompletion, ChatCompletionChunk]) -> Optional[TokenUsage]:
+        """
+        Extract token usage from a chat completion (or the last chunk of a stream), if available.
+        """
+        if getattr(response, "usage", None) is None:
+            return None
+        return TokenUsage(
+            model=response.model,
+            prompt_tokens=response.usage.prompt_tokens,
+            completion_tokens=response.usage.completion_tokens,
+            total_tokens=response.usage.total_tokens,
+        )
+
     def _convert_chat_completions_message(self, message: Message) -> ChatCompletionMessageParam:
         """
         Convert a Bridgic Message to OpenAI ChatCompletionMessageParam.
@@ -730,6 +792,7 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         - All schemas automatically have additionalProperties set to False
         - Best performance achieved with GPT-4o and later models (gpt-4o-mini, gpt-4o-2024-08-06, and later)
         """
+        compiled = self._get_compiled_constraint(constraint)
         params = self._build_parameters(
             messages=messages,
             model=model,
@@ -738,14 +801,16 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
             presence_penalty=presence_penalty,
             frequency_penalty=frequency_penalty,
             extra_body=extra_body,
-            response_format=self._get_response_format(constraint),
+            response_format=compiled.payload,
             **kwargs,
         )
         # Validate required parameters for structured output
         validate_required_params(params, ["messages", "model"])
         
-        response = self.client.chat.completions.parse(**params)
-        return self._convert_response(constraint, response.choices[0].message.content)
+        with LlmMetricsRegistry.read().track(params["model"], "structured_output") as call:
+            response = self.client.chat.completions.parse(**params)
+            call.usage(self._extract_usage(response))
+        return compiled.validate_json(response.choices[0].message.content)
 
     @overload
     def astructured_output(
@@ -853,6 +918,7 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         - Suitable for concurrent processing and high-throughput applications
         - Best performance achieved with GPT-4o and later models (gpt-4o-mini, gpt-4o-2024-08-06, and later)
         """
+        compiled = self._get_compiled_constraint(constraint)
         params = self._build_parameters(
             messages=messages,
             model=model,
@@ -861,14 +927,86 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
             presence_penalty=presence_penalty,
             frequency_penalty=frequency_penalty,
             extra_body=extra_body,
-            response_format=self._get_response_format(constraint),
+            response_format=compiled.payload,
             **kwargs,
         )
         # Validate required parameters for structured output
         validate_required_params(params, ["messages", "model"])
         
-        response = await self.async_client.chat.completions.parse(**params)
-        return self._convert_response(constraint, response.choices[0].message.content)
+        with LlmMetricsRegistry.read().track(params["model"], "astructured_output") as call:
+            response = await self._ahedged(
+                lambda: self.async_client.chat.completions.parse(**params),
+                params["model"],
+                "astructured_output",
+            )
+            call.usage(self._extract_usage(response))
+        return compiled.validate_json(response.choices[0].message.content)
+
+    async def astream_structured_output(
+        self,
+        messages: List[Message],
+        constraint: Union[PydanticModel, JsonSchema],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        presence_penalty: Optional[float] = None,
+        frequency_penalty: Optional[float] = None,
+        extra_body: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> AsyncStructuredStreamResponse:
+        """
+        Stream a structured output, yielding its parts as soon as they are generated.
+
+        The output is generated under the same strict schema as `astructured_output`, and
+        its JSON text is parsed incrementally as it is streamed: each element of an array
+        (e.g. each step of a plan) is yielded as soon as it is complete, so that it can be
+        acted upon while the model is still generating the rest.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            A list of messages comprising the conversation so far.
+        constraint : Union[PydanticModel, JsonSchema]
+            The constraint defining the desired output format.
+        model : str
+            Model ID used to generate the response.
+        temperature, top_p, presence_penalty, frequency_penalty, extra_body
+            See `astructured_output` for details.
+        **kwargs
+            Additional keyword arguments passed to the OpenAI API.
+
+        Yields
+        ------
+        StructuredOutputChunk
+            Each completed array element, with its path in the output and its value
+            validated against the item type declared by the constraint, then a last chunk
+            with an empty path and the whole output, as returned by `astructured_output`.
+
+        Examples
+        --------
+        ```python
+        async for chunk in llm.astream_structured_output(messages, PydanticModel(model=Plan)):
+            if chunk.path[:1] == ("steps",) and len(chunk.path) == 2:
+                start_step(chunk.value)
+            elif not chunk.path:
+                plan = chunk.value
+        ```
+        """
+        stream = StructuredOutputStream(constraint)
+        async for chunk in self.astream(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            top_p=top_p,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+            extra_body=extra_body,
+            response_format=self._get_response_format(constraint),
+            **kwargs,
+        ):
+            for output_chunk in stream.feed(chunk.delta):
+                yield output_chunk
+        yield stream.finish()
 
     def _adjust_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -902,9 +1040,76 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
 
         return schema
     
+    def build_request_parameters(
+        self,
+        messages: List[Message],
+        constraint: Optional[Constraint] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Build the parameters of a chat completion request without sending it, e.g. to send it
+        through the batch API.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            Conversation messages.
+        constraint : Optional[Constraint]
+            The format of the output, as for `astructured_output`. If None, the parameters are
+            the ones of `achat`.
+        **kwargs
+            The parameters of the request, as for `achat`.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The parameters of the request.
+        """
+        if constraint is not None:
+            kwargs.update(self._constrain_parameters(constraint, kwargs.pop("extra_body", None)))
+        return self._build_parameters(messages=messages, **kwargs)
+
+    def parse_structured_output(self, content: str, constraint: Constraint) -> Any:
+        """
+        Parse the content of a completion requested with the parameters of `build_request_parameters`
+        and a constraint.
+
+        Parameters
+        ----------
+        content : str
+            The content of the completion.
+        constraint : Constraint
+            The format of the output.
+
+        Returns
+        -------
+        Any
+            The output, as returned by `astructured_output`.
+        """
+        return self._get_compiled_constraint(constraint).validate_json(content)
+
+    def _get_compiled_constraint(self, constraint: Union[PydanticModel, JsonSchema]) -> CompiledConstraint[Dict[str, Any]]:
+        if not isinstance(constraint, (PydanticModel, JsonSchema)):
+            raise ValueError(f"Unsupported constraint type '{constraint.constraint_type}'. More info about OpenAI structured output: https://platform.openai.com/docs/guides/structured-outputs")
+        return self._constraint_cache.get(constraint)
+
     def _get_response_format(self, constraint: Union[PydanticModel, JsonSchema]) -> Dict[str, Any]:
+        return self._get_compiled_constraint(constraint).payload
+
+    def _constrain_parameters(
+        self,
+        constraint: Union[PydanticModel, JsonSchema],
+        extra_body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """The request parameters constraining the output to a JSON constraint."""
+        return {
+            "extra_body": extra_body,
+            "response_format": self._get_response_format(constraint),
+        }
+
+    def _compile_response_format(self, constraint: Union[PydanticModel, JsonSchema]) -> Dict[str, Any]:
         if isinstance(constraint, PydanticModel):
-            result = {
+            return {
                 "type": "json_schema",
                 "json_schema": {
                     "schema": self._adjust_schema(constraint.model.model_json_schema()),
@@ -912,31 +1117,22 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
                     "strict": True,
                 },
             }
-            return result
-        elif isinstance(constraint, JsonSchema):
-            return {
-                "type": "json_schema",
-                "json_schema": {
-                    "schema": self._adjust_schema(constraint.schema_dict),
-                    # default name for schema
-                    "name": "schema",
-                    "strict": True,
-                },
-            }
-        else:
-            raise ValueError(f"Unsupported constraint type '{constraint.constraint_type}'. More info about OpenAI structured output: https://platform.openai.com/docs/guides/structured-outputs")
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "schema": self._adjust_schema(constraint.schema_dict),
+                # default name for schema
+                "name": "schema",
+                "strict": True,
+            },
+        }
 
     def _convert_response(
         self,
         constraint: Union[PydanticModel, JsonSchema],
         content: str,
     ) -> Union[BaseModel, Dict[str, Any]]:
-        if isinstance(constraint, PydanticModel):
-            return constraint.model.model_validate_json(content)
-        elif isinstance(constraint, JsonSchema):
-            return json.loads(content)
-        else:
-            raise ValueError(f"Unsupported constraint type '{constraint.constraint_type}'. More info about OpenAI structured output: https://platform.openai.com/docs/guides/structured-outputs")
+        return self._get_compiled_constraint(constraint).validate_json(content)
 
     @retryable_model_call(RetryPolicyConfig())
     def select_tool(
@@ -1021,7 +1217,9 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for tool selection
         validate_required_params(params, ["messages", "model"])
         
-        response: ChatCompletion = self.client.chat.completions.create(**params)
+        with LlmMetricsRegistry.read().track(params["model"], "select_tool") as call:
+            response: ChatCompletion = self.client.chat.completions.create(**params)
+            call.usage(self._extract_usage(response))
         tool_calls = response.choices[0].message.tool_calls
         content = response.choices[0].message.content
         return (self._convert_tool_calls(tool_calls), content)
@@ -1110,11 +1308,89 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for tool selection
         validate_required_params(params, ["messages", "model"])
         
-        response: ChatCompletion = await self.async_client.chat.completions.create(**params)
+        with LlmMetricsRegistry.read().track(params["model"], "aselect_tool") as call:
+            response: ChatCompletion = await self.async_client.chat.completions.create(**params)
+            call.usage(self._extract_usage(response))
         tool_calls = response.choices[0].message.tool_calls
         content = response.choices[0].message.content
         return (self._convert_tool_calls(tool_calls), content)
 
+    @retryable_model_call(RetryPolicyConfig())
+    async def astream_select_tool(
+        self,
+        messages: List[Message],
+        tools: List[Tool],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        presence_penalty: Optional[float] = None,
+        frequency_penalty: Optional[float] = None,
+        extra_body: Optional[Dict[str, Any]] = None,
+        parallel_tool_calls: Optional[bool] = None,
+        tool_choice: Union[Literal["auto", "required", "none"], ChatCompletionNamedToolChoiceParam] = None,
+        **kwargs,
+    ) -> AsyncToolSelectionStreamResponse:
+        """
+        Select tools like `aselect_tool`, yielding each tool call as soon as it is generated.
+
+        The tool calls are streamed, and each one is yielded as soon as its arguments are
+        complete, so that its execution can start while the model is still generating the
+        following ones.
+
+        Parameters
+        ----------
+        messages : List[Message]
+            A list of messages comprising the conversation so far providing context for tool selection.
+        tools : List[Tool]
+            A list of tools the model may call.
+        model : str
+            Model ID used to generate the response. Function calling requires compatible models.
+        temperature, top_p, presence_penalty, frequency_penalty, extra_body, parallel_tool_calls, tool_choice
+            See `aselect_tool` for details.
+        **kwargs
+            Additional keyword arguments passed to the OpenAI API.
+
+        Yields
+        ------
+        Union[ToolCall, MessageChunk]
+            A `ToolCall` for each selected tool call, as soon as it is complete, and a
+            `MessageChunk` for each piece of the content of the message from the model.
+        """
+        params = self._build_parameters(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            top_p=top_p,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+            tools=tools,
+            tool_choice=tool_choice,
+            parallel_tool_calls=parallel_tool_calls,
+            extra_body=extra_body,
+            stream=True,
+            **kwargs,
+        )
+        # Validate required parameters for tool selection
+        validate_required_params(params, ["messages", "model", "stream"])
+
+        tool_call_stream = ToolCallStream()
+        with LlmMetricsRegistry.read().track(params["model"], "astream_select_tool") as call:
+            response = await self.async_client.chat.completions.create(**params)
+            async for chunk in response:
+                call.usage(self._extract_usage(chunk))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    call.first_token()
+                    yield MessageChunk(delta=delta.content, raw=chunk)
+                if delta.tool_calls:
+                    call.first_token()
+                    for tool_call in tool_call_stream.feed(delta.tool_calls):
+                        yield tool_call
+        for tool_call in tool_call_stream.finish():
+            yield tool_call
+
     def _convert_parameters(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "type": "object",
@@ -1149,6 +1425,10 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
             "api_key": self.api_key,
             "timeout": self.timeout,
             "configuration": self.configuration.model_dump(),
+            "http_client_config": self.http_client_config,
+            "rate_limit": self.rate_limit.model_dump() if self.rate_limit else None,
+            "circuit_breaker": self.circuit_breaker.model_dump() if self.circuit_breaker else None,
+            "hedging": self.hedging.model_dump() if self.hedging else None,
         }
         if self.http_client:
             warnings.warn(
@@ -1168,18 +1448,41 @@ class OpenAILlm(BaseLlm, StructuredOutput, ToolSelection):
         self.api_key = state_dict["api_key"]
         self.timeout = state_dict["timeout"]
         self.configuration = OpenAIConfiguration(**state_dict.get("configuration", {}))
+        rate_limit = state_dict.get("rate_limit")
+        self.rate_limit = RateLimitConfig(**rate_limit) if rate_limit else None
+        circuit_breaker = state_dict.get("circuit_breaker")
+        self.circuit_breaker = CircuitBreakerConfig(**circuit_breaker) if circuit_breaker else None
+        hedging = state_dict.get("hedging")
+        self.hedging = HedgingConfig(**hedging) if hedging else None
         self.http_client = None
         self.http_async_client = None
-
-        self.client = OpenAI(
-            base_url=self.api_base,
-            api_key=self.api_key,
-            timeout=self.timeout,
-            http_client=self.http_client,
-        )
-        self.async_client = AsyncOpenAI(
-            base_url=self.api_base,
-            api_key=self.api_key,
-            timeout=self.timeout,
-            http_client=self.http_async_client,
-        )
\ No newline at end of file
+        self.http_client_config = state_dict.get("http_client_config")
+
+        self._create_clients()
+        self.hedger = RequestHedger(self.hedging) if self.hedging else None
+        self._create_conversion_memos()
+
+    def _create_clients(self) -> None:
+        http_client = self.http_client or self._create_http_client(is_async=False)
+        http_async_client = self.http_async_client or self._create_http_client(is_async=True)
+        self.client = OpenAI(base_url=self.api_base, api_key=self.api_key, timeout=self.timeout, http_client=http_client)
+        self.async_client = AsyncOpenAI(base_url=self.api_base, api_key=self.api_key, timeout=self.timeout, http_client=http_async_client)
+
+    def _create_http_client(self, is_async: bool) -> Optional[Union[httpx.Client, httpx.AsyncClient]]:
+        if self.http_client_config and self.http_client_config.get("share"):
+            # The instances of the same endpoint opted in to share warm connections.
+            return get_shared_http_client(self.api_base, self.http_client_config, is_async=is_async)
+        return create_http_client_from_config(self.http_client_config, is_async=is_async)
+
+    def _create_conversion_memos(self) -> None:
+        # The history and the tools are mostly unchanged between the calls of an agent loop.
+        self._message_memo = ConversionMemo(self._convert_chat_completions_message, message_fingerprint)
+        self._tool_memo = ConversionMemo(self._convert_tool_to_json, tool_fingerprint)
+        # So are the output models of the structured outputs, whose schemas are compiled once.
+        self._constraint_cache = ConstraintCache(self._compile_response_format)
+
+    async def _ahedged(self, call: Callable[[], Awaitable[Any]], model: str, operation: str) -> Any:
+        # Send the request, hedged if a hedging policy is configured.
+        if self.hedger is None:
+            return await call()
+        return await self.hedger.run(call, model, operation)
@@ -210,6 +210,37 @@ def test_openai_structured_output_json_schema(llm):
     assert isinstance(response["thought"], str)
     assert isinstance(response["answer"], str)
 
+@pytest.mark.skipif(
+    (_api_key is None) or (_model_name is None),
+    reason="OPENAI_API_KEY or OPENAI_MODEL_NAME is not set",
+)
+@pytest.mark.asyncio
+async def test_openai_astream_structured_output(llm):
+    class Step(BaseModel):
+        city: str = Field(description="The name of the city.")
+        country: str = Field(description="The country of the city.")
+
+    class Trip(BaseModel):
+        steps: List[Step] = Field(description="The cities of the trip, in order.")
+
+    chunks = []
+    async for chunk in llm.astream_structured_output(
+        model=_model_name,
+        constraint=PydanticModel(model=Trip),
+        messages=[
+            Message.from_text(
+                text="Plan a trip through three European cities.",
+                role=Role.USER,
+            ),
+        ],
+    ):
+        chunks.append(chunk)
+    printer.print("\n" + str(chunks), color='purple')
+    trip = chunks[-1].value
+    assert chunks[-1].path == ()
+    assert len(trip.steps) >= 1
+    assert [chunk.value for chunk in chunks[:-1] if len(chunk.path) == 2] == trip.steps
+
 @pytest.mark.skipif(
     (_api_key is None) or (_model_name is None),
     reason="OPENAI_API_KEY or OPENAI_MODEL_NAME is not set",
@@ -6,10 +6,11 @@ from typing_extensions import override, overload
 from pydantic import BaseModel
 from openai.types.chat import ChatCompletionNamedToolChoiceParam, ChatCompletionMessageFunctionToolCall
 
-from bridgic.core.model import BaseLlm, RetryPolicyConfig, retryable_model_call
+from bridgic.core.model import BaseLlm, CircuitBreakerConfig, HedgingConfig, LlmMetricsRegistry, RateLimitConfig, RetryPolicyConfig, retryable_model_call
 from bridgic.core.model.types import *
+from bridgic.core.config import HttpClientConfig
 from bridgic.core.model.protocols import StructuredOutput, ToolSelection, PydanticModel, JsonSchema, Constraint, EbnfGrammar, Regex, Choice
-from bridgic.llms.openai_like import OpenAILikeLlm, OpenAILikeConfiguration
+from bridgic.llms.openai_like import OpenAILikeLlm, OpenAILikeConfiguration, AdaptiveConcurrencyConfig, ToolCallStream
 from bridgic.core.utils._console import printer
 from bridgic.core.utils._collection import validate_required_params, merge_dict, filter_dict
 from bridgic.core.utils._tool_calling import generate_tool_id
@@ -37,9 +38,31 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
     timeout: Optional[float]
         The timeout in seconds. If None, no timeout is applied.
     http_client : Optional[httpx.Client]
-        Custom synchronous HTTP client for requests. If None, creates a default client.
+        Custom synchronous HTTP client for requests. If None, uses a client created from
+        `http_client_config`.
     http_async_client : Optional[httpx.AsyncClient]
-        Custom asynchronous HTTP client for requests. If None, creates a default client.
+        Custom asynchronous HTTP client for requests. If None, uses a client created from
+        `http_client_config`.
+    http_client_config : Optional[HttpClientConfig]
+        The configuration (connection limits, keepalive, HTTP/2, ...) of the HTTP clients of the
+        instances that do not pass their own clients, kept on serialization. With `"share": True`,
+        the clients are shared process-wide by the instances of `api_base` with the same
+        configuration, so that they reuse warm connections. If None, the default clients of
+        the OpenAI SDK are used.
+    rate_limit : Optional[RateLimitConfig]
+        The client-side rate limits of the requests, shared by all the instances calling the
+        same model of the same server. If None, requests are not limited.
+    circuit_breaker : Optional[CircuitBreakerConfig]
+        The circuit breaker of the requests, shared by all the instances calling the same
+        server, which fails the requests fast while the server is down. If None, requests
+        are always sent.
+    adaptive_concurrency : Optional[AdaptiveConcurrencyConfig]
+        The adaptive control of the number of in-flight requests to the server, which keeps
+        them near the concurrency where the throughput of the server peaks. If None, the
+        number of in-flight requests is not limited.
+    hedging : Optional[HedgingConfig]
+        The hedging policy of `achat` (and thus `astructured_output`), which sends a second
+        identical request when the first one is slow. If None, requests are not hedged.
     """
 
     def __init__(
@@ -50,6 +73,11 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
         timeout: Optional[float] = None,
         http_client: Optional[httpx.Client] = None,
         http_async_client: Optional[httpx.AsyncClient] = None,
+        http_client_config: Optional[HttpClientConfig] = None,
+        rate_limit: Optional[RateLimitConfig] = None,
+        circuit_breaker: Optional[CircuitBreakerConfig] = None,
+        adaptive_concurrency: Optional[AdaptiveConcurrencyConfig] = None,
+        hedging: Optional[HedgingConfig] = None,
     ):
         super().__init__(
             api_base=api_base,
@@ -58,6 +86,11 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
             timeout=timeout,
             http_client=http_client,
             http_async_client=http_async_client,
+            http_client_config=http_client_config,
+            rate_limit=rate_limit,
+            circuit_breaker=circuit_breaker,
+            adaptive_concurrency=adaptive_concurrency,
+            hedging=hedging,
         )
 
     @override
@@ -276,10 +309,8 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
         extra_body = {} if extra_body is None else extra_body
         structured_outputs = extra_body.setdefault("structured_outputs", {})
 
-        if isinstance(constraint, PydanticModel):
-            structured_outputs["json"] = constraint.model.model_json_schema()
-        elif isinstance(constraint, JsonSchema):
-            structured_outputs["json"] = constraint.schema_dict
+        if isinstance(constraint, (PydanticModel, JsonSchema)):
+            structured_outputs["json"] = self._constraint_cache.get(constraint).payload
         elif isinstance(constraint, Regex):
             structured_outputs["regex"] = constraint.pattern
         elif isinstance(constraint, Choice):
@@ -291,18 +322,34 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
 
         return extra_body
 
+    @override
+    def parse_structured_output(self, content: str, constraint: Constraint) -> Any:
+        if isinstance(constraint, (PydanticModel, JsonSchema)):
+            return self._constraint_cache.get(constraint).validate_json(content)
+        return content
+
+    @override
+    def _constrain_parameters(
+        self,
+        constraint: Constraint,
+        extra_body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        # Streamed outputs are constrained like `astructured_output`, by vLLM structured outputs.
+        return {"extra_body": self._convert_constraint(constraint, extra_body)}
+
+    @override
+    def _compile_constraint(self, constraint: Union[PydanticModel, JsonSchema]) -> Dict[str, Any]:
+        # vLLM takes the bare JSON schema of the output.
+        if isinstance(constraint, PydanticModel):
+            return constraint.model.model_json_schema()
+        return constraint.schema_dict
+
     def _convert_response(
         self,
         constraint: Constraint,
         response: Response,
     ) -> Union[BaseModel, Dict[str, Any], str]:
-        content = response.message.content
-
-        if isinstance(constraint, PydanticModel):
-            return constraint.model.model_validate_json(content)
-        elif isinstance(constraint, JsonSchema):
-            return json.loads(content)
-        return content
+        return self.parse_structured_output(response.message.content, constraint)
 
     @retryable_model_call(RetryPolicyConfig())
     def select_tool(
@@ -379,7 +426,7 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for tool selection
         validate_required_params(params, ["model"])
         
-        input_messages = [self._convert_message(message=msg, strict=True) for msg in messages]
+        input_messages = self._strict_message_memo.convert_all(messages)
         input_tools = [
             {
                 "type": "function",
@@ -391,13 +438,15 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
             } for tool in tools
         ]
 
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=input_messages,
-            tools=input_tools,
-            tool_choice=tool_choice,
-            **kwargs,
-        )
+        with self._request_slot(), LlmMetricsRegistry.read().track(params["model"], "select_tool") as call:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=input_messages,
+                tools=input_tools,
+                tool_choice=tool_choice,
+                **kwargs,
+            )
+            call.usage(self._extract_usage(response, params["model"]))
         tool_calls = response.choices[0].message.tool_calls
 
         output_content = ""
@@ -485,7 +534,7 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
         # Validate required parameters for tool selection
         validate_required_params(params, ["model"])
         
-        input_messages = [self._convert_message(message=msg, strict=True) for msg in messages]
+        input_messages = self._strict_message_memo.convert_all(messages)
         input_tools = [
             {
                 "type": "function",
@@ -497,13 +546,16 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
             } for tool in tools
         ]
 
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=input_messages,
-            tools=input_tools,
-            tool_choice=tool_choice,
-            **kwargs,
-        )
+        async with self._arequest_slot():
+            with LlmMetricsRegistry.read().track(params["model"], "aselect_tool") as call:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=input_messages,
+                    tools=input_tools,
+                    tool_choice=tool_choice,
+                    **kwargs,
+                )
+                call.usage(self._extract_usage(response, params["model"]))
         tool_calls = response.choices[0].message.tool_calls
 
         output_content = ""
@@ -516,6 +568,95 @@ class VllmServerLlm(OpenAILikeLlm, StructuredOutput, ToolSelection):
 
         return (output_tool_calls, output_content)
 
+    @retryable_model_call(RetryPolicyConfig())
+    async def astream_select_tool(
+        self,
+        messages: List[Message],
+        tools: List[Tool],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        presence_penalty: Optional[float] = None,
+        frequency_penalty: Optional[float] = None,
+        extra_body: Optional[Dict[str, Any]] = None,
+        tool_choice: Union[Literal["auto", "required", "none"], ChatCompletionNamedToolChoiceParam] = "auto",
+        **kwargs,
+    ) -> AsyncToolSelectionStreamResponse:
+        """
+        Select tools like `aselect_tool`, yielding each tool call as soon as it is generated.
+
+        Parameters
+        ----------
+        messages: List[Message]
+            The messages to send to the LLM.
+        tools: List[Tool]
+            The tools to use for the tool select.
+        model: Optional[str]
+            The model to use for the tool select.
+        temperature, top_p, presence_penalty, frequency_penalty, extra_body, tool_choice
+            See `aselect_tool` for details.
+        **kwargs: Any
+            The kwargs to use for the tool select.
+
+        Yields
+        ------
+        Union[ToolCall, MessageChunk]
+            A `ToolCall` for each selected tool call, as soon as its arguments are complete,
+            and a `MessageChunk` for each piece of the content of the message from the model.
+
+        Notes
+        -----
+        The tool calls can only be streamed with a tool call parser of vLLM that supports
+        streaming (`--tool-call-parser`).
+        """
+        params = filter_dict(merge_dict(self.configuration.model_dump(), {
+            "model": model,
+            "temperature": temperature,
+            "top_p": top_p,
+            "presence_penalty": presence_penalty,
+            "frequency_penalty": frequency_penalty,
+            "extra_body": extra_body,
+            **kwargs,
+        }))
+        validate_required_params(params, ["model"])
+
+        input_messages = self._strict_message_memo.convert_all(messages)
+        input_tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.parameters,
+                },
+            } for tool in tools
+        ]
+
+        tool_call_stream = ToolCallStream()
+        async with self._arequest_slot():
+            with LlmMetricsRegistry.read().track(params["model"], "astream_select_tool") as call:
+                response = await self.async_client.chat.completions.create(
+                    messages=input_messages,
+                    tools=input_tools,
+                    tool_choice=tool_choice,
+                    stream=True,
+                    **params,
+                )
+                async for chunk in response:
+                    call.usage(self._extract_usage(chunk, params["model"]))
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        call.first_token()
+                        yield MessageChunk(delta=delta.content, raw=chunk)
+                    if delta.tool_calls:
+                        call.first_token()
+                        for tool_call in tool_call_stream.feed(delta.tool_calls):
+                            yield tool_call
+        for tool_call in tool_call_stream.finish():
+            yield tool_call
+
     def _convert_tool_calls(self, tool_calls: List[ChatCompletionMessageFunctionToolCall]) -> List[ToolCall]:
         return [
             ToolCall(
@@ -1,11 +1,14 @@
 """LangWatch tracing callback handler for Bridgic."""
 
 import json
+import time
 import warnings
 from contextvars import ContextVar
-from typing import Any, Dict, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import langwatch
+from opentelemetry import context as otel_context
+from opentelemetry import trace as otel_trace
 from langwatch.state import get_instance
 from langwatch.types import BaseAttributes
 from langwatch.telemetry.span import LangWatchSpan
@@ -14,16 +17,38 @@ from langwatch.domain import BaseAttributes
 
 from bridgic.core.automa import Automa
 from bridgic.core.automa.worker import Worker, WorkerCallback
+from bridgic.core.config import TracePayloadConfig
 from bridgic.core.utils._collection import serialize_data
+from bridgic.core.utils._trace_exporter import TraceExporter
 from bridgic.core.utils._worker_tracing import (
     build_worker_tracing_dict,
     get_worker_tracing_step_name,
+    get_trace_payload_config,
+    get_trace_sampling_config,
+    is_trace_sampled,
+    serialize_trace_arguments,
+    serialize_trace_payload,
 )
 
 # import logging
 
 # logging.getLogger("langwatch.client").setLevel(logging.WARNING)
 
+class _DeferredSpan:
+    """
+    A placeholder of a LangWatch span (or trace) whose creation is deferred to the exporter thread.
+    """
+    __slots__ = ("trace", "span", "start_time")
+
+    trace: Optional[LangWatchTrace]
+    span: Optional[LangWatchSpan]
+    start_time: int
+
+    def __init__(self):
+        self.trace = None
+        self.span = None
+        self.start_time = time.time_ns()
+
 class LangWatchTraceCallback(WorkerCallback):
     """
     LangWatch tracing callback handler for Bridgic.
@@ -43,38 +68,64 @@ class LangWatchTraceCallback(WorkerCallback):
         the `LANGWATCH_ENDPOINT` environment variable will be used. If that is not provided, the default value will be https://app.langwatch.ai.
     base_attributes : Optional[BaseAttributes], default=None
         The base attributes to use for the LangWatch tracing client.
+    background_export : bool, default=False
+        Whether to defer the creation of spans and the serialization of their inputs and outputs 
+        to the background thread of a `TraceExporter`. Only timestamps are recorded on the running 
+        event loop.
+    max_queue_size : int, default=2048
+        The maximum number of span events waiting to be exported in background export mode. When 
+        the exporter falls behind, events beyond it are dropped rather than buffered.
     
     Notes
     ------
     Since tracing requires the execution within an automa to establish the corresponding record root,
     only global configurations (via `GlobalSetting`) and automa-level configurations (via `RunningOptions`) will take effect. 
     In other words, if you set the callback by using `@worker` or `add_worker`, it will not work.
+
+    In background export mode, the worker spans are not set as the current LangWatch span while the 
+    workers are running, so spans created by LangWatch instrumentation inside a worker (e.g. LLM calls) 
+    will not be nested under the span of that worker.
+
+    The trace sampling and payload policies of `GlobalSetting` (or of the `RunningOptions` of the 
+    top-level automa) are honored. Runs under tail sampling are traced as in background export mode, 
+    with their span events held back until the run finishes and only exported if the run is kept.
     """
 
     _api_key: Optional[str]
     _endpoint_url: Optional[str]
     _base_attributes: BaseAttributes
+    _background_export: bool
+    _max_queue_size: int
     _is_ready: bool
+    _exporter: Optional[TraceExporter]
     _current_trace: ContextVar[Optional[LangWatchTrace]]
     _current_span_stack: ContextVar[Tuple[LangWatchSpan, ...]]
+    _tail_sampled_events: ContextVar[Optional[List[Callable[[], None]]]]
 
     def __init__(
         self,
         api_key: Optional[str] = None,
         endpoint_url: Optional[str] = None,
         base_attributes: Optional[BaseAttributes] = None,
+        background_export: bool = False,
+        max_queue_size: int = 2048,
     ):
         super().__init__()
         self._is_ready = False
         self._api_key = api_key
         self._endpoint_url = endpoint_url
         self._base_attributes = base_attributes
+        self._background_export = background_export
+        self._max_queue_size = max_queue_size
         self._current_trace = ContextVar(
             "langwatch_current_trace", default=None
         )
         self._current_span_stack = ContextVar(
             "langwatch_current_span_stack", default=()
         )
+        self._tail_sampled_events = ContextVar(
+            "langwatch_tail_sampled_events", default=None
+        )
         self._setup_langwatch()
 
     def _setup_langwatch(self) -> None:
@@ -90,6 +141,15 @@ class LangWatchTraceCallback(WorkerCallback):
         else:
             self._is_ready = True
 
+        self._exporter = None
+        if self._background_export:
+            # Ended spans are already batched by the OpenTelemetry span processor of LangWatch,
+            # so there is no need to flush after every batch of events.
+            self._exporter = TraceExporter(
+                max_queue_size=self._max_queue_size,
+                name="bridgic-langwatch-exporter",
+            )
+
     def _stringify_value(self, value: Any) -> str:
         """Serialize a value into a JSON string, falling back to str() when needed."""
         try:
@@ -178,13 +238,14 @@ class LangWatchTraceCallback(WorkerCallback):
         self,
         result: Any = None,
         error: Optional[Exception] = None,
+        payload_config: Optional[TracePayloadConfig] = None,
     ) -> Dict[str, Any]:
         """Create a normalized payload for either successful results or errors."""
         if error:
             return {"error_type": type(error).__name__, "error_message": str(error)}
         return {
             "result_type": type(result).__name__ if result is not None else None,
-            "result": serialize_data(result),
+            "result": serialize_trace_payload(result, payload_config or TracePayloadConfig()),
         }
 
     async def _start_worker_span(
@@ -203,7 +264,7 @@ class LangWatchTraceCallback(WorkerCallback):
             key: self._normalize_attribute_value(value)
             for key, value in worker_tracing_dict.items()
         }
-        serialized_args = serialize_data(arguments)
+        serialized_args = serialize_trace_arguments(arguments, get_trace_payload_config(parent))
 
         # LangWatch refers to span metadata as "attributes".
         span = langwatch.span(
@@ -220,8 +281,8 @@ class LangWatchTraceCallback(WorkerCallback):
         stack = self._current_span_stack.get()
         self._current_span_stack.set((*stack, span))
 
-    async def _start_top_level_trace(self, key: str, arguments: Optional[Dict[str, Any]]) -> None:
-        serialized_args = serialize_data(arguments)
+    async def _start_top_level_trace(self, key: str, automa: Automa, arguments: Optional[Dict[str, Any]]) -> None:
+        serialized_args = serialize_trace_arguments(arguments, get_trace_payload_config(automa))
         trace_metadata = {
             "created_from": "bridgic", 
             "key": key, 
@@ -236,6 +297,203 @@ class LangWatchTraceCallback(WorkerCallback):
         await trace_data.__aenter__()
         self._current_trace.set(trace_data)
 
+    def _submit_start(
+        self,
+        handle: _DeferredSpan,
+        parent_handle: Optional[_DeferredSpan],
+        build_span: Callable[[Optional[LangWatchTrace]], LangWatchSpan],
+    ) -> None:
+        """
+        Create the span on the exporter thread, under the span of `parent_handle` (if any).
+        """
+        def export_start() -> None:
+            if parent_handle is not None and parent_handle.span is None:
+                # The start event of the parent was dropped.
+                return
+            lw_trace = parent_handle.trace if parent_handle is not None else LangWatchTrace(skip_root_span=True)
+            if parent_handle is not None:
+                parent_context = otel_trace.set_span_in_context(parent_handle.span._span)
+            else:
+                parent_context = otel_context.Context()
+            # Attach and detach within this event, so that the contexts never interleave on the exporter thread.
+            token = otel_context.attach(parent_context)
+            try:
+                handle.trace = lw_trace
+                handle.span = build_span(lw_trace)
+            finally:
+                otel_context.detach(token)
+
+        self._dispatch(export_start)
+
+    def _submit_end(
+        self,
+        handle: _DeferredSpan,
+        payload_config: TracePayloadConfig,
+        result: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """
+        End the span on the exporter thread with the end time recorded on the event loop.
+        """
+        end_time = time.time_ns()
+
+        def export_end() -> None:
+            if handle.span is None:
+                # The start event of the span was dropped.
+                return
+            handle.span.end(
+                end_time=end_time,
+                output=self._build_output_payload(result=result, error=error, payload_config=payload_config),
+                error=error,
+            )
+
+        self._dispatch(export_end)
+
+    def _dispatch(self, event: Callable[[], None]) -> None:
+        """
+        Hold the span event back if the run is tail sampled, or hand it over to the exporter 
+        (if any) otherwise.
+        """
+        tail_sampled_events = self._tail_sampled_events.get()
+        if tail_sampled_events is not None:
+            tail_sampled_events.append(event)
+        elif self._exporter is not None:
+            self._exporter.submit(event)
+        else:
+            event()
+
+    def _is_deferred(self) -> bool:
+        return self._background_export or self._tail_sampled_events.get() is not None
+
+    def _start_deferred_top_level_trace(self, key: str, automa: Automa, arguments: Optional[Dict[str, Any]]) -> None:
+        handle = _DeferredSpan()
+        self._current_trace.set(handle)
+        start_time = handle.start_time
+        payload_config = get_trace_payload_config(automa)
+
+        def build_span(lw_trace: Optional[LangWatchTrace]) -> LangWatchSpan:
+            trace_metadata = {
+                "created_from": "bridgic",
+                "key": key,
+                "nesting_level": "0",
+            }
+            return LangWatchSpan(
+                trace=lw_trace,
+                name=key or "top_level_automa",
+                type="span",
+                input=serialize_trace_arguments(arguments, payload_config),
+                start_time=start_time,
+                attributes={
+                    "metadata": json.dumps(trace_metadata),
+                    "langwatch.origin": "application",
+                },
+            )
+
+        self._submit_start(handle, None, build_span)
+
+    def _start_deferred_worker_span(
+        self,
+        key: str,
+        worker: "Worker",
+        parent: Automa,
+        arguments: Optional[Dict[str, Any]],
+    ) -> None:
+        stack = self._current_span_stack.get()
+        parent_handle = stack[-1] if stack else self._current_trace.get()
+        if parent_handle is None:
+            warnings.warn("No active LangWatch trace found when starting worker span")
+            return
+
+        handle = _DeferredSpan()
+        self._current_span_stack.set((*stack, handle))
+        step_name = get_worker_tracing_step_name(key, worker)
+        worker_tracing_dict = build_worker_tracing_dict(worker, parent)
+        start_time = handle.start_time
+        payload_config = get_trace_payload_config(parent)
+
+        def build_span(lw_trace: Optional[LangWatchTrace]) -> LangWatchSpan:
+            normalized_worker_tracing = {
+                key: self._normalize_attribute_value(value)
+                for key, value in worker_tracing_dict.items()
+            }
+            return LangWatchSpan(
+                trace=lw_trace,
+                name=step_name,
+                type="span",
+                input=serialize_trace_arguments(arguments, payload_config),
+                start_time=start_time,
+                attributes={
+                    **normalized_worker_tracing,
+                    "nesting_level": str(worker_tracing_dict["nesting_level"]),
+                },
+            )
+
+        self._submit_start(handle, parent_handle, build_span)
+
+    def _complete_deferred_execution(
+        self,
+        is_top_level: bool,
+        parent: Optional[Automa],
+        result: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        payload_config = get_trace_payload_config(parent)
+        if is_top_level:
+            handle = self._current_trace.get()
+            if handle is None:
+                return
+            self._current_trace.set(None)
+            self._submit_end(handle, payload_config, result=result, error=error)
+            self._release_tail_sampled_events(handle, parent, failed=error is not None)
+            return
+
+        stack = self._current_span_stack.get()
+        if not stack:
+            warnings.warn(
+                "No active LangWatch span context found when finishing worker span"
+            )
+            return
+        handle = stack[-1]
+        self._current_span_stack.set(stack[:-1])
+        self._submit_end(handle, payload_config, result=result, error=error)
+
+    def _release_tail_sampled_events(self, handle: _DeferredSpan, automa: Optional[Automa], failed: bool) -> None:
+        """
+        Export the held back span events of a finished run if tail sampling keeps it, or discard them.
+        """
+        tail_sampled_events = self._tail_sampled_events.get()
+        if tail_sampled_events is None:
+            return
+        self._tail_sampled_events.set(None)
+        duration = (time.time_ns() - handle.start_time) / 1e9
+        if not get_trace_sampling_config(automa).should_keep(duration, failed=failed):
+            return
+        for event in tail_sampled_events:
+            self._dispatch(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all the span events are exported in background export mode, and then 
+        push the ended spans through the OpenTelemetry span processors.
+
+        Parameters
+        ----------
+        timeout : Optional[float], default=None
+            The maximum number of seconds to wait for the span events. Wait forever if None.
+
+        Returns
+        -------
+        bool
+            True if all the span events are exported in time; False otherwise.
+        """
+        is_flushed = True
+        if self._exporter is not None:
+            is_flushed = self._exporter.flush(timeout=timeout)
+        tracer_provider = otel_trace.get_tracer_provider()
+        if hasattr(tracer_provider, "force_flush"):
+            tracer_provider.force_flush()
+        return is_flushed
+
     def _get_worker_instance(self, key: str, parent: Optional[Automa]) -> Worker:
         """
         Get worker instance from parent automa.
@@ -274,11 +532,16 @@ class LangWatchTraceCallback(WorkerCallback):
         arguments : Optional[Dict[str, Any]], default=None
             Execution arguments with keys "args" and "kwargs".
         """
-        if not self._is_ready:
+        if not self._is_ready or not is_trace_sampled(parent):
             return
 
         if is_top_level:
-            await self._start_top_level_trace(key, arguments)
+            if get_trace_sampling_config(parent).tail_sampling:
+                self._tail_sampled_events.set([])
+            if self._is_deferred():
+                self._start_deferred_top_level_trace(key, parent, arguments)
+            else:
+                await self._start_top_level_trace(key, parent, arguments)
             return
 
         try:
@@ -287,7 +550,10 @@ class LangWatchTraceCallback(WorkerCallback):
             warnings.warn(f"Failed to get worker instance for key '{key}': {e}")
             return
 
-        await self._start_worker_span(key, worker, parent, arguments)
+        if self._is_deferred():
+            self._start_deferred_worker_span(key, worker, parent, arguments)
+        else:
+            await self._start_worker_span(key, worker, parent, arguments)
 
     async def _complete_worker_execution(
         self,
@@ -327,9 +593,12 @@ class LangWatchTraceCallback(WorkerCallback):
         result : Any, default=None
             Worker execution result.
         """
-        if not self._is_ready:
+        if not self._is_ready or not is_trace_sampled(parent):
+            return
+        if self._is_deferred():
+            self._complete_deferred_execution(is_top_level, parent, result=result)
             return
-        output = self._build_output_payload(result=result)
+        output = self._build_output_payload(result=result, payload_config=get_trace_payload_config(parent))
         await self._complete_worker_execution(output, is_top_level)
 
     async def on_worker_error(
@@ -364,7 +633,10 @@ class LangWatchTraceCallback(WorkerCallback):
         bool
             Always returns False, indicating the exception should not be suppressed.
         """
-        if not self._is_ready:
+        if not self._is_ready or not is_trace_sampled(parent):
+            return False
+        if self._is_deferred():
+            self._complete_deferred_execution(is_top_level, parent, error=error)
             return False
         output = self._build_output_payload(error=error)
         await self._complete_worker_execution(output, is_top_level, error=error)
@@ -375,6 +647,8 @@ class LangWatchTraceCallback(WorkerCallback):
         state_dict["api_key"] = self._api_key
         state_dict["endpoint_url"] = self._endpoint_url
         state_dict["base_attributes"] = self._base_attributes
+        state_dict["background_export"] = self._background_export
+        state_dict["max_queue_size"] = self._max_queue_size
         return state_dict
 
     def load_from_dict(self, state_dict: Dict[str, Any]) -> None:
@@ -382,11 +656,16 @@ class LangWatchTraceCallback(WorkerCallback):
         self._api_key = state_dict.get("api_key")
         self._endpoint_url = state_dict.get("endpoint_url")
         self._base_attributes = state_dict.get("base_attributes")
+        self._background_export = state_dict.get("background_export", False)
+        self._max_queue_size = state_dict.get("max_queue_size", 2048)
         self._current_trace = ContextVar(
             "langwatch_current_trace", default=None
         )
         self._current_span_stack = ContextVar(
             "langwatch_current_span_stack", default=()
         )
+        self._tail_sampled_events = ContextVar(
+            "langwatch_tail_sampled_events", default=None
+        )
         self._setup_langwatch()
 
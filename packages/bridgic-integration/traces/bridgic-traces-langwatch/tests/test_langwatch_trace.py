@@ -40,3 +40,126 @@ async def test_langwatch_trace_with_start_langwatch_trace():
     assert result == "hello world"
 
 
+
+
+@pytest.fixture
+def stub_langwatch_server():
+    """A local stub of the LangWatch OTLP endpoint, which accepts everything."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.server.received_paths.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.received_paths = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_langwatch_background_export_with_stub_server(stub_langwatch_server):
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from bridgic.core.automa import RunningOptions
+    from bridgic.core.automa.worker import WorkerCallbackBuilder
+
+    callback_builder = WorkerCallbackBuilder(
+        LangWatchTraceCallback,
+        init_kwargs={
+            "api_key": "stub-api-key",
+            "endpoint_url": f"http://127.0.0.1:{stub_langwatch_server.server_port}",
+            "background_export": True,
+        },
+    )
+    callback = callback_builder.build()
+    assert callback._is_ready
+
+    span_exporter = InMemorySpanExporter()
+    otel_trace.get_tracer_provider().add_span_processor(SimpleSpanProcessor(span_exporter))
+
+    class FastAutoma(GraphAutoma):
+        @worker(is_start=True)
+        async def step1(self):
+            return "hello"
+
+        @worker(dependencies=["step1"], is_output=True)
+        async def step2(self, step1: str):
+            return f"{step1} world"
+
+    automa = FastAutoma(name="fast_automa", running_options=RunningOptions(callback_builders=[callback_builder]))
+    result = await automa.arun()
+    assert result == "hello world"
+    assert callback.flush(timeout=10)
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    assert set(spans) == {"fast_automa", "step1", "step2"}
+    root = spans["fast_automa"]
+    assert root.parent is None
+    for name in ("step1", "step2"):
+        assert spans[name].parent.span_id == root.context.span_id
+        assert spans[name].context.trace_id == root.context.trace_id
+        assert spans[name].start_time >= root.start_time
+        assert spans[name].end_time <= root.end_time
+    assert "hello world" in root.attributes["langwatch.output"]
+    assert stub_langwatch_server.received_paths
+
+
+@pytest.mark.asyncio
+async def test_langwatch_tail_sampling_keeps_failed_runs_only(stub_langwatch_server):
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from bridgic.core.automa import RunningOptions
+    from bridgic.core.automa.worker import WorkerCallbackBuilder
+    from bridgic.core.config import TraceSamplingConfig, TracePayloadConfig
+
+    callback_builder = WorkerCallbackBuilder(
+        LangWatchTraceCallback,
+        init_kwargs={
+            "api_key": "stub-api-key-for-tail-sampling",
+            "endpoint_url": f"http://127.0.0.1:{stub_langwatch_server.server_port}",
+        },
+    )
+    callback = callback_builder.build()
+
+    span_exporter = InMemorySpanExporter()
+    otel_trace.get_tracer_provider().add_span_processor(SimpleSpanProcessor(span_exporter))
+
+    class MaybeFailingAutoma(GraphAutoma):
+        @worker(is_start=True, is_output=True)
+        async def step1(self, password: str, fail: bool = False):
+            if fail:
+                raise ValueError("failed on purpose")
+            return "done"
+
+    automa = MaybeFailingAutoma(name="tail_sampled_automa", running_options=RunningOptions(
+        callback_builders=[callback_builder],
+        trace_sampling=TraceSamplingConfig(tail_sampling=True),
+        trace_payload=TracePayloadConfig(redact_keys=["password"]),
+    ))
+    assert await automa.arun(password="secret") == "done"
+    assert callback.flush(timeout=10)
+    assert span_exporter.get_finished_spans() == ()
+
+    with pytest.raises(ValueError):
+        await automa.arun(password="secret", fail=True)
+    assert callback.flush(timeout=10)
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    assert set(spans) == {"tail_sampled_automa", "step1"}
+    assert spans["step1"].parent.span_id == spans["tail_sampled_automa"].context.span_id
+    assert "secret" not in spans["step1"].attributes["langwatch.input"]
+    assert "[REDACTED]" in spans["step1"].attributes["langwatch.input"]
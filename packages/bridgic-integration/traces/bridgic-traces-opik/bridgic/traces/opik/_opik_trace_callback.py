@@ -3,18 +3,33 @@
 import time
 import opik
 import warnings
+from contextvars import ContextVar
 from typing_extensions import override
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from opik import context_storage as opik_context_storage
 from opik.api_objects import helpers, opik_client, span, trace
 from opik.decorator import error_info_collector
-from opik.types import ErrorInfoDict
 
 from bridgic.core.automa import Automa
 from bridgic.core.automa.worker import WorkerCallback, Worker
-from bridgic.core.utils._collection import serialize_data, merge_optional_dicts
-from bridgic.core.utils._worker_tracing import build_worker_tracing_dict, get_worker_tracing_step_name
+from bridgic.core.config import TracePayloadConfig, TraceSamplingConfig
+from bridgic.core.utils._collection import merge_optional_dicts
+from bridgic.core.utils._trace_exporter import TraceExporter
+from bridgic.core.utils._worker_tracing import (
+    build_worker_tracing_dict,
+    get_worker_tracing_step_name,
+    get_trace_payload_config,
+    get_trace_sampling_config,
+    is_trace_sampled,
+    serialize_trace_arguments,
+    serialize_trace_payload,
+)
+
+# The export events of the current run held back by tail sampling, or None if the run is not tail sampled.
+_tail_sampled_events: ContextVar[Optional[List[Callable[[], None]]]] = ContextVar(
+    "bridgic_opik_tail_sampled_events", default=None
+)
 
 class OpikTraceCallback(WorkerCallback):
     """
@@ -37,6 +52,13 @@ class OpikTraceCallback(WorkerCallback):
         The API key for Opik. This parameter is ignored for local installations.
     use_local : bool, default=False
         Whether to use local Opik server.
+    background_export : bool, default=False
+        Whether to serialize the inputs and outputs of spans and report them to the Opik client
+        on the background thread of a `TraceExporter`. If False, they are reported on the running
+        event loop when the spans finish, and the Opik client is flushed when each trace completes.
+    max_queue_size : int, default=2048
+        The maximum number of span events waiting to be exported in background export mode. When
+        the Opik backend is too slow to keep up, events beyond it are dropped rather than buffered.
     
     Notes
     ------
@@ -44,6 +66,15 @@ class OpikTraceCallback(WorkerCallback):
     only global configurations (via `GlobalSetting`) and automa-level configurations (via `RunningOptions`) will take effect. 
     In other words, if you set the callback by using `@worker` or `add_worker`, it will not work.
 
+    Spans and traces are only opened and closed on the running event loop. In background export
+    mode, serializing their inputs and outputs, reporting them to the Opik client and flushing the
+    client all happen on the background thread of a `TraceExporter`. Call `flush()` to wait for
+    them to be sent.
+
+    The trace sampling and payload policies of `GlobalSetting` (or of the `RunningOptions` of the
+    top-level automa) are honored. Under tail sampling, the spans of a run are held back until the
+    run finishes and are only exported if the run is kept.
+
     Examples
     ------
     If you want to report tracking information to the self-hosted Opik service, you can initialize the callback instance like this:
@@ -63,7 +94,12 @@ class OpikTraceCallback(WorkerCallback):
     _api_key: Optional[str]
     _host: Optional[str]
     _use_local: bool
+    _background_export: bool
+    _max_queue_size: int
     _opik_client: opik_client.Opik
+    _exporter: TraceExporter
+    _pending_inputs: Dict[str, Dict[str, Tuple[Optional[Dict[str, Any]], TracePayloadConfig]]]
+    """Raw arguments of the running traces and spans (by trace id, then by id) and their payload policies, to be serialized when they are exported."""
 
     def __init__(
         self,
@@ -72,6 +108,8 @@ class OpikTraceCallback(WorkerCallback):
         host: Optional[str] = None,
         api_key: Optional[str] = None,
         use_local: bool = False,
+        background_export: bool = False,
+        max_queue_size: int = 2048,
     ):
         super().__init__()
         self._project_name = project_name
@@ -79,6 +117,8 @@ class OpikTraceCallback(WorkerCallback):
         self._api_key = api_key
         self._host = host
         self._use_local = use_local
+        self._background_export = background_export
+        self._max_queue_size = max_queue_size
         self._is_ready = False
         self._setup_opik()
 
@@ -86,6 +126,12 @@ class OpikTraceCallback(WorkerCallback):
         if self._use_local:
             opik.configure(use_local=True)
         self._opik_client = opik_client.Opik(_use_batching=True, project_name=self._project_name, workspace=self._workspace, api_key=self._api_key, host=self._host)
+        self._exporter = TraceExporter(
+            flush=self._opik_client.flush,
+            max_queue_size=self._max_queue_size,
+            name="bridgic-opik-exporter",
+        )
+        self._pending_inputs = {}
         missing_configuration, _ = self._opik_client._config.get_misconfiguration_detection_results()
         if missing_configuration:
             self._is_ready = False # for serialization compatibility
@@ -131,12 +177,15 @@ class OpikTraceCallback(WorkerCallback):
         trace_data = self._create_trace_data(trace_name)
         opik_context_storage.set_trace_data(trace_data)
         
-        if self._opik_client.config.log_start_trace_span:
-            self._opik_client.trace(**trace_data.as_start_parameters)
         return trace_data
 
-    def _complete_trace(self, output: Optional[Dict[str, Any]], error_info: Optional[ErrorInfoDict]) -> None:
-        """Finalize and log trace we own."""
+    def _complete_trace(
+        self,
+        result: Any = None,
+        error: Optional[Exception] = None,
+        sampling_config: Optional[TraceSamplingConfig] = None,
+    ) -> None:
+        """Finalize the trace we own and hand it over to the exporter."""
         trace_data = opik_context_storage.get_trace_data()
         if trace_data is None:
             return
@@ -152,21 +201,61 @@ class OpikTraceCallback(WorkerCallback):
                 {"execution_duration": end_time - start_time, "end_time": end_time}
             )
 
-        if output:
-            trace_data.update(output=output)
-
-        if error_info:
-            trace_data.update(error_info=error_info)
-
-        self._opik_client.trace(**trace_data.as_parameters)
         opik_context_storage.pop_trace_data(ensure_id=trace_data.id)
-        self._flush()
+        # Drop the inputs of the spans of the trace that never finished along with the trace.
+        pending_inputs = self._pending_inputs.pop(trace_data.id, {})
+        arguments, payload_config = pending_inputs.get(trace_data.id, (None, TracePayloadConfig()))
+
+        def export_trace() -> None:
+            serialized_args = serialize_trace_arguments(arguments, payload_config)
+            if serialized_args:
+                trace_data.update(input=serialized_args)
+            output = self._build_output_payload(result=result, error=error, payload_config=payload_config)
+            if output:
+                trace_data.update(output=output)
+            error_info = error_info_collector.collect(error) if error else None
+            if error_info:
+                trace_data.update(error_info=error_info)
+            self._opik_client.trace(**trace_data.as_parameters)
+
+        self._submit(export_trace)
+
+        tail_sampled_events = _tail_sampled_events.get()
+        if tail_sampled_events is not None:
+            _tail_sampled_events.set(None)
+            duration = (trace_data.metadata or {}).get("execution_duration", 0.0)
+            if sampling_config is None or sampling_config.should_keep(duration, failed=error is not None):
+                for event in tail_sampled_events:
+                    self._export(event)
+
+        if not self._background_export:
+            # The trace is sent before the run returns.
+            self._flush_client()
+
+    def _submit(self, event: Callable[[], None]) -> None:
+        """Export an event, or hold it back if the run is tail sampled."""
+        tail_sampled_events = _tail_sampled_events.get()
+        if tail_sampled_events is not None:
+            tail_sampled_events.append(event)
+        else:
+            self._export(event)
+
+    def _export(self, event: Callable[[], None]) -> None:
+        """Hand an export event over to the exporter, or run it right away if background export is disabled."""
+        if self._background_export:
+            self._exporter.submit(event)
+            return
+        try:
+            event()
+        except Exception as e:
+            warnings.warn(f"Failed to export trace event to Opik: {e}")
 
     def _start_span(
         self,
         step_name: str,
-        inputs: Optional[Dict[str, Any]] = None,
+        arguments: Optional[Dict[str, Any]] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        payload_config: Optional[TracePayloadConfig] = None,
     ) -> None:
         """Start a span for a worker execution step and push it to context."""
         trace_data = opik_context_storage.get_trace_data()
@@ -183,7 +272,6 @@ class OpikTraceCallback(WorkerCallback):
             trace_id=trace_data.id,
             name=step_name,
             parent_span_id=parent_span.id if parent_span else None,
-            input=inputs,
             metadata=metadata,
             project_name=project_name,
         )
@@ -193,41 +281,77 @@ class OpikTraceCallback(WorkerCallback):
             span_data.update(metadata=metadata)
         # Add span to context stack
         opik_context_storage.add_span_data(span_data)
+        payload_config = payload_config or TracePayloadConfig()
+        self._pending_inputs.setdefault(trace_data.id, {})[span_data.id] = (arguments, payload_config)
 
         if self._opik_client.config.log_start_trace_span:
-            self._opik_client.span(**span_data.as_start_parameters)
+            self._submit_start(span_data.as_start_parameters, arguments, payload_config, self._opik_client.span)
+
+    def _submit_start(
+        self,
+        start_parameters: Dict[str, Any],
+        arguments: Optional[Dict[str, Any]],
+        payload_config: TracePayloadConfig,
+        log: Any,
+    ) -> None:
+        """Report the start of a trace or span lazily, serializing its input on the exporter thread."""
+        def export_start() -> None:
+            serialized_args = serialize_trace_arguments(arguments, payload_config)
+            if serialized_args:
+                start_parameters["input"] = serialized_args
+            log(**start_parameters)
 
-    def _finish_span(self, span_data: span.SpanData, worker_metadata: Optional[Dict[str, Any]] = None) -> None:
-        """Finish a worker span with metadata and output, then pop from context."""
+        self._submit(export_start)
+
+    def _finish_span(
+        self,
+        span_data: span.SpanData,
+        result: Any = None,
+        error: Optional[Exception] = None,
+        worker_metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Finish a worker span with metadata, pop it from context and hand it over to the exporter."""
         if worker_metadata:
-            output = worker_metadata.get("output")
-            # Merge all metadata except 'output' into span metadata
-            current_metadata = span_data.metadata or {}
-            current_metadata.update({k: v for k, v in worker_metadata.items() if k != "output"})
-            span_data.update(metadata=current_metadata)
-            
-            if output is not None:
-                span_data.update(output=output)
+            # Merge into a new metadata dict, which may still be read by a pending start event.
+            span_data.update(metadata=worker_metadata)
 
         span_data.init_end_time()
-        self._opik_client.span(**span_data.as_parameters)
         
         # Pop span from context stack
         opik_context_storage.pop_span_data(ensure_id=span_data.id)
+        arguments, payload_config = self._pending_inputs.get(span_data.trace_id, {}).pop(span_data.id, (None, TracePayloadConfig()))
 
-    def _start_top_level_trace(self, key: str, arguments: Optional[Dict[str, Any]]) -> None:
+        def export_span() -> None:
+            serialized_args = serialize_trace_arguments(arguments, payload_config)
+            if serialized_args is not None:
+                span_data.update(input=serialized_args)
+            output = self._build_output_payload(result=result, error=error, payload_config=payload_config)
+            if output is not None:
+                span_data.update(output=output)
+            error_info = error_info_collector.collect(error) if error else None
+            if error_info:
+                span_data.update(error_info=error_info)
+            self._opik_client.span(**span_data.as_parameters)
+
+        self._submit(export_span)
+
+    def _start_top_level_trace(self, key: str, automa: Automa, arguments: Optional[Dict[str, Any]]) -> None:
         """Start trace initialization for top-level automa."""
+        payload_config = get_trace_payload_config(automa)
+        if get_trace_sampling_config(automa).tail_sampling:
+            _tail_sampled_events.set([])
+        is_new_trace = opik_context_storage.get_trace_data() is None
         trace_data = self._get_or_create_trace_data(trace_name=key or "top_level_automa")
         
-        serialized_args = serialize_data(arguments)
         metadata_updates = {"key": key, "nesting_level": 0}
         if trace_data.start_time:
             metadata_updates["start_time"] = trace_data.start_time.timestamp()
         
         trace_data.metadata = merge_optional_dicts(trace_data.metadata, metadata_updates)
-        
-        if serialized_args:
-            trace_data.input = serialized_args
+        self._pending_inputs.setdefault(trace_data.id, {})[trace_data.id] = (arguments, payload_config)
+
+        if is_new_trace and self._opik_client.config.log_start_trace_span:
+            self._submit_start(trace_data.as_start_parameters, arguments, payload_config, self._opik_client.trace)
 
     def _start_worker_span(self, key: str, worker: Worker, parent: Automa, arguments: Optional[Dict[str, Any]]) -> None:
         """Start a span for worker execution."""
@@ -235,8 +359,9 @@ class OpikTraceCallback(WorkerCallback):
         worker_tracing_dict = build_worker_tracing_dict(worker, parent)
         self._start_span(
             step_name=step_name,
-            inputs=serialize_data(arguments),
+            arguments=arguments,
             metadata=worker_tracing_dict,
+            payload_config=get_trace_payload_config(parent),
         )
 
     async def on_worker_start(
@@ -264,10 +389,10 @@ class OpikTraceCallback(WorkerCallback):
         arguments : Optional[Dict[str, Any]], default=None
             Execution arguments with keys "args" and "kwargs".
         """
-        if not self._is_ready:
+        if not self._is_ready or not is_trace_sampled(parent):
             return
         if is_top_level:
-            self._start_top_level_trace(key, arguments)
+            self._start_top_level_trace(key, parent, arguments)
             return
 
         try:
@@ -278,7 +403,11 @@ class OpikTraceCallback(WorkerCallback):
 
         self._start_worker_span(key, worker, parent, arguments)
 
-    def _finish_current_span(self, output: Dict[str, Any], error: Optional[Exception] = None) -> None:
+    def _finish_current_span(
+        self,
+        result: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
         """Finish the current span and pop it from context."""
         current_span = opik_context_storage.top_span_data()
         if not current_span:
@@ -289,32 +418,41 @@ class OpikTraceCallback(WorkerCallback):
         end_time = time.time()
         start_time = current_span.start_time.timestamp() if current_span.start_time else end_time
         
-        # Build worker metadata with timing and output
+        # Build worker metadata with timing
         worker_metadata = {
             "end_time": end_time,
             "execution_duration": end_time - start_time,
-            "output": serialize_data(output),
         }
         
-        # Handle error if present
-        if error:
-            error_info = error_info_collector.collect(error)
-            if error_info:
-                current_span.update(error_info=error_info)
-        
         # Finish the span (this will merge metadata and pop from context)
-        self._finish_span(current_span, worker_metadata=worker_metadata)
+        self._finish_span(
+            current_span,
+            result=result,
+            error=error,
+            worker_metadata=worker_metadata,
+        )
 
-    def _build_output_payload(self, result: Any = None, error: Optional[Exception] = None) -> Dict[str, Any]:
+    def _build_output_payload(
+        self,
+        result: Any = None,
+        error: Optional[Exception] = None,
+        payload_config: Optional[TracePayloadConfig] = None,
+    ) -> Dict[str, Any]:
         """Build a standardized output dictionary for results or errors."""
         if error:
             return {"error_type": type(error).__name__, "error_message": str(error)}
         return {
             "result_type": type(result).__name__ if result is not None else None,
-            "result": serialize_data(result),
+            "result": serialize_trace_payload(result, payload_config or TracePayloadConfig()),
         }
 
-    def _complete_worker_execution(self, output: Dict[str, Any], is_top_level: bool, error: Optional[Exception] = None) -> None:
+    def _complete_worker_execution(
+        self,
+        is_top_level: bool,
+        parent: Optional[Automa] = None,
+        result: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
         """Complete worker or trace execution."""
         if is_top_level:
             trace_data = opik_context_storage.get_trace_data()
@@ -324,10 +462,9 @@ class OpikTraceCallback(WorkerCallback):
                     trace_data.metadata, {"execution_status": execution_status}
                 )
             
-            error_info = error_info_collector.collect(error) if error else None
-            self._complete_trace(output, error_info)
+            self._complete_trace(result=result, error=error, sampling_config=get_trace_sampling_config(parent))
         else:
-            self._finish_current_span(output=output, error=error)
+            self._finish_current_span(result=result, error=error)
 
     async def on_worker_end(
         self,
@@ -356,10 +493,9 @@ class OpikTraceCallback(WorkerCallback):
         result : Any, default=None
             Worker execution result.
         """
-        if not self._is_ready:
+        if not self._is_ready or not is_trace_sampled(parent):
             return
-        output = self._build_output_payload(result=result)
-        self._complete_worker_execution(output, is_top_level)
+        self._complete_worker_execution(is_top_level, parent, result=result)
 
     async def on_worker_error(
         self,
@@ -393,7 +529,7 @@ class OpikTraceCallback(WorkerCallback):
         bool
             Always returns False, indicating the exception should not be suppressed.
         """
-        if not self._is_ready:
+        if not self._is_ready or not is_trace_sampled(parent):
             return False
         if not is_top_level and parent:
             try:
@@ -402,12 +538,33 @@ class OpikTraceCallback(WorkerCallback):
                 warnings.warn(f"Failed to get worker instance for key '{key}': {e}")
                 return False
 
-        output = self._build_output_payload(error=error)
-        self._complete_worker_execution(output, is_top_level, error=error)
+        self._complete_worker_execution(is_top_level, parent, error=error)
         return False
 
-    def _flush(self) -> None:
-        self._opik_client.flush()
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all finished spans and traces are exported and the Opik client is flushed.
+
+        Parameters
+        ----------
+        timeout : Optional[float], default=None
+            The maximum number of seconds to wait. Wait forever if None.
+
+        Returns
+        -------
+        bool
+            True if everything is exported in time; False otherwise.
+        """
+        if not self._background_export:
+            self._flush_client()
+            return True
+        return self._exporter.flush(timeout=timeout)
+
+    def _flush_client(self) -> None:
+        try:
+            self._opik_client.flush()
+        except Exception as e:
+            warnings.warn(f"Failed to flush trace events to Opik: {e}")
 
     @override
     def dump_to_dict(self) -> Dict[str, Any]:
@@ -417,6 +574,8 @@ class OpikTraceCallback(WorkerCallback):
         state_dict["api_key"] = self._api_key
         state_dict["host"] = self._host
         state_dict["use_local"] = self._use_local
+        state_dict["background_export"] = self._background_export
+        state_dict["max_queue_size"] = self._max_queue_size
         return state_dict
 
     @override
@@ -427,5 +586,7 @@ class OpikTraceCallback(WorkerCallback):
         self._api_key = state_dict["api_key"]
         self._host = state_dict["host"]
         self._use_local = state_dict["use_local"]
+        self._background_export = state_dict.get("background_export", False)
+        self._max_queue_size = state_dict.get("max_queue_size", 2048)
         self._setup_opik() # if opik is not ready, it will be set to False
 
@@ -40,3 +40,168 @@ async def test_opik_trace_with_start_opik_trace():
     assert result == "hello world"
 
 
+
+
+class FakeOpikClient:
+    """A stand-in of the Opik client that records the reported traces and spans."""
+
+    def __init__(self):
+        import threading
+        from types import SimpleNamespace
+
+        self.config = SimpleNamespace(log_start_trace_span=False)
+        self.traces = []
+        self.spans = []
+        self.report_threads = set()
+        self.flush_count = 0
+        self._threading = threading
+
+    def trace(self, **trace_parameters):
+        self.report_threads.add(self._threading.current_thread())
+        self.traces.append(trace_parameters)
+
+    def span(self, **span_parameters):
+        self.report_threads.add(self._threading.current_thread())
+        self.spans.append(span_parameters)
+
+    def flush(self):
+        self.flush_count += 1
+
+
+@pytest.mark.asyncio
+async def test_opik_trace_exported_in_background():
+    import threading
+    from bridgic.core.utils._trace_exporter import TraceExporter
+
+    with pytest.warns(UserWarning, match="auth check failed"):
+        callback = OpikTraceCallback(project_name="test-project", host="http://127.0.0.1:9", api_key="fake-key", background_export=True)
+    fake_client = FakeOpikClient()
+    callback._opik_client = fake_client
+    callback._exporter = TraceExporter(flush=fake_client.flush)
+    callback._is_ready = True
+
+    class FastAutoma(GraphAutoma):
+        @worker(is_start=True)
+        async def step1(self, name: str):
+            return "hello"
+
+        @worker(dependencies=["step1"], is_output=True)
+        async def step2(self, step1: str):
+            return f"{step1} world"
+
+    from bridgic.core.automa import RunningOptions
+    from bridgic.core.automa.worker import WorkerCallbackBuilder
+
+    class CallbackBuilder(WorkerCallbackBuilder):
+        def build(self):
+            return callback
+
+    automa = FastAutoma(name="fast_automa", running_options=RunningOptions(callback_builders=[CallbackBuilder(OpikTraceCallback)]))
+    result = await automa.arun(name="bridgic")
+    assert result == "hello world"
+    assert callback.flush(timeout=10)
+
+    # Nothing is reported on the event loop thread.
+    assert threading.current_thread() not in fake_client.report_threads
+    assert fake_client.flush_count >= 1
+
+    assert len(fake_client.traces) == 1
+    trace = fake_client.traces[0]
+    assert trace["input"]["kwargs"] == {"name": "bridgic"}
+    assert trace["output"]["result"] == "hello world"
+    assert trace["metadata"]["execution_status"] == "completed"
+
+    spans = {span["name"]: span for span in fake_client.spans}
+    assert set(spans) == {"step1", "step2"}
+    assert spans["step2"]["output"]["result"] == "hello world"
+    assert spans["step1"]["trace_id"] == trace["id"]
+    assert "execution_duration" in spans["step1"]["metadata"]
+    assert callback._pending_inputs == {}
+
+
+@pytest.mark.asyncio
+async def test_opik_trace_exported_inline_without_background_export():
+    import threading
+    from bridgic.core.automa import RunningOptions
+    from bridgic.core.automa.worker import WorkerCallbackBuilder
+
+    with pytest.warns(UserWarning, match="auth check failed"):
+        callback = OpikTraceCallback(project_name="test-project", host="http://127.0.0.1:9", api_key="fake-key", background_export=False)
+    fake_client = FakeOpikClient()
+    callback._opik_client = fake_client
+    callback._is_ready = True
+
+    class CallbackBuilder(WorkerCallbackBuilder):
+        def build(self):
+            return callback
+
+    automa = MyAutoma(running_options=RunningOptions(callback_builders=[CallbackBuilder(OpikTraceCallback)]))
+    result = await automa.arun()
+    assert result == "hello world"
+
+    # Everything is reported on the event loop thread before the run returns.
+    assert fake_client.report_threads == {threading.current_thread()}
+    assert len(fake_client.traces) == 1
+    assert len(fake_client.spans) == 2
+    assert fake_client.flush_count == 1
+    assert callback.flush()
+    assert fake_client.flush_count == 2
+
+
+@pytest.mark.asyncio
+async def test_opik_trace_honors_sampling_and_payload_policies():
+    from bridgic.core.automa import RunningOptions
+    from bridgic.core.automa.worker import WorkerCallbackBuilder
+    from bridgic.core.config import TraceSamplingConfig, TracePayloadConfig
+    from bridgic.core.utils._trace_exporter import TraceExporter
+
+    with pytest.warns(UserWarning, match="auth check failed"):
+        callback = OpikTraceCallback(project_name="test-project", host="http://127.0.0.1:9", api_key="fake-key", background_export=True)
+    fake_client = FakeOpikClient()
+    callback._opik_client = fake_client
+    callback._exporter = TraceExporter(flush=fake_client.flush)
+    callback._is_ready = True
+
+    class CallbackBuilder(WorkerCallbackBuilder):
+        def build(self):
+            return callback
+
+    class MaybeFailingAutoma(GraphAutoma):
+        @worker(is_start=True, is_output=True)
+        async def step1(self, text: str, api_key: str, fail: bool = False):
+            if fail:
+                raise ValueError("failed on purpose")
+            return text
+
+    def create_automa(**running_options):
+        return MaybeFailingAutoma(running_options=RunningOptions(
+            callback_builders=[CallbackBuilder(OpikTraceCallback)],
+            **running_options,
+        ))
+
+    # Head sampling: no run is traced.
+    automa = create_automa(trace_sampling=TraceSamplingConfig(head_sample_rate=0.0))
+    await automa.arun(text="hello", api_key="secret")
+    assert callback.flush(timeout=10)
+    assert fake_client.traces == [] and fake_client.spans == []
+
+    # Tail sampling: only the failed run is exported.
+    automa = create_automa(trace_sampling=TraceSamplingConfig(tail_sampling=True))
+    await automa.arun(text="hello", api_key="secret")
+    with pytest.raises(ValueError):
+        await automa.arun(text="hello", api_key="secret", fail=True)
+    assert callback.flush(timeout=10)
+    assert len(fake_client.traces) == 1
+    assert fake_client.traces[0]["metadata"]["execution_status"] == "failed"
+    assert [span["name"] for span in fake_client.spans] == ["step1"]
+
+    # Payload policy: arguments are redacted and truncated.
+    fake_client.traces.clear()
+    fake_client.spans.clear()
+    automa = create_automa(trace_payload=TracePayloadConfig(max_bytes=10, redact_keys=["api_key"]))
+    await automa.arun(text="x" * 100, api_key="secret")
+    assert callback.flush(timeout=10)
+    span_input = fake_client.spans[0]["input"]
+    assert span_input["kwargs"]["api_key"] == "[REDACTED]"
+    assert span_input["kwargs"]["text"] == "x" * 10 + "...[truncated 90 bytes]"
+    assert fake_client.spans[0]["output"]["result"] == "x" * 10 + "...[truncated 90 bytes]"